@@ -1,14 +1,18 @@
+import json
 import uuid
 from datetime import datetime
 from synapse.infra.time_utc import now_utc, isoformat_z
 import time
-from typing import List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
 
 from buyer.schemas import ProductSchema, BuyerDecisionSchema, Decision
 from buyer.scoring_rules import ScoringRules
 from infra.metrics_collector import metrics_collector
 from infra.logging_config import get_logger
 
+if TYPE_CHECKING:
+    from synapse.catalog.delta import DeltaState
+
 logger = get_logger(__name__)
 
 
@@ -17,8 +21,16 @@ class BuyerBlock:
         self.scoring_rules = ScoringRules()
         self.metrics = metrics_collector
 
-    def evaluate_batch(self, products: List[ProductSchema]) -> List[BuyerDecisionSchema]:
-        """Evaluate a batch of products"""
+    def evaluate_batch(
+        self,
+        products: List[ProductSchema],
+        delta_state: Optional["DeltaState"] = None,
+    ) -> List[BuyerDecisionSchema]:
+        """Evaluate a batch of products.
+
+        With ``delta_state`` only new/changed products are re-evaluated; the
+        rest reuse the decision stored for the same product fingerprint.
+        """
         logger.info(
             "Starting batch evaluation",
             extra={
@@ -29,36 +41,18 @@ class BuyerBlock:
             },
         )
 
-        decisions: List[BuyerDecisionSchema] = []
+        decisions = self._evaluate_all(products, delta_state)
         approved_count = 0
         rejected_count = 0
         needs_review_count = 0
 
-        for product in products:
-            try:
-                decision = self.evaluate_product(product)
-                decisions.append(decision)
-
-                if decision.decision == Decision.APPROVED:
-                    approved_count += 1
-                elif decision.decision == Decision.REJECTED:
-                    rejected_count += 1
-                else:
-                    needs_review_count += 1
-
-            except Exception as e:  # noqa: BLE001
-                logger.error(
-                    "Error evaluating product",
-                    extra={
-                        "extra_data": {
-                            "product_id": product.product_id,
-                            "error": str(e),
-                            "operation": "evaluate_product",
-                        }
-                    },
-                )
-                decisions.append(self._create_error_decision(product, str(e)))
+        for decision in decisions:
+            if decision.decision == Decision.APPROVED:
+                approved_count += 1
+            elif decision.decision == Decision.REJECTED:
                 rejected_count += 1
+            else:
+                needs_review_count += 1
 
         self.metrics.increment_counter(
             "buyer_products_processed_total", value=len(products)
@@ -88,6 +82,64 @@ class BuyerBlock:
 
         return decisions
 
+    def _evaluate_safe(self, product: ProductSchema) -> BuyerDecisionSchema:
+        try:
+            return self.evaluate_product(product)
+        except Exception as e:  # noqa: BLE001
+            logger.error(
+                "Error evaluating product",
+                extra={
+                    "extra_data": {
+                        "product_id": product.product_id,
+                        "error": str(e),
+                        "operation": "evaluate_product",
+                    }
+                },
+            )
+            return self._create_error_decision(product, str(e))
+
+    def _evaluate_all(
+        self, products: List[ProductSchema], delta_state: Optional["DeltaState"]
+    ) -> List[BuyerDecisionSchema]:
+        if delta_state is None:
+            return [self._evaluate_safe(p) for p in products]
+
+        from synapse.catalog.delta import row_fingerprint
+
+        # las reglas entran al fingerprint: cambiar umbrales invalida el cache
+        rules = self.scoring_rules
+        salt = json.dumps(
+            {
+                "min_margin": rules.min_margin,
+                "min_trust": rules.min_trust,
+                "suspicious_price_ratio_low": rules.suspicious_price_ratio_low,
+                "suspicious_price_ratio_high": rules.suspicious_price_ratio_high,
+            },
+            sort_keys=True,
+        )
+        by_id: Dict[str, ProductSchema] = {}
+        for p in products:
+            by_id.setdefault(p.product_id, p)
+
+        results, _ = delta_state.run_stage(
+            "buyer_block",
+            by_id,
+            lambda items: [self._evaluate_safe(p) for p in items],
+            fingerprint=lambda p: row_fingerprint(
+                p.model_dump(mode="json", exclude={"created_at", "updated_at"}),
+                salt=salt,
+            ),
+            encode=lambda d: d.model_dump(mode="json"),
+            decode=BuyerDecisionSchema.model_validate,
+            cacheable=lambda d: d.model_used != "error_fallback",
+        )
+        # product_id repetido: solo la primera fila usa el cache, el resto se
+        # evalua aparte (pueden traer precios distintos)
+        return [
+            results[p.product_id] if by_id[p.product_id] is p else self._evaluate_safe(p)
+            for p in products
+        ]
+
     def evaluate_product(self, product: ProductSchema) -> BuyerDecisionSchema:
         """Evaluate a single product"""
         start_time = time.perf_counter()
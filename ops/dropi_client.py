@@ -3,6 +3,7 @@ from infra.network_guard import enforce_url_policy
 
 import json
 import os
+import threading
 import time
 from dataclasses import dataclass
 from typing import Any, Dict, Optional, Tuple
@@ -10,6 +11,8 @@ from typing import Any, Dict, Optional, Tuple
 import urllib.request
 import urllib.error
 
+from synapse.infra.http_pool import install_pooled_transport
+
 @dataclass
 class DropiClientConfig:
     base_url: str
@@ -18,6 +21,29 @@ class DropiClientConfig:
     rate_limit_s: float = 0.25
     user_agent: str = "SYNAPSE-MVS/1.0"
 
+class DropiHTTPError(RuntimeError):
+    """HTTP error from Dropi; keeps status + Retry-After for callers that back off."""
+
+    def __init__(self, status: int, body: str, retry_after_s: Optional[float] = None) -> None:
+        super().__init__(f"Dropi HTTPError {status}: {body[:300]}")
+        self.status = int(status)
+        self.retry_after_s = retry_after_s
+
+    @property
+    def retryable(self) -> bool:
+        return self.status == 429 or self.status >= 500
+
+
+class DropiTransportError(RuntimeError):
+    """Connection-level failure (DNS, reset, timeout). Always retryable."""
+
+
+def _parse_retry_after(v: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(v)) if v else None
+    except (TypeError, ValueError):
+        return None
+
 class DropiClient:
     """Minimal HTTP client for Dropi Integrations API.
     Sends both `dropi-integration-key` and the frequently seen typo `dropi-integracion-key`.
@@ -26,16 +52,18 @@ class DropiClient:
     def __init__(self, cfg: DropiClientConfig) -> None:
         self.cfg = cfg.rstrip_slashes()
         self._last_call = 0.0
+        self._throttle_lock = threading.Lock()
 
     def _throttle(self) -> None:
         gap = self.cfg.rate_limit_s
         if gap <= 0:
             return
-        now = time.time()
-        wait = (self._last_call + gap) - now
-        if wait > 0:
-            time.sleep(wait)
-        self._last_call = time.time()
+        with self._throttle_lock:
+            now = time.time()
+            wait = (self._last_call + gap) - now
+            if wait > 0:
+                time.sleep(wait)
+            self._last_call = time.time()
 
     def _headers(self) -> Dict[str, str]:
         # Dual key header for compatibility.
@@ -66,6 +94,7 @@ class DropiClient:
         return self._do(req)
 
     def _do(self, req: urllib.request.Request) -> Dict[str, Any]:
+        install_pooled_transport()
         try:
             with urllib.request.urlopen(req, timeout=self.cfg.timeout_s) as resp:
                 raw = resp.read().decode("utf-8", errors="replace")
@@ -74,9 +103,10 @@ class DropiClient:
                 return json.loads(raw)
         except urllib.error.HTTPError as e:
             raw = e.read().decode("utf-8", errors="replace")
-            raise RuntimeError(f"Dropi HTTPError {e.code}: {raw[:300]}")
+            retry_after = _parse_retry_after(e.headers.get("Retry-After") if e.headers else None)
+            raise DropiHTTPError(e.code, raw, retry_after)
         except urllib.error.URLError as e:
-            raise RuntimeError(f"Dropi URLError: {e}")
+            raise DropiTransportError(f"Dropi URLError: {e}")
         except Exception as e:
             raise RuntimeError(f"Dropi error: {e}")
 
@@ -64,6 +64,8 @@ class FinderArgs:
     top_n: int = 5
     output_dir: str = "data/catalog/dropi"
     evidence_path: str = "evidence/launch_candidates_dropi.json"
+    concurrency: int = 1          # >1: snapshot concurrente + reanudable (ops.dropi_snapshotter)
+    rate_per_s: float = 4.0       # token bucket compartido (solo con concurrency>1)
 
 def _normalize_product(p: Dict[str, Any]) -> Dict[str, Any]:
     # Best-effort normalization based on common Dropi fields.
@@ -184,6 +186,34 @@ class DropiProductFinder:
         ndjson_path = os.path.join(daydir, f"catalog_{ts}.ndjson")
         manifest_path = os.path.join(daydir, f"manifest_{ts}.json")
 
+        if int(args.concurrency or 1) > 1:
+            ndjson_path, count = self._snapshot_concurrent(client, args, daydir, ndjson_path)
+        else:
+            count = self._snapshot_sequential(client, args, ndjson_path)
+        sha = _sha256_file(ndjson_path)
+
+        manifest = {
+            "source": "dropi",
+            "created_utc": ts,
+            "count": count,
+            "sha256": sha,
+            "page_size": args.page_size,
+            "max_products": args.max_products,
+            "filters": {
+                "categories": args.categories or [],
+                "min_images": args.min_images,
+                "min_margin_pct_proxy": str(args.min_margin_pct),
+            },
+        }
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.ledger.emit("CATALOG_SNAPSHOT_CREATED", {"ndjson_path": ndjson_path, "manifest_path": manifest_path, "sha256": sha, "count": count})
+        return ndjson_path, manifest_path, count
+
+    def _snapshot_sequential(self, client: DropiClient, args: FinderArgs, ndjson_path: str) -> int:
         start = 0
         got = 0
         rows: List[Dict[str, Any]] = []
@@ -206,29 +236,27 @@ class DropiProductFinder:
             got = len(rows)
             start += int(args.page_size)
 
-        count = _ndjson_write(ndjson_path, rows)
-        sha = _sha256_file(ndjson_path)
+        return _ndjson_write(ndjson_path, rows)
 
-        manifest = {
-            "source": "dropi",
-            "created_utc": ts,
-            "count": count,
-            "sha256": sha,
-            "page_size": args.page_size,
-            "max_products": args.max_products,
-            "filters": {
-                "categories": args.categories or [],
-                "min_images": args.min_images,
-                "min_margin_pct_proxy": str(args.min_margin_pct),
-            },
-        }
-        with open(manifest_path, "w", encoding="utf-8") as f:
-            json.dump(manifest, f, ensure_ascii=False, indent=2)
-            f.flush()
-            os.fsync(f.fileno())
+    def _snapshot_concurrent(self, client: DropiClient, args: FinderArgs, daydir: str, ndjson_path: str) -> Tuple[str, int]:
+        from ops.dropi_snapshotter import DropiCatalogSnapshotter, SnapshotConfig, load_checkpoint
 
-        self.ledger.emit("CATALOG_SNAPSHOT_CREATED", {"ndjson_path": ndjson_path, "manifest_path": manifest_path, "sha256": sha, "count": count})
-        return ndjson_path, manifest_path, count
+        # un snapshot interrumpido del dia se reanuda sobre su mismo NDJSON
+        ck_path = os.path.join(daydir, "snapshot.checkpoint.json")
+        ck = load_checkpoint(ck_path)
+        if ck is not None and not ck.complete and ck.page_size == int(args.page_size):
+            ndjson_path = ck.ndjson_path
+
+        cfg = SnapshotConfig(
+            page_size=int(args.page_size),
+            max_products=int(args.max_products),
+            concurrency=int(args.concurrency),
+            rate_per_s=float(args.rate_per_s),
+            burst=int(args.concurrency),
+        )
+        res = DropiCatalogSnapshotter(client, cfg, normalize=_normalize_product).run(ndjson_path, checkpoint_path=ck_path)
+        os.remove(ck_path)
+        return res.ndjson_path, res.count
 
     def shortlist(self, ndjson_path: str, args: FinderArgs) -> List[Dict[str, Any]]:
         # Stream read NDJSON
@@ -271,6 +299,8 @@ class DropiProductFinder:
 
 def run(args: FinderArgs) -> Dict[str, Any]:
     cfg = _cfg_from_env()
+    if int(args.concurrency or 1) > 1:
+        cfg.rate_limit_s = 0.0  # el token bucket del snapshotter controla el rate
     client = DropiClient(cfg)
     finder = DropiProductFinder()
 
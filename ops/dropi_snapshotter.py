@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+# ops/dropi_snapshotter.py
+# Snapshot concurrente + reanudable del catalogo Dropi (/products/index).
+#
+# - N paginas en vuelo (ThreadPool), todas bajo un TokenBucket compartido
+# - 429/5xx/red: backoff exponencial por request + el bucket baja el rate (AIMD)
+# - escritura NDJSON en orden de pagina, por lotes (un fsync por lote)
+# - checkpoint tras cada lote: {pages_done, bytes, rows, end_page}; al reanudar
+#   se trunca el NDJSON al ultimo lote confirmado y se sigue desde ahi
+#
+# Solo stdlib. El cliente HTTP sigue siendo ops.dropi_client.DropiClient
+# (enforce_url_policy incluido); usar rate_limit_s=0 ahi: el bucket manda.
+
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from ops.dropi_client import DropiHTTPError, DropiTransportError
+
+
+class TokenBucket:
+    """
+    Token bucket thread-safe con rate adaptativo.
+
+    - acquire(): bloquea hasta tener 1 token
+    - on_throttled(): rate *= 0.5 (piso min_rate) + pausa global opcional (Retry-After)
+    - on_success(): rate += 5% del maximo (recuperacion aditiva)
+    """
+
+    def __init__(
+        self,
+        rate_per_s: float,
+        burst: int = 1,
+        *,
+        min_rate_per_s: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate_per_s <= 0:
+            raise ValueError("rate_per_s must be > 0")
+        self.max_rate = float(rate_per_s)
+        self.min_rate = float(min_rate_per_s) if min_rate_per_s else self.max_rate / 16.0
+        self.rate = self.max_rate
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                if now < self._paused_until:
+                    wait_s = self._paused_until - now
+                elif self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                else:
+                    wait_s = (1.0 - self._tokens) / self.rate
+            self._sleep(wait_s)
+
+    def on_throttled(self, retry_after_s: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after_s:
+                self._paused_until = max(self._paused_until, self._clock() + float(retry_after_s))
+
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+
+@dataclass
+class SnapshotConfig:
+    page_size: int = 50
+    max_products: int = 5000
+    concurrency: int = 4
+    rate_per_s: float = 4.0  # == rate_limit_s=0.25 del cliente secuencial
+    burst: int = 4
+    max_retries: int = 5
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 30.0
+    flush_every_pages: int = 10
+
+
+@dataclass
+class SnapshotCheckpoint:
+    ndjson_path: str
+    page_size: int
+    pages_done: int = 0       # paginas [0, pages_done) ya escritas y fsync'd
+    bytes: int = 0            # tamano del NDJSON en ese punto
+    rows: int = 0
+    end_page: Optional[int] = None  # primera pagina fuera del catalogo (si ya se vio)
+    complete: bool = False
+
+
+@dataclass
+class SnapshotResult:
+    ndjson_path: str
+    count: int
+    pages: int
+    resumed_from_page: int
+    retries: int
+    complete: bool
+
+
+def load_checkpoint(path: Optional[str]) -> Optional[SnapshotCheckpoint]:
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        return SnapshotCheckpoint(**raw)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _write_checkpoint(path: Optional[str], ck: SnapshotCheckpoint) -> None:
+    if not path:
+        return
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(asdict(ck), f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _identity(p: Dict[str, Any]) -> Dict[str, Any]:
+    return p
+
+
+class DropiCatalogSnapshotter:
+    def __init__(
+        self,
+        client: Any,
+        cfg: Optional[SnapshotConfig] = None,
+        *,
+        bucket: Optional[TokenBucket] = None,
+        normalize: Callable[[Dict[str, Any]], Dict[str, Any]] = _identity,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.client = client
+        self.cfg = cfg or SnapshotConfig()
+        self.bucket = bucket or TokenBucket(self.cfg.rate_per_s, self.cfg.burst, sleep=sleep)
+        self.normalize = normalize
+        self._sleep = sleep
+        self._retries = 0
+        self._retries_lock = threading.Lock()
+
+    def _body(self, page: int) -> Dict[str, Any]:
+        return {
+            "pageSize": int(self.cfg.page_size),
+            "startData": int(page) * int(self.cfg.page_size),
+            "no_count": True,
+            "order_by": "id",
+            "order_type": "asc",
+        }
+
+    def _fetch_page(self, page: int) -> List[Dict[str, Any]]:
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                resp = self.client.post("/products/index", self._body(page))
+            except (DropiHTTPError, DropiTransportError) as e:
+                retryable = isinstance(e, DropiTransportError) or e.retryable
+                attempt += 1
+                if not retryable or attempt > self.cfg.max_retries:
+                    raise
+                retry_after = getattr(e, "retry_after_s", None)
+                self.bucket.on_throttled(retry_after)
+                with self._retries_lock:
+                    self._retries += 1
+                delay = min(self.cfg.backoff_max_s, self.cfg.backoff_base_s * (2 ** (attempt - 1)))
+                self._sleep(max(retry_after or 0.0, delay * (0.7 + random.random() * 0.6)))
+                continue
+            self.bucket.on_success()
+            objects = resp.get("objects") if isinstance(resp, dict) else None
+            return list(objects) if isinstance(objects, list) else []
+
+    def run(self, ndjson_path: str, *, checkpoint_path: Optional[str] = None) -> SnapshotResult:
+        cfg = self.cfg
+        ck = load_checkpoint(checkpoint_path)
+        if ck is None or ck.ndjson_path != ndjson_path or ck.page_size != cfg.page_size:
+            ck = SnapshotCheckpoint(ndjson_path=ndjson_path, page_size=cfg.page_size)
+        resumed_from = ck.pages_done
+        max_pages = int(math.ceil(cfg.max_products / float(cfg.page_size))) if cfg.max_products > 0 else 0
+
+        d = os.path.dirname(ndjson_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        mode = "r+b" if (ck.pages_done > 0 and os.path.exists(ndjson_path)) else "wb"
+        if mode == "wb":
+            ck.pages_done, ck.bytes, ck.rows, ck.end_page, ck.complete = 0, 0, 0, None, False
+
+        def limit() -> int:
+            return max_pages if ck.end_page is None else min(max_pages, ck.end_page)
+
+        with open(ndjson_path, mode) as out:
+            out.truncate(ck.bytes)  # descarta escrituras posteriores al ultimo checkpoint
+            out.seek(ck.bytes)
+
+            done: Dict[int, List[Dict[str, Any]]] = {}
+            since_flush = 0
+
+            def flush() -> None:
+                out.flush()
+                os.fsync(out.fileno())
+                ck.bytes = out.tell()
+                _write_checkpoint(checkpoint_path, ck)
+
+            with ThreadPoolExecutor(max_workers=max(1, cfg.concurrency)) as ex:
+                inflight: Dict[Future, int] = {}
+                next_page = ck.pages_done
+                try:
+                    while True:
+                        while len(inflight) < max(1, cfg.concurrency) and next_page < limit():
+                            inflight[ex.submit(self._fetch_page, next_page)] = next_page
+                            next_page += 1
+                        if not inflight:
+                            break
+
+                        finished, _ = wait(list(inflight), return_when=FIRST_COMPLETED)
+                        for fut in finished:
+                            page = inflight.pop(fut)
+                            objects = fut.result()
+                            if len(objects) < cfg.page_size:
+                                end = page if not objects else page + 1
+                                ck.end_page = end if ck.end_page is None else min(ck.end_page, end)
+                            done[page] = objects
+
+                        # escribir el prefijo contiguo en orden de pagina
+                        while ck.pages_done in done and ck.pages_done < limit():
+                            buf = "".join(
+                                json.dumps(self.normalize(p), ensure_ascii=False, separators=(",", ":")) + "\n"
+                                for p in done.pop(ck.pages_done)
+                            )
+                            out.write(buf.encode("utf-8"))
+                            ck.rows += buf.count("\n")
+                            ck.pages_done += 1
+                            since_flush += 1
+                        if since_flush >= max(1, cfg.flush_every_pages):
+                            flush()
+                            since_flush = 0
+                except BaseException:
+                    for fut in inflight:
+                        fut.cancel()
+                    flush()  # lo ya escrito queda confirmado para reanudar
+                    raise
+
+            ck.complete = True
+            flush()
+
+        return SnapshotResult(
+            ndjson_path=ndjson_path,
+            count=ck.rows,
+            pages=ck.pages_done,
+            resumed_from_page=resumed_from,
+            retries=self._retries,
+            complete=ck.complete,
+        )
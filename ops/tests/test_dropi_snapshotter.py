@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+import pytest
+
+from ops.dropi_client import DropiClient, DropiClientConfig, DropiHTTPError
+from ops.dropi_snapshotter import DropiCatalogSnapshotter, SnapshotConfig, TokenBucket, load_checkpoint
+
+CATALOG = [{"id": i, "name": f"Producto {i}"} for i in range(1, 231)]
+
+
+class _FakeDropi(BaseHTTPRequestHandler):
+    fail_once: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def log_message(self, *a: Any) -> None:  # silencio en tests
+        return
+
+    def do_POST(self) -> None:  # noqa: N802
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        start, size = int(body["startData"]), int(body["pageSize"])
+        with self.lock:
+            status = self.fail_once.pop(start, 0)
+        if status:
+            self.send_response(status)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(b"slow down")
+            return
+        payload = json.dumps({"objects": CATALOG[start:start + size]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture()
+def fake_dropi() -> Iterator[str]:
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _FakeDropi)
+    t = threading.Thread(target=srv.serve_forever, daemon=True)
+    t.start()
+    try:
+        yield f"http://127.0.0.1:{srv.server_address[1]}"
+    finally:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _client(base: str) -> DropiClient:
+    return DropiClient(DropiClientConfig(base_url=base, integration_key="test", timeout_s=5, rate_limit_s=0))
+
+
+def _ids(path: Path) -> List[int]:
+    return [json.loads(line)["id"] for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_snapshot_concurrent_in_order_with_retries(tmp_path: Path, fake_dropi: str) -> None:
+    _FakeDropi.fail_once = {40: 429, 60: 503}
+    cfg = SnapshotConfig(page_size=20, max_products=1000, concurrency=4, rate_per_s=500, burst=4, flush_every_pages=3)
+    snap = DropiCatalogSnapshotter(_client(fake_dropi), cfg, sleep=lambda s: None)
+
+    out = tmp_path / "catalog.ndjson"
+    ck = tmp_path / "ck.json"
+    res = snap.run(str(out), checkpoint_path=str(ck))
+
+    assert res.complete is True
+    assert res.count == len(CATALOG)
+    assert res.retries == 2
+    assert _ids(out) == [p["id"] for p in CATALOG]
+    assert load_checkpoint(str(ck)).end_page == 12  # 230 / 20 -> pagina 11 corta
+
+
+def test_snapshot_resumes_after_interruption(tmp_path: Path, fake_dropi: str) -> None:
+    _FakeDropi.fail_once = {}
+    out = tmp_path / "catalog.ndjson"
+    ck = tmp_path / "ck.json"
+    cfg = SnapshotConfig(page_size=10, max_products=1000, concurrency=3, rate_per_s=500, burst=3, flush_every_pages=2)
+
+    class _Dies:
+        def __init__(self, inner: DropiClient, after: int) -> None:
+            self.inner, self.left, self.lock = inner, after, threading.Lock()
+
+        def post(self, path: str, body: Dict[str, Any]) -> Dict[str, Any]:
+            with self.lock:
+                self.left -= 1
+                if self.left < 0:
+                    raise DropiHTTPError(400, "boom")
+            return self.inner.post(path, body)
+
+    with pytest.raises(DropiHTTPError):
+        DropiCatalogSnapshotter(_Dies(_client(fake_dropi), 9), cfg, sleep=lambda s: None).run(str(out), checkpoint_path=str(ck))
+    partial = load_checkpoint(str(ck))
+    assert partial is not None and 0 < partial.pages_done < 23 and not partial.complete
+
+    res = DropiCatalogSnapshotter(_client(fake_dropi), cfg, sleep=lambda s: None).run(str(out), checkpoint_path=str(ck))
+    assert res.resumed_from_page == partial.pages_done
+    assert _ids(out) == [p["id"] for p in CATALOG]
+
+
+def test_token_bucket_paces_and_backs_off() -> None:
+    now = [0.0]
+    slept: List[float] = []
+
+    def sleep(s: float) -> None:
+        slept.append(s)
+        now[0] += s
+
+    b = TokenBucket(2.0, burst=1, clock=lambda: now[0], sleep=sleep)
+    for _ in range(3):
+        b.acquire()
+    assert now[0] == pytest.approx(1.0)  # 3 tokens a 2/s con burst 1
+
+    b.on_throttled(retry_after_s=5)
+    assert b.rate == pytest.approx(1.0)
+    b.acquire()
+    assert now[0] >= 6.0
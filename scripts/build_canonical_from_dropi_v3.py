@@ -1,4 +1,11 @@
 import argparse, csv, json, os, re, sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synapse.catalog.delta import DeltaState, row_fingerprint  # noqa: E402
 
 PLACEHOLDER_RE = re.compile(r"(via\.placeholder\.com|dummyimage\.com|placehold\.it|picsum\.photos)", re.I)
 
@@ -43,6 +50,44 @@ def is_placeholder(url: str) -> bool:
         return False
     return bool(PLACEHOLDER_RE.search(url.strip()))
 
+def canonical_record(c, treat_ph_as_missing):
+    """Fila canonica (sin product_id) + flags para el report. Pura: cacheable por delta."""
+    src = c.get("source") if isinstance(c, dict) else {}
+    if not isinstance(src, dict):
+        src = {}
+    if not isinstance(c, dict):
+        c = {}
+
+    title = pick(src, "title", default="") or pick(c, "title", default="")
+    desc  = pick(src, "description", "body_html", "body", default="") or pick(c, "description", default="")
+    price = pick(src, "price", default="") or pick(c, "price", default="")
+    cap   = pick(src, "compare_at_price", "compare_at", default="") or pick(c, "compare_at_price", default="")
+    img   = pick(src, "image_url", "image", "image_src", default="") or pick(c, "image_url", default="")
+    tags  = norm_tags(src.get("tags")) or norm_tags(c.get("tags"))
+
+    image_raw = bool(img)
+    placeholder = bool(img) and is_placeholder(img)
+    if placeholder and treat_ph_as_missing:
+        img = ""  # lo convertimos a missing real (para prod o cuando se pide)
+
+    return {
+        "row": {
+            "title": title,
+            "description": desc,
+            "price": price,
+            "compare_at_price": cap,
+            "image_url": img,
+            "tags": tags,
+        },
+        "flags": {
+            "price": bool(price),
+            "desc": bool(desc),
+            "image_raw": image_raw,
+            "placeholder": placeholder,
+            "image": bool(img),
+        },
+    }
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--shortlist", required=True)
@@ -53,6 +98,8 @@ def main():
                     help="prod = estricto; bootstrap = deja pasar evidencia chafa pero reporta")
     ap.add_argument("--treat-placeholder-as-missing", action="store_true",
                     help="Si se activa, image_url placeholder cuenta como vacío (missing). En prod se fuerza ON.")
+    ap.add_argument("--delta-state", default="",
+                    help="JSON de estado delta: solo re-deriva productos nuevos/cambiados vs el dump anterior.")
     args = ap.parse_args()
 
     if not os.path.exists(args.shortlist):
@@ -95,46 +142,35 @@ def main():
 
     treat_ph_as_missing = bool(args.treat_placeholder_as_missing) or (args.mode == "prod")
 
+    # delta: solo se re-derivan filas nuevas/cambiadas vs el dump anterior
+    state = DeltaState.load(args.delta_state) if args.delta_state else None
+    items = {pid: m.get(pid, {}) for pid in ids}
+    if state is not None:
+        salt = f"canonical_v3:treat_ph={int(treat_ph_as_missing)}"
+        recs, delta = state.run_stage(
+            "canonical_v3",
+            items,
+            lambda cs: [canonical_record(c, treat_ph_as_missing) for c in cs],
+            fingerprint=lambda c: row_fingerprint(c if isinstance(c, dict) else {}, salt=salt),
+        )
+        state.save()
+    else:
+        recs = {pid: canonical_record(c, treat_ph_as_missing) for pid, c in items.items()}
+        delta = None
+
     for pid in ids:
-        c = m.get(pid, {})
-        src = c.get("source") if isinstance(c, dict) else {}
-        if not isinstance(src, dict):
-            src = {}
-
-        title = pick(src, "title", default="") or pick(c, "title", default="")
-        desc  = pick(src, "description", "body_html", "body", default="") or pick(c, "description", default="")
-        price = pick(src, "price", default="") or pick(c, "price", default="")
-        cap   = pick(src, "compare_at_price", "compare_at", default="") or pick(c, "compare_at_price", default="")
-        img   = pick(src, "image_url", "image", "image_src", default="") or pick(c, "image_url", default="")
-        tags  = norm_tags(src.get("tags")) or norm_tags(c.get("tags"))
-
-        if price:
-            filled_price += 1
-        if desc:
-            filled_desc += 1
-
-        if img:
-            filled_image_raw += 1
-            if is_placeholder(img):
-                placeholder_images += 1
-                if treat_ph_as_missing:
-                    img = ""  # lo convertimos a missing real (para prod o cuando se pide)
-            if img:
-                filled_image_effective += 1
-            else:
-                missing_images += 1
+        rec = recs[pid]
+        fl = rec["flags"]
+        filled_price += int(fl["price"])
+        filled_desc += int(fl["desc"])
+        filled_image_raw += int(fl["image_raw"])
+        placeholder_images += int(fl["placeholder"])
+        if fl["image"]:
+            filled_image_effective += 1
         else:
             missing_images += 1
 
-        out_rows.append({
-            "product_id": pid,
-            "title": title,
-            "description": desc,
-            "price": price,
-            "compare_at_price": cap,
-            "image_url": img,
-            "tags": tags,
-        })
+        out_rows.append({"product_id": pid, **rec["row"]})
 
     os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
     with open(args.out, "w", encoding="utf-8", newline="") as f:
@@ -176,6 +212,8 @@ def main():
         "mode": args.mode,
         "treat_placeholder_as_missing": treat_ph_as_missing,
     }
+    if delta is not None:
+        rep["delta"] = delta.summary()
 
     with open(report_path, "w", encoding="utf-8") as f:
         json.dump(rep, f, ensure_ascii=False, indent=2)
@@ -189,6 +227,8 @@ def main():
     print(f"- fill_image_effective: {filled_image_effective}/{total}")
     print(f"- placeholders: {placeholder_images}")
     print(f"- mode: {args.mode}")
+    if delta is not None:
+        print(f"- delta: {delta.summary()}")
     return 0
 
 if __name__ == "__main__":
@@ -13,6 +13,8 @@ def main():
     ap.add_argument("--min-images", type=int, default=3)
     ap.add_argument("--min-margin-pct", type=str, default="0.20")
     ap.add_argument("--top-n", type=int, default=5)
+    ap.add_argument("--concurrency", type=int, default=1, help=">1: snapshot concurrente y reanudable")
+    ap.add_argument("--rate-per-s", type=float, default=4.0, help="requests/s del token bucket (con --concurrency>1)")
     ns = ap.parse_args()
 
     cats = [c.strip() for c in ns.categories.split(",") if c.strip()] if ns.categories else []
@@ -23,6 +25,8 @@ def main():
         min_images=ns.min_images,
         min_margin_pct=Decimal(ns.min_margin_pct),
         top_n=ns.top_n,
+        concurrency=ns.concurrency,
+        rate_per_s=ns.rate_per_s,
     )
 
     out = run(args)
@@ -4,9 +4,16 @@ import argparse
 import csv
 import json
 import re
+import sys
 from pathlib import Path
 from typing import Any
 
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from synapse.catalog.canonical_store import open_store  # noqa: E402
+
 
 SEED_FALLBACK_PRICE = "29.99"
 SEED_FALLBACK_COMPARE_AT = "49.99"
@@ -35,12 +42,10 @@ def _to_list(x: Any) -> list[str]:
 def _pick_row(canonical_csv: Path, product_id: str) -> dict[str, str]:
     if not canonical_csv.exists():
         return {}
-    with canonical_csv.open("r", encoding="utf-8", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            if (row.get("product_id") or "").strip() == product_id:
-                return {k: (v or "").strip() for k, v in row.items()}
-    return {}
+    row = open_store(canonical_csv).get(product_id)
+    if row is None:
+        return {}
+    return {k: (v or "").strip() for k, v in row.items()}
 
 
 def _merge_tags(existing: str, add: list[str]) -> str:
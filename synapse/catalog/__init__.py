@@ -0,0 +1,26 @@
+# synapse/catalog/__init__.py
+"""
+Catalog - ingesta y canonizacion de catalogos de proveedor (Dropi).
+
+Modulos:
+- dropi_ingest: CSV Dropi -> CanonRow (por chunks, multi-proceso)
+- canonical_store: indice keyed por product_id sobre el canonical CSV
+- delta: diff entre dumps + cache de resultados por etapa
+- near_dup: clustering de near-duplicates (MinHash + LSH) antes de rankear
+"""
+
+from .dropi_ingest import (
+    CanonRow, IngestPlan, IngestStats,
+    plan_ingest, iter_canonical_rows, canonize_catalog, ingest_catalog,
+)
+from .canonical_store import CanonicalCatalogStore, open_store
+from .delta import CatalogDelta, DeltaState, diff_fingerprints, row_fingerprint
+from .near_dup import NearDupConfig, NearDupResult, cluster_near_duplicates
+
+__all__ = [
+    "CanonRow", "IngestPlan", "IngestStats",
+    "plan_ingest", "iter_canonical_rows", "canonize_catalog", "ingest_catalog",
+    "CanonicalCatalogStore", "open_store",
+    "CatalogDelta", "DeltaState", "diff_fingerprints", "row_fingerprint",
+    "NearDupConfig", "NearDupResult", "cluster_near_duplicates",
+]
@@ -0,0 +1,252 @@
+# synapse/catalog/canonical_store.py
+"""
+Canonical catalog store - lookup O(1) por product_id sobre el canonical CSV.
+
+El CSV sigue siendo la fuente de verdad. Este modulo deriva un indice SQLite
+(sidecar `.<csv>.idx.sqlite`) con una fila JSON por product_id:
+
+- invalidacion por contenido: sha256 del CSV (stat size/mtime como fast-path)
+- rebuild atomico (tmp + os.replace), un solo pase sobre el CSV
+- primera aparicion gana (misma semantica que el scan lineal)
+
+Uso:
+    store = open_store("data/catalog/canonical_products.csv")
+    row = store.get("p1")                # dict | None
+    rows = store.get_many(["p1", "p2"])  # {pid: dict}, solo encontrados
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+STORE_SCHEMA_VERSION = "canonical-store-v1"
+_IN_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    k TEXT PRIMARY KEY,
+    v TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    product_id TEXT PRIMARY KEY,
+    ord INTEGER NOT NULL,
+    row_json TEXT NOT NULL
+);
+"""
+
+
+def _sha256_file(path: Path, *, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while True:
+            b = f.read(chunk_size)
+            if not b:
+                break
+            h.update(b)
+    return h.hexdigest()
+
+
+def _stat_key(path: Path) -> Tuple[int, int]:
+    st = path.stat()
+    return int(st.st_size), int(getattr(st, "st_mtime_ns", int(st.st_mtime * 1e9)))
+
+
+def row_product_id(row: Dict[str, Any]) -> str:
+    """Key canonica de una fila: product_id, con fallback a id."""
+    return str(row.get("product_id") or row.get("id") or "").strip()
+
+
+def default_index_path(canonical_csv: Union[str, Path]) -> Path:
+    p = Path(canonical_csv)
+    return p.with_name(f".{p.name}.idx.sqlite")
+
+
+class CanonicalCatalogStore:
+    """Indice keyed por product_id derivado del canonical CSV."""
+
+    def __init__(self, canonical_csv: Union[str, Path], *, index_path: Union[str, Path, None] = None) -> None:
+        self.csv_path = Path(canonical_csv)
+        if not self.csv_path.exists():
+            raise FileNotFoundError(f"canonical_csv not found: {self.csv_path}")
+        self.index_path = Path(index_path) if index_path else default_index_path(self.csv_path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.source_sha256 = ""
+        self.rebuilt = False
+        self.refresh()
+
+    # ------------------------------------------------------------------
+    # Index lifecycle
+    # ------------------------------------------------------------------
+
+    def _read_meta(self, c: sqlite3.Connection) -> Dict[str, str]:
+        try:
+            return {str(k): str(v) for (k, v) in c.execute("SELECT k, v FROM meta").fetchall()}
+        except sqlite3.Error:
+            return {}
+
+    def _open_existing(self) -> Optional[sqlite3.Connection]:
+        if not self.index_path.exists():
+            return None
+        try:
+            return sqlite3.connect(str(self.index_path), check_same_thread=False)
+        except sqlite3.Error:
+            return None
+
+    def _build(self, sha: str, size: int, mtime_ns: int) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(self.index_path.name + f".tmp{os.getpid()}")
+        if tmp.exists():
+            tmp.unlink()
+
+        c = sqlite3.connect(str(tmp))
+        try:
+            c.executescript(_SCHEMA)
+            with self.csv_path.open("r", encoding="utf-8-sig", newline="") as f:
+                r = csv.DictReader(f)
+                fieldnames = list(r.fieldnames or [])
+                batch: List[Tuple[str, int, str]] = []
+                for i, row in enumerate(r):
+                    pid = row_product_id(row)
+                    if not pid:
+                        continue
+                    batch.append((pid, i, json.dumps(dict(row), ensure_ascii=False)))
+                    if len(batch) >= 1000:
+                        c.executemany("INSERT OR IGNORE INTO products(product_id, ord, row_json) VALUES (?,?,?)", batch)
+                        batch = []
+                if batch:
+                    c.executemany("INSERT OR IGNORE INTO products(product_id, ord, row_json) VALUES (?,?,?)", batch)
+            meta = {
+                "schema_version": STORE_SCHEMA_VERSION,
+                "source_path": str(self.csv_path),
+                "source_sha256": sha,
+                "source_size": str(size),
+                "source_mtime_ns": str(mtime_ns),
+                "fieldnames": json.dumps(fieldnames, ensure_ascii=False),
+            }
+            c.executemany("INSERT OR REPLACE INTO meta(k, v) VALUES (?,?)", list(meta.items()))
+            c.commit()
+        finally:
+            c.close()
+        os.replace(str(tmp), str(self.index_path))
+
+    def refresh(self) -> bool:
+        """
+        Revalida el indice contra el CSV. Devuelve True si hubo rebuild.
+        stat igual -> no se hashea; stat distinto -> sha256 decide.
+        """
+        with self._lock:
+            size, mtime_ns = _stat_key(self.csv_path)
+            c = self._conn or self._open_existing()
+            meta = self._read_meta(c) if c is not None else {}
+
+            if meta.get("schema_version") == STORE_SCHEMA_VERSION:
+                if meta.get("source_size") == str(size) and meta.get("source_mtime_ns") == str(mtime_ns):
+                    self._conn = c
+                    self.source_sha256 = meta.get("source_sha256", "")
+                    self.rebuilt = False
+                    return False
+                sha = _sha256_file(self.csv_path)
+                if meta.get("source_sha256") == sha and c is not None:
+                    # contenido igual (touch/copy): solo refrescar stat
+                    c.executemany(
+                        "INSERT OR REPLACE INTO meta(k, v) VALUES (?,?)",
+                        [("source_size", str(size)), ("source_mtime_ns", str(mtime_ns))],
+                    )
+                    c.commit()
+                    self._conn = c
+                    self.source_sha256 = sha
+                    self.rebuilt = False
+                    return False
+            else:
+                sha = _sha256_file(self.csv_path)
+
+            if c is not None:
+                c.close()
+            self._conn = None
+            self._build(sha, size, mtime_ns)
+            self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+            self.source_sha256 = sha
+            self.rebuilt = True
+            return True
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        return self._conn
+
+    def get(self, product_id: str) -> Optional[Dict[str, Any]]:
+        pid = str(product_id or "").strip()
+        if not pid:
+            return None
+        with self._lock:
+            row = self._db().execute("SELECT row_json FROM products WHERE product_id=?", (pid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, product_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """{product_id: row} en el orden pedido; ids inexistentes se omiten."""
+        wanted: List[str] = []
+        seen = set()
+        for x in product_ids:
+            pid = str(x or "").strip()
+            if pid and pid not in seen:
+                seen.add(pid)
+                wanted.append(pid)
+
+        found: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            db = self._db()
+            for i in range(0, len(wanted), _IN_BATCH):
+                part = wanted[i:i + _IN_BATCH]
+                q = "SELECT product_id, row_json FROM products WHERE product_id IN (%s)" % ",".join("?" * len(part))
+                for pid, raw in db.execute(q, part).fetchall():
+                    found[str(pid)] = json.loads(raw)
+        return {pid: found[pid] for pid in wanted if pid in found}
+
+    def __contains__(self, product_id: object) -> bool:
+        return isinstance(product_id, str) and self.get(product_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._db().execute("SELECT COUNT(*) FROM products").fetchone()[0])
+
+    def product_ids(self) -> List[str]:
+        with self._lock:
+            return [str(r[0]) for r in self._db().execute("SELECT product_id FROM products ORDER BY ord").fetchall()]
+
+
+_STORES: Dict[str, CanonicalCatalogStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(canonical_csv: Union[str, Path], *, index_path: Union[str, Path, None] = None) -> CanonicalCatalogStore:
+    """
+    Store compartido por proceso (un indice por CSV). Revalida en cada open,
+    asi que un CSV regenerado en medio de un batch se re-indexa solo.
+    """
+    key = str(Path(canonical_csv).resolve())
+    with _STORES_LOCK:
+        st = _STORES.get(key)
+        if st is None or (index_path and Path(index_path) != st.index_path):
+            st = CanonicalCatalogStore(canonical_csv, index_path=index_path)
+            _STORES[key] = st
+            return st
+    st.refresh()
+    return st
@@ -0,0 +1,198 @@
+# synapse/catalog/delta.py
+"""
+Catalog delta engine - solo re-procesar lo que cambio entre dumps.
+
+Cada fila/item se identifica por product_id y se fingerprintea con hashing
+estable (contract_snapshot.sha256_json). Por etapa (canonical, ranker, buyer)
+se guarda {product_id: {fp, result}}; en el siguiente dump:
+
+- added / changed   -> se recalculan (una sola llamada batch a la etapa)
+- unchanged         -> se arrastra el resultado cacheado
+- removed           -> se purga del estado
+
+Estado persistido en JSON (DeltaState). Sin path = solo memoria.
+
+Uso:
+    state = DeltaState.load("data/catalog/.delta_state.json")
+    results, delta = state.run_stage(
+        "ranker", items_by_id, lambda items: [score(x) for x in items],
+        encode=asdict, decode=lambda d: ProductScore(**d),
+    )
+    state.save()
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar, Union
+
+from synapse.catalog.canonical_store import row_product_id
+from synapse.infra.contract_snapshot import sha256_json, stable_json_dumps
+
+DELTA_SCHEMA_VERSION = "catalog-delta-v1"
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def row_fingerprint(row: Mapping[str, Any], *, fields: Optional[Sequence[str]] = None, salt: str = "") -> str:
+    """
+    sha256 estable de una fila. `fields` restringe a columnas relevantes
+    (p.ej. ignorar timestamps del proveedor); `salt` versiona la etapa.
+    """
+    if fields is not None:
+        payload: Any = {k: row.get(k) for k in fields}
+    else:
+        payload = dict(row)
+    if salt:
+        payload = {"_salt": salt, "row": payload}
+    return sha256_json(payload)
+
+
+def fingerprint_rows(
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    key: Callable[[Mapping[str, Any]], str] = row_product_id,
+    fields: Optional[Sequence[str]] = None,
+) -> Dict[str, str]:
+    """{product_id: fp}. Primera aparicion gana; filas sin id se ignoran."""
+    out: Dict[str, str] = {}
+    for r in rows:
+        pid = key(r)
+        if pid and pid not in out:
+            out[pid] = row_fingerprint(r, fields=fields)
+    return out
+
+
+@dataclass(frozen=True)
+class CatalogDelta:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def to_process(self) -> List[str]:
+        return sorted(self.added + self.changed)
+
+    @property
+    def total(self) -> int:
+        return len(self.added) + len(self.changed) + len(self.unchanged)
+
+    @property
+    def change_rate(self) -> float:
+        return (len(self.added) + len(self.changed)) / self.total if self.total else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed),
+            "unchanged": len(self.unchanged),
+            "change_rate": round(self.change_rate, 6),
+        }
+
+
+def diff_fingerprints(prev: Mapping[str, str], cur: Mapping[str, str]) -> CatalogDelta:
+    added: List[str] = []
+    changed: List[str] = []
+    unchanged: List[str] = []
+    for pid, fp in cur.items():
+        old = prev.get(pid)
+        if old is None:
+            added.append(pid)
+        elif old != fp:
+            changed.append(pid)
+        else:
+            unchanged.append(pid)
+    removed = [pid for pid in prev if pid not in cur]
+    return CatalogDelta(
+        added=sorted(added),
+        removed=sorted(removed),
+        changed=sorted(changed),
+        unchanged=sorted(unchanged),
+    )
+
+
+class DeltaState:
+    """Fingerprints + resultados por etapa del ultimo dump procesado."""
+
+    def __init__(self, path: Union[str, Path, None] = None, *, stages: Optional[Dict[str, Dict[str, Dict[str, Any]]]] = None) -> None:
+        self.path = Path(path) if path else None
+        self.stages: Dict[str, Dict[str, Dict[str, Any]]] = stages or {}
+
+    @classmethod
+    def load(cls, path: Union[str, Path, None]) -> "DeltaState":
+        if not path:
+            return cls(None)
+        p = Path(path)
+        if not p.exists():
+            return cls(p)
+        try:
+            raw = json.loads(p.read_text(encoding="utf-8") or "{}")
+        except (OSError, ValueError):
+            # estado corrupto = cold start (solo cuesta un full recompute)
+            return cls(p)
+        if not isinstance(raw, dict) or raw.get("schema_version") != DELTA_SCHEMA_VERSION:
+            return cls(p)
+        stages = raw.get("stages")
+        return cls(p, stages=stages if isinstance(stages, dict) else {})
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        payload = {"schema_version": DELTA_SCHEMA_VERSION, "stages": self.stages}
+        tmp.write_text(stable_json_dumps(payload) + "\n", encoding="utf-8", newline="\n")
+        os.replace(str(tmp), str(self.path))
+
+    def fingerprints(self, stage: str) -> Dict[str, str]:
+        return {pid: str(e.get("fp", "")) for pid, e in self.stages.get(stage, {}).items()}
+
+    def run_stage(
+        self,
+        stage: str,
+        items: Mapping[str, T],
+        compute: Callable[[List[T]], Sequence[R]],
+        *,
+        fingerprint: Callable[[T], str],
+        encode: Callable[[R], Any] = lambda r: r,
+        decode: Callable[[Any], R] = lambda d: d,
+        cacheable: Callable[[R], bool] = lambda r: True,
+    ) -> Tuple[Dict[str, R], CatalogDelta]:
+        """
+        Ejecuta `compute` solo sobre items nuevos/cambiados (una llamada batch,
+        mismo orden que `items`) y arrastra el resto desde el estado.
+        Resultados no `cacheable` (p.ej. fallbacks de error) no se persisten:
+        se reintentan en la siguiente corrida.
+        Devuelve ({pid: result} en el orden de `items`, delta).
+        """
+        cur_fps = {pid: fingerprint(it) for pid, it in items.items()}
+        prev = self.stages.get(stage, {})
+        delta = diff_fingerprints({pid: str(e.get("fp", "")) for pid, e in prev.items()}, cur_fps)
+
+        todo = set(delta.to_process)
+        todo_ids = [pid for pid in items if pid in todo]
+        fresh = list(compute([items[pid] for pid in todo_ids])) if todo_ids else []
+        if len(fresh) != len(todo_ids):
+            raise ValueError(f"delta stage {stage!r}: compute returned {len(fresh)} results for {len(todo_ids)} items")
+
+        entries: Dict[str, Dict[str, Any]] = {}
+        results: Dict[str, R] = {}
+        fresh_by_id = dict(zip(todo_ids, fresh))
+        for pid in items:
+            if pid in fresh_by_id:
+                r = fresh_by_id[pid]
+                if cacheable(r):
+                    entries[pid] = {"fp": cur_fps[pid], "result": encode(r)}
+                results[pid] = r
+            else:
+                entries[pid] = prev[pid]
+                results[pid] = decode(prev[pid].get("result"))
+
+        self.stages[stage] = entries
+        return results, delta
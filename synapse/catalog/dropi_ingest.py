@@ -0,0 +1,612 @@
+# synapse/catalog/dropi_ingest.py
+"""
+Dropi catalog ingest - CSV del proveedor -> filas canonicas (CanonRow).
+
+Primitivas por fila (header map, precio, imagen real, tags) + motor por chunks:
+- sniff UNA vez (encoding, delimitador, headers) sobre un prefijo acotado
+- parte el archivo en chunks alineados a fin de registro (respeta comillas)
+- canoniza chunks en un pool de procesos
+- emite/escribe las filas en el orden original del CSV
+
+Solo stdlib. `scripts/dropi_catalog_ingest.py` es el CLI encima de esto.
+"""
+
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+CANON_KEYS = ["product_id", "title", "description", "price", "compare_at_price", "image_url", "tags"]
+
+SYNONYMS: Dict[str, List[str]] = {
+    "product_id": ["product_id","productid","id","sku","product_sku","variant_sku","item_id","codigo","cÃ³digo","code","producto_id"],
+    "title": ["title","name","product_name","nombre","nombre_producto","titulo","tÃ­tulo","product_title"],
+    "description": ["description","desc","body","body_html","descripcion","descripciÃ³n","detalle","details","long_description","short_description"],
+    "price": ["price","precio","sale_price","precio_venta","unit_price","amount","price_mxn","mxn_price"],
+    "compare_at_price": ["compare_at_price","compareatprice","old_price","precio_lista","precio_regular","regular_price","list_price"],
+    "image_url": ["image_url","image","img","imagen","imagen_url","url_imagen","photo","thumbnail","main_image","featured_image","images","imagenes"],
+    "tags": ["tags","etiquetas","categories","category","categoria","categorÃ­a","collections","collection"],
+}
+
+# Bloqueo de placeholders (puedes ampliar cuando veas otros)
+BLOCKED_IMAGE_PATTERNS = [
+    re.compile(r"via\.placeholder\.com", re.IGNORECASE),
+    re.compile(r"placehold\.it", re.IGNORECASE),
+    re.compile(r"dummyimage\.com", re.IGNORECASE),
+    re.compile(r"picsum\.photos", re.IGNORECASE),
+]
+
+URL_RE = re.compile(r"^https?://", re.IGNORECASE)
+
+
+def _norm_header(h: str) -> str:
+    h = (h or "").strip().lower().replace("\ufeff", "")
+    h = re.sub(r"[^\w]+", "_", h, flags=re.UNICODE)
+    h = re.sub(r"_+", "_", h).strip("_")
+    return h
+
+
+def _try_decode(path: str, enc: str) -> bool:
+    try:
+        with open(path, "r", encoding=enc, newline="") as f:
+            f.read(4096)
+        return True
+    except Exception:
+        return False
+
+
+def detect_encoding(path: str) -> str:
+    for enc in ("utf-8-sig", "utf-8", "cp1252", "latin-1"):
+        if _try_decode(path, enc):
+            return enc
+    return "utf-8-sig"
+
+
+def detect_delimiter(sample: str) -> str:
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=[",", ";", "\t", "|"])
+        return dialect.delimiter
+    except Exception:
+        ds = [",", ";", "\t", "|"]
+        best = max(ds, key=lambda d: sample.count(d))
+        return best if sample.count(best) > 0 else ","
+
+
+def _clean_text(x: Optional[str]) -> str:
+    if x is None:
+        return ""
+    return str(x).replace("\r\n", "\n").strip()
+
+
+def _parse_price(raw: Optional[str]) -> Optional[float]:
+    if raw is None:
+        return None
+    s = str(raw).strip()
+    if not s:
+        return None
+    s = re.sub(r"[^\d,.\-]", "", s)
+    if not s or s in ("-", ".", ","):
+        return None
+    if "," in s and "." in s:
+        if s.rfind(",") > s.rfind("."):
+            s = s.replace(".", "")
+            s = s.replace(",", ".")
+        else:
+            s = s.replace(",", "")
+    elif "," in s and "." not in s:
+        s = s.replace(",", ".")
+    try:
+        v = float(s)
+        return v if v > 0 else None
+    except Exception:
+        return None
+
+
+def _is_url(s: str) -> bool:
+    return bool(URL_RE.match((s or "").strip()))
+
+
+def _is_blocked_image_url(s: str) -> bool:
+    if not s:
+        return False
+    for pat in BLOCKED_IMAGE_PATTERNS:
+        if pat.search(s):
+            return True
+    return False
+
+
+def _extract_image_candidates(raw: str) -> List[str]:
+    s = _clean_text(raw)
+    if not s:
+        return []
+
+    # JSON list string
+    if s.startswith("[") and s.endswith("]"):
+        try:
+            arr = json.loads(s)
+            if isinstance(arr, list):
+                return [_clean_text(x) for x in arr if _clean_text(x)]
+        except Exception:
+            pass
+
+    # Separadores tÃ­picos
+    for sep in ("|", "; ", ",", "\n"):
+        if sep in s:
+            parts = [p.strip() for p in s.split(sep) if p.strip()]
+            return parts
+
+    return [s.strip()]
+
+
+def _extract_first_real_image_url(raw: str, block_placeholders: bool = True) -> Tuple[str, int]:
+    """
+    Regresa (url, blocked_hits)
+    - Se queda con la primera URL http(s) vÃ¡lida
+    - Si block_placeholders=True, ignora placeholders y los cuenta
+    """
+    blocked_hits = 0
+    candidates = _extract_image_candidates(raw)
+
+    for u in candidates:
+        if not _is_url(u):
+            continue
+        if block_placeholders and _is_blocked_image_url(u):
+            blocked_hits += 1
+            continue
+        return u, blocked_hits
+
+    # si todas eran placeholders, igual cuenta y regresa vacÃ­o
+    if block_placeholders:
+        for u in candidates:
+            if _is_url(u) and _is_blocked_image_url(u):
+                # ya los contamos arriba si eran URLs; esto es por si hubo rarezas
+                pass
+    return "", blocked_hits
+
+
+def _dedupe_preserve(xs: List[str]) -> List[str]:
+    seen = set()
+    out = []
+    for x in xs:
+        k = x.strip().lower()
+        if not k or k in seen:
+            continue
+        seen.add(k)
+        out.append(x.strip())
+    return out
+
+
+def _split_tags(raw: str) -> List[str]:
+    s = _clean_text(raw)
+    if not s:
+        return []
+    if s.startswith("[") and s.endswith("]"):
+        try:
+            arr = json.loads(s)
+            if isinstance(arr, list):
+                return _dedupe_preserve([_clean_text(x) for x in arr if _clean_text(x)])
+        except Exception:
+            pass
+    for sep in ("|", "; ", ","):
+        if sep in s:
+            return _dedupe_preserve([t.strip() for t in s.split(sep) if t.strip()])
+    return [s]
+
+
+def pick_header_map(headers: List[str]) -> Dict[str, Optional[str]]:
+    norm_to_orig = {_norm_header(h): h for h in headers}
+    norm_headers = list(norm_to_orig.keys())
+
+    mapping: Dict[str, Optional[str]] = {k: None for k in CANON_KEYS}
+    for canon_key, syns in SYNONYMS.items():
+        for syn in syns:
+            sn = _norm_header(syn)
+            if sn in norm_to_orig:
+                mapping[canon_key] = norm_to_orig[sn]
+                break
+
+    # fallbacks
+    if mapping["title"] is None:
+        for nh in norm_headers:
+            if "name" in nh or "nombre" in nh or "titulo" in nh or "title" in nh:
+                mapping["title"] = norm_to_orig[nh]
+                break
+
+    if mapping["product_id"] is None:
+        for nh in norm_headers:
+            if nh in ("id", "sku") or nh.endswith("_id") or "product_id" in nh:
+                mapping["product_id"] = norm_to_orig[nh]
+                break
+
+    if mapping["image_url"] is None:
+        for nh in norm_headers:
+            if "image" in nh or "img" in nh or "imagen" in nh or ("url" in nh and ("img" in nh or "image" in nh or "imagen" in nh)):
+                mapping["image_url"] = norm_to_orig[nh]
+                break
+
+    if mapping["price"] is None:
+        for nh in norm_headers:
+            if "price" in nh or "precio" in nh:
+                mapping["price"] = norm_to_orig[nh]
+                break
+
+    if mapping["description"] is None:
+        for nh in norm_headers:
+            if "desc" in nh or "description" in nh or "descripcion" in nh or "detalle" in nh:
+                mapping["description"] = norm_to_orig[nh]
+                break
+
+    if mapping["tags"] is None:
+        for nh in norm_headers:
+            if "tag" in nh or "etiquet" in nh or "categor" in nh or "collection" in nh:
+                mapping["tags"] = norm_to_orig[nh]
+                break
+
+    return mapping
+
+
+@dataclass
+class CanonRow:
+    product_id: str
+    title: str
+    description: str
+    price: Optional[float]
+    compare_at_price: Optional[float]
+    image_url: str
+    tags: List[str]
+    image_blocked_hits: int = 0
+
+
+def canonize_row(row: Dict[str, str], hm: Dict[str, Optional[str]], idx: int, block_placeholders: bool) -> CanonRow:
+    def getv(k: str) -> str:
+        h = hm.get(k)
+        return _clean_text(row.get(h)) if h else ""
+
+    pid = getv("product_id")
+    title = getv("title") or f"Dropi Product {idx}"
+    desc = getv("description")
+    price = _parse_price(getv("price"))
+    cap = _parse_price(getv("compare_at_price"))
+
+    img_raw = getv("image_url")
+    img, blocked_hits = _extract_first_real_image_url(img_raw, block_placeholders=block_placeholders)
+
+    tags = _split_tags(getv("tags"))
+
+    if not pid:
+        slug = re.sub(r"[^\w]+", "-", title.strip().lower(), flags=re.UNICODE).strip("-")
+        slug = slug[:40] if slug else "dropi"
+        pid = f"{slug}-{idx}"
+
+    if not desc:
+        base = title + (f". Tags: {', '.join(tags[:8])}" if tags else "")
+        desc = base + ". Producto de catÃ¡logo Dropi."
+
+    return CanonRow(pid, title, desc, price, cap, img, tags, blocked_hits)
+
+
+def score_row(c: CanonRow, price_min: float, price_max: float) -> float:
+    s = 0.0
+    if c.price is not None:
+        s += 2.0
+        if price_min <= c.price <= price_max:
+            s += 1.0
+    if c.image_url:
+        s += 2.0
+    if c.description and len(c.description) >= 60:
+        s += 1.0
+    if c.tags:
+        s += 0.5
+    if c.compare_at_price is not None and c.price is not None and c.compare_at_price > c.price:
+        s += 0.5
+    return float(s)
+
+
+# ---------------------------------------------------------------------------
+# Motor por chunks
+# ---------------------------------------------------------------------------
+
+SNIFF_BYTES = 64 * 1024
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024
+_ENCODINGS = ("utf-8-sig", "utf-8", "cp1252", "latin-1")
+
+
+@dataclass(frozen=True)
+class IngestPlan:
+    """Resultado del sniff: todo lo que un worker necesita para canonizar un chunk."""
+    path: str
+    encoding: str
+    delimiter: str
+    headers: List[str]
+    header_map: Dict[str, Optional[str]]
+    chunks: List[Tuple[int, int]] = field(default_factory=list)  # [start, end) en bytes
+
+
+@dataclass(frozen=True)
+class IngestStats:
+    path: str
+    out_path: str
+    encoding: str
+    delimiter: str
+    rows: int
+    chunks: int
+    workers: int
+    header_map: Dict[str, Optional[str]]
+
+
+def detect_encoding_bytes(prefix: bytes) -> str:
+    """Igual que detect_encoding pero sobre un prefijo ya leido (sin reabrir el archivo)."""
+    for enc in _ENCODINGS:
+        try:
+            prefix.decode(enc)
+            return enc
+        except UnicodeDecodeError as e:
+            # un multibyte cortado al final del prefijo no invalida el encoding
+            if e.start >= len(prefix) - 3 and e.reason == "unexpected end of data":
+                return enc
+    return "utf-8-sig"
+
+
+_QUOTE_OR_NL = re.compile(b'["\\n]')
+_FIELD_OPENERS = (0x0A, 0x0D)
+
+
+def _next_record_end(buf: Any, pos: int, size: int, delim: bytes, *, min_end: int = 0) -> int:
+    """
+    Offset justo despues del primer '\\n' que cierra un registro con fin >= `min_end`.
+    `pos` debe ser inicio de registro. Devuelve `size` si no hay mas fines de registro.
+
+    Misma maquina de estados que `csv`: solo una '"' al inicio de campo abre un campo
+    entrecomillado; una '"' suelta dentro de un campo sin comillas (p.ej. `TV 32" Smart`)
+    es literal. Dentro del campo, '""' es comilla escapada y cualquier otra '"' lo cierra.
+
+    '"', '\\n', '\\r' y el delimitador son ASCII: seguro en utf-8/cp1252/latin-1.
+    """
+    d = delim[0]
+    while pos < size:
+        m = _QUOTE_OR_NL.search(buf, pos, size)
+        if m is None:
+            return size
+        i = m.start()
+        if buf[i] == 0x0A:
+            if i + 1 >= min_end:
+                return i + 1
+            pos = i + 1
+            continue
+        prev = buf[i - 1] if i > 0 else 0x0A
+        if prev != d and prev not in _FIELD_OPENERS and not (i == 3 and buf[:3] == codecs.BOM_UTF8):
+            pos = i + 1  # comilla literal dentro de campo sin comillas
+            continue
+        j = i + 1
+        while True:
+            k = buf.find(b'"', j, size)
+            if k < 0:
+                return size
+            if k + 1 < size and buf[k + 1] == 0x22:
+                j = k + 2
+                continue
+            pos = k + 1
+            break
+    return size
+
+
+def _split_chunks(buf: Any, start: int, size: int, delim: bytes, chunk_bytes: int) -> List[Tuple[int, int]]:
+    chunks: List[Tuple[int, int]] = []
+    cur = start
+    while cur < size:
+        target = cur + max(1, int(chunk_bytes))
+        if target >= size:
+            chunks.append((cur, size))
+            break
+        # escaneo continuo desde un inicio de registro: el estado de comillas es exacto
+        end = _next_record_end(buf, cur, size, delim, min_end=target)
+        chunks.append((cur, end))
+        cur = end
+    return chunks
+
+
+def plan_ingest(
+    path: Union[str, Path],
+    *,
+    encoding: Optional[str] = None,
+    delimiter: Optional[str] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    sniff_bytes: int = SNIFF_BYTES,
+) -> IngestPlan:
+    """
+    Sniff unico sobre los primeros `sniff_bytes` (encoding, delimitador, headers)
+    y particion del cuerpo en chunks alineados a registro.
+    """
+    p = str(path)
+    with open(p, "rb") as f:
+        prefix = f.read(max(1024, int(sniff_bytes)))
+        size = os.fstat(f.fileno()).st_size
+        enc = encoding or detect_encoding_bytes(prefix)
+        sample = prefix.decode(enc, errors="ignore")
+        used = delimiter or detect_delimiter(sample)
+        delim = used.encode("latin-1")[:1] or b","
+
+        if size == 0:
+            header_end, chunks = 0, []
+            header_text = ""
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                header_end = _next_record_end(buf, 0, size, delim)
+                header_text = buf[:header_end].decode(enc)
+                chunks = _split_chunks(buf, header_end, size, delim, chunk_bytes)
+
+    headers = next(csv.reader(io.StringIO(header_text, newline=""), delimiter=used), [])
+
+    return IngestPlan(
+        path=p,
+        encoding=enc,
+        delimiter=used,
+        headers=headers,
+        header_map=pick_header_map(headers),
+        chunks=chunks,
+    )
+
+
+def _needs_ordinal(row: Dict[str, str], hm: Dict[str, Optional[str]]) -> bool:
+    # canonize_row usa idx solo como fallback de product_id/title
+    for k in ("product_id", "title"):
+        h = hm.get(k)
+        if not h or not _clean_text(row.get(h)):
+            return True
+    return False
+
+
+_ChunkTask = Tuple[str, int, int, str, str, List[str], Dict[str, Optional[str]], bool]
+_ChunkItem = Union[CanonRow, Dict[str, str]]
+
+
+def _canonize_chunk(task: _ChunkTask) -> List[_ChunkItem]:
+    """
+    Worker: canoniza un rango de bytes. Las filas que dependen del indice global
+    (sin product_id/title) regresan crudas y el proceso padre las canoniza.
+    """
+    path, start, end, enc, delim, headers, hm, block_placeholders = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode(enc)
+
+    out: List[_ChunkItem] = []
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=headers, delimiter=delim)
+    for r in reader:
+        if _needs_ordinal(r, hm):
+            out.append(dict(r))
+        else:
+            out.append(canonize_row(r, hm, 0, block_placeholders=block_placeholders))
+    return out
+
+
+def _default_workers() -> int:
+    return max(1, os.cpu_count() or 1)
+
+
+def iter_canonical_rows(
+    plan: IngestPlan,
+    *,
+    workers: Optional[int] = None,
+    limit: int = 0,
+    block_placeholders: bool = True,
+    executor: Optional[Executor] = None,
+) -> Iterator[CanonRow]:
+    """
+    Canoniza el catalogo por chunks y emite CanonRow en el orden original.
+
+    - workers<=1 (o un solo chunk): todo en proceso, sin pool.
+    - En vuelo como maximo 2*workers chunks (memoria acotada).
+    - idx global 1-based, identico a la version fila-por-fila.
+    """
+    n_workers = int(workers) if workers else _default_workers()
+    tasks: List[_ChunkTask] = [
+        (plan.path, s, e, plan.encoding, plan.delimiter, list(plan.headers), dict(plan.header_map), block_placeholders)
+        for (s, e) in plan.chunks
+    ]
+
+    own_pool: Optional[Executor] = None
+    pool = executor
+    if pool is None and n_workers > 1 and len(tasks) > 1:
+        own_pool = ProcessPoolExecutor(max_workers=n_workers)
+        pool = own_pool
+
+    idx = 0
+    try:
+        if pool is None:
+            results: Iterator[List[_ChunkItem]] = (_canonize_chunk(t) for t in tasks)
+        else:
+            results = _ordered_results(pool, tasks, window=max(2, 2 * n_workers))
+
+        for items in results:
+            for item in items:
+                idx += 1
+                if isinstance(item, dict):
+                    yield canonize_row(item, plan.header_map, idx, block_placeholders=block_placeholders)
+                else:
+                    yield item
+                if limit > 0 and idx >= limit:
+                    return
+    finally:
+        if own_pool is not None:
+            own_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _ordered_results(pool: Executor, tasks: Sequence[_ChunkTask], *, window: int) -> Iterator[List[_ChunkItem]]:
+    pending: Deque[Future] = deque()
+    it = iter(tasks)
+    for t in it:
+        pending.append(pool.submit(_canonize_chunk, t))
+        if len(pending) >= window:
+            break
+    while pending:
+        fut = pending.popleft()
+        nxt = next(it, None)
+        if nxt is not None:
+            pending.append(pool.submit(_canonize_chunk, nxt))
+        yield fut.result()
+
+
+def canonize_catalog(
+    path: Union[str, Path],
+    *,
+    encoding: Optional[str] = None,
+    delimiter: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    limit: int = 0,
+    block_placeholders: bool = True,
+) -> Tuple[IngestPlan, List[CanonRow]]:
+    plan = plan_ingest(path, encoding=encoding, delimiter=delimiter, chunk_bytes=chunk_bytes)
+    rows = list(iter_canonical_rows(plan, workers=workers, limit=limit, block_placeholders=block_placeholders))
+    return plan, rows
+
+
+def ingest_catalog(
+    path: Union[str, Path],
+    out_path: Union[str, Path],
+    *,
+    encoding: Optional[str] = None,
+    delimiter: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES,
+    limit: int = 0,
+    block_placeholders: bool = True,
+) -> IngestStats:
+    """
+    CSV -> NDJSON de CanonRow (una fila por linea, orden original).
+    Escritura atomica: tmp + os.replace.
+    """
+    plan = plan_ingest(path, encoding=encoding, delimiter=delimiter, chunk_bytes=chunk_bytes)
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+
+    rows = 0
+    with tmp.open("w", encoding="utf-8", newline="\n") as f:
+        for c in iter_canonical_rows(plan, workers=workers, limit=limit, block_placeholders=block_placeholders):
+            f.write(json.dumps(asdict(c), ensure_ascii=False, separators=(",", ":")) + "\n")
+            rows += 1
+    os.replace(str(tmp), str(out))
+
+    return IngestStats(
+        path=plan.path,
+        out_path=str(out),
+        encoding=plan.encoding,
+        delimiter=plan.delimiter,
+        rows=rows,
+        chunks=len(plan.chunks),
+        workers=int(workers) if workers else _default_workers(),
+        header_map=dict(plan.header_map),
+    )
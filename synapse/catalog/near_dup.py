@@ -0,0 +1,195 @@
+# synapse/catalog/near_dup.py
+"""
+Near-duplicate clustering - el mismo producto fisico de varios proveedores.
+
+- texto: title + description normalizados (creative_dedup.normalize_text),
+  shingles de caracteres -> MinHash -> LSH banding; los pares candidatos se
+  confirman con Jaccard exacto (>= threshold)
+- imagen (opcional): mismo basename de image_url => mismo cluster
+  (basenames cortos/genericos tipo "1.jpg" se ignoran)
+- union-find sobre ambos criterios -> cluster_id por producto
+- representante por cluster: max(prefer), empate = primero en el input
+
+cluster_id = menor product_id del cluster (estable mientras ese id exista).
+
+Uso:
+    res = cluster_near_duplicates(rows)                    # dicts canonicos
+    reps = [rows[i] for i in res.representative_indices]  # antes de rankear
+"""
+
+from __future__ import annotations
+
+import posixpath
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Generic, List, Optional, Sequence, TypeVar
+from urllib.parse import urlsplit
+
+from synapse.infra.minhash import LSHIndex, MinHasher, char_shingles, jaccard, pick_bands
+
+T = TypeVar("T")
+
+MIN_IMAGE_STEM = 8  # "1.jpg", "foto.png" no identifican un producto
+
+
+@dataclass
+class NearDupConfig:
+    threshold: float = 0.8       # Jaccard sobre shingles
+    shingle_size: int = 4
+    num_perm: int = 128
+    seed: int = 1
+    use_image_key: bool = False
+
+
+@dataclass
+class NearDupResult(Generic[T]):
+    items: List[T]
+    keys: List[str]
+    cluster_ids: List[str]                                # paralelo a items
+    clusters: Dict[str, List[int]] = field(default_factory=dict)   # cluster_id -> indices
+    representatives: Dict[str, int] = field(default_factory=dict)  # cluster_id -> indice
+
+    @property
+    def representative_indices(self) -> List[int]:
+        """Indices de representantes en el orden original del input."""
+        return sorted(self.representatives.values())
+
+    def representative_items(self) -> List[T]:
+        return [self.items[i] for i in self.representative_indices]
+
+    def cluster_of(self, key: str) -> Optional[str]:
+        try:
+            return self.cluster_ids[self.keys.index(key)]
+        except ValueError:
+            return None
+
+    def summary(self) -> Dict[str, Any]:
+        multi = [c for c in self.clusters.values() if len(c) > 1]
+        return {
+            "items": len(self.items),
+            "clusters": len(self.clusters),
+            "duplicate_clusters": len(multi),
+            "duplicates_removed": len(self.items) - len(self.clusters),
+        }
+
+
+def image_basename_key(url: str) -> str:
+    """Basename (sin extension ni query) de una URL de imagen; '' si no es util."""
+    u = (url or "").strip()
+    if not u:
+        return ""
+    path = urlsplit(u).path if "://" in u else u.split("?", 1)[0]
+    stem = posixpath.splitext(posixpath.basename(path))[0].lower()
+    return stem if len(stem) >= MIN_IMAGE_STEM else ""
+
+
+def _get(item: Any, name: str) -> Any:
+    if isinstance(item, dict):
+        return item.get(name)
+    return getattr(item, name, None)
+
+
+def default_key(item: Any) -> str:
+    return str(_get(item, "product_id") or _get(item, "id") or "").strip()
+
+
+def default_text(item: Any) -> str:
+    return f"{_get(item, 'title') or ''} {_get(item, 'description') or ''}"
+
+
+def default_image_url(item: Any) -> str:
+    return str(_get(item, "image_url") or "")
+
+
+class _UnionFind:
+    def __init__(self, n: int) -> None:
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # la raiz es siempre el indice menor (orden de input estable)
+            if rb < ra:
+                ra, rb = rb, ra
+            self.parent[rb] = ra
+
+
+def cluster_near_duplicates(
+    items: Sequence[T],
+    cfg: Optional[NearDupConfig] = None,
+    *,
+    key: Callable[[T], str] = default_key,
+    text: Callable[[T], str] = default_text,
+    image_url: Callable[[T], str] = default_image_url,
+    prefer: Optional[Callable[[T], Any]] = None,
+) -> NearDupResult[T]:
+    """
+    Agrupa near-duplicates. Items sin texto util solo se agrupan por imagen.
+    `prefer` (mayor = mejor) elige el representante; default = primero.
+    """
+    # lazy: synapse.marketing_os arrastra wave_runner (init hygiene)
+    from synapse.marketing_os.creative_dedup import normalize_text
+
+    cfg = cfg or NearDupConfig()
+    items = list(items)
+    n = len(items)
+    keys = [key(it) or f"#{i}" for i, it in enumerate(items)]
+
+    hasher = MinHasher(cfg.num_perm, seed=cfg.seed)
+    bands, rows = pick_bands(cfg.num_perm, cfg.threshold)
+    index = LSHIndex(bands, rows)
+    uf = _UnionFind(n)
+    shingles: List[set] = []
+
+    for i, it in enumerate(items):
+        sh = char_shingles(normalize_text(text(it)), cfg.shingle_size)
+        shingles.append(sh)
+        if not sh:
+            continue
+        sig = hasher.signature(sh)
+        for j in index.query(sig):
+            j = int(j)
+            if uf.find(j) != uf.find(i) and jaccard(sh, shingles[j]) >= cfg.threshold:
+                uf.union(i, j)
+        index.insert(i, sig)
+
+    if cfg.use_image_key:
+        first_by_image: Dict[str, int] = {}
+        for i, it in enumerate(items):
+            ik = image_basename_key(image_url(it))
+            if ik:
+                uf.union(first_by_image.setdefault(ik, i), i)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(n):
+        groups.setdefault(uf.find(i), []).append(i)
+
+    cluster_ids = [""] * n
+    clusters: Dict[str, List[int]] = {}
+    representatives: Dict[str, int] = {}
+    for root in sorted(groups):
+        members = groups[root]
+        cid = min(keys[i] for i in members)
+        if cid in clusters:  # product_id repetido en dos clusters distintos
+            cid = f"{cid}#{root}"
+        clusters[cid] = members
+        if prefer is None:
+            representatives[cid] = members[0]
+        else:
+            # max() devuelve el primero entre empates
+            representatives[cid] = max(members, key=lambda i: prefer(items[i]))
+        for i in members:
+            cluster_ids[i] = cid
+
+    return NearDupResult(
+        items=items,
+        keys=keys,
+        cluster_ids=cluster_ids,
+        clusters=clusters,
+        representatives=representatives,
+    )
@@ -6,11 +6,13 @@ import argparse
 import hashlib
 import json
 import shutil
-import subprocess
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 import logging
+
+from synapse.render_farm import DEFAULT_CACHE_DIR, DEFAULT_TIMEOUT_S, OUT_PLACEHOLDER, STATUS_CACHED, STATUS_TIMEOUT, RenderSpec, render_batch
+
 logger = logging.getLogger(__name__)
 
 
@@ -198,15 +200,8 @@ def _ffmpeg_escape_path(p: Path) -> str:
     return s
 
 
-def _run_ffmpeg_make_blank(
-    ffmpeg: str,
-    out_mp4: Path,
-    seconds: int,
-    size: str,
-    fps: int,
-) -> Tuple[bool, str]:
-    out_mp4.parent.mkdir(parents=True, exist_ok=True)
-    cmd = [
+def _blank_cmd(ffmpeg: str, out: str, seconds: int, size: str, fps: int) -> List[str]:
+    return [
         ffmpeg,
         "-y",
         "-hide_banner",
@@ -218,40 +213,27 @@ def _run_ffmpeg_make_blank(
         "-t", str(int(seconds)),
         "-shortest",
         "-pix_fmt", "yuv420p",
-        str(out_mp4.resolve()),
+        out,
     ]
-    try:
-        cp = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if cp.returncode != 0:
-            err = (cp.stderr or cp.stdout or "").strip()
-            return False, err[:1600]
-        if not out_mp4.exists() or out_mp4.stat().st_size <= 0:
-            return False, "ffmpeg produced empty output (blank)"
-        return True, "OK"
-    except (KeyError, IndexError, TypeError) as e:
-        return False, f"exception: {e}"
-
-
-def _run_ffmpeg_make_stub(
+
+
+def _stub_cmd(
     ffmpeg: str,
-    out_mp4: Path,
+    out: str,
     textfile: Path,
     seconds: int,
     size: str,
     fps: int,
     fontfile: Optional[str],
     fontsize: int,
-) -> Tuple[bool, str]:
-    out_mp4.parent.mkdir(parents=True, exist_ok=True)
-    textfile.parent.mkdir(parents=True, exist_ok=True)
-
+) -> List[str]:
     tf = _ffmpeg_escape_path(textfile)
     drawtext = f"drawtext=textfile='{tf}':reload=1:fontcolor=white:fontsize={fontsize}:line_spacing=12:x=(w-text_w)/2:y=(h-text_h)/2"
     if fontfile:
         ff = _ffmpeg_escape_path(Path(fontfile))
         drawtext = f"drawtext=fontfile='{ff}':textfile='{tf}':reload=1:fontcolor=white:fontsize={fontsize}:line_spacing=12:x=(w-text_w)/2:y=(h-text_h)/2"
 
-    cmd = [
+    return [
         ffmpeg,
         "-y",
         "-hide_banner",
@@ -264,20 +246,9 @@ def _run_ffmpeg_make_stub(
         "-vf", drawtext,
         "-shortest",
         "-pix_fmt", "yuv420p",
-        str(out_mp4.resolve()),
+        out,
     ]
 
-    try:
-        cp = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        if cp.returncode != 0:
-            err = (cp.stderr or cp.stdout or "").strip()
-            return False, err[:1600]
-        if not out_mp4.exists() or out_mp4.stat().st_size <= 0:
-            return False, "ffmpeg produced empty output"
-        return True, "OK"
-    except (KeyError, IndexError, TypeError) as e:
-        return False, f"exception: {e}"
-
 
 def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(prog="synapse.creative_assets_build", description="Generate stub video assets for Phase-1 publisher.")
@@ -291,6 +262,10 @@ def main(argv: Optional[List[str]] = None) -> int:
     ap.add_argument("--fps", type=int, default=30, help="Frames per second.")
     ap.add_argument("--fontsize", type=int, default=60, help="Font size for drawtext.")
     ap.add_argument("--force", action="store_true", help="Overwrite existing mp4 assets.")
+    ap.add_argument("--workers", type=int, default=0, help="Parallel ffmpeg jobs (0 = CPU cores).")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_S, help="Per-render timeout (seconds).")
+    ap.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Render farm output cache directory.")
+    ap.add_argument("--no-cache", action="store_true", help="Always invoke ffmpeg (skip render cache).")
     args = ap.parse_args(argv)
 
     briefs_path = Path(args.briefs).resolve()
@@ -327,6 +302,13 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     text_dir = assets_dir / "_text"
 
+    seconds = int(args.seconds)
+    size = _safe_str(args.size)
+    fps = int(args.fps)
+
+    # 1) specs (textfiles escritos antes: son input del cache key)
+    specs: List[RenderSpec] = []
+    slots: List[Optional[int]] = []
     for it in items:
         utm = _safe_str(it.get("utm_content"), "UNKNOWN")
         out_mp4 = assets_dir / f"{utm}.mp4"
@@ -334,6 +316,7 @@ def main(argv: Optional[List[str]] = None) -> int:
 
         if out_mp4.exists() and out_mp4.stat().st_size > 0 and not args.force:
             skipped += 1
+            slots.append(None)
             out_items.append({
                 "utm_content": utm,
                 "path": str(out_mp4),
@@ -346,63 +329,63 @@ def main(argv: Optional[List[str]] = None) -> int:
         payload_text = _build_text_payload(it, _safe_str(args.offer))
         textfile.write_text(payload_text, encoding="utf-8")
 
-        ok, msg = _run_ffmpeg_make_stub(
-            ffmpeg=ffmpeg,
-            out_mp4=out_mp4,
-            textfile=textfile,
-            seconds=int(args.seconds),
-            size=_safe_str(args.size),
-            fps=int(args.fps),
-            fontfile=fontfile,
-            fontsize=int(args.fontsize),
-        )
-
-        mode_used = "drawtext"
-        drawtext_error = ""
-        if not ok:
+        slots.append(len(specs))
+        out_items.append({})
+        specs.append(RenderSpec(
+            job_id=utm,
+            cmd=tuple(_stub_cmd(ffmpeg, OUT_PLACEHOLDER, textfile, seconds, size, fps, fontfile, int(args.fontsize))),
             # Failsafe: still create a valid MP4 so pipelines don't die.
-            drawtext_error = msg
-            ok2, msg2 = _run_ffmpeg_make_blank(
-                ffmpeg=ffmpeg,
-                out_mp4=out_mp4,
-                seconds=int(args.seconds),
-                size=_safe_str(args.size),
-                fps=int(args.fps),
-            )
-            if ok2:
-                ok = True
-                msg = f"DRAWTEXT_FAIL_FALLBACK_BLANK: {drawtext_error}"
-                mode_used = "blank_fallback"
-            else:
-                msg = f"DRAWTEXT_ERR: {drawtext_error} | BLANK_ERR: {msg2}"
-                mode_used = "failed"
-
-        if ok:
+            fallback_cmds=(tuple(_blank_cmd(ffmpeg, OUT_PLACEHOLDER, seconds, size, fps)),),
+            out_path=str(out_mp4),
+            inputs=tuple(x for x in (str(textfile), fontfile) if x),
+        ))
+
+    # 2) render farm: pool por cores + cache content-addressed
+    results, farm_summary = render_batch(
+        specs,
+        cache_dir=Path(args.cache_dir).resolve(),
+        workers=int(args.workers) or None,
+        timeout_s=float(args.timeout),
+        use_cache=not args.no_cache,
+    )
+
+    for pos, idx in enumerate(slots):
+        if idx is None:
+            continue
+        spec, r = specs[idx], results[idx]
+        utm = spec.job_id
+        textfile = text_dir / f"{utm}.txt"
+        drawtext_error = r.errors[0] if r.errors else ""
+
+        if r.ok:
+            mode_used = "drawtext" if r.attempt == 0 else "blank_fallback"
+            msg = f"DRAWTEXT_FAIL_FALLBACK_BLANK: {drawtext_error}" if mode_used != "drawtext" else "OK"
             built += 1
-            out_items.append({
+            out_items[pos] = {
                 "utm_content": utm,
-                "path": str(out_mp4),
+                "path": spec.out_path,
                 "status": "BUILT",
                 "mode": mode_used,
                 "note": msg if mode_used != "drawtext" else "",
-                "bytes": int(out_mp4.stat().st_size),
-                "sha256": _sha256_file(out_mp4),
+                "cached": r.status == STATUS_CACHED,
+                "bytes": r.bytes,
+                "sha256": r.sha256,
                 "ffmpeg": ffmpeg,
                 "fontfile": fontfile or "",
                 "textfile": str(textfile),
-            })
+            }
         else:
             failed += 1
-            out_items.append({
+            out_items[pos] = {
                 "utm_content": utm,
-                "path": str(out_mp4),
+                "path": spec.out_path,
                 "status": "FAIL",
-                "mode": mode_used,
-                "error": msg,
+                "mode": "timeout" if r.status == STATUS_TIMEOUT else "failed",
+                "error": " | ".join(r.errors),
                 "ffmpeg": ffmpeg,
                 "fontfile": fontfile or "",
                 "textfile": str(textfile),
-            })
+            }
 
     manifest = {
         "marker": __MARKER__,
@@ -413,10 +396,11 @@ def main(argv: Optional[List[str]] = None) -> int:
         "assets_dir": str(assets_dir),
         "counts": {"items": len(items), "built": built, "skipped": skipped, "failed": failed},
         "assets": out_items,
+        "render_farm": {k: farm_summary[k] for k in ("workers", "elapsed_s", "render_s_total", "counts")},
         "notes": {
             "purpose": "Stub assets to unblock Meta publisher validate/execute pipeline",
             "mode": "template_stub_with_failsafe",
-            "video_spec": {"seconds": int(args.seconds), "size": _safe_str(args.size), "fps": int(args.fps)},
+            "video_spec": {"seconds": seconds, "size": size, "fps": fps},
             "failsafe": "If drawtext fails, a blank MP4 is generated so validate can pass (dev unblock).",
         },
     }
@@ -13,6 +13,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 import logging
+
+from synapse.render_farm import DEFAULT_CACHE_DIR, DEFAULT_TIMEOUT_S, OUT_PLACEHOLDER, STATUS_CACHED, STATUS_TIMEOUT, RenderSpec, render_batch
+
 logger = logging.getLogger(__name__)
 
 __MARKER__ = "CREATIVE_FACTORY_ULTRA_2026-01-14_V1"
@@ -48,13 +51,6 @@ def _safe_str(x: Any, default: str = "") -> str:
     s = str(x).strip()
     return s if s else default
 
-def _sha256_file(p: Path) -> str:
-    h = hashlib.sha256()
-    with p.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return "sha256:" + h.hexdigest()
-
 def _sha256_obj(obj: Any) -> str:
     raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
     return "sha256:" + hashlib.sha256(raw).hexdigest()
@@ -265,33 +261,16 @@ def _build_drawtext_filters(
 
     return ",".join(parts)
 
-def _render_ffmpeg(
-    out_path: Path,
-    beats: List[Beat],
-    duration_s: float,
-    size: str,
-    fps: int,
-    fontfile: Optional[str],
-) -> Tuple[bool, str]:
-    """
-    Render a vertical MP4 using FFmpeg sources only (no external media needed).
-    """
-    if not _which("ffmpeg"):
-        return False, "ffmpeg_not_found"
-
-    # parse size WxH
+def _parse_size(size: str) -> Optional[Tuple[int, int]]:
     try:
         w_str, h_str = size.lower().split("x")
-        w, h = int(w_str), int(h_str)
+        return int(w_str), int(h_str)
     except (ValueError, TypeError):
-        return False, "bad_size"
-
-    vf = _build_drawtext_filters(beats, fontfile=fontfile, w=w, h=h)
-
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+        return None
 
+def _render_cmd(out: str, vf: str, duration_s: float, w: int, h: int, fps: int) -> List[str]:
     # Video source + silent audio (helps platform ingestion)
-    cmd = [
+    return [
         "ffmpeg", "-y",
         "-f", "lavfi", "-i", f"color=c=black:s={w}x{h}:d={duration_s}:r={fps}",
         "-f", "lavfi", "-i", "anullsrc=r=44100:cl=stereo",
@@ -305,26 +284,35 @@ def _render_ffmpeg(
         "-movflags", "+faststart",
         "-c:a", "aac",
         "-b:a", "128k",
-        str(out_path),
+        out,
     ]
 
-    try:
-        subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace")
-        return True, "ok"
-    except subprocess.CalledProcessError as e:
-        # fallback: retry without fontfile (font resolution issues)
-        if fontfile:
-            try:
-                vf2 = _build_drawtext_filters(beats, fontfile=None, w=w, h=h)
-                cmd2 = cmd[:]
-                cmd2[cmd2.index(vf)] = vf2  # replace vf string
-                subprocess.check_output(cmd2, stderr=subprocess.STDOUT, text=True, encoding="utf-8", errors="replace")
-                return True, "ok_font_fallback"
-            except Exception:
-                return False, "ffmpeg_failed"
-        return False, "ffmpeg_failed"
-    except (AttributeError):
-        return False, "ffmpeg_failed"
+def _render_spec(
+    utm: str,
+    out_path: Path,
+    beats: List[Beat],
+    duration_s: float,
+    size: str,
+    fps: int,
+    fontfile: Optional[str],
+) -> Optional[RenderSpec]:
+    """Render MP4 vertical solo con fuentes FFmpeg, como job del render farm (fallback: sin fontfile)."""
+    wh = _parse_size(size)
+    if wh is None:
+        return None
+    w, h = wh
+    cmd = _render_cmd(OUT_PLACEHOLDER, _build_drawtext_filters(beats, fontfile=fontfile, w=w, h=h), duration_s, w, h, fps)
+    fallbacks: Tuple[Tuple[str, ...], ...] = ()
+    if fontfile:
+        vf2 = _build_drawtext_filters(beats, fontfile=None, w=w, h=h)
+        fallbacks = (tuple(_render_cmd(OUT_PLACEHOLDER, vf2, duration_s, w, h, fps)),)
+    return RenderSpec(
+        job_id=utm,
+        cmd=tuple(cmd),
+        fallback_cmds=fallbacks,
+        out_path=str(out_path),
+        inputs=(fontfile,) if fontfile else (),
+    )
 
 def _qa_asset(path: Path, min_size_bytes: int, expected_size: str, max_duration_s: float) -> Tuple[bool, List[str], Dict[str, Any]]:
     """
@@ -378,6 +366,10 @@ def main(argv: Optional[List[str]] = None) -> int:
     ap.add_argument("--min-bytes", type=int, default=50_000, help="Minimum output bytes for QA gate")
     ap.add_argument("--max-duration", type=float, default=25.0, help="Max duration allowed for QA gate")
     ap.add_argument("--dry-run", action="store_true", help="No rendering; just plan + report")
+    ap.add_argument("--workers", type=int, default=0, help="Parallel ffmpeg jobs (0 = CPU cores)")
+    ap.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT_S, help="Per-render timeout seconds")
+    ap.add_argument("--cache-dir", default=str(DEFAULT_CACHE_DIR), help="Render farm output cache directory")
+    ap.add_argument("--no-cache", action="store_true", help="Always invoke ffmpeg (skip render cache)")
     args = ap.parse_args(argv)
 
     briefs_path = Path(args.briefs).resolve()
@@ -404,13 +396,12 @@ def main(argv: Optional[List[str]] = None) -> int:
     manifest_items: List[Dict[str, Any]] = []
     errors: List[Dict[str, Any]] = []
 
+    # 1) plan + specs
+    jobs: List[Tuple[Dict[str, Any], RenderSpec]] = []
     for b in briefs:
         if not isinstance(b, dict):
             continue
         utm = _safe_str(b.get("utm_content"), "UNKNOWN")
-        hook_id = _safe_str(b.get("hook_id"), "")
-        angle = _safe_str(b.get("angle"), "")
-        fmt = _safe_str(b.get("format"), "")
 
         beats, policy_flags = _build_beats(b, duration_s=float(args.duration))
         out_mp4 = assets_dir / f"{utm}.mp4"
@@ -433,7 +424,8 @@ def main(argv: Optional[List[str]] = None) -> int:
             results.append({"utm_content": utm, "status": "FAIL", "error": err["error"]})
             continue
 
-        ok, reason = _render_ffmpeg(
+        spec = _render_spec(
+            utm,
             out_path=out_mp4,
             beats=beats,
             duration_s=float(args.duration),
@@ -441,11 +433,38 @@ def main(argv: Optional[List[str]] = None) -> int:
             fps=int(args.fps),
             fontfile=fontfile,
         )
-        if not ok:
+        if spec is None:
+            errors.append({"utm_content": utm, "error": "bad_size"})
+            results.append({"utm_content": utm, "status": "FAIL", "error": "bad_size", "out_mp4": str(out_mp4)})
+            continue
+        jobs.append(({"brief": b, "policy_flags": policy_flags}, spec))
+
+    # 2) render farm: pool por cores, cache content-addressed, timeout por job
+    rendered, farm_summary = render_batch(
+        [spec for _, spec in jobs],
+        cache_dir=Path(args.cache_dir).resolve(),
+        workers=int(args.workers) or None,
+        timeout_s=float(args.timeout),
+        use_cache=not args.no_cache,
+    )
+
+    # 3) QA + manifest (orden de los briefs)
+    for (ctx, spec), r in zip(jobs, rendered):
+        b = ctx["brief"]
+        policy_flags = ctx["policy_flags"]
+        utm = spec.job_id
+        hook_id = _safe_str(b.get("hook_id"), "")
+        angle = _safe_str(b.get("angle"), "")
+        fmt = _safe_str(b.get("format"), "")
+        out_mp4 = Path(spec.out_path)
+
+        if not r.ok:
+            reason = "ffmpeg_timeout" if r.status == STATUS_TIMEOUT else "ffmpeg_failed"
             err = {"utm_content": utm, "error": reason}
             errors.append(err)
             results.append({"utm_content": utm, "status": "FAIL", "error": reason, "out_mp4": str(out_mp4)})
             continue
+        reason = "ok" if r.attempt == 0 else "ok_font_fallback"
 
         qa_ok, qa_issues, meta = _qa_asset(
             out_mp4,
@@ -453,7 +472,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             expected_size=_safe_str(args.size, "1080x1920"),
             max_duration_s=float(args.max_duration),
         )
-        sha = _sha256_file(out_mp4) if out_mp4.exists() else ""
+        sha = r.sha256
 
         item = {
             "utm_content": utm,
@@ -467,6 +486,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             "meta": meta,
             "render_marker": __MARKER__,
             "render_ts": _utc_now_z(),
+            "render_cached": r.status == STATUS_CACHED,
         }
         manifest_items.append(item)
 
@@ -499,6 +519,7 @@ def main(argv: Optional[List[str]] = None) -> int:
         "briefs_path": str(briefs_path),
         "counts": {"planned": len(plan_items), "results": len(results), "errors": len(errors)},
         "env": {"ffmpeg_present": ffmpeg_ok, "ffprobe_present": bool(_which("ffprobe")), "fontfile": fontfile or ""},
+        "render_farm": {k: farm_summary[k] for k in ("workers", "elapsed_s", "render_s_total", "counts")},
         "plan": plan_items,
         "results": results,
         "errors": errors,
@@ -47,6 +47,11 @@ class ProductCandidate:
     keyword_matches: List[str] = field(default_factory=list)
     match_score: float = 0.0
     
+    # Near-duplicates (synapse.catalog.near_dup)
+    description: str = ""
+    cluster_id: str = ""
+    cluster_size: int = 1
+    
     def __post_init__(self):
         if self.price > 0 and self.cost > 0:
             self.margin_absolute = self.price - self.cost
@@ -206,6 +211,7 @@ class CatalogScanner:
                 category=p.get("category", ""),
                 price=price,
                 cost=cost,
+                description=p.get("description", "") or "",
                 rating=rating,
                 reviews=reviews,
                 sales=sales,
@@ -1,6 +1,6 @@
 # synapse/discovery/pipeline_orchestrator.py
 """
-Pipeline Orchestrator - E2E: nicho -> scan -> rank -> top -> kits.
+Pipeline Orchestrator - E2E: nicho -> scan -> dedup -> rank -> top -> kits.
 
 Un comando = De nicho seleccionado a marketing kits listos.
 """
@@ -28,6 +28,11 @@ class PipelineConfig:
     min_rating: float = 3.5
     scan_limit: int = 200
     
+    # Near-duplicate config (mismo producto, varios proveedores)
+    dedup_near_duplicates: bool = True
+    dedup_threshold: float = 0.8
+    dedup_image_key: bool = False
+    
     # Rank config
     top_n: int = 10
     min_score: float = 0.4
@@ -50,6 +55,7 @@ class PipelineResult:
     
     # Stages
     scan_result: Optional[ScanResult] = None
+    dedup_summary: Dict[str, Any] = field(default_factory=dict)
     ranking_result: Optional[RankingResult] = None
     
     # Final output
@@ -74,6 +80,7 @@ class PipelineResult:
             "niche_name": self.niche_name,
             "status": self.status,
             "top_products_count": len(self.top_products),
+            "duplicates_removed": int(self.dedup_summary.get("duplicates_removed", 0)),
             "kits_generated": self.kits_generated,
             "duration_seconds": self.duration_seconds,
         }
@@ -167,10 +174,15 @@ class PipelineOrchestrator:
                 result.error = "No candidates found in scan"
                 return result
             
-            # Stage 2: Rank products
+            # Stage 2: Collapse near-duplicates (1 representante por cluster)
+            candidates = scan_result.candidates
+            if cfg.dedup_near_duplicates:
+                candidates = self._dedup_candidates(candidates, cfg, result)
+            
+            # Stage 3: Rank products
             result.status = "ranking"
             ranking_result = self.product_ranker.rank(
-                candidates=scan_result.candidates,
+                candidates=candidates,
                 top_n=cfg.top_n,
                 min_score=cfg.min_score,
             )
@@ -183,7 +195,7 @@ class PipelineOrchestrator:
                 result.error = "No products passed ranking threshold"
                 return result
             
-            # Stage 3: Generate kits (if enabled)
+            # Stage 4: Generate kits (if enabled)
             if cfg.generate_kits:
                 result.status = "generating"
                 kit_paths = self._generate_kits(result.top_products, niche)
@@ -206,6 +218,23 @@ class PipelineOrchestrator:
         
         return result
     
+    def _dedup_candidates(
+        self, candidates: List[ProductCandidate], cfg: PipelineConfig, result: PipelineResult
+    ) -> List[ProductCandidate]:
+        """Asigna cluster_id y deja solo el mejor candidato de cada cluster."""
+        from synapse.catalog.near_dup import NearDupConfig, cluster_near_duplicates
+        
+        res = cluster_near_duplicates(
+            candidates,
+            NearDupConfig(threshold=cfg.dedup_threshold, use_image_key=cfg.dedup_image_key),
+            prefer=lambda c: (c.margin_percent, c.rating, c.reviews, c.images_count),
+        )
+        for c, cid in zip(candidates, res.cluster_ids):
+            c.cluster_id = cid
+            c.cluster_size = len(res.clusters[cid])
+        result.dedup_summary = res.summary()
+        return res.representative_items()
+    
     def _generate_kits(self, products: List[ProductScore], niche: NicheProfile) -> List[str]:
         """Genera marketing kits para productos top."""
         kit_paths = []
@@ -10,13 +10,16 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 import json
 import math
 from pathlib import Path
 
 from .catalog_scanner import ProductCandidate
 
+if TYPE_CHECKING:
+    from synapse.catalog.delta import DeltaState
+
 
 @dataclass
 class ProductScore:
@@ -88,14 +91,17 @@ class ProductRanker:
         candidates: List[ProductCandidate],
         top_n: int = 10,
         min_score: float = 0.4,
+        delta_state: Optional["DeltaState"] = None,
     ) -> RankingResult:
         """
         Rankea productos y retorna top N.
+
+        Con `delta_state` solo se re-scorean candidatos nuevos/cambiados
+        (fingerprint de candidato + weights); el resto sale del estado.
         """
         scored = []
         
-        for candidate in candidates:
-            score = self._score_product(candidate)
+        for score in self._score_all(candidates, delta_state):
             if score.total_score >= min_score:
                 scored.append(score)
         
@@ -123,6 +129,31 @@ class ProductRanker:
             score_distribution=distribution,
         )
     
+    def _score_all(self, candidates: List[ProductCandidate], delta_state: Optional["DeltaState"]) -> List[ProductScore]:
+        if delta_state is None:
+            return [self._score_product(c) for c in candidates]
+
+        from synapse.catalog.delta import row_fingerprint
+
+        salt = json.dumps(self.weights, sort_keys=True)
+        by_id: Dict[str, ProductCandidate] = {}
+        loose: List[ProductCandidate] = []
+        for c in candidates:
+            if c.product_id and c.product_id not in by_id:
+                by_id[c.product_id] = c
+            else:
+                loose.append(c)  # sin id o repetido: no cacheable
+
+        results, _ = delta_state.run_stage(
+            "product_ranker",
+            by_id,
+            lambda items: [self._score_product(c) for c in items],
+            fingerprint=lambda c: row_fingerprint(asdict(c), salt=salt),
+            encode=asdict,
+            decode=lambda d: ProductScore(**d),
+        )
+        return list(results.values()) + [self._score_product(c) for c in loose]
+
     def _score_product(self, p: ProductCandidate) -> ProductScore:
         """Calcula scores para un producto."""
         
@@ -24,16 +24,26 @@ class CircuitBreaker:
             return False
         return True
 
-    def call(self, fn: Callable[[], T]) -> T:
+    def check(self) -> None:
+        """Para callers que no pasan por call() (ej. clientes async)."""
         if self._is_open():
             raise CircuitOpenError("circuit_open")
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.time()
+
+    def call(self, fn: Callable[[], T]) -> T:
+        self.check()
         try:
             out = fn()
-            self._failures = 0
-            self._opened_at = None
+            self.record_success()
             return out
         except (AttributeError):
-            self._failures += 1
-            if self._failures >= self.failure_threshold:
-                self._opened_at = time.time()
+            self.record_failure()
             raise
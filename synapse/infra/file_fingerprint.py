@@ -1,14 +1,37 @@
+"""
+File fingerprints (sha256) de los <FILE:...> de un plan de publish.
+
+Cache persistente (data/cache/file_fingerprints.json bajo cwd):
+- key = path absoluto; hit solo si (size, mtime_ns, inode, dev, ctime_ns)
+  coinciden exactamente con el stat actual. ctime cubre el caso de un
+  utime() que restaura mtime despues de reescribir el archivo.
+- No se cachean hashes "racy": archivo tocado (mtime/ctime) hace menos de
+  RACY_WINDOW_NS al momento de hashear (los timestamps del FS tienen
+  granularidad gruesa), o cuyo stat cambio mientras se leia.
+- Cache corrupto/ilegible = vacio. Escritura atomica (tmp + os.replace).
+- Misses se hashean en paralelo (hashlib libera el GIL en bloques grandes).
+- SYNAPSE_FP_CACHE=0 desactiva el cache.
+"""
+
 from __future__ import annotations
 
 import hashlib
 import json
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 FILE_REF_RE = re.compile(r"^<FILE:([^>]+)>$")
 
+DEFAULT_CACHE_REL = Path("data/cache/file_fingerprints.json")
+CACHE_VERSION = 1
+RACY_WINDOW_NS = 2 * 1_000_000_000
+DEFAULT_HASH_WORKERS = 4
+
 
 def _sha256_file(path: Path, *, chunk_size: int = 8 * 1024 * 1024) -> str:
     h = hashlib.sha256()
@@ -21,6 +44,80 @@ def _sha256_file(path: Path, *, chunk_size: int = 8 * 1024 * 1024) -> str:
     return h.hexdigest()
 
 
+def _stat_key(st: os.stat_result) -> Dict[str, int]:
+    return {
+        "size": int(st.st_size),
+        "mtime_ns": int(st.st_mtime_ns),
+        "ino": int(st.st_ino),
+        "dev": int(st.st_dev),
+        "ctime_ns": int(st.st_ctime_ns),
+    }
+
+
+@dataclass
+class FingerprintCache:
+    path: Path
+    entries: Dict[str, Dict[str, Any]]
+    hits: int = 0
+    misses: int = 0
+    dirty: bool = False
+
+    @classmethod
+    def load(cls, path: Path) -> "FingerprintCache":
+        entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            obj = json.loads(path.read_text(encoding="utf-8"))
+            if isinstance(obj, dict) and obj.get("version") == CACHE_VERSION and isinstance(obj.get("entries"), dict):
+                entries = {k: v for k, v in obj["entries"].items() if isinstance(v, dict)}
+        except (OSError, ValueError):
+            pass
+        return cls(path=path, entries=entries)
+
+    def get(self, key: str, st: os.stat_result) -> Optional[str]:
+        e = self.entries.get(key)
+        if e is not None and all(e.get(k) == v for k, v in _stat_key(st).items()) and e.get("sha256"):
+            self.hits += 1
+            return str(e["sha256"])
+        self.misses += 1
+        return None
+
+    def put(self, key: str, st: os.stat_result, sha: str) -> None:
+        self.entries[key] = {**_stat_key(st), "sha256": sha}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        # fuera los archivos que ya no existen (el cache no crece sin limite)
+        entries = {k: v for k, v in self.entries.items() if os.path.exists(k)}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(
+                json.dumps({"version": CACHE_VERSION, "entries": entries}, ensure_ascii=False, sort_keys=True),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+        except OSError:
+            return  # cache best-effort: nunca rompe el fingerprint
+        self.dirty = False
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("SYNAPSE_FP_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _hash_stable(p: Path) -> Tuple[str, Optional[os.stat_result]]:
+    """sha256 + stat si el resultado es cacheable (archivo quieto mientras se leyo)."""
+    before = p.stat()
+    sha = _sha256_file(p)
+    after = p.stat()
+    touched_ns = max(after.st_mtime_ns, after.st_ctime_ns)
+    if _stat_key(before) != _stat_key(after) or time.time_ns() - touched_ns < RACY_WINDOW_NS:
+        return sha, None
+    return sha, after
+
+
 def _safe_abs(path_str: str, *, cwd: Path) -> Path:
     p = Path(path_str).expanduser()
     if not p.is_absolute():
@@ -80,23 +177,33 @@ def compute_file_fingerprints_from_steps(
     *,
     cwd: Optional[Path] = None,
     algo: str = "sha256",
+    use_cache: bool = True,
+    cache_path: Optional[Path] = None,
+    workers: int = DEFAULT_HASH_WORKERS,
 ) -> Dict[str, Any]:
     """
     Devuelve un snapshot determinista para meter en runtime_snapshot.
     - NO imprime secretos.
     - Si falta archivo: marca missing=True, sha256=""
+    - sha256 via cache persistente (ver docstring del modulo); misses en paralelo.
     """
     cwd2 = cwd or Path.cwd()
     file_refs = collect_file_paths_from_steps(steps)
+    cache = FingerprintCache.load(cache_path or (cwd2 / DEFAULT_CACHE_REL)) if (use_cache and _cache_enabled()) else None
 
     entries: Dict[str, Dict[str, Any]] = {}
+    to_hash: List[Tuple[str, Path]] = []
     for ref in file_refs:
         p = _safe_abs(ref, cwd=cwd2)
         key = str(p)
 
         if p.exists() and p.is_file():
             st = p.stat()
-            sha = _sha256_file(p) if algo == "sha256" else ""
+            sha = ""
+            if algo == "sha256":
+                sha = (cache.get(key, st) if cache is not None else None) or ""
+                if not sha:
+                    to_hash.append((key, p))
             entries[key] = {
                 "missing": False,
                 "size": int(st.st_size),
@@ -113,6 +220,22 @@ def compute_file_fingerprints_from_steps(
                 "sha256_12": "",
             }
 
+    if to_hash:
+        n = max(1, min(int(workers), len(to_hash)))
+        with ThreadPoolExecutor(max_workers=n) as ex:
+            hashed = list(ex.map(lambda kp: _hash_stable(kp[1]), to_hash))
+        for (key, _), (sha, st) in zip(to_hash, hashed):
+            entries[key]["sha256"] = sha
+            entries[key]["sha256_12"] = sha[:12]
+            if st is not None:
+                # el entry refleja el stat con el que se hasheo
+                entries[key]["size"] = int(st.st_size)
+                entries[key]["mtime_ns"] = int(st.st_mtime_ns)
+                if cache is not None:
+                    cache.put(key, st, sha)
+    if cache is not None:
+        cache.save()
+
     # hash global determinista
     material = json.dumps(entries, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
     overall = hashlib.sha256(material.encode("utf-8")).hexdigest()
@@ -124,4 +247,5 @@ def compute_file_fingerprints_from_steps(
         "overall_sha256": overall,
         "overall_sha12": overall[:12],
         "entries": entries,  # path abs -> meta
+        "cache": {"hits": cache.hits, "misses": cache.misses} if cache is not None else None,
     }
@@ -0,0 +1,332 @@
+# synapse/infra/http_pool.py
+"""
+Transporte HTTP compartido con conexiones keep-alive (http.client).
+
+- Pool por host (scheme, host:port): hasta `max_per_host` requests en vuelo,
+  conexiones ociosas reusables hasta `idle_timeout_s`.
+- Se monta como handler de urllib (install_pooled_transport): los clientes
+  siguen llamando urllib.request.urlopen(...) y pasan por el pool; los tests
+  que mockean urlopen no cambian.
+- enforce_url_policy() se aplica en cada request que sale por el pool
+  (incluye redirects), ademas de lo que ya haga cada cliente.
+- El body de la respuesta se lee completo antes de devolver la conexion al
+  pool (las APIs que usamos responden JSON chico).
+- Antes de reusar una conexion ociosa se descarta si el server ya la cerro
+  (socket legible = EOF). Si igual falla por keep-alive vencido se reintenta
+  con conexion nueva solo cuando es seguro: el request no llego a escribirse
+  completo, o el metodo es idempotente. Un POST ya enviado nunca se re-envia.
+- Fallos al conectar/enviar salen como URLError (igual que do_open de
+  urllib); un timeout leyendo la respuesta sale como TimeoutError.
+"""
+
+from __future__ import annotations
+
+import http.client
+import io
+import os
+import select
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import urllib.response
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from infra.network_guard import enforce_url_policy
+
+__MARKER__ = "HTTP_POOL_2026-10-18_V2"
+
+PoolKey = Tuple[str, str]  # (scheme, host[:port])
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS", "TRACE"})
+_STALE_ERRORS = (ConnectionResetError, BrokenPipeError, http.client.BadStatusLine)
+_DEFAULT_TIMEOUT = getattr(socket, "_GLOBAL_DEFAULT_TIMEOUT", None)
+
+
+class SendError(OSError):
+    """Fallo al conectar o escribir el request: el server no recibio un request completo."""
+
+    def __init__(self, err: BaseException) -> None:
+        super().__init__(str(err))
+        self.err = err
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, "") or default))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return max(0.0, float(os.getenv(name, "") or default))
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_per_host: int = 8
+    idle_timeout_s: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> "PoolConfig":
+        return cls(
+            max_per_host=_env_int("SYNAPSE_HTTP_POOL_SIZE", cls.max_per_host),
+            idle_timeout_s=_env_float("SYNAPSE_HTTP_POOL_IDLE_S", cls.idle_timeout_s),
+        )
+
+
+@dataclass
+class HostMetrics:
+    requests: int = 0
+    opened: int = 0
+    reused: int = 0
+    expired: int = 0
+    dropped: int = 0
+    stale_retries: int = 0
+    errors: int = 0
+
+
+@dataclass
+class _HostPool:
+    slots: threading.BoundedSemaphore
+    idle: List[Tuple[http.client.HTTPConnection, float]] = field(default_factory=list)
+    metrics: HostMetrics = field(default_factory=HostMetrics)
+
+
+def _dropped(conn: http.client.HTTPConnection) -> bool:
+    """Conexion ociosa que el server ya cerro (o que tiene bytes inesperados)."""
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool:
+    def __init__(self, config: Optional[PoolConfig] = None) -> None:
+        self.config = config or PoolConfig()
+        self._hosts: Dict[PoolKey, _HostPool] = {}
+        self._lock = threading.Lock()
+
+    def _host(self, key: PoolKey) -> _HostPool:
+        with self._lock:
+            hp = self._hosts.get(key)
+            if hp is None:
+                hp = _HostPool(slots=threading.BoundedSemaphore(self.config.max_per_host))
+                self._hosts[key] = hp
+            return hp
+
+    def _checkout(self, hp: _HostPool) -> Optional[http.client.HTTPConnection]:
+        now = time.monotonic()
+        with self._lock:
+            while hp.idle:
+                conn, since = hp.idle.pop()  # LIFO: la mas reciente esta mas viva
+                if now - since > self.config.idle_timeout_s:
+                    hp.metrics.expired += 1
+                elif _dropped(conn):
+                    hp.metrics.dropped += 1
+                else:
+                    return conn
+                conn.close()
+        return None
+
+    def _checkin(self, hp: _HostPool, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            hp.idle.append((conn, time.monotonic()))
+
+    def send(
+        self,
+        key: PoolKey,
+        new_conn: Any,
+        *,
+        method: str,
+        path: str,
+        body: Any,
+        headers: Dict[str, str],
+        timeout: Optional[float],
+    ) -> Tuple[int, str, http.client.HTTPMessage, bytes]:
+        """
+        (status, reason, headers, body). Fallos al conectar/escribir -> SendError;
+        errores leyendo la respuesta se propagan tal cual (OSError, HTTPException).
+        """
+        hp = self._host(key)
+        replayable = body is None or isinstance(body, (bytes, bytearray))
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        with hp.slots:
+            while True:
+                conn = self._checkout(hp)
+                reused = conn is not None
+                if conn is None:
+                    conn = new_conn()
+                    with self._lock:
+                        hp.metrics.opened += 1
+                else:
+                    with self._lock:
+                        hp.metrics.reused += 1
+                conn.timeout = timeout
+                if conn.sock is not None:
+                    # urlopen sin timeout manda el centinela de socket, no un numero
+                    conn.sock.settimeout(socket.getdefaulttimeout() if timeout is _DEFAULT_TIMEOUT else timeout)
+                try:
+                    conn.request(method, path, body=body, headers=headers)
+                except BaseException as e:
+                    conn.close()
+                    # request incompleto: el server no lo pudo procesar, se puede repetir
+                    if reused and replayable and isinstance(e, _STALE_ERRORS):
+                        with self._lock:
+                            hp.metrics.stale_retries += 1
+                        continue
+                    with self._lock:
+                        hp.metrics.errors += 1
+                    if isinstance(e, OSError):
+                        raise SendError(e) from e
+                    raise
+                try:
+                    resp = conn.getresponse()
+                    data = resp.read()
+                except BaseException as e:
+                    conn.close()
+                    # el request ya salio: solo se repite si repetirlo no duplica efectos
+                    if reused and replayable and idempotent and isinstance(e, _STALE_ERRORS):
+                        with self._lock:
+                            hp.metrics.stale_retries += 1
+                        continue
+                    with self._lock:
+                        hp.metrics.errors += 1
+                    raise
+                with self._lock:
+                    hp.metrics.requests += 1
+                if resp.will_close:
+                    conn.close()
+                else:
+                    self._checkin(hp, conn)
+                return resp.status, resp.reason, resp.msg, data
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            out = {}
+            for (scheme, host), hp in sorted(self._hosts.items()):
+                m = asdict(hp.metrics)
+                m["idle"] = len(hp.idle)
+                out[f"{scheme}://{host}"] = m
+            return out
+
+    def close(self) -> None:
+        with self._lock:
+            for hp in self._hosts.values():
+                for conn, _ in hp.idle:
+                    conn.close()
+                hp.idle.clear()
+
+
+class _PooledOpenMixin:
+    pool: ConnectionPool
+
+    def _pooled_open(self, req: urllib.request.Request, scheme: str, new_conn: Any) -> Any:
+        enforce_url_policy(req.full_url)
+        host = req.host
+        if not host:
+            raise urllib.error.URLError("no host given")
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        headers.setdefault("Connection", "keep-alive")
+
+        try:
+            status, reason, msg, data = self.pool.send(
+                (scheme, host),
+                lambda: new_conn(host, req.timeout),
+                method=req.get_method(),
+                path=req.selector,
+                body=req.data,
+                headers=headers,
+                timeout=req.timeout,
+            )
+        except SendError as err:
+            raise urllib.error.URLError(err.err)  # como do_open: connect/send -> URLError
+        except TimeoutError:
+            raise  # mismo comportamiento que un read timeout de urlopen
+        except OSError as err:
+            raise urllib.error.URLError(err)
+
+        resp = urllib.response.addinfourl(io.BytesIO(data), msg, req.full_url, status)
+        resp.msg = reason  # lo que espera HTTPErrorProcessor
+        return resp
+
+
+class PooledHTTPHandler(_PooledOpenMixin, urllib.request.HTTPHandler):
+    def __init__(self, pool: ConnectionPool) -> None:
+        super().__init__()
+        self.pool = pool
+
+    def http_open(self, req: urllib.request.Request) -> Any:
+        if getattr(req, "_tunnel_host", None):
+            return super().http_open(req)
+        return self._pooled_open(req, "http", lambda host, timeout: http.client.HTTPConnection(host, timeout=timeout))
+
+
+class PooledHTTPSHandler(_PooledOpenMixin, urllib.request.HTTPSHandler):
+    def __init__(self, pool: ConnectionPool) -> None:
+        super().__init__()
+        self.pool = pool
+
+    def https_open(self, req: urllib.request.Request) -> Any:
+        if getattr(req, "_tunnel_host", None):
+            return super().https_open(req)
+        ctx = getattr(self, "_context", None)
+        return self._pooled_open(
+            req, "https", lambda host, timeout: http.client.HTTPSConnection(host, timeout=timeout, context=ctx)
+        )
+
+
+_shared_pool: Optional[ConnectionPool] = None
+_install_lock = threading.Lock()
+
+
+def shared_pool() -> ConnectionPool:
+    global _shared_pool
+    with _install_lock:
+        if _shared_pool is None:
+            _shared_pool = ConnectionPool(PoolConfig.from_env())
+        return _shared_pool
+
+
+def build_pooled_opener(pool: Optional[ConnectionPool] = None) -> urllib.request.OpenerDirector:
+    p = pool or shared_pool()
+    return urllib.request.build_opener(PooledHTTPHandler(p), PooledHTTPSHandler(p))
+
+
+_installed_for: Optional[ConnectionPool] = None
+
+
+def install_pooled_transport(config: Optional[PoolConfig] = None) -> ConnectionPool:
+    """
+    Idempotente: instala el opener con pool como opener global de urllib.
+    Con `config` distinto se reemplaza el pool compartido (cerrando el anterior).
+    """
+    global _shared_pool, _installed_for
+    with _install_lock:
+        if config is not None and (_shared_pool is None or _shared_pool.config != config):
+            if _shared_pool is not None:
+                _shared_pool.close()
+            _shared_pool = ConnectionPool(config)
+        elif _shared_pool is None:
+            _shared_pool = ConnectionPool(PoolConfig.from_env())
+        pool = _shared_pool
+        if _installed_for is not pool:
+            urllib.request.install_opener(build_pooled_opener(pool))
+            _installed_for = pool
+        return pool
+
+
+def pool_metrics() -> Dict[str, Dict[str, int]]:
+    return shared_pool().metrics()
@@ -0,0 +1,130 @@
+# synapse/infra/minhash.py
+"""
+MinHash + LSH banding (stdlib, deterministico).
+
+Primitivas compartidas para near-duplicate detection:
+- char_shingles / word_shingles: texto normalizado -> set de shingles
+- MinHasher: set -> firma de num_perm enteros (hash estable, no usa hash())
+- LSHIndex: banding (bands x rows) -> solo pares candidatos; el caller
+  verifica Jaccard exacto sobre los sets
+
+La probabilidad de que un par con Jaccard s sea candidato es
+1 - (1 - s**rows)**bands; pick_bands() elige (bands, rows) acotando la
+probabilidad de perder un par en el threshold (prioriza recall: los falsos
+positivos se descartan con el Jaccard exacto).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import random
+from typing import Dict, Hashable, Iterable, List, Sequence, Set, Tuple
+
+_MERSENNE = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def char_shingles(text: str, k: int = 4) -> Set[str]:
+    """Shingles de k caracteres sobre texto ya normalizado. Texto corto = 1 shingle."""
+    t = text or ""
+    if not t:
+        return set()
+    if len(t) <= k:
+        return {t}
+    return {t[i:i + k] for i in range(len(t) - k + 1)}
+
+
+def word_shingles(text: str, k: int = 1) -> Set[str]:
+    """Shingles de k palabras (k=1 == token set)."""
+    words = [w for w in (text or "").split(" ") if w]
+    if k <= 1:
+        return set(words)
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / float(len(a) + len(b) - inter)
+
+
+def _token_hash(tok: str) -> int:
+    return int.from_bytes(hashlib.blake2b(tok.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class MinHasher:
+    """Familia de num_perm hashes universales (a*x + b) mod p, fija por seed."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1) -> None:
+        if num_perm <= 0:
+            raise ValueError("num_perm must be > 0")
+        rng = random.Random(seed)
+        self.num_perm = int(num_perm)
+        self._perms: List[Tuple[int, int]] = [
+            (rng.randrange(1, _MERSENNE), rng.randrange(0, _MERSENNE)) for _ in range(self.num_perm)
+        ]
+
+    def signature(self, tokens: Iterable[str]) -> Tuple[int, ...]:
+        hs = [_token_hash(t) for t in set(tokens)]
+        if not hs:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(min(((a * x + b) % _MERSENNE) & _MAX_HASH for x in hs) for a, b in self._perms)
+
+
+def miss_probability(threshold: float, bands: int, rows: int) -> float:
+    """P(un par con Jaccard == threshold no comparte ninguna banda)."""
+    return (1.0 - float(threshold) ** rows) ** bands
+
+
+def pick_bands(num_perm: int, threshold: float, *, max_miss: float = 1e-4) -> Tuple[int, int]:
+    """
+    (bands, rows) con bands*rows == num_perm: el mas selectivo (mas rows =
+    menos candidatos) cuya miss_probability en threshold sea <= max_miss.
+    Sin opcion valida -> rows=1 (maximo recall).
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if miss_probability(threshold, bands, rows) <= max_miss:
+            best = (bands, rows)
+    return best
+
+
+class LSHIndex:
+    """Buckets por banda; query() devuelve keys que comparten al menos una banda."""
+
+    def __init__(self, bands: int, rows: int) -> None:
+        if bands <= 0 or rows <= 0:
+            raise ValueError("bands/rows must be > 0")
+        self.bands = int(bands)
+        self.rows = int(rows)
+        self._buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._order: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def _band_keys(self, sig: Sequence[int]) -> List[Tuple[int, ...]]:
+        if len(sig) < self.bands * self.rows:
+            raise ValueError(f"signature too short: {len(sig)} < {self.bands * self.rows}")
+        r = self.rows
+        return [tuple(sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def insert(self, key: Hashable, sig: Sequence[int]) -> None:
+        self._order.setdefault(key, len(self._order))
+        for bucket, bk in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(bk, []).append(key)
+
+    def query(self, sig: Sequence[int]) -> List[Hashable]:
+        """Candidatos en orden de insercion (sin repetidos)."""
+        seen: Set[Hashable] = set()
+        for bucket, bk in zip(self._buckets, self._band_keys(sig)):
+            seen.update(bucket.get(bk, ()))
+        return sorted(seen, key=self._order.__getitem__)
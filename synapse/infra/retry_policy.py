@@ -1,10 +1,11 @@
 """Central retry policy with exponential backoff + jitter. AUTO: F1_CORE_BOOTSTRAP_2026_02"""
 
 from __future__ import annotations
+import asyncio
 import random
 import time
 from dataclasses import dataclass
-from typing import Callable, TypeVar, Tuple
+from typing import Awaitable, Callable, TypeVar, Tuple
 
 T = TypeVar("T")
 
@@ -14,6 +15,12 @@ class RetryPolicy:
     base_delay_s: float
     max_delay_s: float
 
+    def delay_s(self, attempt: int) -> float:
+        """Backoff (con jitter) tras el intento `attempt` (1-based) fallido."""
+        exp = self.base_delay_s * (2 ** (attempt - 1))
+        delay = min(self.max_delay_s, exp)
+        return delay * (0.7 + random.random() * 0.6)
+
     def run(self, fn: Callable[[], T], retry_on: Tuple[type, ...] = (Exception,)) -> T:
         attempt = 0
         last_err: Exception | None = None
@@ -25,8 +32,20 @@ class RetryPolicy:
                 last_err = e
                 if attempt >= self.max_attempts:
                     raise
-                exp = self.base_delay_s * (2 ** (attempt - 1))
-                delay = min(self.max_delay_s, exp)
-                delay = delay * (0.7 + random.random() * 0.6)
-                time.sleep(delay)
+                time.sleep(self.delay_s(attempt))
+        raise last_err or RuntimeError("retry_policy_failed")
+
+    async def run_async(self, fn: Callable[[], Awaitable[T]], retry_on: Tuple[type, ...] = (Exception,)) -> T:
+        """Igual que run(), pero el backoff es asyncio.sleep (no bloquea el loop)."""
+        attempt = 0
+        last_err: Exception | None = None
+        while attempt < self.max_attempts:
+            attempt += 1
+            try:
+                return await fn()
+            except retry_on as e:
+                last_err = e
+                if attempt >= self.max_attempts:
+                    raise
+                await asyncio.sleep(self.delay_s(attempt))
         raise last_err or RuntimeError("retry_policy_failed")
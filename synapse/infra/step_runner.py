@@ -0,0 +1,307 @@
+# synapse/infra/step_runner.py
+"""
+Step runner: DAG de stages con inputs/outputs declarados.
+
+- Dependencias derivadas de los paths declarados (en orden de declaracion):
+  B depende de A si B lee/escribe algo que A escribe, o si B escribe algo
+  que A lee. `after` agrega dependencias explicitas.
+- Stages independientes corren en paralelo (threads).
+- Skip por fingerprint: si los inputs y outputs de un stage coinciden con lo
+  que quedo tras su ultima corrida OK (misma cmd/env), no se re-ejecuta.
+- Ejecucion in-process (import + main(argv), stdout/stderr capturados por
+  thread) o aislada en subprocess (`python -m module args`).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib
+import inspect
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+MODE_INPROC = "inproc"
+MODE_SUBPROCESS = "subprocess"
+
+STATUS_RAN = "RAN"
+STATUS_SKIPPED = "SKIPPED_UNCHANGED"
+
+_TAIL = 2000
+
+
+@dataclass(frozen=True, slots=True)
+class Stage:
+    """Stage declarativo: modulo con main(argv) + paths que lee/escribe."""
+
+    name: str
+    module: str
+    args: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    after: Tuple[str, ...] = ()
+    cacheable: bool = True
+
+    @property
+    def cmd(self) -> str:
+        return " ".join(["python", "-m", self.module, *self.args])
+
+
+@dataclass(frozen=True, slots=True)
+class StageOutcome:
+    name: str
+    cmd: str
+    returncode: int
+    stdout_tail: str
+    stderr_tail: str
+    status: str = STATUS_RAN
+    elapsed_s: float = 0.0
+
+
+Executor = Callable[[Stage, Mapping[str, str]], Tuple[int, str, str]]
+
+
+# ── Fingerprints ──────────────────────────────────────────
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def path_fingerprint(path: Path) -> str:
+    """Archivo: sha256 del contenido. Dir: hash de (relpath, sha) de sus archivos."""
+    if path.is_file():
+        return _sha256_file(path)
+    if path.is_dir():
+        h = hashlib.sha256()
+        for p in sorted(x for x in path.rglob("*") if x.is_file()):
+            h.update(p.relative_to(path).as_posix().encode("utf-8"))
+            h.update(b"\0")
+            h.update(_sha256_file(p).encode("ascii"))
+            h.update(b"\n")
+        return "dir:" + h.hexdigest()
+    return "missing"
+
+
+def _fingerprints(root: Path, rels: Sequence[str]) -> Dict[str, str]:
+    return {r: path_fingerprint(root / r) for r in rels}
+
+
+def stage_key(stage: Stage, env: Mapping[str, str]) -> str:
+    raw = json.dumps({"module": stage.module, "args": list(stage.args), "env": dict(sorted(env.items()))}, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ── DAG ───────────────────────────────────────────────────
+
+def build_dependencies(stages: Sequence[Stage]) -> Dict[str, Set[str]]:
+    """Hazards RAW/WAW/WAR sobre los paths declarados, en orden de declaracion."""
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate stage names: {names}")
+    deps: Dict[str, Set[str]] = {s.name: set() for s in stages}
+    for j, b in enumerate(stages):
+        b_in, b_out = set(b.inputs), set(b.outputs)
+        for a in stages[:j]:
+            a_in, a_out = set(a.inputs), set(a.outputs)
+            if a_out & (b_in | b_out) or b_out & a_in:
+                deps[b.name].add(a.name)
+        for dep in b.after:
+            if dep in deps:  # stages deshabilitados por config se ignoran
+                deps[b.name].add(dep)
+    return deps
+
+
+# ── Executors ─────────────────────────────────────────────
+
+def _tail(s: str) -> str:
+    s = (s or "").strip()
+    return s[-_TAIL:] if len(s) > _TAIL else s
+
+
+def run_subprocess(stage: Stage, env: Mapping[str, str]) -> Tuple[int, str, str]:
+    full_env = os.environ.copy()
+    full_env.update(env)
+    p = subprocess.run(
+        [sys.executable, "-m", stage.module, *stage.args],
+        capture_output=True, text=True, env=full_env, cwd=str(Path.cwd()),
+    )
+    return p.returncode, p.stdout or "", p.stderr or ""
+
+
+class _ThreadStream(io.TextIOBase):
+    """sys.stdout/err proxy: cada thread con captura activa escribe a su buffer."""
+
+    def __init__(self, fallback: Any) -> None:
+        self._fallback = fallback
+        self._local = threading.local()
+
+    @property
+    def encoding(self) -> str:  # type: ignore[override]
+        return "utf-8"
+
+    def begin(self) -> None:
+        self._local.buf = io.StringIO()
+
+    def end(self) -> str:
+        buf = getattr(self._local, "buf", None)
+        self._local.buf = None
+        return buf.getvalue() if buf is not None else ""
+
+    def write(self, s: str) -> int:  # type: ignore[override]
+        buf = getattr(self._local, "buf", None)
+        return buf.write(s) if buf is not None else self._fallback.write(s)
+
+    def flush(self) -> None:
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            self._fallback.flush()
+
+
+def _call_main(module: str, args: Sequence[str]) -> int:
+    fn = importlib.import_module(module).main
+    try:
+        takes_argv = bool(inspect.signature(fn).parameters)
+    except (TypeError, ValueError):
+        takes_argv = True
+    try:
+        rc = fn(list(args)) if takes_argv else fn()
+    except SystemExit as e:  # argparse / sys.exit dentro del main
+        code = e.code
+        rc = code if isinstance(code, int) else (0 if code is None else 1)
+    return int(rc or 0)
+
+
+def make_inprocess_executor(out: _ThreadStream, err: _ThreadStream) -> Executor:
+    def execute(stage: Stage, env: Mapping[str, str]) -> Tuple[int, str, str]:
+        out.begin()
+        err.begin()
+        try:
+            rc = _call_main(stage.module, stage.args)
+        except Exception:
+            rc = 1
+            sys.stderr.write(traceback.format_exc())
+        return rc, out.end(), err.end()
+
+    return execute
+
+
+# ── Runner ────────────────────────────────────────────────
+
+@dataclass
+class StepRunner:
+    root: Path
+    state_path: Optional[Path] = None
+    mode: str = MODE_INPROC
+    workers: int = 4
+    env: Dict[str, str] = field(default_factory=dict)
+    force: bool = False
+
+    def _load_state(self) -> Dict[str, Any]:
+        if self.state_path is None or self.force:
+            return {}
+        try:
+            obj = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return obj.get("stages", {}) if isinstance(obj, dict) and isinstance(obj.get("stages"), dict) else {}
+
+    def _save_state(self, stages: Dict[str, Any]) -> None:
+        if self.state_path is None:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(f"{self.state_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"stages": stages}, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+
+    def _unchanged(self, stage: Stage, prev: Optional[Dict[str, Any]]) -> bool:
+        if not stage.cacheable or not prev or prev.get("key") != stage_key(stage, self.env):
+            return False
+        return (
+            prev.get("inputs") == _fingerprints(self.root, stage.inputs)
+            and prev.get("outputs") == _fingerprints(self.root, stage.outputs)
+        )
+
+    def run(self, stages: Sequence[Stage]) -> List[StageOutcome]:
+        """Corre el DAG; resultados en el orden de `stages`."""
+        deps = build_dependencies(stages)
+        by_name = {s.name: s for s in stages}
+        prev_state = self._load_state()
+        new_state: Dict[str, Any] = dict(prev_state)
+        outcomes: Dict[str, StageOutcome] = {}
+        lock = threading.Lock()
+
+        saved_env = {k: os.environ.get(k) for k in self.env}
+        saved_streams = (sys.stdout, sys.stderr)
+        if self.mode == MODE_INPROC:
+            # in-process: env del tick para todo el proceso + captura por thread
+            os.environ.update(self.env)
+            out, err = _ThreadStream(sys.stdout), _ThreadStream(sys.stderr)
+            sys.stdout, sys.stderr = out, err  # type: ignore[assignment]
+            execute = make_inprocess_executor(out, err)
+        elif self.mode == MODE_SUBPROCESS:
+            execute = run_subprocess
+        else:
+            raise ValueError(f"unknown mode: {self.mode}")
+
+        def run_one(stage: Stage) -> StageOutcome:
+            t0 = time.monotonic()
+            if self._unchanged(stage, prev_state.get(stage.name)):
+                return StageOutcome(
+                    name=stage.name, cmd=f"<SKIP> {stage.module}", returncode=0,
+                    stdout_tail="inputs unchanged since last OK tick", stderr_tail="",
+                    status=STATUS_SKIPPED, elapsed_s=round(time.monotonic() - t0, 4),
+                )
+            rc, so, se = execute(stage, self.env)
+            if rc == 0 and stage.cacheable:
+                rec = {
+                    "key": stage_key(stage, self.env),
+                    "inputs": _fingerprints(self.root, stage.inputs),
+                    "outputs": _fingerprints(self.root, stage.outputs),
+                }
+                with lock:
+                    new_state[stage.name] = rec
+            elif rc != 0:
+                with lock:
+                    new_state.pop(stage.name, None)
+            return StageOutcome(
+                name=stage.name, cmd=stage.cmd, returncode=int(rc),
+                stdout_tail=_tail(so), stderr_tail=_tail(se),
+                elapsed_s=round(time.monotonic() - t0, 4),
+            )
+
+        try:
+            pending = {s.name for s in stages}
+            running: Dict[Future, str] = {}
+            with ThreadPoolExecutor(max_workers=max(1, int(self.workers))) as ex:
+                while pending or running:
+                    ready = [n for n in pending if deps[n] <= outcomes.keys()]
+                    for n in sorted(ready, key=lambda x: [s.name for s in stages].index(x)):
+                        pending.discard(n)
+                        running[ex.submit(run_one, by_name[n])] = n
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        outcomes[running.pop(fut)] = fut.result()
+        finally:
+            if self.mode == MODE_INPROC:
+                sys.stdout, sys.stderr = saved_streams
+                for k, v in saved_env.items():
+                    if v is None:
+                        os.environ.pop(k, None)
+                    else:
+                        os.environ[k] = v
+
+        self._save_state(new_state)
+        return [outcomes[s.name] for s in stages]
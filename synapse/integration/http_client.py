@@ -21,6 +21,8 @@ import urllib.error
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional, Tuple, Union
 
+from synapse.infra.http_pool import install_pooled_transport
+
 
 class HttpClientError(RuntimeError):
     pass
@@ -89,6 +91,7 @@ class SimpleHttpClient:
         if self.dry_run:
             return HttpResponse(status=200, headers={"x-dry-run": "1"}, body=b'{"dry_run": true}')
 
+        install_pooled_transport()  # keep-alive por host, compartido entre clientes
         headers = dict(req.headers or {})
         headers.setdefault("User-Agent", self.user_agent)
 
@@ -0,0 +1,399 @@
+"""
+HTTP Client asyncio (stdlib) para SYNAPSE (Integrations layer).
+
+Variante async de SimpleHttpClient para fan-out (insights, paginas de
+catalogo, forwards de ordenes): cientos de requests en vuelo en un proceso.
+
+Misma semantica que SimpleHttpClient:
+- enforce_url_policy() antes de cualquier cosa; dry_run=True por defecto
+  (misma respuesta fake, sin red).
+- retry_max / backoff_s arman un RetryPolicy (1x, 2x, 4x con jitter) que
+  corre con run_async: el backoff es asyncio.sleep. retry_policy= lo reemplaza.
+- 4xx -> HttpResponseError sin retry; 5xx / red / timeout -> retry;
+  al agotar: HttpTimeoutError o HttpClientError("request failed").
+- CircuitBreaker opcional: abierto -> CircuitOpenError sin tocar la red;
+  cuenta una falla por request que agota los reintentos.
+
+Concurrencia:
+- Semaforo por host (max_per_host, default SYNAPSE_HTTP_POOL_SIZE) + tope
+  global (max_in_flight).
+- Conexiones keep-alive por host sobre asyncio streams (HTTP/1.1 minimo:
+  Content-Length / chunked); una conexion reusada que el server cerro se
+  reintenta con conexion nueva solo si es seguro (como infra/http_pool): el
+  request no se termino de escribir, o el metodo es idempotente. Un POST ya
+  enviado nunca se re-envia.
+- timeout_s cubre connect + request + respuesta, no la espera de slot.
+"""
+
+from __future__ import annotations
+from infra.network_guard import enforce_url_policy
+
+import asyncio
+import ssl
+import time
+import weakref
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from synapse.infra.circuit_breaker import CircuitBreaker
+from synapse.infra.http_pool import IDEMPOTENT_METHODS, HostMetrics, PoolConfig
+from synapse.infra.retry_policy import RetryPolicy
+from synapse.integrations.http_client import (
+    HttpClientError,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseError,
+    HttpTimeoutError,
+    _encode_json,
+)
+
+__MARKER__ = "ASYNC_HTTP_CLIENT_2026-10-18_V3"
+
+PoolKey = Tuple[str, str]  # (scheme, host[:port]) igual que http_pool
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_STALE_ERRORS = (ConnectionResetError, BrokenPipeError, asyncio.IncompleteReadError)
+
+
+class _UpstreamRejected(HttpResponseError):
+    """5xx: se reintenta; al agotar sale como HttpClientError("request failed")."""
+
+
+_RETRY_ON: Tuple[type, ...] = (_UpstreamRejected, OSError, TimeoutError, asyncio.TimeoutError, ValueError, TypeError)
+
+
+@dataclass
+class _Conn:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    since: float = 0.0
+
+    def close(self) -> None:
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+@dataclass
+class _HostSlots:
+    slots: asyncio.Semaphore
+    idle: List[_Conn] = field(default_factory=list)
+
+
+@dataclass
+class _LoopState:
+    """Semaforos y conexiones viven atados a un event loop."""
+
+    slots: asyncio.Semaphore
+    hosts: Dict[PoolKey, _HostSlots] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class _Target:
+    scheme: str
+    host: str
+    port: int
+    netloc: str
+    path: str
+
+    @property
+    def key(self) -> PoolKey:
+        return (self.scheme, self.netloc)
+
+
+def _parse_target(url: str) -> _Target:
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS:
+        raise ValueError(f"unsupported scheme: {url!r}")
+    if not parts.hostname:
+        raise ValueError(f"no host given: {url!r}")
+    netloc = parts.netloc.rpartition("@")[2]
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    return _Target(scheme, parts.hostname, parts.port or _DEFAULT_PORTS[scheme], netloc, path)
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    out = bytearray()
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError("truncated chunked body")
+        size = int(line.split(b";", 1)[0].strip() or b"0", 16)
+        if size == 0:
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # trailers
+            return bytes(out)
+        out += await reader.readexactly(size)
+        await reader.readline()  # CRLF del chunk
+
+
+async def _read_response(reader: asyncio.StreamReader, method: str) -> Tuple[int, Dict[str, str], bytes, bool]:
+    """(status, headers, body, keep_alive)."""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionResetError("connection closed before status line")
+    version, _, rest = line.decode("latin-1").rstrip("\r\n").partition(" ")
+    code = rest.partition(" ")[0]
+    if not version.startswith("HTTP/") or not code.isdigit():
+        raise ConnectionError(f"bad status line: {line[:80]!r}")
+    status = int(code)
+
+    headers: Dict[str, str] = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = h.decode("latin-1").partition(":")
+        headers[name.strip()] = value.strip()
+    low = {k.lower(): v.lower() for k, v in headers.items()}
+
+    keep = version == "HTTP/1.1" and low.get("connection", "") != "close"
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif "chunked" in low.get("transfer-encoding", ""):
+        body = await _read_chunked(reader)
+    elif "content-length" in low:
+        body = await reader.readexactly(int(low["content-length"]))
+    else:
+        body = await reader.read()  # sin largo: hasta EOF
+        keep = False
+    return status, headers, body, keep
+
+
+def _render_request(method: str, target: _Target, headers: Dict[str, str], body: Optional[bytes]) -> bytes:
+    h = {"Host": target.netloc, "Accept-Encoding": "identity", "Connection": "keep-alive"}
+    h.update(headers)
+    if body is not None or method in ("POST", "PUT", "PATCH"):
+        h["Content-Length"] = str(len(body or b""))
+    lines = [f"{method} {target.path} HTTP/1.1"] + [f"{k}: {v}" for k, v in h.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+
+class AsyncHttpClient:
+    """
+    Cliente HTTP asyncio, mismos parametros que SimpleHttpClient mas limites.
+
+    max_per_host: requests en vuelo por (scheme, host:port)
+    max_in_flight: tope global del cliente
+    circuit: CircuitBreaker compartido por todas las requests del cliente
+    retry_policy: reemplaza el RetryPolicy armado con retry_max / backoff_s
+    """
+
+    def __init__(
+        self,
+        *,
+        retry_max: int = 2,
+        backoff_s: float = 0.4,
+        dry_run: bool = True,
+        user_agent: str = "synapse-http/1.0",
+        max_per_host: Optional[int] = None,
+        max_in_flight: int = 256,
+        idle_timeout_s: Optional[float] = None,
+        circuit: Optional[CircuitBreaker] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
+        if retry_max < 0:
+            raise ValueError("retry_max must be >= 0")
+        if backoff_s < 0:
+            raise ValueError("backoff_s must be >= 0")
+        if max_in_flight < 1 or (max_per_host is not None and max_per_host < 1):
+            raise ValueError("concurrency limits must be >= 1")
+        env = PoolConfig.from_env()
+        self.retry_max = retry_max
+        self.backoff_s = backoff_s
+        self.dry_run = dry_run
+        self.user_agent = user_agent
+        self.max_per_host = max_per_host or env.max_per_host
+        self.max_in_flight = max_in_flight
+        self.idle_timeout_s = env.idle_timeout_s if idle_timeout_s is None else idle_timeout_s
+        self.circuit = circuit
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_attempts=retry_max + 1,
+            base_delay_s=backoff_s,
+            max_delay_s=backoff_s * (2 ** max(0, retry_max - 1)),
+        )
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+        self._metrics: Dict[PoolKey, HostMetrics] = {}
+        self._ssl: Optional[ssl.SSLContext] = None
+
+    # ---------------- transporte ----------------
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        st = self._loops.get(loop)
+        if st is None:
+            st = _LoopState(slots=asyncio.Semaphore(self.max_in_flight))
+            self._loops[loop] = st
+        return st
+
+    def _host(self, st: _LoopState, key: PoolKey) -> _HostSlots:
+        hs = st.hosts.get(key)
+        if hs is None:
+            hs = _HostSlots(slots=asyncio.Semaphore(self.max_per_host))
+            st.hosts[key] = hs
+        self._metrics.setdefault(key, HostMetrics())
+        return hs
+
+    def _checkout(self, hs: _HostSlots, m: HostMetrics) -> Optional[_Conn]:
+        now = time.monotonic()
+        while hs.idle:
+            conn = hs.idle.pop()  # LIFO
+            if now - conn.since <= self.idle_timeout_s and not conn.reader.at_eof():
+                return conn
+            conn.close()
+            m.expired += 1
+        return None
+
+    async def _connect(self, target: _Target) -> _Conn:
+        ctx = None
+        if target.scheme == "https":
+            if self._ssl is None:
+                self._ssl = ssl.create_default_context()
+            ctx = self._ssl
+        reader, writer = await asyncio.open_connection(target.host, target.port, ssl=ctx)
+        return _Conn(reader, writer)
+
+    async def _roundtrip(self, hs: _HostSlots, m: HostMetrics, target: _Target, method: str, raw: bytes) -> Tuple[int, Dict[str, str], bytes]:
+        while True:
+            conn = self._checkout(hs, m)
+            reused = conn is not None
+            if conn is None:
+                conn = await self._connect(target)
+                m.opened += 1
+            else:
+                m.reused += 1
+            try:
+                conn.writer.write(raw)
+                await conn.writer.drain()
+            except _STALE_ERRORS as e:
+                conn.close()
+                # request incompleto: el server no lo pudo procesar, se puede repetir
+                if reused:
+                    m.stale_retries += 1
+                    continue
+                m.errors += 1
+                raise ConnectionResetError(str(e) or type(e).__name__) from e
+            except BaseException:
+                conn.close()  # incluye CancelledError del timeout
+                m.errors += 1
+                raise
+            try:
+                status, headers, body, keep = await _read_response(conn.reader, method)
+            except _STALE_ERRORS as e:
+                conn.close()
+                # el request ya salio: solo se repite si repetirlo no duplica efectos
+                if reused and method in IDEMPOTENT_METHODS:
+                    m.stale_retries += 1
+                    continue
+                m.errors += 1
+                raise ConnectionResetError(str(e) or type(e).__name__) from e
+            except BaseException:
+                conn.close()
+                m.errors += 1
+                raise
+            m.requests += 1
+            if keep:
+                conn.since = time.monotonic()
+                hs.idle.append(conn)
+            else:
+                conn.close()
+            return status, headers, body
+
+    async def _send(self, req: HttpRequest, headers: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+        target = _parse_target(req.url)
+        method = req.method.upper()
+        raw = _render_request(method, target, headers, req.body)
+        st = self._state()
+        hs = self._host(st, target.key)
+        m = self._metrics[target.key]
+        async with st.slots, hs.slots:
+            return await asyncio.wait_for(self._roundtrip(hs, m, target, method, raw), timeout=req.timeout_s)
+
+    # ---------------- API ----------------
+
+    async def request(self, req: HttpRequest) -> HttpResponse:
+        enforce_url_policy(req.url)
+        if self.dry_run:
+            body = _encode_json({"dry_run": True, "method": req.method.upper(), "url": req.url})
+            return HttpResponse(status=200, headers={"x-dry-run": "1"}, body=body)
+        if self.circuit is not None:
+            self.circuit.check()
+
+        headers = dict(req.headers or {})
+        headers.setdefault("User-Agent", self.user_agent)
+
+        async def attempt() -> HttpResponse:
+            status, resp_headers, body = await self._send(req, headers)
+            if 400 <= status < 500:
+                # 4xx: upstream responde, no se reintenta ni abre el circuito
+                if self.circuit is not None:
+                    self.circuit.record_success()
+                raise HttpResponseError(status=status, body=body, message="Client error")
+            if status >= 400:
+                raise _UpstreamRejected(status=status, body=body, message="Upstream rejected")
+            if self.circuit is not None:
+                self.circuit.record_success()
+            return HttpResponse(status=status, headers=resp_headers, body=body)
+
+        try:
+            return await self.retry_policy.run_async(attempt, retry_on=_RETRY_ON)
+        except _RETRY_ON as e:
+            if self.circuit is not None:
+                self.circuit.record_failure()
+            if isinstance(e, (TimeoutError, asyncio.TimeoutError)):  # en 3.10 wait_for no lanza el builtin
+                raise HttpTimeoutError("timeout") from e
+            raise HttpClientError("request failed") from e
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout_s: float = 20.0) -> HttpResponse:
+        return await self.request(HttpRequest(method="GET", url=url, headers=headers or {}, timeout_s=timeout_s))
+
+    async def post_json(
+        self,
+        url: str,
+        payload: Any,
+        headers: Optional[Dict[str, str]] = None,
+        timeout_s: float = 20.0,
+    ) -> HttpResponse:
+        h = dict(headers or {})
+        h.setdefault("Content-Type", "application/json; charset=utf-8")
+        return await self.request(HttpRequest(method="POST", url=url, headers=h, body=_encode_json(payload), timeout_s=timeout_s))
+
+    async def request_all(self, reqs: Iterable[HttpRequest]) -> List[Union[HttpResponse, Exception]]:
+        """Fan-out: todas en paralelo (acotadas por los semaforos); errores por item, en orden."""
+        return list(await asyncio.gather(*(self.request(r) for r in reqs), return_exceptions=True))
+
+    def metrics(self) -> Dict[str, Dict[str, int]]:
+        out = {}
+        for (scheme, host), m in sorted(self._metrics.items()):
+            out[f"{scheme}://{host}"] = asdict(m)
+        return out
+
+    async def aclose(self) -> None:
+        st = self._loops.pop(asyncio.get_running_loop(), None)
+        if st is None:
+            return
+        for hs in st.hosts.values():
+            for conn in hs.idle:
+                conn.close()
+            hs.idle.clear()
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+
+def fetch_all(reqs: Iterable[HttpRequest], **client_kwargs: Any) -> List[Union[HttpResponse, Exception]]:
+    """Entrada sync para scripts/CLIs: corre el fan-out en un event loop propio."""
+
+    async def _main() -> List[Union[HttpResponse, Exception]]:
+        async with AsyncHttpClient(**client_kwargs) as client:
+            return await client.request_all(reqs)
+
+    return asyncio.run(_main())
@@ -8,6 +8,9 @@ import time
 import urllib.request
 import urllib.error
 
+from infra.network_guard import enforce_url_policy
+from synapse.infra.http_pool import install_pooled_transport
+
 
 class CircuitOpenError(RuntimeError):
     pass
@@ -125,6 +128,8 @@ class UrllibTransport:
         body: bytes,
         timeout_seconds: int,
     ) -> Tuple[int, bytes]:
+        enforce_url_policy(url)
+        install_pooled_transport()
         req = urllib.request.Request(url=url, data=body, headers=headers, method=method)
         try:
             with urllib.request.urlopen(req, timeout=timeout_seconds) as resp:
@@ -19,6 +19,8 @@ import urllib.request
 from dataclasses import dataclass, field
 from typing import Any, Dict, Optional
 
+from synapse.infra.http_pool import install_pooled_transport
+
 
 class HttpClientError(RuntimeError):
     pass
@@ -90,6 +92,7 @@ class SimpleHttpClient:
             body = _encode_json({"dry_run": True, "method": req.method.upper(), "url": req.url})
             return HttpResponse(status=200, headers={"x-dry-run": "1"}, body=body)
 
+        install_pooled_transport()  # keep-alive por host, compartido entre clientes
         headers = dict(req.headers or {})
         headers.setdefault("User-Agent", self.user_agent)
 
@@ -8,7 +8,7 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 
-__LL_MARKER__ = "LL_PATCH_2026-01-12_SYNTHETIC_GUARD_V4"
+__LL_MARKER__ = "LL_PATCH_2026-10-18_LATEST_REVISION_V5"
 
 STATE_REL = Path("data/learning/learning_state.json")
 REPORT_REL = Path("data/learning/learning_report.json")
@@ -225,6 +225,33 @@ def _is_synthetic(p: Dict[str, Any]) -> bool:
     return False
 
 
+def _latest_revisions(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Meta re-estado: meta_insights_ingest agrega una fila nueva (revision = n)
+    por (ad_id, date). Solo cuenta la revision mas alta; en empate, la ultima.
+    Payloads sin ad_id/date pasan tal cual. Se conserva el orden de aparicion.
+    """
+    out: List[Dict[str, Any]] = []
+    pos: Dict[str, Tuple[int, int]] = {}  # key -> (indice en out, revision)
+    for p in payloads:
+        ad_id, day = str(p.get("ad_id") or ""), str(p.get("date") or "")
+        if not ad_id or not day:
+            out.append(p)
+            continue
+        key = f"{ad_id}|{day}"
+        try:
+            rev = int(p.get("revision") or 1)
+        except (TypeError, ValueError):
+            rev = 1
+        if key not in pos:
+            pos[key] = (len(out), rev)
+            out.append(p)
+        elif rev >= pos[key][1]:
+            out[pos[key][0]] = p
+            pos[key] = (pos[key][0], rev)
+    return out
+
+
 def _get_spend(p: Dict[str, Any]) -> float:
     for k in ("spend", "cost", "amount_spent", "spend_total"):
         if k in p:
@@ -331,6 +358,7 @@ class LearningLoop:
 
         #  filtro anti-data-fake
         payloads_all = [p for p in payloads_all if not _is_synthetic(p)]
+        payloads_all = _latest_revisions(payloads_all)
 
         payloads_used = payloads_all
         if cfg.require_evidence:
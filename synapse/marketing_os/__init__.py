@@ -26,7 +26,7 @@ from .experiment_engine import (
 )
 from .campaign_blueprint import (
     BlueprintGenerator, CampaignBlueprint, Platform, Objective,
-    TargetingConfig, quick_blueprint
+    TargetingConfig, PortfolioPlan, quick_blueprint
 )
 
 __all__ = [
@@ -40,5 +40,5 @@ __all__ = [
     "ExperimentEngine", "ExperimentMetrics", "ExperimentDecision",
     "Decision", "StopLossConfig", "quick_evaluate",
     "BlueprintGenerator", "CampaignBlueprint", "Platform", "Objective",
-    "TargetingConfig", "quick_blueprint",
+    "TargetingConfig", "PortfolioPlan", "quick_blueprint",
 ]
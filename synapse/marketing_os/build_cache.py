@@ -0,0 +1,144 @@
+# synapse/marketing_os/build_cache.py
+"""
+Build Cache - build incremental de los artifacts de un wave kit.
+
+Sidecar <kit_dir>/.build_cache.json: relpath -> {fp, sha256, bytes, mtime_ns, extra}.
+fp = fingerprint de los INPUTS del artifact (fila de producto, version de
+templates, hash del set de creatives, params del writer). Un artifact se
+regenera solo si su fp cambio o el archivo en disco ya no es el que se
+escribio (size/mtime_ns); si no, se reusa su sha256 sin re-leerlo.
+
+write_zip_streamed() arma el bundle leyendo los miembros desde disco en
+chunks, con timestamps fijos: mismos miembros => mismos bytes de zip.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from synapse.infra.contract_snapshot import file_sha256, sha256_json, stable_json_dumps
+from synapse.marketing_os.wave_kit_manifest import Artifact
+
+CACHE_FILENAME = ".build_cache.json"
+CACHE_SCHEMA = "buildcache-v1"
+
+# 1980-01-01: minimo de DOS/zip; fijo para que el zip sea reproducible
+_ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+_CHUNK = 1 << 20
+
+_CODE_FP: Dict[Any, str] = {}
+
+
+def code_fingerprint(*objs: Any) -> str:
+    """Hash del source de funciones/modulos: editar el writer invalida sus artifacts."""
+    parts: List[str] = []
+    for obj in objs:
+        fp = _CODE_FP.get(obj)
+        if fp is None:
+            try:
+                src = inspect.getsource(obj)
+            except (OSError, TypeError):
+                src = getattr(obj, "__qualname__", repr(obj))  # sin source: solo el nombre
+            fp = hashlib.sha256(src.encode("utf-8")).hexdigest()
+            _CODE_FP[obj] = fp
+        parts.append(fp)
+    return sha256_json(parts)
+
+
+class BuildCache:
+    def __init__(self, base_dir: Union[str, Path]) -> None:
+        self.base_dir = Path(base_dir)
+        self.path = self.base_dir / CACHE_FILENAME
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+        self._dirty = False
+        self.rebuilt: List[str] = []
+        self.reused: List[str] = []
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(raw, dict) or raw.get("schema") != CACHE_SCHEMA:
+            return {}
+        entries = raw.get("entries")
+        return entries if isinstance(entries, dict) else {}
+
+    def is_fresh(self, relpath: str, fp: str) -> bool:
+        e = self._entries.get(relpath)
+        if not e or e.get("fp") != fp:
+            return False
+        try:
+            st = (self.base_dir / relpath).stat()
+        except OSError:
+            return False
+        return st.st_size == e.get("bytes") and st.st_mtime_ns == e.get("mtime_ns")
+
+    def record(self, relpath: str, fp: str, *, extra: Optional[Dict[str, Any]] = None) -> Artifact:
+        p = self.base_dir / relpath
+        st = p.stat()
+        self._entries[relpath] = {
+            "fp": fp,
+            "sha256": file_sha256(p),
+            "bytes": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "extra": extra or {},
+        }
+        self._dirty = True
+        return self.artifact(relpath)
+
+    def ensure(self, relpath: str, fp: str, build: Callable[[], Any]) -> bool:
+        """
+        Corre build() solo si el artifact esta stale. build() escribe el archivo;
+        si devuelve un dict se guarda como `extra` (metadatos a reusar sin
+        rebuild). True = rebuild.
+        """
+        if self.is_fresh(relpath, fp):
+            self.reused.append(relpath)
+            return False
+        out = build()
+        self.record(relpath, fp, extra=out if isinstance(out, dict) else None)
+        self.rebuilt.append(relpath)
+        return True
+
+    def artifact(self, relpath: str) -> Artifact:
+        e = self._entries[relpath]
+        return Artifact(relpath=relpath, sha256=e["sha256"], bytes=int(e["bytes"]))
+
+    def extra(self, relpath: str) -> Dict[str, Any]:
+        return dict(self._entries.get(relpath, {}).get("extra") or {})
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        payload = {"schema": CACHE_SCHEMA, "entries": self._entries}
+        tmp.write_text(stable_json_dumps(payload) + "\n", encoding="utf-8", newline="\n")
+        os.replace(str(tmp), str(self.path))
+        self._dirty = False
+
+
+def write_zip_streamed(bundle_path: Path, *, base_dir: Path, relpaths: List[str]) -> None:
+    """Zip determinista (orden dado, fecha fija) copiando cada miembro desde disco."""
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = bundle_path.with_name(f"{bundle_path.name}.{os.getpid()}.tmp")
+    with zipfile.ZipFile(tmp, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        for rp in relpaths:
+            p = base_dir / rp
+            if not p.is_file():
+                continue
+            info = zipfile.ZipInfo(rp, date_time=_ZIP_EPOCH)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            big = p.stat().st_size >= zipfile.ZIP64_LIMIT
+            with p.open("rb") as src, z.open(info, "w", force_zip64=big) as dst:
+                shutil.copyfileobj(src, dst, _CHUNK)
+    os.replace(str(tmp), str(bundle_path))
@@ -103,6 +103,138 @@ class CampaignBlueprint:
         return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
 
 
+# Splits compartidos (un solo lugar: single y bulk usan los mismos)
+PLATFORM_SPLIT: Dict[str, float] = {"meta": 0.6, "tiktok": 0.4}
+META_ADSET_SPLIT: Dict[str, float] = {"hooks_test": 0.6, "retarget": 0.4}
+
+
+def _slots(
+    items: List[Dict[str, Any]],
+    content_type: str,
+    slot_prefix: str,
+    variant_prefix: str,
+    limit: int,
+    use_variant_id: bool = True,
+) -> List[CreativeSlot]:
+    out = []
+    for i, item in enumerate(items[:limit]):
+        default_variant = f"{variant_prefix}{i+1}"
+        out.append(CreativeSlot(
+            slot_id=f"{slot_prefix}_{i+1}",
+            content_type=content_type,
+            variant_id=item.get("variant_id", default_variant) if use_variant_id else default_variant,
+            content_preview=item.get("content", "")[:100],
+            quality_score=item.get("quality_score", 0),
+        ))
+    return out
+
+
+@dataclass(frozen=True)
+class _SharedPlan:
+    """Estructuras que no dependen del producto: se derivan una vez por plan."""
+    date_stamp: str
+    meta_targeting: TargetingConfig
+    retarget_targeting: TargetingConfig
+    tiktok_targeting: TargetingConfig
+
+    @classmethod
+    def build(cls, targeting: Optional[TargetingConfig] = None) -> "_SharedPlan":
+        targeting = targeting or TargetingConfig()
+        return cls(
+            date_stamp=now_utc().strftime('%Y%m%d'),
+            meta_targeting=targeting,
+            # AdSet 2: Retargeting (engaged users)
+            retarget_targeting=TargetingConfig(
+                geo=targeting.geo,
+                age_min=targeting.age_min,
+                age_max=targeting.age_max,
+                placements=["feed", "stories"],
+            ),
+            tiktok_targeting=TargetingConfig(
+                geo=["MX"],
+                age_min=18,
+                age_max=45,
+                placements=["tiktok_feed"],
+            ),
+        )
+
+
+@dataclass
+class PortfolioPlan:
+    """Blueprints de N productos x M plataformas, armados en una pasada."""
+    plan_id: str
+    platforms: List[str]
+    total_budget_usd: float
+    budget_per_product_usd: float
+    platform_split: Dict[str, float]
+    blueprints: Dict[str, Dict[str, CampaignBlueprint]] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def iter_blueprints(self, platform: Optional[str] = None):
+        for product_id, by_platform in self.blueprints.items():
+            for plat, bp in by_platform.items():
+                if platform is None or plat == platform:
+                    yield bp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "plan_id": self.plan_id,
+            "created_at": self.created_at,
+            "platforms": list(self.platforms),
+            "total_budget_usd": self.total_budget_usd,
+            "budget_per_product_usd": self.budget_per_product_usd,
+            "platform_split": dict(self.platform_split),
+            "counts": {
+                "products": len(self.blueprints),
+                "blueprints": sum(len(v) for v in self.blueprints.values()),
+            },
+            "blueprints": {
+                pid: {plat: bp.to_dict() for plat, bp in by_platform.items()}
+                for pid, by_platform in self.blueprints.items()
+            },
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def to_publish_tasks(self, landing_urls: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """
+        Tasks en el formato de publish_tasks_meta.json: entrada directa para
+        synapse.meta_publish_plan.build_plan(). Un task por creative slot de
+        los blueprints Meta (campaign = blueprint, adset = adset del slot).
+        """
+        landing_urls = landing_urls or {}
+        tasks: List[Dict[str, Any]] = []
+        for bp in self.iter_blueprints("meta"):
+            for adset in bp.adsets:
+                per_slot = round(adset.budget_usd / len(adset.creatives), 2) if adset.creatives else 0.0
+                for slot in adset.creatives:
+                    utm = f"{bp.product_id}_{slot.slot_id}"
+                    tasks.append({
+                        "product_id": bp.product_id,
+                        "utm_content": utm,
+                        "landing_url": landing_urls.get(bp.product_id, ""),
+                        "naming": {
+                            "campaign": bp.blueprint_id,
+                            "adset": f"{adset.adset_name}_{slot.slot_id}",
+                            "ad": f"{utm}_AD",
+                        },
+                        "copy": {
+                            "primary_text": slot.content_preview,
+                            "headline": bp.product_name,
+                            "description": "",
+                        },
+                        "budget_usd": per_slot,
+                        "optimization": adset.optimization,
+                        "quality_score": slot.quality_score,
+                    })
+        return {
+            "marker": f"PORTFOLIO_PLAN:{self.plan_id}",
+            "ts": self.created_at,
+            "tasks": tasks,
+        }
+
+
 class BlueprintGenerator:
     """
     Genera blueprints de campana por plataforma.
@@ -110,6 +242,7 @@ class BlueprintGenerator:
     Uso:
         gen = BlueprintGenerator()
         blueprint = gen.generate_meta_blueprint(product_id, kit)
+        plan = gen.generate_portfolio([(pid, name, kit), ...], total_budget=500)
     """
     
     def __init__(self, default_budget: float = 50.0):
@@ -124,60 +257,38 @@ class BlueprintGenerator:
         targeting: Optional[TargetingConfig] = None,
     ) -> CampaignBlueprint:
         """Genera blueprint para Meta (Facebook/Instagram)."""
-        
         budget = budget_usd or self.default_budget
-        targeting = targeting or TargetingConfig()
-        
-        # Create ad sets by angle
-        adsets = []
-        
-        # AdSet 1: Test Hooks (multiple hooks, same targeting)
-        hook_creatives = []
-        for i, hook in enumerate(kit.get("hooks", [])[:5]):
-            hook_creatives.append(CreativeSlot(
-                slot_id=f"hook_{i+1}",
-                content_type="hook",
-                variant_id=hook.get("variant_id", f"H{i+1}"),
-                content_preview=hook.get("content", "")[:100],
-                quality_score=hook.get("quality_score", 0),
-            ))
-        
-        adsets.append(AdSetConfig(
-            adset_name=f"{product_id}_hooks_test",
-            targeting=targeting,
-            optimization="PURCHASE",
-            budget_usd=budget * 0.6,
-            creatives=hook_creatives,
-        ))
-        
-        # AdSet 2: Retargeting (engaged users)
-        retarget_targeting = TargetingConfig(
-            geo=targeting.geo,
-            age_min=targeting.age_min,
-            age_max=targeting.age_max,
-            placements=["feed", "stories"],
-        )
-        
-        primary_creatives = []
-        for i, text in enumerate(kit.get("primary_texts", [])[:3]):
-            primary_creatives.append(CreativeSlot(
-                slot_id=f"primary_{i+1}",
-                content_type="primary_text",
-                variant_id=f"PT{i+1}",
-                content_preview=text.get("content", "")[:100],
-                quality_score=text.get("quality_score", 0),
-            ))
-        
-        adsets.append(AdSetConfig(
-            adset_name=f"{product_id}_retarget",
-            targeting=retarget_targeting,
-            optimization="PURCHASE",
-            budget_usd=budget * 0.4,
-            creatives=primary_creatives,
-        ))
+        return self._meta_blueprint(product_id, product_name, kit, budget, _SharedPlan.build(targeting))
+    
+    def _meta_blueprint(
+        self,
+        product_id: str,
+        product_name: str,
+        kit: Dict[str, Any],
+        budget: float,
+        shared: _SharedPlan,
+    ) -> CampaignBlueprint:
+        adsets = [
+            # AdSet 1: Test Hooks (multiple hooks, same targeting)
+            AdSetConfig(
+                adset_name=f"{product_id}_hooks_test",
+                targeting=shared.meta_targeting,
+                optimization="PURCHASE",
+                budget_usd=budget * META_ADSET_SPLIT["hooks_test"],
+                creatives=_slots(kit.get("hooks", []), "hook", "hook", "H", 5),
+            ),
+            # AdSet 2: Retargeting (engaged users)
+            AdSetConfig(
+                adset_name=f"{product_id}_retarget",
+                targeting=shared.retarget_targeting,
+                optimization="PURCHASE",
+                budget_usd=budget * META_ADSET_SPLIT["retarget"],
+                creatives=_slots(kit.get("primary_texts", []), "primary_text", "primary", "PT", 3, use_variant_id=False),
+            ),
+        ]
         
         return CampaignBlueprint(
-            blueprint_id=f"meta_{product_id}_{now_utc().strftime('%Y%m%d')}",
+            blueprint_id=f"meta_{product_id}_{shared.date_stamp}",
             product_id=product_id,
             product_name=product_name,
             platform=Platform.META,
@@ -200,38 +311,29 @@ class BlueprintGenerator:
         budget_usd: float = None,
     ) -> CampaignBlueprint:
         """Genera blueprint para TikTok."""
-        
         budget = budget_usd or self.default_budget
-        
+        return self._tiktok_blueprint(product_id, product_name, kit, budget, _SharedPlan.build())
+    
+    def _tiktok_blueprint(
+        self,
+        product_id: str,
+        product_name: str,
+        kit: Dict[str, Any],
+        budget: float,
+        shared: _SharedPlan,
+    ) -> CampaignBlueprint:
         # TikTok: focus on video scripts
-        script_creatives = []
-        for i, script in enumerate(kit.get("scripts_15s", [])[:5]):
-            script_creatives.append(CreativeSlot(
-                slot_id=f"script_{i+1}",
-                content_type="script_15s",
-                variant_id=script.get("variant_id", f"S{i+1}"),
-                content_preview=script.get("content", "")[:100],
-                quality_score=script.get("quality_score", 0),
-            ))
-        
-        targeting = TargetingConfig(
-            geo=["MX"],
-            age_min=18,
-            age_max=45,
-            placements=["tiktok_feed"],
-        )
-        
         adsets = [AdSetConfig(
             adset_name=f"{product_id}_tiktok_test",
-            targeting=targeting,
+            targeting=shared.tiktok_targeting,
             optimization="CONVERSION",
             bid_strategy="LOWEST_COST",
             budget_usd=budget,
-            creatives=script_creatives,
+            creatives=_slots(kit.get("scripts_15s", []), "script_15s", "script", "S", 5),
         )]
         
         return CampaignBlueprint(
-            blueprint_id=f"tiktok_{product_id}_{now_utc().strftime('%Y%m%d')}",
+            blueprint_id=f"tiktok_{product_id}_{shared.date_stamp}",
             product_id=product_id,
             product_name=product_name,
             platform=Platform.TIKTOK,
@@ -254,18 +356,61 @@ class BlueprintGenerator:
         total_budget: float = 100.0,
     ) -> Dict[str, CampaignBlueprint]:
         """Genera blueprints para todas las plataformas."""
+        plan = self.generate_portfolio([(product_id, product_name, kit)], total_budget=total_budget)
+        return plan.blueprints[product_id]
+    
+    def generate_portfolio(
+        self,
+        products: List[Any],
+        platforms: Optional[List[str]] = None,
+        total_budget: Optional[float] = None,
+        targeting: Optional[TargetingConfig] = None,
+        plan_id: Optional[str] = None,
+    ) -> PortfolioPlan:
+        """
+        Bulk: blueprints de todos los productos x plataformas en una pasada.
         
-        # Split budget: 60% Meta, 40% TikTok
-        return {
-            "meta": self.generate_meta_blueprint(
-                product_id, product_name, kit, 
-                budget_usd=total_budget * 0.6
-            ),
-            "tiktok": self.generate_tiktok_blueprint(
-                product_id, product_name, kit,
-                budget_usd=total_budget * 0.4
-            ),
-        }
+        products: (product_id, product_name, kit) o dicts con esas keys.
+        total_budget: presupuesto del portafolio, repartido parejo por producto
+        (default: default_budget por producto; 0 -> default_budget por plataforma,
+        como generate_*_blueprint). Targeting, fecha y splits se
+        derivan una sola vez y se comparten entre blueprints (no mutarlos).
+        """
+        platforms = [p.lower() for p in (platforms or list(PLATFORM_SPLIT))]
+        unknown = [p for p in platforms if p not in PLATFORM_SPLIT]
+        if unknown:
+            raise ValueError(f"unsupported platforms: {unknown}")
+        
+        # Split de plataformas renormalizado sobre las elegidas
+        weight = sum(PLATFORM_SPLIT[p] for p in platforms)
+        split = {p: PLATFORM_SPLIT[p] / weight for p in platforms}
+        
+        rows = []
+        for item in products:
+            if isinstance(item, dict):
+                rows.append((str(item["product_id"]), str(item.get("product_name") or item.get("name") or item["product_id"]), item.get("kit") or {}))
+            else:
+                pid, name, kit = item
+                rows.append((str(pid), str(name), kit or {}))
+        
+        per_product = (total_budget / len(rows)) if (total_budget is not None and rows) else self.default_budget
+        shared = _SharedPlan.build(targeting)
+        builders = {"meta": self._meta_blueprint, "tiktok": self._tiktok_blueprint}
+        # mismo fallback falsy que generate_*_blueprint: budget 0 -> default_budget por plataforma
+        budgets = {p: (per_product * split[p]) or self.default_budget for p in platforms}
+        if not per_product:
+            per_product = sum(budgets.values())
+        
+        plan = PortfolioPlan(
+            plan_id=plan_id or f"portfolio_{shared.date_stamp}_{len(rows)}p",
+            platforms=platforms,
+            total_budget_usd=per_product * len(rows),
+            budget_per_product_usd=per_product,
+            platform_split=split,
+        )
+        for pid, name, kit in rows:
+            plan.blueprints[pid] = {p: builders[p](pid, name, kit, budgets[p], shared) for p in platforms}
+        return plan
 
 
 def quick_blueprint(
@@ -21,7 +21,7 @@ import itertools
 import random
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from .models import (
     ProductContext,
@@ -33,6 +33,7 @@ from .models import (
     AdKitManifest,
 )
 from .quality_filter import QualityFilter
+from .template_engine import RenderContext, compile_all, render
 
 
 # ============================================================
@@ -176,8 +177,8 @@ class CreativeFactory:
         """
         config = config or {}
         
-        # Build context for templates
-        ctx = self._build_context(product, interrogation)
+        # Build context for templates (valores stringificados una vez + memo de fragmentos)
+        ctx = RenderContext(self._build_context(product, interrogation))
         
         # Generate each component
         hooks = self._generate_hooks(ctx, config.get("num_hooks", 10))
@@ -248,12 +249,24 @@ class CreativeFactory:
             "cta": "👉 Link en bio" if random.random() > 0.5 else "👉 Compra ahora",
         }
     
-    def _fill_template(self, template: str, ctx: Dict[str, Any]) -> str:
-        """Rellena template con contexto."""
-        result = template
-        for key, value in ctx.items():
-            result = result.replace("{" + key + "}", str(value))
-        return result
+    def generate_kits(
+        self,
+        items: Sequence[Tuple[ProductContext, Optional[InterrogationResult]]],
+        config: Optional[Dict] = None,
+    ) -> List[Dict[str, Any]]:
+        """Kits para muchos productos; las tablas de templates se compilan una vez."""
+        precompile_templates()
+        return [self.generate_kit(product, interrogation, config) for product, interrogation in items]
+    
+    def _fill_template(self, template: str, ctx: Union[Dict[str, Any], RenderContext]) -> str:
+        """Rellena template con contexto (plan compilado, ver template_engine)."""
+        return render(template, ctx)
+    
+    @staticmethod
+    def _derive(ctx: Union[Dict[str, Any], RenderContext], **extra: Any) -> Union[Dict[str, Any], RenderContext]:
+        if isinstance(ctx, RenderContext):
+            return ctx.derive(**extra)
+        return {**ctx, **extra}
     
     def _generate_hooks(self, ctx: Dict, num: int) -> List[Dict]:
         """Genera hooks diversos."""
@@ -262,6 +275,7 @@ class CreativeFactory:
         
         # Get angles to use
         angles = list(HOOK_TEMPLATES.keys())
+        hook_ctx = self._derive(ctx, hook="")
         
         # Generate combinations
         for angle in itertools.cycle(angles):
@@ -272,7 +286,6 @@ class CreativeFactory:
             template = random.choice(templates)
             
             # Fill and add hook context
-            hook_ctx = {**ctx, "hook": ""}
             content = self._fill_template(template, hook_ctx)
             
             # Skip if too similar
@@ -303,7 +316,7 @@ class CreativeFactory:
         # Generate a hook for context
         hook_template = random.choice(HOOK_TEMPLATES[Angle.DOLOR])
         hook = self._fill_template(hook_template, ctx)
-        script_ctx = {**ctx, "hook": hook}
+        script_ctx = self._derive(ctx, hook=hook)
         
         formats_cycle = itertools.cycle(templates.keys())
         
@@ -345,7 +358,7 @@ class CreativeFactory:
             
             hook_template = random.choice(HOOK_TEMPLATES[Angle.DOLOR])
             hook = self._fill_template(hook_template, ctx)
-            text_ctx = {**ctx, "hook": hook}
+            text_ctx = self._derive(ctx, hook=hook)
             
             content = self._fill_template(template, text_ctx)
             result = self.quality_filter.check(content, ContentType.PRIMARY_TEXT)
@@ -483,6 +496,14 @@ class CreativeFactory:
 # HELPER FUNCTION
 # ============================================================
 
+def precompile_templates() -> int:
+    """Compila todas las tablas de templates (idempotente, memoizado)."""
+    return compile_all([
+        HOOK_TEMPLATES, SCRIPT_TEMPLATES, PRIMARY_TEXT_TEMPLATES,
+        HEADLINE_TEMPLATES, LANDING_SECTIONS,
+    ])
+
+
 def quick_generate(
     product_id: str,
     name: str,
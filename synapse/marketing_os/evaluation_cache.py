@@ -0,0 +1,103 @@
+# synapse/marketing_os/evaluation_cache.py
+"""
+Evaluation Cache - cache content-addressed para evaluadores de interrogacion.
+
+Key = sha256(engine_version + evaluator (nombre, VERSION, hash del source) +
+ProductContext completo). Una entrada por evaluador: cambiar un evaluador
+solo invalida SUS resultados; el resto de la interrogacion sigue en cache.
+
+Storage: <root>/<k[:2]>/<k>.json (write atomico tmp + os.replace) con capa
+en memoria. Sin root = solo memoria (por proceso).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from synapse.infra.contract_snapshot import sha256_json, stable_json_dumps
+
+_FP_CACHE: Dict[type, str] = {}
+
+
+def evaluator_fingerprint(evaluator: Any) -> str:
+    """
+    Identidad de un evaluador: clase + VERSION + hash de su source + repr de
+    CACHE_DEPS (tablas de modulo que lee). Editar el evaluador o sus tablas
+    cambia el fingerprint sin bump manual.
+    """
+    cls = type(evaluator)
+    fp = _FP_CACHE.get(cls)
+    if fp is None:
+        try:
+            src = inspect.getsource(cls)
+        except (OSError, TypeError):
+            src = ""  # sin source (frozen/zip): solo VERSION manda
+        fp = sha256_json({
+            "cls": f"{cls.__module__}.{cls.__qualname__}",
+            "version": str(getattr(cls, "VERSION", "1")),
+            "src": hashlib.sha256(src.encode("utf-8")).hexdigest(),
+            "deps": hashlib.sha256(repr(getattr(cls, "CACHE_DEPS", ())).encode("utf-8")).hexdigest(),
+        })
+        _FP_CACHE[cls] = fp
+    return fp
+
+
+def context_key(ctx: Any) -> Dict[str, Any]:
+    """ProductContext completo (input_hash() trunca description: no sirve aqui)."""
+    return asdict(ctx)
+
+
+class EvaluationCache:
+    def __init__(self, root: Union[str, Path, None] = None) -> None:
+        self.root = Path(root) if root else None
+        self._mem: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(engine_version: str, evaluator: Any, ctx: Any) -> str:
+        return sha256_json({
+            "engine": engine_version,
+            "evaluator": evaluator_fingerprint(evaluator),
+            "ctx": context_key(ctx),
+        })
+
+    def _path(self, key: str) -> Path:
+        assert self.root is not None
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        hit = self._mem.get(key)
+        if hit is None and self.root is not None:
+            p = self._path(key)
+            try:
+                raw = json.loads(p.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                raw = None
+            if isinstance(raw, dict):
+                hit = raw
+                self._mem[key] = raw
+        if hit is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return hit
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        self._mem[key] = payload
+        if self.root is None:
+            return
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+        tmp.write_text(stable_json_dumps(payload) + "\n", encoding="utf-8", newline="\n")
+        os.replace(str(tmp), str(p))
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries_in_memory": len(self._mem)}
@@ -21,8 +21,8 @@ Verdicts:
 from __future__ import annotations
 
 import re
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
 from .models import (
     ProductContext,
@@ -33,6 +33,14 @@ from .models import (
     Risk,
 )
 
+if TYPE_CHECKING:
+    from .evaluation_cache import EvaluationCache
+
+
+# Bump = invalida TODO el cache de evaluadores (cambio de contrato del engine).
+# Cambios a un evaluador se detectan solos (VERSION + source del evaluador).
+ENGINE_VERSION = "1"
+
 
 # ============================================================
 # FRAMEWORK RESULTS
@@ -150,6 +158,9 @@ CATEGORY_OBJECTIONS = {
 class JTBDEvaluator:
     """Jobs To Be Done framework."""
     
+    VERSION = "1"
+    CACHE_DEPS = (CATEGORY_JOBS,)  # tablas que lee (entran al fingerprint del cache)
+    
     def evaluate(self, ctx: ProductContext) -> FrameworkResult:
         findings = {}
         score = 0.0
@@ -231,6 +242,9 @@ class JTBDEvaluator:
 class EmotionMapEvaluator:
     """Mapa emocional framework."""
     
+    VERSION = "1"
+    CACHE_DEPS = (CATEGORY_EMOTIONS, CATEGORY_ENEMIES)  # tablas que lee (entran al fingerprint del cache)
+    
     def evaluate(self, ctx: ProductContext) -> FrameworkResult:
         findings = {}
         score = 0.0
@@ -308,6 +322,9 @@ class EmotionMapEvaluator:
 class ObjectionEvaluator:
     """Análisis de objeciones framework."""
     
+    VERSION = "1"
+    CACHE_DEPS = (CATEGORY_OBJECTIONS,)  # tablas que lee (entran al fingerprint del cache)
+    
     def evaluate(self, ctx: ProductContext) -> FrameworkResult:
         findings = {}
         score = 0.0
@@ -383,6 +400,9 @@ class ObjectionEvaluator:
 class ComplianceEvaluator:
     """Compliance check framework."""
     
+    VERSION = "1"
+    CACHE_DEPS = (COMPLIANCE_TERMS, CATEGORY_RISKS)  # tablas que lee (entran al fingerprint del cache)
+    
     def evaluate(self, ctx: ProductContext) -> FrameworkResult:
         findings = {}
         flags = []
@@ -428,6 +448,9 @@ class ComplianceEvaluator:
 class DifferentiationEvaluator:
     """Diferenciación framework."""
     
+    VERSION = "1"
+    CACHE_DEPS = ()  # tablas que lee (entran al fingerprint del cache)
+    
     def evaluate(self, ctx: ProductContext) -> FrameworkResult:
         findings = {}
         score = 0.0
@@ -528,9 +551,13 @@ class InterrogationEngine:
             # Puede lanzar
         else:
             # Revisar blocking_reasons
+    
+    Con `cache` (EvaluationCache) cada evaluador se salta si ya corrio sobre
+    el mismo ProductContext con la misma version de codigo.
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional["EvaluationCache"] = None):
+        self.cache = cache
         self.evaluators = [
             JTBDEvaluator(),
             EmotionMapEvaluator(),
@@ -552,7 +579,7 @@ class InterrogationEngine:
         
         framework_results: Dict[str, FrameworkResult] = {}
         for evaluator in self.evaluators:
-            result = evaluator.evaluate(ctx)
+            result = self._evaluate(evaluator, ctx)
             framework_results[result.name] = result
         
         framework_scores = {name: r.score for name, r in framework_results.items()}
@@ -605,6 +632,20 @@ class InterrogationEngine:
             input_hash=ctx.input_hash(),
         )
     
+    def _evaluate(self, evaluator: Any, ctx: ProductContext) -> FrameworkResult:
+        if self.cache is None:
+            return evaluator.evaluate(ctx)
+        key = self.cache.make_key(ENGINE_VERSION, evaluator, ctx)
+        cached = self.cache.get(key)
+        if cached is not None:
+            try:
+                return FrameworkResult(**cached)
+            except TypeError:
+                pass  # entrada de un schema viejo: recalcular
+        result = evaluator.evaluate(ctx)
+        self.cache.put(key, asdict(result))
+        return result
+    
     def _compile_risks(self, ctx: ProductContext, results: Dict[str, FrameworkResult]) -> List[Risk]:
         risks = []
         
@@ -26,13 +26,15 @@ from __future__ import annotations
 import hashlib
 import re
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Set, Tuple
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 from .models import (
     ContentType,
     QualityDimension,
     QualityFilterResult,
 )
+from .similarity_index import SimilarityIndex
 
 
 # ============================================================
@@ -158,11 +160,17 @@ class MetaFilter:
     Filter 2: Meta-evaluador de calidad.
     
     Evalúa 6 dimensiones y detecta duplicados.
+    
+    Similitud contra TODO el historial aceptado (SimilarityIndex). Con
+    `similarity_index_path` el historial persiste entre corridas/waves.
     """
     
-    def __init__(self):
+    SIMILARITY_THRESHOLD = 0.8
+    
+    def __init__(self, similarity_index_path: Union[str, Path, None] = None):
         self.seen_hashes: Set[str] = set()
         self.content_history: List[str] = []
+        self.similarity_index = SimilarityIndex(self.SIMILARITY_THRESHOLD, path=similarity_index_path)
     
     def evaluate(
         self,
@@ -208,25 +216,13 @@ class MetaFilter:
         if passed:
             self.seen_hashes.add(content_hash)
             self.content_history.append(content)
+            self.similarity_index.add(content.lower().split())
         
         return passed, scores, issues
     
     def _is_too_similar(self, content: str, threshold: float = 0.8) -> bool:
-        """Check si es muy similar a contenido previo."""
-        content_words = set(content.lower().split())
-        
-        for prev in self.content_history[-20:]:
-            prev_words = set(prev.lower().split())
-            if not prev_words:
-                continue
-            
-            intersection = len(content_words & prev_words)
-            union = len(content_words | prev_words)
-            
-            if union > 0 and intersection / union > threshold:
-                return True
-        
-        return False
+        """Check si es muy similar a contenido previo (historial completo)."""
+        return self.similarity_index.find_similar(content.lower().split(), threshold) is not None
     
     def _score_clarity(self, content: str) -> float:
         """Evalúa claridad."""
@@ -356,9 +352,11 @@ class MetaFilter:
         return max(0.1, min(1.0, score))
     
     def reset(self):
-        """Reset state (para nuevo batch)."""
+        """Reset state (para nuevo batch). El historial persistido se conserva."""
         self.seen_hashes.clear()
         self.content_history.clear()
+        if not self.similarity_index.persistent:
+            self.similarity_index.clear()
 
 
 # ============================================================
@@ -380,9 +378,13 @@ class QualityFilter:
             # result.regeneration_hint dice qué mejorar
     """
     
-    def __init__(self, max_regenerations: int = 3):
+    def __init__(
+        self,
+        max_regenerations: int = 3,
+        similarity_index_path: Union[str, Path, None] = None,
+    ):
         self.contract_filter = ContractFilter()
-        self.meta_filter = MetaFilter()
+        self.meta_filter = MetaFilter(similarity_index_path=similarity_index_path)
         self.max_regenerations = max_regenerations
         self.regeneration_counts: Dict[str, int] = {}
     
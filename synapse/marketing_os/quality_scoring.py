@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Any
 
 from synapse.marketing_os.creative_dedup import normalize_text
@@ -16,16 +18,8 @@ class CreativeQuality:
     metrics: dict[str, Any]
 
 
-def score_creatives(
-    creatives: list[dict[str, Any]],
-    *,
-    title: str | None = None,
-    text_key: str = "primary_text",
-) -> CreativeQuality:
-    n = len(creatives)
-    texts = [str(c.get(text_key) or "") for c in creatives]
-    norm = [normalize_text(t) for t in texts]
-
+def _aggregate(texts: list[str], norm: list[str], title_hits: list[bool]) -> CreativeQuality:
+    n = len(texts)
     uniq = len(set(norm)) if n else 0
     unique_ratio = (uniq / n) if n else 0.0
 
@@ -33,14 +27,7 @@ def score_creatives(
     avg_len = (sum(lengths) / len(lengths)) if lengths else 0.0
 
     # title presence = at least one title token appears in creative text
-    title_tokens = set(normalize_text(title or "").split()) if title else set()
-    present = 0
-    if title_tokens and n:
-        for nt in norm:
-            toks = set(nt.split())
-            if toks.intersection(title_tokens):
-                present += 1
-    title_presence_ratio = (present / n) if n else 0.0
+    title_presence_ratio = (sum(title_hits) / n) if n else 0.0
 
     # penalties: too short or too long average
     # sweet spot: ~35–140 chars
@@ -66,3 +53,179 @@ def score_creatives(
         "len_penalty": len_pen,
     }
     return CreativeQuality(score=score_i, metrics=metrics)
+
+
+def _title_tokens(title: str | None) -> set[str]:
+    return set(normalize_text(title or "").split()) if title else set()
+
+
+def score_creatives(
+    creatives: list[dict[str, Any]],
+    *,
+    title: str | None = None,
+    text_key: str = "primary_text",
+) -> CreativeQuality:
+    texts = [str(c.get(text_key) or "") for c in creatives]
+    norm = [normalize_text(t) for t in texts]
+    title_tokens = _title_tokens(title)
+    title_hits = [bool(title_tokens) and not title_tokens.isdisjoint(nt.split()) for nt in norm]
+    return _aggregate(texts, norm, title_hits)
+
+
+# ------------------------------------------------------------
+# Bulk scoring: reglas precompiladas + hit vectors por regla
+# ------------------------------------------------------------
+
+# sweet spot de largo (mismo que la penalizacion agregada)
+MIN_LEN = 35
+MAX_LEN = 140
+MAX_WORDS_PER_SENTENCE = 25
+
+# reglas de patron: nombre -> regex (presencia => 1 hit)
+PATTERN_RULES: dict[str, str] = {
+    "placeholder": r"\{[a-z_]+\}",
+    "specific_claim": r"\d+%|\d+ horas|\d+ días|\$\d+",
+    "has_number": r"\d",
+}
+
+# reglas de checks sin regex, evaluadas en la misma pasada
+CHECK_RULES: tuple[str, ...] = ("empty", "too_short", "too_long", "long_sentences", "missing_title", "duplicate")
+
+
+def _term_rules() -> dict[str, list[str]]:
+    # lazy: las listas viven en quality_filter (una sola fuente de verdad)
+    from synapse.marketing_os.quality_filter import COMPLIANCE_TERMS, FILLER_WORDS, GENERIC_PHRASES, SPAIN_SPANISH
+
+    return {
+        "compliance_term": list(COMPLIANCE_TERMS),
+        "generic_phrase": list(GENERIC_PHRASES),
+        "spain_spanish": list(SPAIN_SPANISH),
+        "filler_word": list(FILLER_WORDS),
+    }
+
+
+@dataclass(frozen=True)
+class CompiledRules:
+    """
+    Todas las reglas de patron en UN regex: en cada posicion, un lookahead
+    opcional por grupo. Los terminos van en un solo grupo (alternancia del mas
+    largo al mas corto); los terminos que son prefijo del match se suman via
+    `prefixes`, asi cada termino distinto presente cuenta 1 hit (== `in`).
+    """
+
+    names: tuple[str, ...]
+    matcher: re.Pattern[str]
+    pattern_groups: tuple[tuple[str, str], ...]  # (group, rule)
+    term_rule: dict[str, str]
+    prefixes: dict[str, tuple[str, ...]]
+
+    def index(self, name: str) -> int:
+        return self.names.index(name)
+
+
+@lru_cache(maxsize=1)
+def compile_rules() -> CompiledRules:
+    term_rules = _term_rules()
+    term_rule: dict[str, str] = {}
+    for rule, terms in term_rules.items():
+        for t in terms:
+            term_rule.setdefault(t.lower(), rule)
+    terms = sorted(term_rule, key=lambda t: (-len(t), t))
+    prefixes = {t: tuple(o for o in terms if o != t and t.startswith(o)) for t in terms}
+
+    groups = [("term", "|".join(re.escape(t) for t in terms))]
+    pattern_groups = []
+    for i, (rule, rx) in enumerate(PATTERN_RULES.items()):
+        groups.append((f"p{i}", rx))
+        pattern_groups.append((f"p{i}", rule))
+    matcher = re.compile("".join(f"(?=(?P<{g}>{rx}))?" for g, rx in groups))
+
+    names = (*term_rules, *PATTERN_RULES, *CHECK_RULES)
+    return CompiledRules(
+        names=tuple(names),
+        matcher=matcher,
+        pattern_groups=tuple(pattern_groups),
+        term_rule=term_rule,
+        prefixes=prefixes,
+    )
+
+
+@dataclass(frozen=True)
+class BulkQuality:
+    quality: CreativeQuality  # agregado, identico a score_creatives()
+    rules: tuple[str, ...]
+    hits: list[list[int]]  # hits[i][j] = hits de rules[j] en el creative i
+
+    def rule_vector(self, name: str) -> list[int]:
+        j = self.rules.index(name)
+        return [row[j] for row in self.hits]
+
+    def rule_totals(self) -> dict[str, int]:
+        return {name: sum(row[j] for row in self.hits) for j, name in enumerate(self.rules)}
+
+    def flagged(self, name: str) -> list[int]:
+        return [i for i, v in enumerate(self.rule_vector(name)) if v]
+
+
+def _scan(rules: CompiledRules, text: str) -> tuple[set[str], set[str]]:
+    """Una pasada: terminos distintos presentes + reglas de patron que matchean."""
+    terms: set[str] = set()
+    patterns: set[str] = set()
+    for m in rules.matcher.finditer(text.lower()):
+        t = m.group("term")
+        if t is not None and t not in terms:
+            terms.add(t)
+            terms.update(rules.prefixes[t])
+        for g, rule in rules.pattern_groups:
+            if m.group(g) is not None:
+                patterns.add(rule)
+    return terms, patterns
+
+
+def score_creatives_bulk(
+    creatives: list[dict[str, Any]],
+    *,
+    title: str | None = None,
+    text_key: str = "primary_text",
+) -> BulkQuality:
+    """
+    Score agregado (== score_creatives) + breakdown por regla y por creative
+    en una sola pasada por creative. Las reglas se compilan una vez por proceso.
+    """
+    rules = compile_rules()
+    col = {name: j for j, name in enumerate(rules.names)}
+    title_tokens = _title_tokens(title)
+
+    texts: list[str] = []
+    norm: list[str] = []
+    title_hits: list[bool] = []
+    hits: list[list[int]] = []
+    seen: set[str] = set()
+    for c in creatives:
+        text = str(c.get(text_key) or "")
+        nt = normalize_text(text)
+        row = [0] * len(rules.names)
+
+        terms, patterns = _scan(rules, text)
+        for t in terms:
+            row[col[rules.term_rule[t]]] += 1
+        for rule in patterns:
+            row[col[rule]] = 1
+
+        has_title = bool(title_tokens) and not title_tokens.isdisjoint(nt.split())
+        sentences = text.split(".")
+        words_per_sentence = sum(len(s.split()) for s in sentences) / len(sentences)
+        row[col["empty"]] = int(not text)
+        row[col["too_short"]] = int(bool(text) and len(text) < MIN_LEN)
+        row[col["too_long"]] = int(len(text) > MAX_LEN)
+        row[col["long_sentences"]] = int(words_per_sentence > MAX_WORDS_PER_SENTENCE)
+        row[col["missing_title"]] = int(bool(title_tokens) and not has_title)
+        row[col["duplicate"]] = int(nt in seen)
+        seen.add(nt)
+
+        texts.append(text)
+        norm.append(nt)
+        title_hits.append(has_title)
+        hits.append(row)
+
+    return BulkQuality(quality=_aggregate(texts, norm, title_hits), rules=rules.names, hits=hits)
@@ -0,0 +1,136 @@
+# synapse/marketing_os/similarity_index.py
+"""
+Similarity Index - historial completo de creativos aceptados.
+
+Indice invertido token -> creativos con prefix filtering para Jaccard:
+si J(x, y) >= t entonces |x & y| >= ceil(t * |x|), asi que con un orden
+global fijo de tokens basta indexar/probar los primeros
+|x| - ceil(t * |x|) + 1 tokens de cada set. Solo los que comparten un
+token de prefijo (y pasan el filtro de tamano t*|x| <= |y| <= |x|/t) se
+verifican con Jaccard exacto.
+
+Persistencia opcional: JSONL append-only (una linea por creativo aceptado),
+se recarga al abrir => repeticiones de waves anteriores tambien cuentan.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import zlib
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+_EPS = 1e-9
+
+
+def _token_order(tok: str) -> Tuple[int, str]:
+    # orden global estable (crc32 dispersa tokens comunes fuera del prefijo)
+    return (zlib.crc32(tok.encode("utf-8")), tok)
+
+
+def _prefix_len(n: int, threshold: float) -> int:
+    return max(1, min(n, n - int(math.ceil(threshold * n - _EPS)) + 1))
+
+
+class SimilarityIndex:
+    """
+    Uso:
+        idx = SimilarityIndex(threshold=0.8, path="data/marketing/similarity_index.jsonl")
+        if idx.find_similar(words) is None:
+            idx.add(words)
+    """
+
+    def __init__(self, threshold: float = 0.8, path: Union[str, Path, None] = None) -> None:
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = float(threshold)
+        self.path = Path(path) if path else None
+        self._sets: List[FrozenSet[str]] = []
+        self._postings: Dict[str, List[int]] = {}
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    @property
+    def persistent(self) -> bool:
+        return self.path is not None
+
+    def __len__(self) -> int:
+        return len(self._sets)
+
+    def _load(self) -> None:
+        assert self.path is not None
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    toks = json.loads(line).get("tokens")
+                except (ValueError, AttributeError):
+                    continue  # linea truncada por un crash: se ignora
+                if isinstance(toks, list):
+                    self._insert(frozenset(str(t) for t in toks))
+
+    def _insert(self, s: FrozenSet[str]) -> int:
+        sid = len(self._sets)
+        self._sets.append(s)
+        ordered = sorted(s, key=_token_order)
+        for tok in ordered[:_prefix_len(len(ordered), self.threshold)]:
+            self._postings.setdefault(tok, []).append(sid)
+        return sid
+
+    def add(self, tokens: Iterable[str]) -> Optional[int]:
+        """Agrega un set (vacios no se indexan). Persiste si hay path."""
+        s = frozenset(tokens)
+        if not s:
+            return None
+        sid = self._insert(s)
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            line = json.dumps({"tokens": sorted(s)}, ensure_ascii=False) + "\n"
+            # una sola escritura O_APPEND por linea: seguro entre procesos
+            fd = os.open(str(self.path), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, line.encode("utf-8"))
+            finally:
+                os.close(fd)
+        return sid
+
+    def find_similar(self, tokens: Iterable[str], threshold: Optional[float] = None) -> Optional[int]:
+        """
+        Id del primer set con Jaccard > threshold (estricto, como MetaFilter),
+        o None. threshold < self.threshold => scan lineal (el prefijo indexado
+        no garantiza recall por debajo del threshold del indice).
+        """
+        s = frozenset(tokens)
+        if not s:
+            return None
+        t = self.threshold if threshold is None else float(threshold)
+        if t < self.threshold:
+            candidates: Iterable[int] = range(len(self._sets))
+        else:
+            ordered = sorted(s, key=_token_order)
+            found = set()
+            for tok in ordered[:_prefix_len(len(ordered), t)]:
+                found.update(self._postings.get(tok, ()))
+            candidates = sorted(found)
+
+        n = len(s)
+        lo, hi = t * n - _EPS, n / t + _EPS if t > 0 else float("inf")
+        for sid in candidates:
+            other = self._sets[sid]
+            m = len(other)
+            if m < lo or m > hi:
+                continue
+            inter = len(s & other)
+            union = n + m - inter
+            if union > 0 and inter / union > t:
+                return sid
+        return None
+
+    def clear(self) -> None:
+        """Vacia el indice en memoria (el archivo persistido no se toca)."""
+        self._sets.clear()
+        self._postings.clear()
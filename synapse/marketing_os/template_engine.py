@@ -0,0 +1,128 @@
+# synapse/marketing_os/template_engine.py
+"""
+Template Engine - templates "{slot}" compilados una sola vez.
+
+compile_template() parsea cada template a un plan inmutable de segmentos
+(literal | slot) y se memoiza por texto. RenderContext stringifica los
+valores una vez y memoiza fragmentos ya renderizados (p.ej. el mismo hook
+usado por scripts y primary texts).
+
+Semantica == CreativeFactory._fill_template original:
+- "{key}" con key en el contexto -> str(valor)
+- "{otro}" sin valor -> se deja literal
+Diferencia deliberada: un valor que contiene "{slot}" NO se re-expande
+(el replace secuencial lo hacia segun el orden del dict).
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+_SLOT = re.compile(r"\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    source: str
+    # (is_slot, text): literal o nombre de slot
+    segments: Tuple[Tuple[bool, str], ...]
+
+    @property
+    def slots(self) -> Tuple[str, ...]:
+        return tuple(t for is_slot, t in self.segments if is_slot)
+
+    def render(self, values: Mapping[str, str]) -> str:
+        out: List[str] = []
+        for is_slot, t in self.segments:
+            if not is_slot:
+                out.append(t)
+            else:
+                v = values.get(t)
+                out.append("{" + t + "}" if v is None else v)
+        return "".join(out)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(template: str) -> CompiledTemplate:
+    segs: List[Tuple[bool, str]] = []
+    pos = 0
+    for m in _SLOT.finditer(template):
+        if m.start() > pos:
+            segs.append((False, template[pos:m.start()]))
+        segs.append((True, m.group(1)))
+        pos = m.end()
+    if pos < len(template):
+        segs.append((False, template[pos:]))
+    return CompiledTemplate(source=template, segments=tuple(segs))
+
+
+def compile_all(templates: Iterable[Any]) -> int:
+    """Precompila (recursivo sobre dict/list/tuple). Devuelve cuantos strings vio."""
+    n = 0
+    stack = [templates]
+    while stack:
+        x = stack.pop()
+        if isinstance(x, str):
+            compile_template(x)
+            n += 1
+        elif isinstance(x, Mapping):
+            stack.extend(x.values())
+        elif isinstance(x, (list, tuple)):
+            stack.extend(x)
+    return n
+
+
+class RenderContext:
+    """Valores ya stringificados + memo de fragmentos renderizados."""
+
+    __slots__ = ("values", "_memo")
+
+    def __init__(self, values: Union[Mapping[str, Any], "RenderContext"]) -> None:
+        if isinstance(values, RenderContext):
+            self.values: Dict[str, str] = dict(values.values)
+        else:
+            self.values = {k: str(v) for k, v in values.items()}
+        self._memo: Dict[str, str] = {}
+
+    def derive(self, **extra: Any) -> "RenderContext":
+        """Contexto hijo con slots extra (memo propio: los slots cambian)."""
+        child = RenderContext(self)
+        for k, v in extra.items():
+            child.values[k] = str(v)
+        return child
+
+    def render(self, template: str) -> str:
+        hit = self._memo.get(template)
+        if hit is None:
+            hit = compile_template(template).render(self.values)
+            self._memo[template] = hit
+        return hit
+
+
+def render(template: str, ctx: Union[Mapping[str, Any], RenderContext]) -> str:
+    if isinstance(ctx, RenderContext):
+        return ctx.render(template)
+    return compile_template(template).render({k: str(v) for k, v in ctx.items()})
+
+
+def render_bulk(
+    templates: Sequence[str],
+    contexts: Sequence[Union[Mapping[str, Any], RenderContext]],
+    *,
+    only: Optional[Sequence[Sequence[int]]] = None,
+) -> List[List[str]]:
+    """
+    productos x variantes: out[i][j] = templates[j] con contexts[i].
+    `only[i]` restringe los indices de template para el contexto i.
+    Cada template se compila una vez y cada contexto se stringifica una vez.
+    """
+    plans = [compile_template(t) for t in templates]
+    out: List[List[str]] = []
+    for i, ctx in enumerate(contexts):
+        values = ctx.values if isinstance(ctx, RenderContext) else {k: str(v) for k, v in ctx.items()}
+        idxs = range(len(plans)) if only is None else only[i]
+        out.append([plans[j].render(values) for j in idxs])
+    return out
@@ -1,20 +1,22 @@
 from __future__ import annotations
 
-import csv
-import zipfile
+import json
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
-from synapse.infra.contract_snapshot import stable_json_dumps
+from synapse.catalog.canonical_store import open_store
+from synapse.infra.contract_snapshot import sha256_json, stable_json_dumps
 from synapse.infra.dry_run import DryRunDecision, format_dry_run_banner
 from synapse.infra.logging_std import get_logger, log_kv
+from synapse.marketing_os.build_cache import BuildCache, code_fingerprint, write_zip_streamed
 from synapse.marketing_os.creative_dedup import dedup_creatives
 from synapse.marketing_os.exporters.meta_bundle import write_meta_bundle
 from synapse.marketing_os.exporters.shopify_pack import write_shopify_products_csv
 from synapse.marketing_os.experiment_stoploss import default_policy_mx
-from synapse.marketing_os.quality_scoring import score_creatives
-from synapse.marketing_os.wave_kit_manifest import Artifact, artifact_from_file, build_manifest, write_manifest
+from synapse.marketing_os import quality_scoring
+from synapse.marketing_os.quality_scoring import score_creatives_bulk
+from synapse.marketing_os.wave_kit_manifest import Artifact, build_manifest, write_manifest
 
 
 @dataclass(frozen=True)
@@ -108,13 +110,10 @@ def _resolve_canonical_csv(explicit: str | None = None) -> Path | None:
 
 
 def _load_product(canonical_csv: Path, product_id: str) -> dict[str, Any]:
-    with canonical_csv.open("r", encoding="utf-8", newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            pid = str(row.get("product_id") or row.get("id") or "").strip()
-            if pid == product_id:
-                return dict(row)
-    raise KeyError(f"product_id not found in canonical_csv: {product_id}")
+    row = open_store(canonical_csv).get(product_id)
+    if row is None:
+        raise KeyError(f"product_id not found in canonical_csv: {product_id}")
+    return row
 
 
 def _minimal_product(product_id: str) -> dict[str, Any]:
@@ -133,28 +132,29 @@ def _pick_benefit(product: dict[str, Any]) -> str:
     return str(product.get("benefit") or product.get("hook") or product.get("usp") or "mejor valor").strip()
 
 
+# Copy angles: directo, social proof, urgencia, outcome
+_CREATIVE_TEMPLATES: tuple[tuple[str, str], ...] = (
+    ("Directo", "{title} que sí cumple: {benefit}."),
+    ("Upgrade", "Upgrade inmediato: {title}. {benefit}."),
+    ("Outcome", "Resultados que se notan: {title}."),
+    ("Social", "La gente que sabe, elige {title}."),
+    ("Fricción", "Menos batallar, más avanzar: {title}."),
+    ("Valor", "Lo barato sale caro. Mejor: {title}."),
+    ("Descubrimiento", "Lo necesitas, aunque no lo sabías: {title}."),
+    ("Disciplina", "Menos excusas, más acción: {title}."),
+    ("Tiempo", "Tu día a día, pero en modo PRO: {title}."),
+    ("CTA", "Pruébalo hoy: {title}."),
+    ("Hook", "{title} + {benefit} = combo ganador."),
+    ("Simple", "Hazlo fácil: {title} y listo."),
+)
+
+
 def _generate_creatives_raw(product: dict[str, Any]) -> list[dict[str, Any]]:
     title = _pick_title(product, "Producto")
     benefit = _pick_benefit(product)
 
-    # Copy angles: directo, social proof, urgencia, outcome
-    templates = [
-        ("Directo", "{title} que sí cumple: {benefit}."),
-        ("Upgrade", "Upgrade inmediato: {title}. {benefit}."),
-        ("Outcome", "Resultados que se notan: {title}."),
-        ("Social", "La gente que sabe, elige {title}."),
-        ("Fricción", "Menos batallar, más avanzar: {title}."),
-        ("Valor", "Lo barato sale caro. Mejor: {title}."),
-        ("Descubrimiento", "Lo necesitas, aunque no lo sabías: {title}."),
-        ("Disciplina", "Menos excusas, más acción: {title}."),
-        ("Tiempo", "Tu día a día, pero en modo PRO: {title}."),
-        ("CTA", "Pruébalo hoy: {title}."),
-        ("Hook", "{title} + {benefit} = combo ganador."),
-        ("Simple", "Hazlo fácil: {title} y listo."),
-    ]
-
     out: list[dict[str, Any]] = []
-    for i, (angle, t) in enumerate(templates, start=1):
+    for i, (angle, t) in enumerate(_CREATIVE_TEMPLATES, start=1):
         txt = t.format(title=title, benefit=benefit).strip()
         out.append(
             {
@@ -182,12 +182,16 @@ def _write_json(path: Path, payload: dict[str, Any]) -> None:
 
 
 def _write_bundle_zip(bundle_path: Path, *, base_dir: Path, relpaths: list[str]) -> None:
-    bundle_path.parent.mkdir(parents=True, exist_ok=True)
-    with zipfile.ZipFile(bundle_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        for rp in relpaths:
-            p = base_dir / rp
-            if p.exists() and p.is_file():
-                z.write(p, arcname=rp)
+    write_zip_streamed(bundle_path, base_dir=base_dir, relpaths=relpaths)
+
+
+def _templates_fingerprint() -> str:
+    """Version de los creatives: templates + codigo que los genera y deduplica."""
+    return sha256_json({
+        "templates": [list(t) for t in _CREATIVE_TEMPLATES],
+        "code": code_fingerprint(_generate_creatives_raw, _pick_title, _pick_benefit, _write_ndjson, dedup_creatives),
+        "dedup_threshold": 0.80,
+    })
 
 
 def plan_paths(*, out_root: Path, product_id: str) -> WaveKitPaths:
@@ -223,58 +227,131 @@ def run(
         return 0
 
     csv_path = _resolve_canonical_csv(canonical_csv)
-    used_fallback = False
-    if csv_path is None:
-        used_fallback = True
-        product = _minimal_product(product_id)
-    else:
+    product = None
+    if csv_path is not None:
         try:
             product = _load_product(csv_path, product_id)
         except KeyError:
-            used_fallback = True
-            product = _minimal_product(product_id)
+            product = None
 
-    raw_creatives = _generate_creatives_raw(product)
-    dres = dedup_creatives(raw_creatives, threshold=0.80)
-    creatives = dres.kept
+    _build_kit(
+        product_id=product_id,
+        product=product,
+        out_root=str(out_root_p),
+        canonical_csv=str(csv_path) if csv_path is not None else None,
+        schema_version=schema_version,
+    )
+    return 0
 
-    _write_ndjson(paths.creatives_ndjson, creatives)
 
+def _build_kit(
+    *,
+    product_id: str,
+    product: dict[str, Any] | None,
+    out_root: str,
+    canonical_csv: str | None,
+    schema_version: str,
+) -> dict[str, Any]:
+    """
+    Genera y escribe el kit de un producto (independiente de los demas).
+    product=None => fallback minimo. Devuelve el resumen del kit.
+    Top-level y con args picklables: corre igual inline o en un worker.
+
+    Incremental (BuildCache en el kit dir): cada artifact se regenera solo si
+    cambio su fingerprint de inputs; re-correr la wave tras arreglar un
+    producto solo reescribe los outputs de ese producto.
+    """
+    paths = plan_paths(out_root=Path(out_root), product_id=product_id)
+    used_fallback = product is None
+    if product is None:
+        product = _minimal_product(product_id)
+
+    cache = BuildCache(paths.root)
     title = _pick_title(product, product_id)
-    q = score_creatives(creatives, title=title)
-    q_payload = {"score": q.score, "metrics": q.metrics, "dedup_dropped": dres.dropped}
-    _write_json(paths.quality_json, q_payload)
-
-    meta_json = write_meta_bundle(paths.meta_dir, product_id=product_id, creatives=creatives)
-    shopify_csv = write_shopify_products_csv(
-        paths.shopify_dir,
-        product={
+    catalog_mode = "fallback_minimal" if used_fallback else "canonical"
+    state: dict[str, Any] = {}
+
+    def _creatives() -> list[dict[str, Any]]:
+        # solo se materializan si algun artifact dependiente esta stale
+        if "creatives" not in state:
+            with paths.creatives_ndjson.open("r", encoding="utf-8") as f:
+                state["creatives"] = [json.loads(line) for line in f if line.strip()]
+        return state["creatives"]
+
+    def build_creatives() -> dict[str, Any]:
+        dres = dedup_creatives(_generate_creatives_raw(product), threshold=0.80)
+        state["creatives"] = dres.kept
+        _write_ndjson(paths.creatives_ndjson, dres.kept)
+        return {"count": len(dres.kept), "dedup_dropped": dres.dropped}
+
+    cache.ensure(
+        "creatives.ndjson",
+        # solo los campos que leen los templates: fix de descripcion no regenera creatives
+        sha256_json({
+            "title": _pick_title(product, "Producto"),
+            "benefit": _pick_benefit(product),
+            "templates": _templates_fingerprint(),
+        }),
+        build_creatives,
+    )
+    creative_info = cache.extra("creatives.ndjson")
+    creatives_sha = cache.artifact("creatives.ndjson").sha256
+    dedup_dropped = int(creative_info.get("dedup_dropped") or 0)
+
+    def build_quality() -> dict[str, Any]:
+        bulk = score_creatives_bulk(_creatives(), title=title)
+        q = bulk.quality
+        _write_json(
+            paths.quality_json,
+            {"score": q.score, "metrics": q.metrics, "dedup_dropped": dedup_dropped, "rule_hits": bulk.rule_totals()},
+        )
+        return {"score": q.score}
+
+    cache.ensure(
+        "quality.json",
+        sha256_json({
+            "creatives": creatives_sha,
             "title": title,
-            "description": _pick_desc(product),
-            "handle": product.get("handle") or title or product_id,
-        },
-        tags=["synapse", "wavekit"],
-        vendor="TrendifyHub",
-        status="draft",
+            "dedup_dropped": dedup_dropped,
+            "code": code_fingerprint(quality_scoring, _write_json),
+        }),
+        build_quality,
     )
 
-    # bundle (core deliverables)
+    cache.ensure(
+        "meta/meta_assets.json",
+        sha256_json({"creatives": creatives_sha, "product_id": product_id, "code": code_fingerprint(write_meta_bundle)}),
+        lambda: write_meta_bundle(paths.meta_dir, product_id=product_id, creatives=_creatives()),
+    )
+
+    shopify_product = {
+        "title": title,
+        "description": _pick_desc(product),
+        "handle": product.get("handle") or title or product_id,
+    }
+    shopify_opts = {"tags": ["synapse", "wavekit"], "vendor": "TrendifyHub", "status": "draft"}
+    cache.ensure(
+        "shopify/shopify_products.csv",
+        sha256_json({"product": shopify_product, **shopify_opts, "code": code_fingerprint(write_shopify_products_csv)}),
+        lambda: write_shopify_products_csv(paths.shopify_dir, product=shopify_product, **shopify_opts),
+    )
+
+    # bundle (core deliverables): solo se re-zipea si cambio algun miembro
     rels = [
         "creatives.ndjson",
         "quality.json",
         "meta/meta_assets.json",
         "shopify/shopify_products.csv",
     ]
-    _write_bundle_zip(paths.bundle_zip, base_dir=paths.root, relpaths=rels)
-
-    base_dir = paths.root
-    artifacts: list[Artifact] = [
-        artifact_from_file(paths.creatives_ndjson, base_dir=base_dir),
-        artifact_from_file(paths.quality_json, base_dir=base_dir),
-        artifact_from_file(meta_json, base_dir=base_dir),
-        artifact_from_file(shopify_csv, base_dir=base_dir),
-        artifact_from_file(paths.bundle_zip, base_dir=base_dir),
-    ]
+    cache.ensure(
+        "bundle.zip",
+        sha256_json({"members": [[rp, cache.artifact(rp).sha256] for rp in rels], "code": code_fingerprint(write_zip_streamed)}),
+        lambda: _write_bundle_zip(paths.bundle_zip, base_dir=paths.root, relpaths=rels),
+    )
+
+    artifacts: list[Artifact] = [cache.artifact(rp) for rp in (*rels, "bundle.zip")]
+    quality_score = cache.extra("quality.json").get("score", 0.0)
+    creative_count = int(creative_info.get("count") or 0)
 
     policy = default_policy_mx()
     manifest = build_manifest(
@@ -282,11 +359,11 @@ def run(
         schema_version=schema_version,
         artifacts=artifacts,
         meta={
-            "canonical_csv": str(csv_path) if csv_path is not None else None,
-            "catalog_mode": "fallback_minimal" if used_fallback else "canonical",
-            "creative_count": len(creatives),
-            "quality_score": q.score,
-            "dedup_dropped": dres.dropped,
+            "canonical_csv": canonical_csv,
+            "catalog_mode": catalog_mode,
+            "creative_count": creative_count,
+            "quality_score": quality_score,
+            "dedup_dropped": dedup_dropped,
             "stoploss_policy": {
                 "roas_min": policy.roas_min,
                 "max_spend_mxn": policy.max_spend_mxn,
@@ -294,20 +371,118 @@ def run(
             },
         },
     )
-    write_manifest(paths.manifest_path, manifest)
-    return 0
+    cache.ensure("manifest.json", manifest["self_hash"], lambda: write_manifest(paths.manifest_path, manifest))
+    cache.save()
+    return {
+        "product_id": product_id,
+        "status": "ok",
+        "kit_dir": str(paths.root),
+        "catalog_mode": catalog_mode,
+        "creative_count": creative_count,
+        "quality_score": quality_score,
+        "dedup_dropped": dedup_dropped,
+        "rebuilt": list(cache.rebuilt),
+    }
+
+
+def _build_kit_safe(kw: dict[str, Any]) -> dict[str, Any]:
+    try:
+        return _build_kit(**kw)
+    except Exception as e:  # un producto roto no tumba el batch
+        return {"product_id": kw["product_id"], "status": "error", "error": f"{type(e).__name__}: {e}"}
+
+
+def run_batch(
+    *,
+    product_ids: list[str],
+    dry_run: bool = True,
+    out_root: str | None = None,
+    canonical_csv: str | None = None,
+    schema_version: str = "wavekit-v2",
+    workers: int = 1,
+) -> dict[str, Any]:
+    """
+    Wave de N productos: resuelve el canonical y carga los productos UNA vez
+    (get_many), luego reparte _build_kit por un process pool. Cada producto
+    escribe su bundle en out_root/<product_id>; el resumen combinado queda en
+    out_root/batch_summary.json. Devuelve ese resumen.
+    """
+    lg = get_logger("synapse.wave_kit_runner")
+    out_root_p = Path(out_root) if out_root else Path("data/marketing/waves")
+    ids = list(dict.fromkeys(str(p) for p in product_ids if str(p).strip()))
+
+    decision = DryRunDecision(dry_run=dry_run, reason="cli_or_default")
+    log_kv(lg, format_dry_run_banner(decision, "wavekit"), products=len(ids), out=str(out_root_p), workers=workers)
+
+    summary: dict[str, Any] = {"schema_version": schema_version, "products": len(ids), "dry_run": bool(dry_run)}
+    if dry_run:
+        summary.update({"ok": 0, "errors": 0, "results": []})
+        return summary
+
+    csv_path = _resolve_canonical_csv(canonical_csv)
+    rows = open_store(csv_path).get_many(ids) if csv_path is not None else {}
+
+    jobs = [
+        {
+            "product_id": pid,
+            "product": rows.get(pid),
+            "out_root": str(out_root_p),
+            "canonical_csv": str(csv_path) if csv_path is not None else None,
+            "schema_version": schema_version,
+        }
+        for pid in ids
+    ]
+
+    if workers <= 1 or len(jobs) <= 1:
+        results = [_build_kit_safe(j) for j in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as ex:
+            results = list(ex.map(_build_kit_safe, jobs))
+
+    ok = [r for r in results if r.get("status") == "ok"]
+    summary.update(
+        {
+            "canonical_csv": str(csv_path) if csv_path is not None else None,
+            "ok": len(ok),
+            "errors": len(results) - len(ok),
+            "fallback_minimal": sum(1 for r in ok if r.get("catalog_mode") == "fallback_minimal"),
+            "creative_count": sum(int(r.get("creative_count") or 0) for r in ok),
+            "avg_quality_score": round(sum(float(r["quality_score"]) for r in ok) / len(ok), 4) if ok else 0.0,
+            "results": results,
+        }
+    )
+    out_root_p.mkdir(parents=True, exist_ok=True)
+    tmp = out_root_p / "batch_summary.json.tmp"
+    _write_json(tmp, summary)
+    tmp.replace(out_root_p / "batch_summary.json")
+    return summary
 
 
 def main(argv: list[str] | None = None) -> int:
     import argparse
 
     p = argparse.ArgumentParser(prog="synapse.marketing_os.wave_kit_runner")
-    p.add_argument("--product-id", required=True)
+    target = p.add_mutually_exclusive_group(required=True)
+    target.add_argument("--product-id")
+    target.add_argument("--product-ids", help="Batch: ids separados por coma.")
     p.add_argument("--apply", action="store_true")
     p.add_argument("--out-root", default=None)
     p.add_argument("--canonical-csv", default=None)
+    p.add_argument("--workers", type=int, default=1)
     args = p.parse_args(argv)
 
+    if args.product_ids:
+        summary = run_batch(
+            product_ids=[x.strip() for x in str(args.product_ids).split(",")],
+            dry_run=not bool(args.apply),
+            out_root=args.out_root,
+            canonical_csv=args.canonical_csv,
+            workers=int(args.workers),
+        )
+        return 0 if not summary.get("errors") else 1
+
     return run(
         product_id=str(args.product_id),
         dry_run=not bool(args.apply),
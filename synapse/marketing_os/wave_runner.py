@@ -15,6 +15,8 @@ from typing import Any, Dict, List, Optional
 from .models import ProductContext, InterrogationVerdict
 from .interrogation_engine import InterrogationEngine
 from .creative_factory import CreativeFactory
+from .quality_filter import QualityFilter
+from .evaluation_cache import EvaluationCache
 
 
 WAVE_VERSION = "05"
@@ -58,7 +60,10 @@ class WaveRunner:
         output_dir: Optional[Path] = None,
         ledger_dir: Optional[Path] = None,
         manifest_dir: Optional[Path] = None,
+        similarity_index_path: Optional[Path] = None,
+        interrogation_cache_dir: Optional[Path] = None,
     ):
+        self._init_args = (output_dir, ledger_dir, manifest_dir, similarity_index_path, interrogation_cache_dir)
         self.output_dir = output_dir or DEFAULT_PATHS["output"]
         self.ledger_dir = ledger_dir or DEFAULT_PATHS["ledger"]
         self.manifest_dir = manifest_dir or DEFAULT_PATHS["manifests"]
@@ -67,8 +72,14 @@ class WaveRunner:
         self.ledger_dir.mkdir(parents=True, exist_ok=True)
         self.manifest_dir.mkdir(parents=True, exist_ok=True)
         
-        self.interrogation_engine = InterrogationEngine()
-        self.creative_factory = CreativeFactory()
+        # interrogation_cache_dir: resultados por evaluador entre waves (opt-in)
+        self.interrogation_engine = InterrogationEngine(
+            cache=EvaluationCache(interrogation_cache_dir) if interrogation_cache_dir else None,
+        )
+        # similarity_index_path: historial de creativos entre waves (opt-in)
+        self.creative_factory = CreativeFactory(
+            quality_filter=QualityFilter(similarity_index_path=similarity_index_path),
+        )
     
     def run(
         self,
@@ -164,8 +175,31 @@ class WaveRunner:
                 completed_at=datetime.now(timezone.utc).isoformat(),
             )
     
-    def run_batch(self, products: List[ProductContext], force: bool = False, config: Optional[Dict] = None) -> List[WaveResult]:
-        return [self.run(p, force=force, config=config) for p in products]
+    def run_batch(
+        self,
+        products: List[ProductContext],
+        force: bool = False,
+        config: Optional[Dict] = None,
+        workers: int = 1,
+    ) -> List[WaveResult]:
+        """
+        Corre la wave de varios productos (resultados en el orden de entrada).
+        
+        workers > 1: process pool; cada worker arma UN WaveRunner (engines +
+        templates) y lo reutiliza para todos sus productos. Cada kit se escribe
+        de forma independiente; ver summarize_batch() para el resumen combinado.
+        """
+        if workers <= 1 or len(products) <= 1:
+            return [self.run(p, force=force, config=config) for p in products]
+        
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(products)),
+            initializer=_init_batch_worker,
+            initargs=self._init_args,
+        ) as ex:
+            return list(ex.map(_run_in_batch_worker, [(p, force, config) for p in products]))
     
     def _generate_wave_id(self, product_id: str) -> str:
         timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
@@ -244,6 +278,37 @@ class WaveRunner:
             pass
 
 
+_BATCH_RUNNER: Optional[WaveRunner] = None
+
+
+def _init_batch_worker(*init_args: Any) -> None:
+    global _BATCH_RUNNER
+    _BATCH_RUNNER = WaveRunner(*init_args)
+
+
+def _run_in_batch_worker(job: tuple) -> WaveResult:
+    product, force, config = job
+    assert _BATCH_RUNNER is not None
+    return _BATCH_RUNNER.run(product, force=force, config=config)
+
+
+def summarize_batch(results: List[WaveResult]) -> Dict[str, Any]:
+    """Resumen combinado de un run_batch."""
+    by_status: Dict[str, int] = {}
+    for r in results:
+        by_status[r.status] = by_status.get(r.status, 0) + 1
+    ok = [r for r in results if r.status == "SUCCESS"]
+    return {
+        "products": len(results),
+        "by_status": by_status,
+        "hooks_generated": sum(r.hooks_generated for r in ok),
+        "scripts_generated": sum(r.scripts_generated for r in ok),
+        "avg_quality_score": round(sum(r.quality_score for r in ok) / len(ok), 4) if ok else 0.0,
+        "duration_seconds_total": round(sum(r.duration_seconds for r in results), 3),
+        "results": [r.to_dict() for r in results],
+    }
+
+
 def run_wave(product_id: str, name: str, category: str, price: float, cost: float, description: str = "", unique_features: Optional[List[str]] = None, force: bool = False) -> WaveResult:
     product = ProductContext(product_id=product_id, name=name, category=category, price=price, cost=cost, description=description, unique_features=unique_features or [])
     runner = WaveRunner()
@@ -3,11 +3,20 @@ SYNAPSE — Control Tower Snapshot (CANON)
 - Atomic write (tmp + replace)
 - Freshness stamp + content fingerprint (fp12)
 - Consume outputs in data/run/
-marker: CT_SNAPSHOT_CANON_2026-01-20_V1_ATOMIC_FRESHNESS
+- Incremental: digest por fuente (stat de cada artefacto, dir de runs, offset
+  del ledger, HEAD/refs/index de .git). Solo se reconstruyen las secciones
+  cuya fuente cambio; el resto sale del cache
+  (data/cache/control_tower_snapshot_cache.json). El ledger se lee desde el
+  ultimo offset, no entero.
+- git: commit/branch leidos de .git sin shell, cacheados por HEAD/refs/index.
+  `dirty` (git status) va en su propia seccion: se recalcula si cambia HEAD o
+  el index, y ademas cada --dirty-ttl segundos (ediciones sin stagear).
+marker: CT_SNAPSHOT_CANON_2026-10-18_V3_INCREMENTAL
 
 CLI:
   python -m synapse.meta.meta_control_tower_snapshot --repo . --out data/run/control_tower_snapshot.json
   python -m synapse.meta.meta_control_tower_snapshot . data/run/control_tower_snapshot.json
+  python -m synapse.meta.meta_control_tower_snapshot --repo . --watch 3
 """
 
 from __future__ import annotations
@@ -23,14 +32,23 @@ import socket
 import subprocess
 import sys
 import tempfile
+import time
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple, List
+from typing import Any, Callable, Dict, Optional, Tuple, List
 import logging
 logger = logging.getLogger(__name__)
 
 SCHEMA_VERSION = "ct_snapshot_v1"
-MARKER = "CT_SNAPSHOT_CANON_2026-01-20_V1_ATOMIC_FRESHNESS"
+MARKER = "CT_SNAPSHOT_CANON_2026-10-18_V3_INCREMENTAL"
+
+CACHE_VERSION = 1
+DEFAULT_CACHE = Path("data/cache/control_tower_snapshot_cache.json")
+DIRTY_TTL_S = 30.0
+LEDGER_REL = Path("data/ledger/events.ndjson")
+RUNS_DIR_REL = Path("data/run/meta_publish_runs")
+ARTIFACTS = ("preflight", "run", "report", "autopilot", "policy", "index")
 
 
 def utc_now_iso() -> str:
@@ -73,26 +91,104 @@ def first_non_empty(*vals: Any) -> Any:
     return None
 
 
-def git_info(repo: Path) -> Dict[str, Any]:
-    def run(args: List[str]) -> str:
-        try:
-            r = subprocess.run(args, cwd=str(repo), capture_output=True, text=True, timeout=2)
-            if r.returncode != 0:
-                return "unknown"
-            return (r.stdout or "").strip()
-        except (AttributeError):
-            return "unknown"
-
-    commit = run(["git", "rev-parse", "HEAD"])[:12]
-    branch = run(["git", "rev-parse", "--abbrev-ref", "HEAD"])
-    dirty = run(["git", "status", "--porcelain"])
+def stat_digest(p: Path) -> str:
+    """Digest barato de una fuente: cambia si el archivo se reescribe/reemplaza."""
+    try:
+        st = p.stat()
+    except OSError:
+        return "missing"
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ctime_ns}:{st.st_ino}"
+
+
+def _read_text(p: Path) -> str:
+    try:
+        return p.read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return ""
+
+
+def git_dirs(repo: Path) -> Tuple[Optional[Path], Optional[Path]]:
+    """(git_dir, common_dir) subiendo desde repo; soporta worktrees (.git = 'gitdir: ...')."""
+    for base in (repo, *repo.parents):
+        dot = base / ".git"
+        if dot.is_dir():
+            git_dir = dot
+        elif dot.is_file():
+            txt = _read_text(dot)
+            if not txt.startswith("gitdir:"):
+                return None, None
+            git_dir = Path(txt[len("gitdir:"):].strip())
+            if not git_dir.is_absolute():
+                git_dir = (base / git_dir).resolve()
+        else:
+            continue
+        common = _read_text(git_dir / "commondir")
+        if not common:
+            return git_dir, git_dir
+        common_dir = Path(common)
+        return git_dir, common_dir if common_dir.is_absolute() else (git_dir / common_dir).resolve()
+    return None, None
+
+
+def _packed_ref(common_dir: Path, ref: str) -> str:
+    for line in _read_text(common_dir / "packed-refs").splitlines():
+        if line and line[0] not in "#^":
+            sha, _, name = line.partition(" ")
+            if name.strip() == ref:
+                return sha
+    return ""
+
+
+def git_head_sources(repo: Path) -> List[Path]:
+    """Archivos de .git de los que depende HEAD (para el digest de la seccion git)."""
+    git_dir, common_dir = git_dirs(repo)
+    if git_dir is None or common_dir is None:
+        return []
+    out = [git_dir / "HEAD", git_dir / "index"]
+    head = _read_text(git_dir / "HEAD")
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        out += [common_dir / ref, common_dir / "packed-refs"]
+    return out
+
+
+def git_dirty(repo: Path) -> Optional[bool]:
+    """git status --porcelain sin reescribir el index (recorre el worktree: caro, va cacheado)."""
+    try:
+        r = subprocess.run(["git", "--no-optional-locks", "status", "--porcelain"], cwd=str(repo), capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if r.returncode != 0:
+        return None
+    return bool((r.stdout or "").strip())
+
+
+def git_head(repo: Path) -> Dict[str, Any]:
+    """HEAD leido de .git (HEAD -> ref suelta o packed-refs), sin shell."""
+    unknown = {"commit12": "unknown", "branch": "unknown"}
+    git_dir, common_dir = git_dirs(repo)
+    if git_dir is None or common_dir is None:
+        return unknown
+    head = _read_text(git_dir / "HEAD")
+    if head.startswith("ref:"):
+        ref = head[len("ref:"):].strip()
+        branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+        commit = _read_text(common_dir / ref) or _packed_ref(common_dir, ref)
+    else:
+        branch, commit = "HEAD", head  # detached
     return {
-        "commit12": commit if commit else "unknown",
-        "branch": branch if branch else "unknown",
-        "dirty": bool(dirty.strip()),
+        "commit12": commit[:12] if commit else "unknown",
+        "branch": branch or "unknown",
     }
 
 
+def git_info(repo: Path) -> Dict[str, Any]:
+    """git_head + dirty via git status."""
+    info = git_head(repo)
+    info["dirty"] = git_dirty(repo) if info["commit12"] != "unknown" else None
+    return info
+
+
 def content_fp12(payload: Dict[str, Any]) -> str:
     stable = dict(payload)
     stable.pop("ts", None)
@@ -116,7 +212,142 @@ def atomic_write_json(out_path: Path, data: Dict[str, Any]) -> None:
         except (AttributeError) as e:
             logger.debug("suppressed exception", exc_info=True)
 
-def build_snapshot(repo_root: Path, include_raw: bool = True, trend_n: int = 10) -> Dict[str, Any]:
+class SnapshotCache:
+    """Digest por fuente + seccion ya construida; en memoria (watch) y en disco (CLI)."""
+
+    def __init__(self, path: Optional[Path] = None, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.clock = clock
+        self.sources: Dict[str, str] = {}
+        self.sections: Dict[str, Any] = {}
+        self.built_at: Dict[str, float] = {}
+        self.rebuilt: List[str] = []
+
+    @classmethod
+    def load(cls, path: Optional[Path], clock: Callable[[], float] = time.time) -> "SnapshotCache":
+        cache = cls(path, clock)
+        if path is None:
+            return cache
+        obj, err = read_json_safe(path)
+        if err is None and isinstance(obj, dict) and obj.get("version") == CACHE_VERSION:
+            if isinstance(obj.get("sources"), dict) and isinstance(obj.get("sections"), dict):
+                cache.sources = dict(obj["sources"])
+                cache.sections = dict(obj["sections"])
+                if isinstance(obj.get("built_at"), dict):
+                    cache.built_at = dict(obj["built_at"])
+        return cache
+
+    def section(self, name: str, digest: str, build: Callable[[Any], Any], max_age_s: Optional[float] = None) -> Any:
+        """Seccion cacheada si su fuente no cambio (y no tiene mas de max_age_s); si no, build(anterior)."""
+        now = self.clock()
+        if self.sources.get(name) == digest and name in self.sections:
+            if max_age_s is None or now - float(self.built_at.get(name, float("-inf"))) < max_age_s:
+                return self.sections[name]
+        data = build(self.sections.get(name))
+        self.sources[name] = digest
+        self.sections[name] = data
+        self.built_at[name] = now
+        self.rebuilt.append(name)
+        return data
+
+    def save(self) -> None:
+        if self.path is None or not self.rebuilt:
+            return
+        atomic_write_json(
+            self.path,
+            {"version": CACHE_VERSION, "sources": self.sources, "sections": self.sections, "built_at": self.built_at},
+        )
+
+
+def _artifact_section(p: Path) -> Dict[str, Any]:
+    obj, err = read_json_safe(p)
+    return {"obj": obj, "err": err}
+
+
+def _tail_guard(f: Any, offset: int) -> str:
+    """Hash de los 64 bytes previos al offset: detecta reescrituras del tramo ya leido."""
+    f.seek(max(0, offset - 64))
+    return hashlib.sha256(f.read(min(64, offset))).hexdigest()[:16]
+
+
+def ledger_section(p: Path, prev: Any) -> Dict[str, Any]:
+    """
+    Conteos del ledger NDJSON leyendo solo lo agregado desde el ultimo offset.
+    Si el archivo se trunco/reemplazo (inode, tamaño, o cambio el tramo
+    previo al offset) se re-escanea desde 0. Una linea sin \\n final se
+    deja para la proxima pasada.
+    """
+    def empty() -> Dict[str, Any]:
+        return {"path": str(p), "offset": 0, "ino": None, "guard": "", "events": 0, "bad_lines": 0, "by_type": {}, "last_ts": None}
+
+    try:
+        st = p.stat()
+    except OSError:
+        return empty()
+    cur = dict(prev) if isinstance(prev, dict) and prev.get("path") == str(p) else empty()
+    cur["by_type"] = dict(cur.get("by_type") or {})
+    offset = int(cur.get("offset") or 0)
+
+    with p.open("rb") as f:
+        if offset and (cur.get("ino") != st.st_ino or st.st_size < offset or _tail_guard(f, offset) != cur.get("guard")):
+            cur, offset = empty(), 0
+        f.seek(offset)
+        chunk = f.read()
+        end = chunk.rfind(b"\n") + 1
+        for raw in chunk[:end].splitlines():
+            if not raw.strip():
+                continue
+            try:
+                ev = json.loads(raw.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError):
+                cur["bad_lines"] += 1
+                continue
+            et = str(first_non_empty(get_prop(ev, "payload.event_type"), get_prop(ev, "event_type"), "—"))
+            cur["by_type"][et] = cur["by_type"].get(et, 0) + 1
+            cur["events"] += 1
+            cur["last_ts"] = first_non_empty(get_prop(ev, "ts_utc"), get_prop(ev, "timestamp"), cur["last_ts"])
+        offset += end
+        cur.update({"offset": offset, "ino": st.st_ino, "guard": _tail_guard(f, offset) if offset else ""})
+    return cur
+
+
+def runs_dir_section(d: Path) -> Dict[str, Any]:
+    """Historial de runs: conteo + el ultimo por mtime (el nombre lleva el modo delante); solo se abre ese."""
+    try:
+        entries = sorted((e.stat().st_mtime_ns, e.name) for e in os.scandir(d) if e.name.endswith(".json") and e.is_file())
+    except OSError:
+        entries = []
+    names = [name for _, name in entries]
+    out: Dict[str, Any] = {"dir": str(d), "count": len(names), "latest": names[-1] if names else None}
+    if names:
+        latest, err = read_json_safe(d / names[-1])
+        out.update({
+            "latest_ts": get_prop(latest, "ts"),
+            "latest_mode": get_prop(latest, "mode"),
+            "latest_status": get_prop(latest, "status"),
+            "latest_err": err,
+        })
+    return out
+
+
+@lru_cache(maxsize=1)
+def _host_provenance() -> Tuple[str, str, str]:
+    return (
+        f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
+        platform.platform(),
+        socket.gethostname(),
+    )
+
+
+def build_snapshot(
+    repo_root: Path,
+    include_raw: bool = True,
+    trend_n: int = 10,
+    cache: Optional[SnapshotCache] = None,
+    dirty_ttl_s: float = DIRTY_TTL_S,
+) -> Dict[str, Any]:
+    cache = cache if cache is not None else SnapshotCache()
+    cache.rebuilt = []
     run_dir = repo_root / "data" / "run"
 
     paths = {
@@ -129,12 +360,32 @@ def build_snapshot(repo_root: Path, include_raw: bool = True, trend_n: int = 10)
         "index_nd": run_dir / "meta_publish_runs_index.ndjson",
     }
 
-    preflight, pre_err = read_json_safe(paths["preflight"])
-    run_obj, run_err = read_json_safe(paths["run"])
-    rep_obj, rep_err = read_json_safe(paths["report"])
-    auto_obj, auto_err = read_json_safe(paths["autopilot"])
-    pol_obj, pol_err = read_json_safe(paths["policy"])
-    idx_obj, idx_err = read_json_safe(paths["index"])
+    loaded: Dict[str, Dict[str, Any]] = {}
+    for name in ARTIFACTS:
+        p = paths[name]
+        loaded[name] = cache.section(f"artifact:{name}", stat_digest(p), lambda _prev, p=p: _artifact_section(p))
+    preflight, pre_err = loaded["preflight"]["obj"], loaded["preflight"]["err"]
+    run_obj, run_err = loaded["run"]["obj"], loaded["run"]["err"]
+    rep_obj, rep_err = loaded["report"]["obj"], loaded["report"]["err"]
+    auto_obj, auto_err = loaded["autopilot"]["obj"], loaded["autopilot"]["err"]
+    pol_obj, pol_err = loaded["policy"]["obj"], loaded["policy"]["err"]
+    idx_obj, idx_err = loaded["index"]["obj"], loaded["index"]["err"]
+
+    runs_dir = repo_root / RUNS_DIR_REL
+    runs_hist = cache.section("runs_dir", stat_digest(runs_dir), lambda _prev: runs_dir_section(runs_dir))
+
+    ledger_path = repo_root / LEDGER_REL
+    ledger = cache.section("ledger", stat_digest(ledger_path), lambda prev: ledger_section(ledger_path, prev))
+
+    git_digest = "|".join(stat_digest(p) for p in git_head_sources(repo_root)) or "no-git"
+    git = dict(cache.section("git", git_digest, lambda _prev: git_head(repo_root)))
+    # git status recorre el worktree: por TTL, no en cada build (ediciones sin stagear no tocan .git)
+    git["dirty"] = cache.section(
+        "git_dirty",
+        git_digest,
+        lambda _prev: git_dirty(repo_root) if git["commit12"] != "unknown" else None,
+        max_age_s=dirty_ttl_s,
+    )
 
     # KPIs (alineado con test_contract)
     mode = first_non_empty(
@@ -217,11 +468,12 @@ def build_snapshot(repo_root: Path, include_raw: bool = True, trend_n: int = 10)
                 "path": r.get("path", r.get("filename", "")),
             })
 
+    py, plat, host = _host_provenance()
     provenance = {
-        "python": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
-        "platform": platform.platform(),
-        "host": socket.gethostname(),
-        "git": git_info(repo_root),
+        "python": py,
+        "platform": plat,
+        "host": host,
+        "git": git,
     }
 
     raw_errors = {
@@ -245,6 +497,8 @@ def build_snapshot(repo_root: Path, include_raw: bool = True, trend_n: int = 10)
         "freshness": {
             "generated_at": utc_now_iso(),
             "max_age_seconds_default": 300,
+            "sources": dict(sorted(cache.sources.items())),
+            "rebuilt": sorted(cache.rebuilt),
         },
         "kpis": {
             "mode": mode,
@@ -265,6 +519,8 @@ def build_snapshot(repo_root: Path, include_raw: bool = True, trend_n: int = 10)
             "raw_errors": raw_errors,
         },
         "trends": trends,
+        "runs_dir": runs_hist,
+        "ledger": {k: v for k, v in ledger.items() if k not in ("ino", "guard")},
         "raw": {},
     }
 
@@ -290,6 +546,10 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
     ap.add_argument("--out", dest="out", default="data/run/control_tower_snapshot.json")
     ap.add_argument("--no-raw", dest="no_raw", action="store_true", help="Do not embed raw JSON payloads")
     ap.add_argument("--trend-n", dest="trend_n", type=int, default=10)
+    ap.add_argument("--cache", dest="cache", default=str(DEFAULT_CACHE), help="Per-source digest cache (relative to repo)")
+    ap.add_argument("--no-cache", dest="no_cache", action="store_true", help="Rebuild every section from scratch")
+    ap.add_argument("--watch", dest="watch", type=float, default=0.0, help="Refresh every N seconds (writes only on content change)")
+    ap.add_argument("--dirty-ttl", dest="dirty_ttl", type=float, default=DIRTY_TTL_S, help="Re-run git status after N seconds")
     ap.add_argument("pos_repo", nargs="?", default=None)
     ap.add_argument("pos_out", nargs="?", default=None)
     return ap.parse_args(argv)
@@ -309,8 +569,32 @@ def main(argv: List[str]) -> int:
     if not out.is_absolute():
         out = (repo / out).resolve()
 
-    snap = build_snapshot(repo_root=repo, include_raw=(not ns.no_raw), trend_n=ns.trend_n)
+    cache_path: Optional[Path] = None
+    if not ns.no_cache:
+        cache_path = Path(ns.cache)
+        if not cache_path.is_absolute():
+            cache_path = (repo / cache_path).resolve()
+    cache = SnapshotCache.load(cache_path)
+
+    snap = build_snapshot(repo_root=repo, include_raw=(not ns.no_raw), trend_n=ns.trend_n, cache=cache, dirty_ttl_s=ns.dirty_ttl)
     atomic_write_json(out, snap)
+    cache.save()
+
+    if ns.watch > 0:
+        # polling: mismo cache en memoria, solo se reescribe si cambio el contenido
+        last_fp = get_prop(snap, "freshness.content_fp12")
+        try:
+            while True:
+                time.sleep(ns.watch)
+                snap = build_snapshot(repo_root=repo, include_raw=(not ns.no_raw), trend_n=ns.trend_n, cache=cache, dirty_ttl_s=ns.dirty_ttl)
+                fp = get_prop(snap, "freshness.content_fp12")
+                cache.save()
+                if fp != last_fp:
+                    atomic_write_json(out, snap)
+                    last_fp = fp
+                    cli_print(json.dumps({"ts": snap.get("ts"), "content_fp12": fp, "rebuilt": get_prop(snap, "freshness.rebuilt")}, ensure_ascii=False))
+        except KeyboardInterrupt:
+            return 0
 
     k = snap.get("kpis", {})
     cli_print(json.dumps({
@@ -324,6 +608,7 @@ def main(argv: List[str]) -> int:
         "fp12": k.get("fp12"),
         "sha12": k.get("sha12"),
         "content_fp12": get_prop(snap, "freshness.content_fp12"),
+        "rebuilt": get_prop(snap, "freshness.rebuilt"),
         "ts": snap.get("ts"),
     }, indent=2, ensure_ascii=False))
     return 0
@@ -23,6 +23,7 @@ from synapse.infra.idempotency_store import IdempotencyStore
 from synapse.infra.ledger_f1_core import Ledger
 from synapse.infra.retry_policy import RetryPolicy
 from synapse.meta.publisher_adapter import call_create_campaign, call_pause_campaign
+from synapse.meta_usage_scheduler import classify_op, shared_scheduler
 
 
 # ---------------------------------------------------------------------------
@@ -326,6 +327,8 @@ class MetaSafeClient:
         # Live pause
         try:
             def _do_pause() -> Dict[str, Any]:
+                # CRITICAL lane: skips usage pacing, only waits out a hard throttle
+                shared_scheduler().acquire(priority=classify_op("pause_campaign"))
                 return self.circuit_breaker.call(
                     lambda: call_pause_campaign(campaign_id),
                 )
@@ -0,0 +1,422 @@
+"""
+Ingesta nativa de Meta insights -> ledger (eventos AD_RESULTS).
+
+Reemplaza el export CSV manual de ad_results_import para Meta:
+- Insights nivel ad, time_increment=1 (una fila por ad por dia).
+- El rango [since, until] se parte en ventanas de --window-days que se piden
+  en paralelo (--workers). Ventanas de >= --async-min-days van por async
+  report job (POST insights -> report_run_id -> poll -> GET resultados).
+- Paginacion por cursor (paging.cursors.after mientras haya paging.next).
+- Cada fila -> payload AD_RESULTS con el mismo shape que import_csv (+ ad_id,
+  date, source). Dedupe por (ad_id, date): misma data = skip; si Meta
+  re-estado los numeros se escribe una nueva revision (revision = n) que
+  reemplaza a las anteriores: los consumidores (learning_loop) cuentan solo
+  la revision mas alta por ad_id|date, nunca la suma.
+- Escritura al ledger en orden determinista (ventana, pagina) desde un solo
+  thread; SYNAPSE_READONLY / --dry-run = no escribe ledger ni state.
+- Red via SimpleHttpClient (URL policy + retry) y el scheduler de uso de
+  Meta con prioridad BULK; sin --live solo se permite un --graph-base
+  loopback (fake Graph para tests/simulacion).
+"""
+
+from __future__ import annotations
+
+from synapse.infra.cli_logging import cli_print
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
+
+from synapse.ad_results_import import LEDGER_REL, _append_ledger_event, _extract_utm_content, _row_hash, _safe_float, _safe_int
+from synapse.integrations.http_client import HttpClientError, HttpRequest, HttpResponseError, SimpleHttpClient
+from synapse.meta_usage_scheduler import PRIORITY_BULK, ThrottledError, UsageScheduler, account_from_url, shared_scheduler
+
+__MARKER__ = "META_INSIGHTS_INGEST_2026-10-18_V4"
+
+STATE_REL = Path("data/run/meta_insights_state.json")
+DEFAULT_GRAPH_BASE = "https://graph.facebook.com"
+DEFAULT_GRAPH_VERSION = "v22.0"
+DEFAULT_FIELDS = (
+    "ad_id", "ad_name", "adset_id", "campaign_id", "date_start", "date_stop",
+    "spend", "impressions", "clicks", "inline_link_clicks", "actions", "purchase_roas",
+)
+DEFAULT_WINDOW_DAYS = 7
+DEFAULT_ASYNC_MIN_DAYS = 14
+DEFAULT_WORKERS = 4
+PAGE_LIMIT = 500
+
+# orden de preferencia: omni_purchase ya incluye pixel + app
+PURCHASE_ACTIONS = ("omni_purchase", "purchase", "offsite_conversion.fb_pixel_purchase")
+
+JOB_DONE = "Job Completed"
+JOB_FAILED = ("Job Failed", "Job Skipped")
+
+
+class InsightsError(RuntimeError):
+    pass
+
+
+def _utc_now_z() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _is_loopback(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return host in ("localhost", "127.0.0.1", "::1")
+
+
+def date_windows(since: date, until: date, days: int) -> List[Tuple[date, date]]:
+    """[since, until] inclusive -> ventanas consecutivas de hasta `days` dias."""
+    if until < since:
+        raise ValueError("until must be >= since")
+    step = max(1, int(days))
+    out: List[Tuple[date, date]] = []
+    cur = since
+    while cur <= until:
+        end = min(until, cur + timedelta(days=step - 1))
+        out.append((cur, end))
+        cur = end + timedelta(days=1)
+    return out
+
+
+class GraphInsights:
+    """GETs/POSTs de insights sobre SimpleHttpClient (thread-safe: sin estado mutable)."""
+
+    def __init__(
+        self,
+        http: SimpleHttpClient,
+        *,
+        access_token: str,
+        graph_base: str = DEFAULT_GRAPH_BASE,
+        graph_version: str = DEFAULT_GRAPH_VERSION,
+        poll_interval_s: float = 2.0,
+        poll_timeout_s: float = 900.0,
+        sleep: Callable[[float], None] = time.sleep,
+        scheduler: Optional[UsageScheduler] = None,
+    ) -> None:
+        self.http = http
+        self.scheduler = scheduler or shared_scheduler()
+        self.access_token = access_token
+        self.graph_base = graph_base.rstrip("/")
+        self.graph_version = graph_version
+        self.poll_interval_s = poll_interval_s
+        self.poll_timeout_s = poll_timeout_s
+        self.sleep = sleep
+
+    def _url(self, path: str, params: Dict[str, Any]) -> str:
+        q = dict(params)
+        q["access_token"] = self.access_token
+        return f"{self.graph_base}/{self.graph_version}/{path.lstrip('/')}?{urlencode(q)}"
+
+    def _call(self, path: str, send: Callable[[], Any]) -> Dict[str, Any]:
+        account = account_from_url("/" + path)
+        try:
+            self.scheduler.acquire(account, PRIORITY_BULK)
+        except ThrottledError as e:
+            raise InsightsError(str(e)) from e
+        try:
+            resp = send()
+            self.scheduler.observe(resp.headers, account)
+            obj = resp.json()
+        except HttpResponseError as e:
+            try:
+                self.scheduler.observe_error(json.loads(e.body), account)
+            except (TypeError, ValueError):
+                pass
+            raise InsightsError(f"graph http {e.status}: {e.body[:300]!r}") from e
+        except (HttpClientError, ValueError) as e:
+            raise InsightsError(f"graph request failed: {e}") from e
+        if not isinstance(obj, dict):
+            raise InsightsError(f"unexpected graph response: {obj!r}"[:300])
+        if "error" in obj:
+            raise InsightsError(f"graph error: {obj['error']!r}"[:300])
+        return obj
+
+    def get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._call(path, lambda: self.http.get(self._url(path, params), timeout_s=60.0))
+
+    def post(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        q = dict(params)
+        q["access_token"] = self.access_token
+        req = HttpRequest(
+            method="POST",
+            url=f"{self.graph_base}/{self.graph_version}/{path.lstrip('/')}",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            body=urlencode(q).encode("utf-8"),
+            timeout_s=60.0,
+        )
+        return self._call(path, lambda: self.http.request(req))
+
+    def paged(self, path: str, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
+        """Todas las filas siguiendo cursores; (rows, paginas)."""
+        rows: List[Dict[str, Any]] = []
+        q = dict(params)
+        pages = 0
+        while True:
+            page = self.get(path, q)
+            pages += 1
+            data = page.get("data") or []
+            rows.extend(r for r in data if isinstance(r, dict))
+            paging = page.get("paging") or {}
+            after = (paging.get("cursors") or {}).get("after")
+            if not paging.get("next") or not after or not data:
+                return rows, pages
+            q["after"] = after
+
+    def run_report_job(self, account: str, params: Dict[str, Any]) -> str:
+        job = self.post(f"{account}/insights", params)
+        rid = str(job.get("report_run_id") or "")
+        if not rid:
+            raise InsightsError(f"no report_run_id: {job!r}"[:300])
+        deadline = time.monotonic() + self.poll_timeout_s
+        while True:
+            st = self.get(rid, {})
+            status = str(st.get("async_status") or "")
+            if status == JOB_DONE and int(st.get("async_percent_completion") or 0) >= 100:
+                return rid
+            if status in JOB_FAILED:
+                raise InsightsError(f"report job {rid} {status}")
+            if time.monotonic() >= deadline:
+                raise InsightsError(f"report job {rid} timeout ({status or 'unknown'})")
+            self.sleep(self.poll_interval_s)
+
+
+@dataclass
+class WindowResult:
+    since: str
+    until: str
+    mode: str
+    rows: List[Dict[str, Any]] = field(default_factory=list)
+    pages: int = 0
+    error: str = ""
+
+
+def fetch_window(
+    api: GraphInsights,
+    account: str,
+    window: Tuple[date, date],
+    *,
+    fields: Tuple[str, ...] = DEFAULT_FIELDS,
+    use_async: bool = False,
+) -> WindowResult:
+    since, until = window
+    params = {
+        "level": "ad",
+        "time_increment": 1,
+        "fields": ",".join(fields),
+        "time_range": json.dumps({"since": since.isoformat(), "until": until.isoformat()}, separators=(",", ":")),
+        "limit": PAGE_LIMIT,
+    }
+    res = WindowResult(since=since.isoformat(), until=until.isoformat(), mode="async" if use_async else "sync")
+    try:
+        if use_async:
+            rid = api.run_report_job(account, params)
+            res.rows, res.pages = api.paged(f"{rid}/insights", {"limit": PAGE_LIMIT})
+        else:
+            res.rows, res.pages = api.paged(f"{account}/insights", params)
+    except InsightsError as e:
+        res.error = str(e)
+    return res
+
+
+def _action_value(items: Any, kinds: Tuple[str, ...] = PURCHASE_ACTIONS) -> float:
+    by_type = {str(a.get("action_type")): a.get("value") for a in items or [] if isinstance(a, dict)}
+    for k in kinds:
+        if k in by_type:
+            return _safe_float(by_type[k])
+    return 0.0
+
+
+def row_to_payload(row: Dict[str, Any], product_id: str) -> Dict[str, Any]:
+    """Fila de insights -> payload AD_RESULTS (mismo shape que ad_results_import)."""
+    impressions = _safe_int(row.get("impressions"))
+    views_3s = _action_value(row.get("actions"), ("video_view",))
+    ad_id = str(row.get("ad_id") or "")
+    return {
+        "event_type": "AD_RESULTS",
+        "platform": "meta",
+        "product_id": product_id or "unknown",
+        "utm_content": _extract_utm_content({"ad_name": str(row.get("ad_name") or "")}) or "unknown",
+        "creative_id": ad_id or "unknown",
+        "spend": _safe_float(row.get("spend")),
+        "impressions": impressions,
+        "clicks": _safe_int(row.get("inline_link_clicks") or row.get("clicks")),
+        "conversions": int(_action_value(row.get("actions"))),
+        "roas": _action_value(row.get("purchase_roas")),
+        "hook_rate_3s": round(views_3s * 100.0 / impressions, 2) if impressions else 0.0,
+        "ad_id": ad_id,
+        "date": str(row.get("date_start") or ""),
+        "source": "meta_insights",
+        "marker": __MARKER__,
+    }
+
+
+_HASH_EXCLUDE = frozenset({"marker", "source", "revision"})
+
+
+def _data_hash(payload: Dict[str, Any]) -> str:
+    """Hash de dedupe solo sobre los datos: un bump de __MARKER__ no re-estado filas ya vistas."""
+    return _row_hash({k: v for k, v in payload.items() if k not in _HASH_EXCLUDE})
+
+
+def _load_state(repo: Path) -> Dict[str, Any]:
+    try:
+        st = json.loads((repo / STATE_REL).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        st = None
+    if not isinstance(st, dict) or not isinstance(st.get("seen"), dict):
+        return {"marker": __MARKER__, "seen": {}}
+    return st
+
+
+def _save_state(repo: Path, st: Dict[str, Any]) -> None:
+    st["marker"] = __MARKER__
+    st["ts"] = _utc_now_z()
+    p = repo / STATE_REL
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(st, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def ingest(
+    repo: Path,
+    api: GraphInsights,
+    *,
+    account: str,
+    since: date,
+    until: date,
+    product_id: str,
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    async_min_days: int = DEFAULT_ASYNC_MIN_DAYS,
+    workers: int = DEFAULT_WORKERS,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    windows = date_windows(since, until, window_days)
+
+    def one(w: Tuple[date, date]) -> WindowResult:
+        span = (w[1] - w[0]).days + 1
+        return fetch_window(api, account, w, use_async=span >= max(1, int(async_min_days)))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(windows)))) as ex:
+        results = list(ex.map(one, windows))
+
+    readonly = dry_run or os.getenv("SYNAPSE_READONLY", "").strip() in ("1", "true", "TRUE", "yes", "YES")
+    ledger_path = repo / LEDGER_REL
+    st = _load_state(repo)
+    seen: Dict[str, Any] = st["seen"]
+    state_marker = st.get("marker")
+
+    counts = {"rows": 0, "written": 0, "revisions": 0, "skipped_duplicates": 0, "skipped_invalid": 0}
+    for res in results:
+        for row in res.rows:
+            counts["rows"] += 1
+            payload = row_to_payload(row, product_id)
+            if not payload["ad_id"] or not payload["date"]:
+                counts["skipped_invalid"] += 1
+                continue
+            key = f"{account}|{payload['ad_id']}|{payload['date']}"
+            h = _data_hash(payload)
+            prev = seen.get(key)
+            if prev and prev.get("hash") in (h, _row_hash({**payload, "marker": state_marker})):
+                # state viejo: hash sobre el payload completo con el marker de entonces
+                if prev.get("hash") != h and not readonly:
+                    prev["hash"] = h
+                counts["skipped_duplicates"] += 1
+                continue
+            revision = int(prev.get("revision", 1)) + 1 if prev else 1
+            if revision > 1:
+                payload["revision"] = revision
+                counts["revisions"] += 1
+            counts["written"] += 1
+            if not readonly:
+                _append_ledger_event(ledger_path, payload=payload, ts_utc=f"{payload['date']}T00:00:00Z")
+                seen[key] = {"hash": h, "revision": revision, "ts": _utc_now_z()}
+
+    if not readonly:
+        _save_state(repo, st)
+
+    errors = [{"since": r.since, "until": r.until, "error": r.error} for r in results if r.error]
+    return {
+        "marker": __MARKER__,
+        "ts": _utc_now_z(),
+        "status": "PARTIAL" if errors else "OK",
+        "account": account,
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "windows": [
+            {"since": r.since, "until": r.until, "mode": r.mode, "rows": len(r.rows), "pages": r.pages, "ok": not r.error}
+            for r in results
+        ],
+        "counts": counts,
+        "errors": errors,
+        "usage": api.scheduler.snapshot(),
+        "ledger_path": str(ledger_path),
+        "state_path": str(repo / STATE_REL),
+        "readonly": bool(readonly),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="synapse.meta_insights_ingest", description="Pull Meta ad insights into the ledger as AD_RESULTS events.")
+    ap.add_argument("--account", default="", help="Ad account id (default META_AD_ACCOUNT_ID).")
+    ap.add_argument("--since", default="", help="YYYY-MM-DD (default: until - 6 days).")
+    ap.add_argument("--until", default="", help="YYYY-MM-DD (default: yesterday UTC).")
+    ap.add_argument("--product-id", default="34357", help="Product id tag (evidence key).")
+    ap.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS, help="Days per request window.")
+    ap.add_argument("--async-min-days", type=int, default=DEFAULT_ASYNC_MIN_DAYS, help="Windows this long or longer use async report jobs.")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Windows fetched in parallel.")
+    ap.add_argument("--graph-base", default="", help="Graph API base URL (non-live: loopback fake server only).")
+    ap.add_argument("--graph-version", default=DEFAULT_GRAPH_VERSION)
+    ap.add_argument("--live", action="store_true", help="Talk to the real Graph API (needs network flags + META_ACCESS_TOKEN).")
+    ap.add_argument("--dry-run", action="store_true", help="Fetch only; do not write ledger/state.")
+    args = ap.parse_args(argv)
+
+    until = date.fromisoformat(args.until) if args.until else datetime.now(timezone.utc).date() - timedelta(days=1)
+    since = date.fromisoformat(args.since) if args.since else until - timedelta(days=6)
+
+    graph_base = (args.graph_base or "").rstrip("/")
+    if not args.live and not (graph_base and _is_loopback(graph_base)):
+        cli_print(json.dumps({"marker": __MARKER__, "status": "NEEDS_LIVE", "hint": "use --live or a loopback --graph-base"}, indent=2))
+        return 2
+
+    account = (args.account or os.getenv("META_AD_ACCOUNT_ID", "")).strip()
+    if not account:
+        raise RuntimeError("--account or META_AD_ACCOUNT_ID is required")
+    if not account.startswith("act_"):
+        account = f"act_{account}"
+    token = os.getenv("META_ACCESS_TOKEN", "").strip() or ("SIMULATE" if not args.live else "")
+    if not token:
+        raise RuntimeError("META_ACCESS_TOKEN env var is required for --live")
+
+    api = GraphInsights(
+        SimpleHttpClient(dry_run=False),
+        access_token=token,
+        graph_base=graph_base or DEFAULT_GRAPH_BASE,
+        graph_version=args.graph_version,
+    )
+    out = ingest(
+        Path.cwd(),
+        api,
+        account=account,
+        since=since,
+        until=until,
+        product_id=str(args.product_id),
+        window_days=args.window_days,
+        async_min_days=args.async_min_days,
+        workers=args.workers,
+        dry_run=bool(args.dry_run),
+    )
+    cli_print(json.dumps(out, ensure_ascii=False, indent=2, sort_keys=True, default=str))
+    return 0 if out["status"] == "OK" else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,158 @@
+"""
+Graph API batch requests para meta_publish_execute.
+
+- Hasta MAX_BATCH_ITEMS POSTs por llamada (param `batch`), cada uno
+  con su relative_url ("v22.0/act_x/adsets") y body form-urlencoded.
+- La respuesta es una lista posicional: {"code", "body"} por item, o null si
+  Graph no llego a procesarlo. Cada item se mapea de vuelta a su step key.
+- Retry por item: solo se re-encolan los items que Graph marco como no
+  procesados (null) o con un error transitorio explicito (is_transient /
+  RETRYABLE_ERROR_CODES). Un 5xx sin codigo no alcanza: el item pudo haberse
+  creado.
+- Si falla el batch completo sin respuesta de Graph (red, timeout, 5xx) no se
+  sabe que items se aplicaron: todos quedan FAIL con outcome_unknown y no se
+  re-postean; la proxima corrida los reconcilia contra el plan state.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+from synapse.infra.retry_policy import RetryPolicy
+
+__MARKER__ = "META_PUBLISH_BATCH_2026-10-18_V2"
+
+MAX_BATCH_ITEMS = 50  # limite de Graph por batch
+
+# error.code de Graph que vale la pena reintentar (rate limit / temporales)
+RETRYABLE_ERROR_CODES = frozenset({1, 2, 4, 17, 32, 341, 613})
+
+DEFAULT_RETRY = RetryPolicy(max_attempts=3, base_delay_s=1.0, max_delay_s=10.0)
+
+PostBatch = Callable[[List[Dict[str, Any]]], Any]
+
+
+def form_fields(data: Dict[str, Any]) -> Dict[str, str]:
+    """Mismo encoding que un POST form normal: dict/list van como JSON."""
+    form: Dict[str, str] = {}
+    for k, v in data.items():
+        if isinstance(v, (dict, list)):
+            form[k] = json.dumps(v, ensure_ascii=False)
+        else:
+            form[k] = str(v)
+    return form
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    key: str
+    relative_url: str
+    payload: Dict[str, Any]
+
+    def to_request(self) -> Dict[str, Any]:
+        return {"method": "POST", "relative_url": self.relative_url, "body": urlencode(form_fields(self.payload))}
+
+
+@dataclass
+class BatchStats:
+    items: int = 0
+    http_calls: int = 0
+    retried: int = 0
+    rounds: int = 0
+    retried_keys: List[str] = field(default_factory=list)
+
+
+def parse_batch_response(resp: Any, n: int) -> List[Optional[Dict[str, Any]]]:
+    """Respuesta de Graph -> una respuesta estilo _http_post por item (None = no procesado)."""
+    if not isinstance(resp, list):
+        # fallo del batch completo (HTTP error, auth, red): aplica a todos los items
+        whole = resp if isinstance(resp, dict) and "error" in resp else {"error": f"bad batch response: {resp!r}"[:500], "http_status": None}
+        status = whole.get("http_status")
+        if status is None or (isinstance(status, int) and status >= 500):
+            whole = dict(whole, outcome_unknown=True)
+        return [dict(whole) for _ in range(n)]
+
+    out: List[Optional[Dict[str, Any]]] = []
+    for i in range(n):
+        item = resp[i] if i < len(resp) else None
+        if not isinstance(item, dict):
+            out.append(None)
+            continue
+        code = item.get("code")
+        raw = item.get("body")
+        try:
+            body = json.loads(raw) if isinstance(raw, str) else raw
+        except json.JSONDecodeError:
+            body = {"raw": raw}
+        if not isinstance(body, dict):
+            body = {"raw": body}
+        if (isinstance(code, int) and code >= 400) or "error" in body:
+            out.append({"error": body.get("error", body), "http_status": code})
+        else:
+            out.append(body)
+    return out
+
+
+def is_retryable(resp: Optional[Dict[str, Any]]) -> bool:
+    if resp is None:
+        return True
+    if "error" not in resp or resp.get("outcome_unknown"):
+        return False
+    err = resp.get("error")
+    if isinstance(err, dict):
+        return bool(err.get("is_transient")) or err.get("code") in RETRYABLE_ERROR_CODES
+    return False
+
+
+def run_batches(
+    items: Sequence[BatchItem],
+    post_batch: PostBatch,
+    *,
+    batch_size: int = MAX_BATCH_ITEMS,
+    retry: Optional[RetryPolicy] = None,
+    workers: int = 1,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Tuple[Dict[str, Dict[str, Any]], BatchStats]:
+    """
+    Manda `items` en batches de hasta batch_size (en paralelo hasta `workers`).
+    Devuelve key -> respuesta por item + stats.
+    """
+    retry = retry or DEFAULT_RETRY
+    size = max(1, min(int(batch_size), MAX_BATCH_ITEMS))
+    stats = BatchStats(items=len(items))
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = list(items)
+
+    for attempt in range(1, max(1, retry.max_attempts) + 1):
+        if not pending:
+            break
+        if attempt > 1:
+            sleep(retry.delay_s(attempt - 1))
+        chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+        stats.rounds += 1
+        stats.http_calls += len(chunks)
+
+        def send(chunk: List[BatchItem]) -> List[Optional[Dict[str, Any]]]:
+            return parse_batch_response(post_batch([it.to_request() for it in chunk]), len(chunk))
+
+        with ThreadPoolExecutor(max_workers=max(1, min(int(workers), len(chunks)))) as ex:
+            parsed = list(ex.map(send, chunks))
+
+        last = attempt >= retry.max_attempts
+        retry_next: List[BatchItem] = []
+        for chunk, answers in zip(chunks, parsed):
+            for it, resp in zip(chunk, answers):
+                if is_retryable(resp) and not last:
+                    retry_next.append(it)
+                    continue
+                results[it.key] = resp if resp is not None else {"error": "batch item not processed", "http_status": None}
+        stats.retried += len(retry_next)
+        stats.retried_keys.extend(it.key for it in retry_next)
+        pending = retry_next
+
+    return results, stats
@@ -0,0 +1,137 @@
+"""
+DAG scheduler para planes de meta_publish_plan.
+
+- deps de un step = depends_on + refs <ID:key> de su payload (solo keys del plan).
+- Un step se despacha cuando todas sus deps terminaron (OK o no: el executor
+  decide si faltan ids); hasta `workers` steps en vuelo.
+- fail_fast: tras el primer FAIL no se despacha nada nuevo; los que ya estaban
+  en vuelo terminan. Los no despachados no aparecen en el resultado (igual que
+  el `break` del executor secuencial).
+- Resultados en orden de plan, no de finalizacion.
+- execute_levels(): mismo grafo, pero despacha nivel por nivel (batching).
+"""
+
+from __future__ import annotations
+
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Sequence, Set
+
+__MARKER__ = "META_PUBLISH_DAG_2026-10-18_V1"
+
+ID_REF_RE = re.compile(r"<ID:([^>]+)>")
+
+StepFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+LevelFn = Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]]
+
+
+def _id_refs(obj: Any) -> List[str]:
+    out: List[str] = []
+
+    def walk(x: Any) -> None:
+        if isinstance(x, dict):
+            for v in x.values():
+                walk(v)
+        elif isinstance(x, list):
+            for v in x:
+                walk(v)
+        elif isinstance(x, str):
+            out.extend(ID_REF_RE.findall(x))
+
+    walk(obj)
+    return out
+
+
+def step_dependencies(steps: Sequence[Dict[str, Any]]) -> Dict[str, Set[str]]:
+    keys = [str(s.get("key") or "") for s in steps]
+    known = set(keys)
+    deps: Dict[str, Set[str]] = {}
+    for key, s in zip(keys, steps):
+        declared = s.get("depends_on", [])
+        raw = [str(d) for d in declared] if isinstance(declared, list) else []
+        raw.extend(_id_refs(s.get("payload", {})))
+        deps[key] = {d for d in raw if d in known and d != key}
+    return deps
+
+
+def dependency_levels(steps: Sequence[Dict[str, Any]]) -> Dict[str, int]:
+    """Nivel topologico (0 = sin deps). ValueError si hay ciclo."""
+    deps = step_dependencies(steps)
+    levels: Dict[str, int] = {}
+    remaining = dict(deps)
+    while remaining:
+        ready = [k for k, d in remaining.items() if d <= levels.keys()]
+        if not ready:
+            raise ValueError(f"dependency cycle among steps: {sorted(remaining)[:10]}")
+        for k in ready:
+            levels[k] = 1 + max((levels[d] for d in remaining[k]), default=-1)
+            del remaining[k]
+    return levels
+
+
+def execute_dag(
+    steps: Sequence[Dict[str, Any]],
+    run_step: StepFn,
+    *,
+    workers: int = 4,
+    fail_fast: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Corre run_step(step) -> report (con "status") respetando deps.
+    run_step debe ser thread-safe respecto de su estado compartido (id_map, ledger).
+    """
+    steps = list(steps)
+    deps = step_dependencies(steps)
+    dependency_levels(steps)  # detecta ciclos antes de tocar la red
+
+    order = {str(s.get("key") or ""): n for n, s in enumerate(steps)}
+    by_key = {str(s.get("key") or ""): s for s in steps}
+    pending: List[str] = list(order)
+    finished: Set[str] = set()
+    reports: Dict[str, Dict[str, Any]] = {}
+    stop = False
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as ex:
+        running: Dict[Future, str] = {}
+        while (pending and not stop) or running:
+            if not stop:
+                ready = [k for k in pending if deps[k] <= finished]
+                slots = max(1, int(workers)) - len(running)
+                for k in ready[:slots]:
+                    pending.remove(k)
+                    running[ex.submit(run_step, by_key[k])] = k
+            if not running:
+                break
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in done:
+                k = running.pop(fut)
+                rep = fut.result()
+                reports[k] = rep
+                finished.add(k)
+                if fail_fast and rep.get("status") == "FAIL":
+                    stop = True
+
+    return [reports[k] for k in sorted(reports, key=order.__getitem__)]
+
+
+def execute_levels(
+    steps: Sequence[Dict[str, Any]],
+    run_level: LevelFn,
+    *,
+    fail_fast: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Variante por niveles (para batching): run_level(steps del nivel) -> reports.
+    Un nivel entero se despacha junto; fail_fast corta entre niveles.
+    """
+    steps = list(steps)
+    levels = dependency_levels(steps)
+    order = {str(s.get("key") or ""): n for n, s in enumerate(steps)}
+    reports: List[Dict[str, Any]] = []
+    for lvl in sorted(set(levels.values())):
+        group = [s for s in steps if levels[str(s.get("key") or "")] == lvl]
+        out = run_level(group)
+        reports.extend(out)
+        if fail_fast and any(r.get("status") == "FAIL" for r in out):
+            break
+    return sorted(reports, key=lambda r: order.get(str(r.get("key") or ""), len(order)))
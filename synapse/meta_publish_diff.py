@@ -0,0 +1,132 @@
+"""
+Plan diff para re-ejecuciones incrementales de meta_publish_execute.
+
+Estado por step (data/run/meta_publish_state.json), escrito tras cada step
+aplicado con exito: id de Graph, op, endpoint de creacion y un digest por
+campo del payload ya resuelto (ids reales, runtime inputs, sha del archivo
+en uploads). Scope = modo + graph base: ids de un Graph fake nunca se
+reutilizan contra el real.
+
+Al re-ejecutar, cada step se clasifica con sus deps ya resueltas:
+- skip: mismos digests -> se reutiliza el id guardado, 0 llamadas.
+- update: cambiaron campos editables de un op editable -> POST /{id} solo
+  con esos campos (el id no cambia, los dependientes siguen en skip).
+- create: sin estado, cambio de op/endpoint, campo inmutable o op no
+  editable (videos, creatives) -> se crea de nuevo; sus dependientes ven un
+  id nuevo y se reclasifican en cascada.
+Editar el copy de un ad = recrear su creative + update del ad (2 llamadas).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+__MARKER__ = "META_PUBLISH_DIFF_2026-10-18_V1"
+
+STATE_VERSION = 1
+DEFAULT_STATE = Path("data/run/meta_publish_state.json")
+
+ACTION_CREATE = "create"
+ACTION_UPDATE = "update"
+ACTION_SKIP = "skip"
+
+# ops que Graph deja editar via POST /{id} -> campos que NO se pueden editar
+UPDATABLE_OPS: Dict[str, frozenset] = {
+    "create_campaign": frozenset({"objective", "buying_type", "special_ad_categories"}),
+    "create_adset": frozenset({"campaign_id", "billing_event", "optimization_goal", "promoted_object"}),
+    "create_ad": frozenset({"adset_id"}),
+}
+
+
+def field_digests(payload: Dict[str, Any]) -> Dict[str, str]:
+    """Digest corto por campo top-level (mismo JSON canonico que el resto del executor)."""
+    out: Dict[str, str] = {}
+    for k, v in payload.items():
+        raw = json.dumps(v, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+        out[str(k)] = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+    return out
+
+
+@dataclass
+class StepDiff:
+    key: str
+    action: str
+    prev_id: str = ""
+    changed: List[str] = field(default_factory=list)
+    reason: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"action": self.action, "prev_id": self.prev_id, "changed": self.changed, "reason": self.reason}
+
+
+def classify_step(key: str, op: str, endpoint: str, fields: Dict[str, str], prev: Optional[Dict[str, Any]]) -> StepDiff:
+    """Step con payload ya resuelto (fields = field_digests) vs su ultimo estado aplicado."""
+    if not isinstance(prev, dict) or not prev.get("id"):
+        return StepDiff(key, ACTION_CREATE, reason="new")
+    prev_id = str(prev["id"])
+    if prev.get("op") != op or prev.get("endpoint") != endpoint:
+        return StepDiff(key, ACTION_CREATE, reason="op/endpoint changed")
+
+    old = prev.get("fields") if isinstance(prev.get("fields"), dict) else {}
+    changed = sorted(k for k in set(old) | set(fields) if old.get(k) != fields.get(k))
+    if not changed:
+        return StepDiff(key, ACTION_SKIP, prev_id=prev_id)
+
+    immutable = UPDATABLE_OPS.get(op)
+    if immutable is None:
+        return StepDiff(key, ACTION_CREATE, changed=changed, reason=f"{op} is not updatable")
+    removed = [k for k in changed if k not in fields]
+    if removed:
+        return StepDiff(key, ACTION_CREATE, changed=changed, reason=f"fields removed: {removed}")
+    blocked = [k for k in changed if k in immutable]
+    if blocked:
+        return StepDiff(key, ACTION_CREATE, changed=changed, reason=f"immutable fields changed: {blocked}")
+    return StepDiff(key, ACTION_UPDATE, prev_id=prev_id, changed=changed)
+
+
+class PlanState:
+    """Ultimo estado aplicado por step, para un scope (modo|graph base)."""
+
+    def __init__(self, path: Path, scope: str) -> None:
+        self.path = path
+        self.scope = scope
+        self._doc: Dict[str, Any] = {"version": STATE_VERSION, "scopes": {}}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, path: Path, scope: str) -> "PlanState":
+        st = cls(path, scope)
+        try:
+            doc = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return st
+        if isinstance(doc, dict) and doc.get("version") == STATE_VERSION and isinstance(doc.get("scopes"), dict):
+            st._doc = doc
+            steps = doc["scopes"].get(scope, {}).get("steps")
+            st.steps = dict(steps) if isinstance(steps, dict) else {}
+        return st
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.steps.get(key)
+
+    def record(self, key: str, *, created_id: str, op: str, endpoint: str, fields: Dict[str, str], run: str, ts: str) -> None:
+        self.steps[key] = {"id": created_id, "op": op, "endpoint": endpoint, "fields": dict(fields), "run": run, "ts": ts}
+
+    def save(self) -> None:
+        self._doc.setdefault("scopes", {})[self.scope] = {"steps": self.steps}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self._doc, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+def summarize(diffs: List[StepDiff]) -> Dict[str, Any]:
+    counts = {ACTION_CREATE: 0, ACTION_UPDATE: 0, ACTION_SKIP: 0}
+    for d in diffs:
+        counts[d.action] = counts.get(d.action, 0) + 1
+    return {"counts": counts, "api_calls": counts[ACTION_CREATE] + counts[ACTION_UPDATE]}
@@ -8,19 +8,32 @@ import hashlib
 import json
 import os
 import re
-from dataclasses import dataclass
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from urllib import request as urlrequest
 from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 
-__MARKER__ = "META_PUBLISH_EXECUTE_2026-01-17_V7"
+from infra.network_guard import enforce_url_policy
+from synapse.infra.http_pool import install_pooled_transport
+from synapse.meta_publish_batch import BatchItem, form_fields, run_batches
+from synapse.meta_publish_diff import ACTION_SKIP, ACTION_UPDATE, DEFAULT_STATE, PlanState, classify_step, field_digests, summarize
+from synapse.meta_usage_scheduler import PRIORITY_BULK, PRIORITY_NORMAL, ThrottledError, account_from_url, classify_op, shared_scheduler
+from synapse.meta_video_upload import DEFAULT_STATE_DIR as DEFAULT_UPLOAD_STATE_DIR
+from synapse.meta_video_upload import upload_resumable
+
+__MARKER__ = "META_PUBLISH_EXECUTE_2026-10-18_V13"
 
 DEFAULT_PLAN = Path("data/run/meta_publish_plan.json")
 DEFAULT_OUT = Path("data/run/meta_publish_run.json")
 DEFAULT_OUT_DIR = Path("data/run/meta_publish_runs")
+DEFAULT_GRAPH_BASE = "https://graph.facebook.com"
+DEFAULT_WORKERS = 4
+DEFAULT_RESUMABLE_MIN_MB = 8.0  # videos >= esto suben por sesion resumable (chunks)
 
 ID_REF_RE = re.compile(r"^<ID:([^>]+)>$")
 FILE_REF_RE = re.compile(r"^<FILE:([^>]+)>$")
@@ -102,32 +115,62 @@ def _multipart_formdata(fields: Dict[str, Any], files: Dict[str, Tuple[str, byte
     return body, f"multipart/form-data; boundary={boundary}"
 
 
-def _http_post(url: str, data: Dict[str, Any], access_token: str) -> Dict[str, Any]:
-    form: Dict[str, str] = {"access_token": access_token}
-    for k, v in data.items():
-        if isinstance(v, (dict, list)):
-            form[k] = json.dumps(v, ensure_ascii=False)
-        else:
-            form[k] = str(v)
+def _guard(url: str) -> Optional[Dict[str, Any]]:
+    """URL policy (fail-closed) + transporte keep-alive compartido."""
+    try:
+        enforce_url_policy(url)
+    except RuntimeError as e:
+        return {"error": str(e), "http_status": None}
+    install_pooled_transport()
+    return None
 
-    body = urlencode(form).encode("utf-8")
-    req = urlrequest.Request(url, data=body, method="POST")
-    req.add_header("Content-Type", "application/x-www-form-urlencoded")
 
+def _urlopen_json(req: urlrequest.Request, *, timeout: float, priority: int, account: str = "") -> Dict[str, Any]:
+    """POST a Graph pasando por el scheduler de uso (pacing + headers de uso)."""
+    sched = shared_scheduler()
+    account = account or account_from_url(req.full_url)
+    try:
+        sched.acquire(account, priority)
+    except ThrottledError as e:
+        return {"error": str(e), "http_status": None}
     try:
-        with urlrequest.urlopen(req, timeout=60) as resp:
+        with urlrequest.urlopen(req, timeout=timeout) as resp:
+            sched.observe(dict(resp.headers.items()), account)
             raw = resp.read().decode("utf-8", errors="replace")
             return json.loads(raw) if raw.strip().startswith("{") else {"raw": raw}
     except HTTPError as e:
+        if e.headers is not None:
+            sched.observe(dict(e.headers.items()), account)
         raw = e.read().decode("utf-8", errors="replace")
         try:
-            return {"error": json.loads(raw), "http_status": e.code}
+            err = json.loads(raw)
         except (json.JSONDecodeError, TypeError):
             return {"error": raw, "http_status": e.code}
+        sched.observe_error(err, account)
+        return {"error": err, "http_status": e.code}
     except URLError as e:
         return {"error": str(e), "http_status": None}
 
 
+def _http_post(
+    url: str,
+    data: Dict[str, Any],
+    access_token: str,
+    priority: int = PRIORITY_NORMAL,
+    account: str = "",
+) -> Dict[str, Any]:
+    blocked = _guard(url)
+    if blocked is not None:
+        return blocked
+    form: Dict[str, str] = {"access_token": access_token}
+    form.update(form_fields(data))
+
+    body = urlencode(form).encode("utf-8")
+    req = urlrequest.Request(url, data=body, method="POST")
+    req.add_header("Content-Type", "application/x-www-form-urlencoded")
+    return _urlopen_json(req, timeout=60, priority=priority, account=account)
+
+
 def _http_post_multipart(
     url: str,
     fields: Dict[str, Any],
@@ -137,31 +180,33 @@ def _http_post_multipart(
 ) -> Dict[str, Any]:
     if not file_path.exists():
         return {"error": f"file not found: {file_path}", "http_status": None}
+    blocked = _guard(url)
+    if blocked is not None:
+        return blocked
+    return _http_post_file_bytes(url, fields, file_field, file_path.name, file_path.read_bytes(), access_token)
 
-    content = file_path.read_bytes()
-    filename = file_path.name
-    ctype = "application/octet-stream"
+
+def _http_post_file_bytes(
+    url: str,
+    fields: Dict[str, Any],
+    file_field: str,
+    filename: str,
+    content: bytes,
+    access_token: str,
+) -> Dict[str, Any]:
+    """Multipart con el contenido ya en memoria (archivo chico o un chunk resumable)."""
+    blocked = _guard(url)
+    if blocked is not None:
+        return blocked
 
     fields2 = dict(fields)
     fields2["access_token"] = access_token
 
-    body, content_type = _multipart_formdata(fields2, {file_field: (filename, content, ctype)})
+    body, content_type = _multipart_formdata(fields2, {file_field: (filename, content, "application/octet-stream")})
 
     req = urlrequest.Request(url, data=body, method="POST")
     req.add_header("Content-Type", content_type)
-
-    try:
-        with urlrequest.urlopen(req, timeout=120) as resp:
-            raw = resp.read().decode("utf-8", errors="replace")
-            return json.loads(raw) if raw.strip().startswith("{") else {"raw": raw}
-    except HTTPError as e:
-        raw = e.read().decode("utf-8", errors="replace")
-        try:
-            return {"error": json.loads(raw), "http_status": e.code}
-        except (json.JSONDecodeError, TypeError):
-            return {"error": raw, "http_status": e.code}
-    except URLError as e:
-        return {"error": str(e), "http_status": None}
+    return _urlopen_json(req, timeout=120, priority=PRIORITY_BULK)
 
 
 @dataclass
@@ -317,6 +362,381 @@ def _runtime_snapshot(
     return snap
 
 
+@dataclass
+class _ExecContext:
+    mode: str
+    rt: RuntimeInputs
+    meta_aid: str
+    graph_base: str
+    graph_version: str
+    plan_hash: str
+    access_token: str
+    repo_root: Path
+    network: bool  # live, o simulate contra un Graph fake local (--graph-base)
+    ledger: Any = None
+    drift_error: type = RuntimeError
+    id_map: Dict[str, str] = field(default_factory=dict)
+    errors: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    batch_stats: Dict[str, int] = field(default_factory=dict)
+    file_fps: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # path abs -> entry
+    upload_state_dir: Optional[Path] = None
+    resumable_min_bytes: int = int(DEFAULT_RESUMABLE_MIN_MB * 1024 * 1024)
+    state: Optional[PlanState] = None  # incremental: ultimo estado aplicado por step
+    diffs: Dict[str, Any] = field(default_factory=dict)  # key -> StepDiff
+    run_tag: str = ""
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _is_loopback(url: str) -> bool:
+    host = (urlparse(url).hostname or "").lower()
+    return host in ("localhost", "127.0.0.1", "::1")
+
+
+@dataclass
+class _Call:
+    """Request pendiente de un step ya preparado (placeholders/ledger resueltos)."""
+
+    key: str
+    op: str
+    endpoint_resolved: str
+    url: str
+    payload: Dict[str, Any]
+    payload_sha256: str
+    file_path: Optional[Path] = None
+    fields: Dict[str, str] = field(default_factory=dict)  # digests del payload completo (estado incremental)
+    state_endpoint: str = ""  # endpoint de creacion (en updates endpoint_resolved = /{id})
+    update_id: str = ""
+
+
+def _file_ref_path(source: Any, ctx: _ExecContext) -> Optional[Path]:
+    m = FILE_REF_RE.match(_safe_str(source, ""))
+    if not m:
+        return None
+    file_path = Path(m.group(1)).expanduser()
+    if not file_path.is_absolute():
+        return (ctx.repo_root / file_path).resolve()
+    return file_path.resolve()
+
+
+def _state_fields(op: str, payload: Dict[str, Any], ctx: _ExecContext) -> Dict[str, str]:
+    """Digests por campo; en uploads el `source` cuenta por contenido, no por path."""
+    view = dict(payload)
+    if op == "upload_video":
+        fp = _file_ref_path(view.get("source"), ctx)
+        entry = ctx.file_fps.get(str(fp)) if fp is not None else None
+        if isinstance(entry, dict) and entry.get("sha256"):
+            view["source"] = entry["sha256"]
+    return field_digests(view)
+
+
+def _record_state(ctx: _ExecContext, key: str, created_id: str, op: str, endpoint: str, fields: Dict[str, str]) -> None:
+    """Llamar con ctx.lock tomado."""
+    if ctx.state is not None:
+        ctx.state.record(key, created_id=created_id, op=op, endpoint=endpoint, fields=fields, run=ctx.run_tag, ts=_utc_now_z())
+
+
+def _prepare_step(s: Dict[str, Any], ctx: _ExecContext) -> Tuple[Dict[str, Any], Optional[_Call]]:
+    """
+    Todo lo previo al request: placeholders, deps, ledger reuse. Devuelve el
+    report y, si hay que pegarle a Graph, el _Call (report aun sin cerrar).
+    """
+    op = _safe_str(s.get("op"))
+    key = _safe_str(s.get("key"))
+    endpoint = _safe_str(s.get("endpoint"))
+    depends_on = s.get("depends_on", [])
+    if not isinstance(depends_on, list):
+        depends_on = []
+
+    payload = s.get("payload", {})
+    if not isinstance(payload, dict):
+        payload = {}
+
+    payload2 = dict(payload)
+    if ctx.rt.status_override and "status" in payload2:
+        payload2["status"] = ctx.rt.status_override
+
+    with ctx.lock:
+        id_map = dict(ctx.id_map)
+    payload2 = _resolve_placeholders(payload2, id_map, ctx.rt)
+
+    ignore_file_refs = (op == "upload_video")
+    unresolved = _find_unresolved(payload2, ignore_file_refs=ignore_file_refs)
+
+    endpoint_resolved = endpoint
+    if ctx.meta_aid:
+        endpoint_resolved = endpoint_resolved.replace("<META_AD_ACCOUNT_ID>", ctx.meta_aid)
+
+    step_report: Dict[str, Any] = {
+        "i": s.get("i"),
+        "key": key,
+        "op": op,
+        "endpoint": endpoint,
+        "endpoint_resolved": endpoint_resolved,
+        "depends_on": depends_on,
+        "unresolved": unresolved,
+        "status": "OK",
+    }
+
+    def fail(message: str) -> Tuple[Dict[str, Any], None]:
+        return _fail_step(step_report, {"key": key, "op": op, "error": message}, ctx, message), None
+
+    if not ctx.network:
+        sid = _simulate_id(key, ctx.plan_hash)
+        with ctx.lock:
+            ctx.id_map[key] = sid
+        step_report["simulated_id"] = sid
+        return step_report, None
+
+    missing_deps = [d for d in depends_on if _safe_str(d) and _safe_str(d) not in id_map]
+    if missing_deps:
+        return fail(f"missing deps: {missing_deps}")
+
+    if unresolved:
+        return fail(f"unresolved placeholders: {unresolved}")
+
+    payload_sha256 = _sha256_obj(payload2)
+    fields = _state_fields(op, payload2, ctx) if ctx.state is not None else {}
+
+    # -------- DIFF INCREMENTAL (vs ultimo estado aplicado) --------
+    diff = None
+    if ctx.state is not None:
+        diff = classify_step(key, op, endpoint_resolved, fields, ctx.state.get(key))
+        with ctx.lock:
+            ctx.diffs[key] = diff
+        step_report["diff"] = diff.to_dict()
+        if diff.action == ACTION_SKIP:
+            with ctx.lock:
+                ctx.id_map[key] = diff.prev_id
+            step_report["status"] = "SKIPPED"
+            step_report["kept_id"] = diff.prev_id
+            return step_report, None
+        if diff.action == ACTION_UPDATE:
+            update_payload = {k: payload2[k] for k in diff.changed}
+            update_endpoint = f"/{diff.prev_id}"
+            step_report["payload_sha256_12"] = _sha256_obj(update_payload)[:12]
+            return step_report, _Call(
+                key=key,
+                op=op,
+                endpoint_resolved=update_endpoint,
+                url=f"{ctx.graph_base}/{ctx.graph_version}{update_endpoint}",
+                payload=update_payload,
+                payload_sha256=_sha256_obj(update_payload),
+                fields=fields,
+                state_endpoint=endpoint_resolved,
+                update_id=diff.prev_id,
+            )
+
+    # -------- LEDGER REUSE (anti-duplicados) --------
+    if ctx.ledger is not None:
+        try:
+            with ctx.lock:
+                reused = ctx.ledger.reuse_or_raise_drift(
+                    step_key=key,
+                    op=op,
+                    endpoint_resolved=endpoint_resolved,
+                    payload_sha256=payload_sha256,
+                )
+            if reused:
+                with ctx.lock:
+                    ctx.id_map[key] = reused
+                    _record_state(ctx, key, str(reused), op, endpoint_resolved, fields)
+                step_report["status"] = "REUSED"
+                step_report["reused_id"] = reused
+                step_report["payload_sha256_12"] = payload_sha256[:12]
+                return step_report, None
+        except ctx.drift_error as e:
+            step_report["payload_sha256_12"] = payload_sha256[:12]
+            return fail(str(e))
+    else:
+        step_report["payload_sha256_12"] = payload_sha256[:12]
+
+    url = f"{ctx.graph_base}/{ctx.graph_version}{endpoint_resolved}"
+    call = _Call(
+        key=key,
+        op=op,
+        endpoint_resolved=endpoint_resolved,
+        url=url,
+        payload=payload2,
+        payload_sha256=payload_sha256,
+        fields=fields,
+        state_endpoint=endpoint_resolved,
+    )
+
+    if op == "upload_video":
+        source = payload2.get("source")
+        file_path = _file_ref_path(source, ctx)
+        if file_path is None:
+            return fail(f"upload_video missing <FILE:...> source (got {source})")
+
+        # hard safety (should already be caught before, but double tap)
+        if not file_path.exists():
+            return fail(f"file not found: {file_path}")
+        call.file_path = file_path
+
+    return step_report, call
+
+
+def _fail_step(
+    step_report: Dict[str, Any],
+    err: Dict[str, Any],
+    ctx: _ExecContext,
+    message: Optional[str] = None,
+) -> Dict[str, Any]:
+    with ctx.lock:
+        ctx.errors[step_report["key"]] = err
+    step_report["status"] = "FAIL"
+    if message is not None:
+        step_report["error"] = message
+    return step_report
+
+
+def _finish_step(step_report: Dict[str, Any], call: _Call, resp: Any, ctx: _ExecContext) -> Dict[str, Any]:
+    """Respuesta de Graph -> id_map + ledger commit."""
+    step_report["response"] = resp
+
+    rid = None
+    if isinstance(resp, dict):
+        rid = resp.get("id") or resp.get("video_id")
+
+    if isinstance(resp, dict) and ("error" in resp):
+        return _fail_step(step_report, {"key": call.key, "op": call.op, "response_error": resp.get("error")}, ctx)
+
+    if call.update_id:
+        # POST /{id} responde {"success": true}: el id no cambia
+        if isinstance(resp, dict) and resp.get("success") is False:
+            return _fail_step(step_report, {"key": call.key, "op": call.op, "response_error": "update not applied"}, ctx, "update not applied")
+        step_report["updated_id"] = call.update_id
+        step_report["status"] = "UPDATED"
+        with ctx.lock:
+            ctx.id_map[call.key] = call.update_id
+            _record_state(ctx, call.key, call.update_id, call.op, call.state_endpoint, call.fields)
+        return step_report
+
+    if rid:
+        rid_str = str(rid)
+        step_report["created_id"] = rid_str
+        step_report["status"] = "OK"
+
+        with ctx.lock:
+            ctx.id_map[call.key] = rid_str
+            _record_state(ctx, call.key, rid_str, call.op, call.state_endpoint, call.fields)
+            if ctx.ledger is not None:
+                resp_meta = {}
+                if isinstance(resp, dict):
+                    for kk in ("id", "video_id"):
+                        if kk in resp:
+                            resp_meta[kk] = resp.get(kk)
+                ctx.ledger.commit(
+                    step_key=call.key,
+                    op=call.op,
+                    endpoint_resolved=call.endpoint_resolved,
+                    payload_sha256=call.payload_sha256,
+                    created_id=rid_str,
+                    response_meta=resp_meta or None,
+                )
+                step_report["ledger_committed"] = True
+
+    return step_report
+
+
+def _upload_video_resumable(call: _Call, ctx: _ExecContext) -> Dict[str, Any]:
+    assert call.file_path is not None
+    return upload_resumable(
+        call.url,
+        call.file_path,
+        post_form=lambda data: _http_post(call.url, data=data, access_token=ctx.access_token),
+        post_chunk=lambda fields, filename, chunk: _http_post_file_bytes(
+            call.url, fields, "video_file_chunk", filename, chunk, ctx.access_token
+        ),
+        state_dir=ctx.upload_state_dir or (ctx.repo_root / DEFAULT_UPLOAD_STATE_DIR),
+        expected=ctx.file_fps.get(str(call.file_path)),
+        title=_safe_str(call.payload.get("name"), call.key),
+    )
+
+
+def _send_call(call: _Call, ctx: _ExecContext) -> Dict[str, Any]:
+    if call.file_path is not None:
+        if call.file_path.stat().st_size >= ctx.resumable_min_bytes:
+            return _upload_video_resumable(call, ctx)
+        fields = {"name": _safe_str(call.payload.get("name"), call.key)}
+        return _http_post_multipart(call.url, fields=fields, file_field="source", file_path=call.file_path, access_token=ctx.access_token)
+    return _http_post(call.url, data=call.payload, access_token=ctx.access_token, priority=classify_op(call.op))
+
+
+def _execute_step(s: Dict[str, Any], ctx: _ExecContext) -> Dict[str, Any]:
+    """Un step del plan. Thread-safe: id_map/ledger/errors bajo ctx.lock."""
+    step_report, call = _prepare_step(s, ctx)
+    if call is None:
+        return step_report
+    return _finish_step(step_report, call, _send_call(call, ctx), ctx)
+
+
+def _graph_batch(url: str, batch: List[Dict[str, Any]], access_token: str, account: str) -> Any:
+    # el endpoint de batch no lleva la cuenta en la URL: todos los items son de `account`
+    resp = _http_post(
+        url,
+        data={"batch": batch, "include_headers": "false"},
+        access_token=access_token,
+        priority=PRIORITY_BULK,
+        account=account,
+    )
+    raw = resp.get("raw") if isinstance(resp, dict) else None
+    if isinstance(raw, str) and raw.strip().startswith("["):
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return resp
+    return resp
+
+
+def _run_level_batched(group: List[Dict[str, Any]], ctx: _ExecContext, *, batch_size: int, workers: int) -> List[Dict[str, Any]]:
+    """
+    Un nivel del DAG: uploads (multipart, no batcheables) en paralelo y el
+    resto en batches de Graph, mapeando cada item a su step.
+    """
+    prepared = [_prepare_step(s, ctx) for s in group]
+    uploads = [(rep, call) for rep, call in prepared if call is not None and call.file_path is not None]
+    batchable = [(rep, call) for rep, call in prepared if call is not None and call.file_path is None]
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        futs = [ex.submit(lambda rc: _finish_step(rc[0], rc[1], _send_call(rc[1], ctx), ctx), pair) for pair in uploads]
+
+        if batchable:
+            # un batch por cuenta: cada llamada se cobra (y pacea) en la cuenta correcta
+            by_account: Dict[str, List[BatchItem]] = {}
+            for _, call in batchable:
+                item = BatchItem(key=call.key, relative_url=f"{ctx.graph_version}{call.endpoint_resolved}", payload=call.payload)
+                by_account.setdefault(account_from_url("/" + item.relative_url), []).append(item)
+            answers: Dict[str, Dict[str, Any]] = {}
+            retried_keys: List[str] = []
+            for account, items in by_account.items():
+                got, stats = run_batches(
+                    items,
+                    lambda reqs, account=account: _graph_batch(f"{ctx.graph_base}/", reqs, ctx.access_token, account),
+                    batch_size=batch_size,
+                    workers=workers,
+                )
+                answers.update(got)
+                retried_keys.extend(stats.retried_keys)
+                with ctx.lock:
+                    for k in ("items", "http_calls", "retried"):
+                        ctx.batch_stats[k] = ctx.batch_stats.get(k, 0) + getattr(stats, k)
+            for rep, call in batchable:
+                retries = retried_keys.count(call.key)
+                if retries:
+                    rep["batch_retries"] = retries
+                if answers[call.key].get("outcome_unknown"):
+                    rep["outcome_unknown"] = True
+                _finish_step(rep, call, answers[call.key], ctx)
+
+        for f in futs:
+            f.result()
+        with ctx.lock:
+            ctx.batch_stats["uploads"] = ctx.batch_stats.get("uploads", 0) + len(uploads)
+
+    return [rep for rep, _ in prepared]
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     ap = argparse.ArgumentParser(
         prog="synapse.meta_publish_execute",
@@ -327,6 +747,35 @@ def main(argv: Optional[List[str]] = None) -> int:
     ap.add_argument("--out-dir", default=str(DEFAULT_OUT_DIR), help="Directory to store run history JSON")
     ap.add_argument("--mode", default="dry", choices=["dry", "simulate", "live"], help="dry|simulate|live")
     ap.add_argument("--continue-on-error", action="store_true", help="Continue steps even after an error (live).")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Max independent steps in flight (1 = sequential).")
+    ap.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help="Group ready non-upload steps of the same DAG level into Graph batch calls of up to N (max 50). 0 = off.",
+    )
+    ap.add_argument(
+        "--resumable-min-mb",
+        type=float,
+        default=DEFAULT_RESUMABLE_MIN_MB,
+        help="Videos of at least this size upload through a resumable chunked session (0 = always).",
+    )
+    ap.add_argument("--upload-state-dir", default="", help="Resumable upload session state (default <repo>/data/run/meta_upload_sessions)")
+    ap.add_argument(
+        "--state",
+        default="",
+        help="Incremental state of the last applied steps (default <repo>/data/run/meta_publish_state.json)",
+    )
+    ap.add_argument(
+        "--full",
+        action="store_true",
+        help="Ignore the incremental state and walk the whole plan (ledger idempotency still applies).",
+    )
+    ap.add_argument(
+        "--graph-base",
+        default="",
+        help="Graph API base URL. In simulate mode, a loopback fake Graph server to POST steps to instead of synthesizing ids.",
+    )
 
     # Runtime injects
     ap.add_argument("--daily-budget", default="", help="DAILY_BUDGET_MINOR_UNITS (e.g. 500 = $5.00)")
@@ -412,6 +861,12 @@ def main(argv: Optional[List[str]] = None) -> int:
     meta_aid = _safe_str(os.getenv("META_AD_ACCOUNT_ID"), "")
     graph_version = _safe_str(plan.get("graph_version"), "v22.0")
 
+    graph_base = _safe_str(args.graph_base, "").rstrip("/")
+    network = mode == "live" or bool(graph_base)
+    if mode == "simulate" and graph_base and not _is_loopback(graph_base):
+        raise ValueError("--graph-base in simulate mode must point to a loopback fake server")
+    graph_base = graph_base or DEFAULT_GRAPH_BASE
+
     repo_root = _repo_root_from_plan(plan_path)
 
     # File fingerprints (strong safety; affects run_fingerprint)
@@ -515,6 +970,8 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     # credentials only for live
     access_token = _safe_str(os.getenv("META_ACCESS_TOKEN"), "")
+    if network and mode == "simulate":
+        access_token = "SIMULATE"
     if mode == "live":
         if not access_token:
             raise RuntimeError("META_ACCESS_TOKEN env var is required for --mode live")
@@ -531,186 +988,50 @@ def main(argv: Optional[List[str]] = None) -> int:
     else:
         LedgerDriftError = RuntimeError  # type: ignore
 
-    id_map: Dict[str, str] = {}
-    results: List[Dict[str, Any]] = []
-    errors: List[Dict[str, Any]] = []
-
-    for s in steps:
-        if not isinstance(s, dict):
-            continue
-
-        op = _safe_str(s.get("op"))
-        key = _safe_str(s.get("key"))
-        endpoint = _safe_str(s.get("endpoint"))
-        depends_on = s.get("depends_on", [])
-        if not isinstance(depends_on, list):
-            depends_on = []
-
-        payload = s.get("payload", {})
-        if not isinstance(payload, dict):
-            payload = {}
-
-        payload2 = dict(payload)
-        if rt.status_override and "status" in payload2:
-            payload2["status"] = rt.status_override
-
-        payload2 = _resolve_placeholders(payload2, id_map, rt)
-
-        ignore_file_refs = (op == "upload_video")
-        unresolved = _find_unresolved(payload2, ignore_file_refs=ignore_file_refs)
-
-        endpoint_resolved = endpoint
-        if meta_aid:
-            endpoint_resolved = endpoint_resolved.replace("<META_AD_ACCOUNT_ID>", meta_aid)
-
-        step_report: Dict[str, Any] = {
-            "i": s.get("i"),
-            "key": key,
-            "op": op,
-            "endpoint": endpoint,
-            "endpoint_resolved": endpoint_resolved,
-            "depends_on": depends_on,
-            "unresolved": unresolved,
-            "status": "OK",
-        }
-
-        if mode == "simulate":
-            sid = _simulate_id(key, plan_hash)
-            id_map[key] = sid
-            step_report["simulated_id"] = sid
-            results.append(step_report)
-            continue
-
-        if mode == "live":
-            missing_deps = [d for d in depends_on if _safe_str(d) and _safe_str(d) not in id_map]
-            if missing_deps:
-                err = {"key": key, "op": op, "error": f"missing deps: {missing_deps}"}
-                errors.append(err)
-                step_report["status"] = "FAIL"
-                step_report["error"] = err["error"]
-                results.append(step_report)
-                if not args.continue_on_error:
-                    break
-                continue
-
-            if unresolved:
-                err = {"key": key, "op": op, "error": f"unresolved placeholders: {unresolved}"}
-                errors.append(err)
-                step_report["status"] = "FAIL"
-                step_report["error"] = err["error"]
-                results.append(step_report)
-                if not args.continue_on_error:
-                    break
-                continue
-
-            payload_sha256 = _sha256_obj(payload2)
-
-            # -------- LEDGER REUSE (anti-duplicados) --------
-            if ledger is not None:
-                try:
-                    reused = ledger.reuse_or_raise_drift(
-                        step_key=key,
-                        op=op,
-                        endpoint_resolved=endpoint_resolved,
-                        payload_sha256=payload_sha256,
-                    )
-                    if reused:
-                        id_map[key] = reused
-                        step_report["status"] = "REUSED"
-                        step_report["reused_id"] = reused
-                        step_report["payload_sha256_12"] = payload_sha256[:12]
-                        results.append(step_report)
-                        continue
-                except LedgerDriftError as e:
-                    err = {"key": key, "op": op, "error": str(e)}
-                    errors.append(err)
-                    step_report["status"] = "FAIL"
-                    step_report["error"] = str(e)
-                    step_report["payload_sha256_12"] = payload_sha256[:12]
-                    results.append(step_report)
-                    if not args.continue_on_error:
-                        break
-                    continue
-            else:
-                step_report["payload_sha256_12"] = payload_sha256[:12]
-
-            url = f"https://graph.facebook.com/{graph_version}{endpoint_resolved}"
-
-            if op == "upload_video":
-                source = payload2.get("source")
-                m = FILE_REF_RE.match(_safe_str(source, ""))
-                if not m:
-                    err = {"key": key, "op": op, "error": f"upload_video missing <FILE:...> source (got {source})"}
-                    errors.append(err)
-                    step_report["status"] = "FAIL"
-                    step_report["error"] = err["error"]
-                    results.append(step_report)
-                    if not args.continue_on_error:
-                        break
-                    continue
-
-                file_path = Path(m.group(1)).expanduser()
-                if not file_path.is_absolute():
-                    file_path = (repo_root / file_path).resolve()
-                else:
-                    file_path = file_path.resolve()
-
-                # hard safety (should already be caught before, but double tap)
-                if not file_path.exists():
-                    err = {"key": key, "op": op, "error": f"file not found: {file_path}"}
-                    errors.append(err)
-                    step_report["status"] = "FAIL"
-                    step_report["error"] = err["error"]
-                    results.append(step_report)
-                    if not args.continue_on_error:
-                        break
-                    continue
-
-                fields = {"name": _safe_str(payload2.get("name"), key)}
-                resp = _http_post_multipart(url, fields=fields, file_field="source", file_path=file_path, access_token=access_token)
-            else:
-                resp = _http_post(url, data=payload2, access_token=access_token)
-
-            step_report["response"] = resp
-
-            rid = None
-            if isinstance(resp, dict):
-                rid = resp.get("id") or resp.get("video_id")
-
-            if isinstance(resp, dict) and ("error" in resp):
-                step_report["status"] = "FAIL"
-                errors.append({"key": key, "op": op, "response_error": resp.get("error")})
-                results.append(step_report)
-                if not args.continue_on_error:
-                    break
-                continue
-
-            if rid:
-                rid_str = str(rid)
-                id_map[key] = rid_str
-                step_report["created_id"] = rid_str
-                step_report["status"] = "OK"
-
-                if ledger is not None:
-                    resp_meta = {}
-                    if isinstance(resp, dict):
-                        for kk in ("id", "video_id"):
-                            if kk in resp:
-                                resp_meta[kk] = resp.get(kk)
-                    ledger.commit(
-                        step_key=key,
-                        op=op,
-                        endpoint_resolved=endpoint_resolved,
-                        payload_sha256=payload_sha256,
-                        created_id=rid_str,
-                        response_meta=resp_meta or None,
-                    )
-                    step_report["ledger_committed"] = True
-
-            results.append(step_report)
-            continue
-
-        results.append(step_report)
+    from synapse.meta_publish_dag import execute_dag, execute_levels
+
+    ctx = _ExecContext(
+        mode=mode,
+        rt=rt,
+        meta_aid=meta_aid,
+        graph_base=graph_base,
+        graph_version=graph_version,
+        plan_hash=plan_hash,
+        access_token=access_token,
+        repo_root=repo_root,
+        network=network,
+        ledger=ledger,
+        drift_error=LedgerDriftError,
+        file_fps=dict(file_fps.get("entries") or {}),
+        upload_state_dir=Path(args.upload_state_dir).resolve() if _safe_str(args.upload_state_dir) else None,
+        resumable_min_bytes=int(max(0.0, float(args.resumable_min_mb)) * 1024 * 1024),
+        run_tag=run_fp.fingerprint_12,
+    )
+    # incremental solo con red: en simulate offline los ids son sinteticos
+    state_path = Path(args.state).resolve() if _safe_str(args.state) else repo_root / DEFAULT_STATE
+    if network:
+        ctx.state = PlanState.load(state_path, f"{mode}|{graph_base}")
+        if args.full:
+            ctx.state.steps = {}
+    workers = max(1, int(args.workers))
+    batch_size = max(0, int(args.batch_size))
+    if batch_size and network:
+        results = execute_levels(
+            [s for s in steps if isinstance(s, dict)],
+            lambda group: _run_level_batched(group, ctx, batch_size=batch_size, workers=workers),
+            fail_fast=not bool(args.continue_on_error),
+        )
+    else:
+        results = execute_dag(
+            [s for s in steps if isinstance(s, dict)],
+            lambda s: _execute_step(s, ctx),
+            workers=workers,
+            fail_fast=not bool(args.continue_on_error),
+        )
+    id_map = ctx.id_map
+    errors = [ctx.errors[r["key"]] for r in results if r["key"] in ctx.errors]
+    if ctx.state is not None:
+        ctx.state.save()  # tambien tras un FAIL: lo aplicado no se vuelve a crear
 
     run = {
         "marker": __MARKER__,
@@ -722,6 +1043,10 @@ def main(argv: Optional[List[str]] = None) -> int:
         "run_fingerprint_12": run_fp.fingerprint_12,
         "runtime_snapshot": runtime_snapshot,
         "graph_version": graph_version,
+        "workers": workers,
+        "batch": {"size": batch_size, **ctx.batch_stats} if batch_size and network else {"size": 0},
+        "usage": shared_scheduler().snapshot() if network else None,
+        "diff": {"state": str(state_path), "full": bool(args.full), **summarize(list(ctx.diffs.values()))} if ctx.state is not None else None,
         "counts": {"steps": len(steps), "results": len(results), "errors": len(errors)},
         "id_map": id_map,
         "results": results,
@@ -732,7 +1057,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             "dir": str(Path(args.ledger_dir).resolve()),
             "scope": "run_fingerprint",
         },
-        "files": {"count": file_fps.get("count"), "missing": file_fps.get("missing"), "overall_sha12": file_fps.get("overall_sha12")},
+        "files": {"count": file_fps.get("count"), "missing": file_fps.get("missing"), "overall_sha12": file_fps.get("overall_sha12"), "cache": file_fps.get("cache")},
     }
 
     _write_json(out_path, run)
@@ -749,6 +1074,7 @@ def main(argv: Optional[List[str]] = None) -> int:
         "history": str(out_dir / hist_name),
         "counts": run["counts"],
         "ledger": run["ledger"],
+        "diff": run["diff"],
         "run_fingerprint_12": run_fp.fingerprint_12,
         "files": run["files"],
     }, ensure_ascii=False, indent=2, sort_keys=True))
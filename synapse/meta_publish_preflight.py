@@ -294,7 +294,7 @@ def main(argv: Optional[List[str]] = None) -> int:
         },
         "placeholder_scan": ph,
         "env_meta": {"META_AD_ACCOUNT_ID_present": bool(meta_aid)},
-        "files": {"count": file_fps.get("count"), "missing": file_fps.get("missing"), "overall_sha12": file_fps.get("overall_sha12")},
+        "files": {"count": file_fps.get("count"), "missing": file_fps.get("missing"), "overall_sha12": file_fps.get("overall_sha12"), "cache": file_fps.get("cache")},
         "issues": issues,
         "per_step": per_step[:50],
         "notes": {
@@ -0,0 +1,342 @@
+"""
+Scheduler de llamadas a Meta guiado por los headers de uso de Graph.
+
+Graph devuelve en cada respuesta cuanto del rate limit se lleva consumido:
+- X-App-Usage: {"call_count", "total_time", "total_cputime"} (% app, global)
+- X-Ad-Account-Usage: {"acc_id_util_pct", "reset_time_duration"} (por cuenta;
+  reset_time_duration solo cuenta como bloqueo con acc_id_util_pct >= 100)
+- X-Business-Use-Case-Usage: {"<biz_id>": [{"type", "call_count", ...,
+  "estimated_time_to_regain_access" (min)}]} (se asigna a la cuenta de la URL)
+
+Modelo: por scope ("app", "act_<id>") el ultimo % observado y, si Meta ya
+bloqueo, hasta cuando. Antes de despachar, acquire(account, priority):
+- % < pace_at: pasa directo.
+- pace_at <= % < pause_at: espaciado entre llamadas, lineal hasta max_pace_s.
+- % >= pause_at: pausa cool_down_s desde la observacion.
+- bloqueo reportado (regain / error de throttling): todos esperan el bloqueo
+  completo; max_wait_s no lo acorta. Si no termina dentro de max_wait_s,
+  acquire lanza ThrottledError ("throttled until ...") en vez de despachar
+  una llamada que alargaria el bloqueo. max_wait_s solo corta pacing y
+  pausas preventivas (pause_at).
+Umbrales por prioridad: CRITICAL (pausas, recortes de budget) ignora pacing
+y pausa preventiva; BULK (uploads, insights) frena antes que NORMAL. Mientras
+haya un CRITICAL esperando en una cuenta, el resto de esa cuenta cede el paso.
+Observaciones viejas (> stale_after_s) no pacean: la ventana de Meta es movil.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+__MARKER__ = "META_USAGE_SCHEDULER_2026-10-18_V1"
+
+PRIORITY_CRITICAL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+# error.code de Graph que significan "te estoy limitando"
+THROTTLE_ERROR_CODES = frozenset({4, 17, 32, 613, 80000, 80001, 80002, 80003, 80004, 80005, 80006, 80008, 80009, 80014})
+
+APP_SCOPE = "app"
+_ACT_RE = re.compile(r"/(act_\d+)(?:/|$|\?)")
+
+
+class ThrottledError(RuntimeError):
+    """Meta reporto un bloqueo que no termina dentro de max_wait_s: la llamada no se despacha."""
+
+    def __init__(self, scope: str, remaining_s: float) -> None:
+        until = datetime.now(timezone.utc) + timedelta(seconds=remaining_s)
+        super().__init__(f"meta throttled on {scope} until {until.isoformat(timespec='seconds')} ({remaining_s:.0f}s)")
+        self.scope = scope
+        self.remaining_s = remaining_s
+
+
+@dataclass(frozen=True)
+class Thresholds:
+    pace_at: float
+    pause_at: float
+
+
+DEFAULT_THRESHOLDS: Dict[int, Thresholds] = {
+    PRIORITY_CRITICAL: Thresholds(pace_at=101.0, pause_at=101.0),
+    PRIORITY_NORMAL: Thresholds(pace_at=75.0, pause_at=95.0),
+    PRIORITY_BULK: Thresholds(pace_at=60.0, pause_at=85.0),
+}
+
+
+def classify_op(op: str) -> int:
+    """Prioridad de un step/llamada segun su op."""
+    o = (op or "").lower()
+    if "pause" in o or "budget" in o or "stop" in o:
+        return PRIORITY_CRITICAL
+    if "upload" in o or "insights" in o or "batch" in o:
+        return PRIORITY_BULK
+    return PRIORITY_NORMAL
+
+
+def account_from_url(url: str) -> str:
+    m = _ACT_RE.search(url or "")
+    return m.group(1) if m else ""
+
+
+def _json_header(headers: Mapping[str, str], name: str) -> Any:
+    for k, v in headers.items():
+        if str(k).lower() == name:
+            try:
+                return json.loads(v)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _pct(obj: Dict[str, Any], keys: Tuple[str, ...]) -> float:
+    vals = []
+    for k in keys:
+        try:
+            vals.append(float(obj.get(k) or 0))
+        except (TypeError, ValueError):
+            continue
+    return max(vals) if vals else 0.0
+
+
+@dataclass(frozen=True)
+class UsageReading:
+    scope: str  # "app" | "act_<id>"
+    pct: float
+    regain_s: float = 0.0
+
+
+def parse_usage_headers(headers: Mapping[str, str], account: str = "") -> List[UsageReading]:
+    """Headers de una respuesta de Graph -> lecturas por scope (vacio si no hay headers)."""
+    out: List[UsageReading] = []
+    app = _json_header(headers, "x-app-usage")
+    if isinstance(app, dict):
+        out.append(UsageReading(APP_SCOPE, _pct(app, ("call_count", "total_time", "total_cputime"))))
+
+    if account:
+        acc = _json_header(headers, "x-ad-account-usage")
+        if isinstance(acc, dict):
+            pct = _pct(acc, ("acc_id_util_pct",))
+            # reset_time_duration es lo que tarda en decaer el %, llega tambien con uso bajo:
+            # solo es bloqueo cuando la cuenta ya esta al 100%
+            regain = float(acc.get("reset_time_duration") or 0) if pct >= 100.0 else 0.0
+            out.append(UsageReading(account, pct, regain))
+        buc = _json_header(headers, "x-business-use-case-usage")
+        if isinstance(buc, dict):
+            for items in buc.values():
+                for it in items if isinstance(items, list) else []:
+                    if isinstance(it, dict):
+                        regain_min = float(it.get("estimated_time_to_regain_access") or 0)
+                        out.append(UsageReading(account, _pct(it, ("call_count", "total_time", "total_cputime")), regain_min * 60.0))
+    return out
+
+
+@dataclass
+class _Budget:
+    pct: float = 0.0
+    observed_at: float = float("-inf")
+    blocked_until: float = 0.0
+    last_dispatch: float = float("-inf")
+
+
+@dataclass
+class SchedulerStats:
+    dispatched: int = 0
+    paced: int = 0
+    paused: int = 0
+    waited_s: float = 0.0
+    throttle_errors: int = 0
+    throttled: int = 0
+
+
+class UsageScheduler:
+    def __init__(
+        self,
+        *,
+        thresholds: Optional[Dict[int, Thresholds]] = None,
+        max_pace_s: float = 5.0,
+        cool_down_s: float = 60.0,
+        stale_after_s: float = 300.0,
+        max_wait_s: Optional[float] = 900.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.thresholds = dict(thresholds or DEFAULT_THRESHOLDS)
+        self.max_pace_s = max_pace_s
+        self.cool_down_s = cool_down_s
+        self.stale_after_s = stale_after_s
+        self.max_wait_s = max_wait_s  # tope por llamada para pacing/pausas preventivas
+        self.clock = clock
+        self._budgets: Dict[str, _Budget] = {}
+        self._critical_waiting: Dict[str, int] = {}
+        self._cond = threading.Condition()
+        self.stats = SchedulerStats()
+
+    def _budget(self, scope: str) -> _Budget:
+        b = self._budgets.get(scope)
+        if b is None:
+            b = self._budgets[scope] = _Budget()
+        return b
+
+    # ---------------- observaciones ----------------
+
+    def observe(self, headers: Mapping[str, str], account: str = "") -> List[UsageReading]:
+        readings = parse_usage_headers(headers or {}, account)
+        if not readings:
+            return readings
+        now = self.clock()
+        with self._cond:
+            fresh: Dict[str, _Budget] = {}
+            for r in readings:
+                b = self._budget(r.scope)
+                if r.scope not in fresh:
+                    b.pct = 0.0  # headers de la misma respuesta: manda el maximo
+                    fresh[r.scope] = b
+                b.pct = max(b.pct, r.pct)
+                b.observed_at = now
+                if r.regain_s > 0:
+                    b.blocked_until = max(b.blocked_until, now + r.regain_s)
+            self._cond.notify_all()
+        return readings
+
+    def observe_error(self, error: Any, account: str = "") -> bool:
+        """Error de Graph de throttling -> bloquea la cuenta (o la app) cool_down_s."""
+        if isinstance(error, dict) and isinstance(error.get("error"), dict):
+            error = error["error"]  # body completo {"error": {...}}
+        code = error.get("code") if isinstance(error, dict) else None
+        if code not in THROTTLE_ERROR_CODES:
+            return False
+        with self._cond:
+            b = self._budget(account or APP_SCOPE)
+            b.blocked_until = max(b.blocked_until, self.clock() + self.cool_down_s)
+            self.stats.throttle_errors += 1
+            self._cond.notify_all()
+        return True
+
+    # ---------------- despacho ----------------
+
+    def _wait_s(self, scope: str, priority: int, now: float) -> Tuple[float, str]:
+        b = self._budgets.get(scope)
+        if b is None:
+            return 0.0, ""
+        if b.blocked_until > now:
+            return b.blocked_until - now, "paused"
+        if now - b.observed_at > self.stale_after_s:
+            return 0.0, ""
+        th = self.thresholds.get(priority, self.thresholds[PRIORITY_NORMAL])
+        if b.pct >= th.pause_at:
+            until = b.observed_at + self.cool_down_s
+            return (until - now, "paused") if until > now else (0.0, "")
+        if b.pct >= th.pace_at:
+            span = max(1e-9, th.pause_at - th.pace_at)
+            interval = self.max_pace_s * min(1.0, (b.pct - th.pace_at) / span)
+            nxt = b.last_dispatch + interval
+            return (nxt - now, "paced") if nxt > now else (0.0, "")
+        return 0.0, ""
+
+    def delay_for(self, account: str, priority: int = PRIORITY_NORMAL) -> Tuple[float, str]:
+        """(segundos a esperar, motivo) sin reservar turno."""
+        now = self.clock()
+        with self._cond:
+            return self._delay_locked(account, priority, now)
+
+    def _delay_locked(self, account: str, priority: int, now: float) -> Tuple[float, str]:
+        best = (0.0, "")
+        for scope in (APP_SCOPE, account):
+            if scope:
+                w = self._wait_s(scope, priority, now)
+                if w[0] > best[0]:
+                    best = w
+        return best
+
+    def _hard_block_locked(self, account: str, now: float) -> Tuple[float, str]:
+        """(segundos restantes, scope) del bloqueo reportado por Meta mas largo."""
+        best = (0.0, "")
+        for scope in (APP_SCOPE, account):
+            b = self._budgets.get(scope) if scope else None
+            if b is not None and b.blocked_until - now > best[0]:
+                best = (b.blocked_until - now, scope)
+        return best
+
+    def acquire(self, account: str = "", priority: int = PRIORITY_NORMAL, *, max_wait_s: Optional[float] = None) -> float:
+        """
+        Bloquea hasta que se pueda despachar; devuelve los segundos esperados.
+        ThrottledError si un bloqueo reportado no termina dentro de max_wait_s.
+        """
+        if max_wait_s is None:
+            max_wait_s = self.max_wait_s
+        start = self.clock()
+        reasons = set()
+        blocked = False
+        with self._cond:
+            if priority == PRIORITY_CRITICAL:
+                self._critical_waiting[account] = self._critical_waiting.get(account, 0) + 1
+            try:
+                while True:
+                    now = self.clock()
+                    wait, why = self._delay_locked(account, priority, now)
+                    yield_to_critical = priority != PRIORITY_CRITICAL and self._critical_waiting.get(account, 0) > 0
+                    hard, hard_scope = self._hard_block_locked(account, now)
+                    if hard > 0 and max_wait_s is not None and now + hard > start + max_wait_s:
+                        # despachar igual alargaria el bloqueo: se falla con el motivo
+                        self.stats.throttled += 1
+                        raise ThrottledError(hard_scope, hard)
+                    if max_wait_s is not None and now - start >= max_wait_s and hard <= 0:
+                        wait, yield_to_critical = 0.0, False
+                    if wait <= 0 and not yield_to_critical:
+                        break
+                    if why:
+                        reasons.add(why)
+                    timeout = min(wait, 1.0) if wait > 0 else 0.05
+                    if max_wait_s is not None:
+                        timeout = min(timeout, max(0.0, start + max_wait_s - now))
+                    blocked = True
+                    self._cond.wait(timeout=timeout)
+                for scope in (APP_SCOPE, account):
+                    if scope:
+                        self._budget(scope).last_dispatch = now
+                waited = max(0.0, now - start) if blocked else 0.0
+                self.stats.dispatched += 1
+                self.stats.paced += int("paced" in reasons)
+                self.stats.paused += int("paused" in reasons)
+                self.stats.waited_s += waited
+                return waited
+            finally:
+                if priority == PRIORITY_CRITICAL:
+                    self._critical_waiting[account] -= 1
+                    self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = self.clock()
+        with self._cond:
+            scopes = {
+                k: {"pct": round(b.pct, 2), "blocked_s": round(max(0.0, b.blocked_until - now), 1)}
+                for k, b in sorted(self._budgets.items())
+            }
+            return {
+                "scopes": scopes,
+                "dispatched": self.stats.dispatched,
+                "paced": self.stats.paced,
+                "paused": self.stats.paused,
+                "waited_s": round(self.stats.waited_s, 3),
+                "throttle_errors": self.stats.throttle_errors,
+                "throttled": self.stats.throttled,
+            }
+
+
+_shared: Optional[UsageScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler() -> UsageScheduler:
+    """Un modelo por proceso: todas las llamadas a Meta comparten la cuota."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = UsageScheduler()
+        return _shared
@@ -0,0 +1,253 @@
+"""
+Upload resumable de videos (advideos) para meta_publish_execute.
+
+Protocolo de Graph (upload_phase):
+- start: file_size -> upload_session_id, video_id, start_offset, end_offset
+- transfer: video_file_chunk = bytes [start_offset, end_offset) del archivo;
+  Graph responde el proximo rango (start_offset == end_offset => completo)
+- finish: cierra la sesion; el id del step es el video_id de start.
+
+- Se lee del disco solo el rango pedido (memoria acotada por el chunk que
+  fija Graph, no por el tamaño del video).
+- Estado de la sesion en JSON (escritura atomica) despues de cada chunk: si
+  el proceso o la red se caen, el proximo run retoma desde el ultimo offset
+  confirmado. La sesion se indexa por (endpoint, sha256 del archivo).
+- El archivo se verifica contra el file fingerprint del run antes de subir;
+  si cambio desde entonces, no se sube.
+- Retry por chunk (errores transitorios de Graph, red y 5xx): repetir un
+  transfer no duplica nada porque la sesion fija el offset. start y finish
+  solo se repiten ante errores transitorios que Graph reporta. Un start
+  repetido tras un timeout abriria una sesion huerfana. Un finish repetido
+  puede recibir un error aunque la sesion ya se haya cerrado.
+- Antes de mandar finish se marca en el estado (finish_sent). Si un run
+  posterior recibe un error de Graph al repetir el finish, el upload se da
+  por cerrado con el video_id guardado de start.
+- Una sesion retomada que Graph ya no reconoce se descarta y se arranca de
+  cero una sola vez.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from synapse.infra.file_fingerprint import _sha256_file
+from synapse.infra.retry_policy import RetryPolicy
+from synapse.meta_publish_batch import is_retryable
+
+__MARKER__ = "META_VIDEO_UPLOAD_2026-10-18_V3"
+
+DEFAULT_STATE_DIR = Path("data/run/meta_upload_sessions")
+DEFAULT_RETRY = RetryPolicy(max_attempts=4, base_delay_s=1.0, max_delay_s=15.0)
+
+PostForm = Callable[[Dict[str, Any]], Dict[str, Any]]
+PostChunk = Callable[[Dict[str, Any], str, bytes], Dict[str, Any]]  # (fields, filename, chunk)
+
+
+class UploadError(RuntimeError):
+    pass
+
+
+def _utc_now_z() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class UploadSession:
+    endpoint: str
+    path: str
+    size: int
+    sha256: str
+    upload_session_id: str = ""
+    video_id: str = ""
+    start_offset: int = 0
+    end_offset: int = 0
+    chunks: int = 0
+    finish_sent: bool = False
+    updated_at: str = ""
+
+    @property
+    def complete(self) -> bool:
+        return self.start_offset >= self.end_offset
+
+
+def session_path(state_dir: Path, endpoint: str, sha256: str) -> Path:
+    h = hashlib.sha256(f"{endpoint}|{sha256}".encode("utf-8")).hexdigest()
+    return state_dir / f"{h[:24]}.json"
+
+
+def load_session(p: Path) -> Optional[UploadSession]:
+    try:
+        obj = json.loads(p.read_text(encoding="utf-8"))
+        return UploadSession(**obj) if isinstance(obj, dict) else None
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def save_session(p: Path, sess: UploadSession) -> None:
+    p.parent.mkdir(parents=True, exist_ok=True)
+    sess.updated_at = _utc_now_z()
+    tmp = p.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(asdict(sess), ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, p)
+
+
+def verify_file(path: Path, expected: Optional[Dict[str, Any]]) -> Tuple[int, str]:
+    """
+    (size, sha256) del archivo, validado contra su entry de file fingerprints.
+    Si size/mtime coinciden con el entry se usa su sha256 (ya calculado en el run).
+    """
+    st = path.stat()
+    size = int(st.st_size)
+    if expected and not expected.get("missing") and expected.get("sha256"):
+        if int(expected.get("size") or -1) == size and int(expected.get("mtime_ns") or -1) == int(st.st_mtime_ns):
+            return size, str(expected["sha256"])
+        sha = _sha256_file(path)
+        if sha != expected["sha256"]:
+            raise UploadError(f"file changed since run fingerprint: {path} ({sha[:12]} != {str(expected['sha256'])[:12]})")
+        return size, sha
+    return size, _sha256_file(path)
+
+
+def _offsets(resp: Dict[str, Any]) -> Tuple[int, int]:
+    try:
+        return int(resp["start_offset"]), int(resp["end_offset"])
+    except (KeyError, TypeError, ValueError):
+        raise UploadError(f"bad upload response: {resp!r}"[:500])
+
+
+def _transfer_retryable(resp: Dict[str, Any]) -> bool:
+    # solo transfer: la sesion fija el offset, repetirlo no duplica nada,
+    # asi que ademas de los transitorios de Graph se reintentan red y 5xx
+    status = resp.get("http_status")
+    return is_retryable(resp) or status is None or (isinstance(status, int) and status >= 500)
+
+
+def _answered(resp: Dict[str, Any]) -> bool:
+    """Graph respondio (4xx): no es un fallo de red/5xx de resultado incierto."""
+    status = resp.get("http_status")
+    return isinstance(status, int) and status < 500
+
+
+def _with_retry(
+    fn: Callable[[], Dict[str, Any]],
+    retry: RetryPolicy,
+    sleep: Callable[[float], None],
+    retryable: Callable[[Dict[str, Any]], bool] = is_retryable,
+) -> Dict[str, Any]:
+    attempt = 1
+    while True:
+        resp = fn()
+        if not (isinstance(resp, dict) and "error" in resp and retryable(resp)) or attempt >= retry.max_attempts:
+            return resp
+        sleep(retry.delay_s(attempt))
+        attempt += 1
+
+
+def upload_resumable(
+    endpoint: str,
+    file_path: Path,
+    *,
+    post_form: PostForm,
+    post_chunk: PostChunk,
+    state_dir: Path,
+    expected: Optional[Dict[str, Any]] = None,
+    title: str = "",
+    retry: Optional[RetryPolicy] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Dict[str, Any]:
+    """
+    Sube `file_path` a `endpoint` (…/act_x/advideos) por sesiones resumables.
+    Devuelve una respuesta estilo _http_post: {"id", "video_id", "upload": {...}}
+    o {"error", "http_status"} (con el estado guardado para retomar).
+    """
+    retry = retry or DEFAULT_RETRY
+    try:
+        size, sha = verify_file(file_path, expected)
+    except (OSError, UploadError) as e:
+        return {"error": str(e), "http_status": None}
+
+    sp = session_path(state_dir, endpoint, sha)
+    sess = load_session(sp)
+    if sess is not None and (sess.size != size or sess.sha256 != sha or not sess.upload_session_id):
+        sess = None
+    resumed_from = sess.start_offset if sess is not None else None
+
+    try:
+        if sess is None:
+            resp = _with_retry(lambda: post_form({"upload_phase": "start", "file_size": size}), retry, sleep)
+            if "error" in resp:
+                return resp
+            start, end = _offsets(resp)
+            sess = UploadSession(
+                endpoint=endpoint,
+                path=str(file_path),
+                size=size,
+                sha256=sha,
+                upload_session_id=str(resp.get("upload_session_id") or ""),
+                video_id=str(resp.get("video_id") or ""),
+                start_offset=start,
+                end_offset=end,
+            )
+            if not sess.upload_session_id:
+                raise UploadError(f"start without upload_session_id: {resp!r}"[:500])
+            save_session(sp, sess)
+
+        sent = 0
+        with file_path.open("rb") as f:
+            while not sess.complete:
+                f.seek(sess.start_offset)
+                chunk = f.read(sess.end_offset - sess.start_offset)
+                fields = {"upload_phase": "transfer", "upload_session_id": sess.upload_session_id, "start_offset": sess.start_offset}
+                resp = _with_retry(lambda: post_chunk(fields, file_path.name, chunk), retry, sleep, _transfer_retryable)
+                if "error" in resp:
+                    if resumed_from is not None and not _transfer_retryable(resp):
+                        # sesion vieja que Graph ya no acepta: de cero, una vez
+                        sp.unlink(missing_ok=True)
+                        return upload_resumable(
+                            endpoint, file_path, post_form=post_form, post_chunk=post_chunk, state_dir=state_dir,
+                            expected=expected, title=title, retry=retry, sleep=sleep,
+                        )
+                    return resp
+                sess.start_offset, sess.end_offset = _offsets(resp)
+                sess.chunks += 1
+                sent += len(chunk)
+                save_session(sp, sess)
+
+        fin: Dict[str, Any] = {"upload_phase": "finish", "upload_session_id": sess.upload_session_id}
+        if title:
+            fin["title"] = title
+        finish_resent = sess.finish_sent
+        sess.finish_sent = True
+        save_session(sp, sess)
+        resp = _with_retry(lambda: post_form(fin), retry, sleep)
+        finish = "confirmed"
+        if "error" in resp:
+            if not (finish_resent and sess.video_id and _answered(resp)):
+                return resp
+            # el finish anterior llego a Graph: la sesion ya esta cerrada, el video existe
+            resp, finish = {}, "already_closed"
+    except UploadError as e:
+        return {"error": str(e), "http_status": None}
+
+    sp.unlink(missing_ok=True)
+    video_id = str(resp.get("video_id") or sess.video_id)
+    return {
+        "id": video_id,
+        "video_id": video_id,
+        "upload": {
+            "mode": "resumable",
+            "size": size,
+            "sha256_12": sha[:12],
+            "chunks": sess.chunks,
+            "bytes_sent": sent,
+            "resumed_from": resumed_from,
+            "finish": finish,
+        },
+    }
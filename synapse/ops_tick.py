@@ -1,6 +1,9 @@
 """ops_tick — Level 4 (NASA Power-of-Ten Grade).
 
-Orchestrates the Phase-1 loop end-to-end via subprocess calls.
+Orchestrates the Phase-1 loop end-to-end as a DAG of stages with declared
+inputs/outputs (synapse.infra.step_runner): in-process by default,
+subprocess isolation with --isolate. Independent stages run concurrently;
+a stage whose input/output fingerprints match the last OK tick is skipped.
 No direct money-path logic; delegates to specialised modules.
 """
 
@@ -9,9 +12,6 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
-import os
-import subprocess
-import sys
 from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -20,9 +20,21 @@ from typing import Any, Dict, List, Optional
 import deal
 
 from synapse.infra.cli_logging import cli_print
+from synapse.infra.step_runner import MODE_INPROC, MODE_SUBPROCESS, STATUS_SKIPPED, Stage, StepRunner
 
 _MARKER = "OPS_TICK_2026-01-13_V3_SAFE_NOIMPORT_SKIP_RUNNER"
 _LEDGER_REL = Path("data/ledger/events.ndjson")
+_STATE_REL = Path("data/run/ops_tick_state.json")
+
+# Declared I/O per stage (repo-relative). Keep in sync with each module.
+_LEDGER = str(_LEDGER_REL)
+_IMPORT_STATE = "data/run/ad_results_import_state.json"
+_LEARNING = ("data/learning/learning_state.json", "data/learning/learning_report.json")
+_WEIGHTS = "data/config/weights.json"
+_NEXT_ACTIONS = "data/run/learning_next_actions.json"
+_QUEUE = "data/run/creative_queue.json"
+_BRIEFS = ("data/run/creative_briefs.json", "data/run/creative_briefs")
+_PRUNED = (_NEXT_ACTIONS, _QUEUE, *_BRIEFS, "data/run/creative_publish_state.json")
 
 
 # ── Value Objects ─────────────────────────────────────────
@@ -37,6 +49,9 @@ class TickConfig:
     prune: bool
     no_import: bool
     effective_readonly: bool
+    isolate: bool = False
+    workers: int = 4
+    force: bool = False
 
 
 @dataclass(frozen=True, slots=True)
@@ -63,27 +78,6 @@ def _sha256(path: Path) -> str:
     return h.hexdigest().upper()
 
 
-def _run(
-    cmd: List[str],
-    env_overrides: Optional[Dict[str, str]] = None,
-) -> StepResult:
-    env = os.environ.copy()
-    if env_overrides:
-        env.update(env_overrides)
-    p = subprocess.run(
-        cmd, capture_output=True, text=True,
-        env=env, cwd=str(Path.cwd()),
-    )
-    out = (p.stdout or "").strip()
-    err = (p.stderr or "").strip()
-    return StepResult(
-        cmd=" ".join(cmd),
-        returncode=p.returncode,
-        stdout_tail=out[-2000:] if len(out) > 2000 else out,
-        stderr_tail=err[-2000:] if len(err) > 2000 else err,
-    )
-
-
 def _skip_step(name: str, reason: str) -> StepResult:
     return StepResult(
         cmd=f"<SKIP> {name}", returncode=0,
@@ -100,6 +94,11 @@ def _parse_tick_config(argv: Optional[List[str]] = None) -> TickConfig:
     ap.add_argument("--product-id", default="34357")
     ap.add_argument("--readonly", action="store_true")
     ap.add_argument("--write", action="store_true")
+    ap.add_argument("--isolate", action="store_true",
+                    help="Run each stage as a python -m subprocess.")
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--force", action="store_true",
+                    help="Ignore fingerprints; run every stage.")
     args = ap.parse_args(argv)
     return TickConfig(
         csv=str(args.csv),
@@ -110,35 +109,91 @@ def _parse_tick_config(argv: Optional[List[str]] = None) -> TickConfig:
         effective_readonly=bool(
             args.readonly or (args.no_import and not args.write)
         ),
+        isolate=bool(args.isolate),
+        workers=max(1, int(args.workers)),
+        force=bool(args.force),
     )
 
 
-def _execute_steps(config: TickConfig) -> List[StepResult]:
-    env = {"SYNAPSE_READONLY": "1"} if config.effective_readonly else {}
-    py = sys.executable
-    steps: List[StepResult] = []
+def _plan_stages(config: TickConfig) -> List[Stage | StepResult]:
+    """Stages in report order; config-level skips stay as StepResult."""
+    plan: List[Stage | StepResult] = []
 
     if config.prune:
-        steps.append(_run([py, "-m", "synapse.phase1_ready", "--prune"], env))
-
-    steps.append(_run([py, "-m", "synapse.ledger_ndjson", "validate"], env))
+        plan.append(Stage(
+            name="phase1_ready", module="synapse.phase1_ready",
+            args=("--prune",), inputs=(_LEDGER,),
+            outputs=(*_PRUNED, *_LEARNING), cacheable=False,
+        ))
+
+    plan.append(Stage(
+        name="ledger_validate", module="synapse.ledger_ndjson",
+        args=("validate",), inputs=(_LEDGER,),
+    ))
 
     if not config.no_import:
-        steps.append(_run([
-            py, "-m", "synapse.ad_results_import",
-            "--csv", config.csv,
-            "--platform", config.platform,
-            "--product-id", config.product_id,
-        ], env))
+        csv_input = "exports" if config.csv.strip().lower() == "auto" else config.csv
+        plan.append(Stage(
+            name="ad_results_import", module="synapse.ad_results_import",
+            args=(
+                "--csv", config.csv,
+                "--platform", config.platform,
+                "--product-id", config.product_id,
+            ),
+            inputs=(csv_input, _LEDGER, _IMPORT_STATE),
+            outputs=(_LEDGER, _IMPORT_STATE),
+        ))
 
     if config.no_import and config.effective_readonly:
-        steps.append(_skip_step("synapse.runner", "no-import + readonly"))
+        plan.append(_skip_step("synapse.runner", "no-import + readonly"))
     else:
-        steps.append(_run([py, "-m", "synapse.runner"], env))
+        plan.append(Stage(
+            name="runner", module="synapse.runner",
+            inputs=(_LEDGER, *_LEARNING, _WEIGHTS),
+            outputs=(_LEDGER, *_LEARNING, _WEIGHTS),
+        ))
+
+    plan.append(Stage(
+        name="post_learning", module="synapse.post_learning",
+        inputs=(_WEIGHTS,), outputs=(_NEXT_ACTIONS,),
+    ))
+    plan.append(Stage(
+        name="creative_queue", module="synapse.creative_queue",
+        inputs=(_NEXT_ACTIONS,), outputs=(_QUEUE,),
+    ))
+    plan.append(Stage(
+        name="creative_briefs", module="synapse.creative_briefs",
+        inputs=(_QUEUE,), outputs=_BRIEFS,
+    ))
+    return plan
+
 
-    steps.append(_run([py, "-m", "synapse.post_learning"], env))
-    steps.append(_run([py, "-m", "synapse.creative_queue"], env))
-    steps.append(_run([py, "-m", "synapse.creative_briefs"], env))
+def _execute_steps(config: TickConfig) -> List[StepResult]:
+    env = {"SYNAPSE_READONLY": "1"} if config.effective_readonly else {}
+    plan = _plan_stages(config)
+    runner = StepRunner(
+        root=Path.cwd(),
+        state_path=Path.cwd() / _STATE_REL,
+        mode=MODE_SUBPROCESS if config.isolate else MODE_INPROC,
+        workers=config.workers,
+        env=env,
+        force=config.force,
+    )
+    outcomes = iter(runner.run([p for p in plan if isinstance(p, Stage)]))
+
+    steps: List[StepResult] = []
+    for p in plan:
+        if isinstance(p, StepResult):
+            steps.append(p)
+            continue
+        o = next(outcomes)
+        if o.status == STATUS_SKIPPED:
+            steps.append(_skip_step(p.module, o.stdout_tail))
+        else:
+            steps.append(StepResult(
+                cmd=o.cmd, returncode=o.returncode,
+                stdout_tail=o.stdout_tail, stderr_tail=o.stderr_tail,
+            ))
     return steps
 
 
@@ -0,0 +1,252 @@
+"""
+Render farm: cola de RenderSpec + pool acotado (default = CPU cores) + cache
+de outputs content-addressed.
+
+- Cada spec es un argv (ffmpeg u otro) con el placeholder OUT_PLACEHOLDER
+  donde va el archivo de salida, mas fallbacks opcionales (p.ej. drawtext ->
+  blank) que se intentan en orden.
+- cache key = sha256(argv + fallbacks + contenido de los inputs declarados).
+  El path de salida NO entra en la key: re-render de un spec sin cambios =
+  copiar del cache, sin subprocess.
+- Timeout por job (subprocess.run(timeout=...)); un job colgado no bloquea
+  el batch.
+- Los jobs corren en threads: el trabajo pesado es el proceso hijo.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+__MARKER__ = "RENDER_FARM_2026-10-18_V1"
+
+OUT_PLACEHOLDER = "{out}"
+DEFAULT_CACHE_DIR = Path("data/cache/render_farm")
+DEFAULT_TIMEOUT_S = 300.0
+
+STATUS_RENDERED = "RENDERED"
+STATUS_CACHED = "CACHED"
+STATUS_FAILED = "FAILED"
+STATUS_TIMEOUT = "TIMEOUT"
+
+
+def _utc_now_z() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _sha256_file(p: Path) -> str:
+    h = hashlib.sha256()
+    with p.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return "sha256:" + h.hexdigest()
+
+
+def _sha256_obj(obj: Any) -> str:
+    raw = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return "sha256:" + hashlib.sha256(raw).hexdigest()
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    job_id: str
+    cmd: Tuple[str, ...]
+    out_path: str
+    inputs: Tuple[str, ...] = ()
+    fallback_cmds: Tuple[Tuple[str, ...], ...] = ()
+    timeout_s: Optional[float] = None
+
+
+@dataclass
+class RenderResult:
+    job_id: str
+    status: str
+    out_path: str
+    cache_key: str
+    attempt: int = -1  # 0 = cmd principal, 1.. = fallback usado
+    elapsed_s: float = 0.0
+    bytes: int = 0
+    sha256: str = ""
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (STATUS_RENDERED, STATUS_CACHED)
+
+
+def spec_cache_key(spec: RenderSpec) -> str:
+    """Hash del spec + fingerprints de contenido de sus inputs (no del out_path)."""
+    inputs: List[Tuple[str, str]] = []
+    for raw in spec.inputs:
+        p = Path(raw)
+        inputs.append((p.name, _sha256_file(p) if p.is_file() else "missing"))
+    return _sha256_obj({
+        "cmd": list(spec.cmd),
+        "fallbacks": [list(c) for c in spec.fallback_cmds],
+        "inputs": inputs,
+    })
+
+
+def _materialize(src: Path, dst: Path) -> None:
+    """Copia (no hardlink: un `ffmpeg -y` sobre el asset corromperia el cache)."""
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class RenderFarm:
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        workers: Optional[int] = None,
+        timeout_s: float = DEFAULT_TIMEOUT_S,
+        use_cache: bool = True,
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.timeout_s = float(timeout_s)
+        self.use_cache = use_cache
+
+    def _entry(self, key: str) -> Tuple[Path, Path]:
+        h = key.split(":", 1)[-1]
+        base = self.cache_dir / h[:2] / h
+        return base.with_suffix(".out"), base.with_suffix(".json")
+
+    def _cached(self, key: str) -> Optional[Dict[str, Any]]:
+        out, meta = self._entry(key)
+        try:
+            info = json.loads(meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(info, dict) or not out.is_file() or out.stat().st_size != info.get("bytes"):
+            return None
+        return info
+
+    def _store(self, key: str, produced: Path, info: Dict[str, Any]) -> Path:
+        out, meta = self._entry(key)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(produced, out)
+        tmp = meta.with_name(f"{meta.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(info, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, meta)
+        return out
+
+    def _run_one(self, spec: RenderSpec) -> RenderResult:
+        t0 = time.monotonic()
+        key = spec_cache_key(spec)
+        dst = Path(spec.out_path)
+        res = RenderResult(job_id=spec.job_id, status=STATUS_FAILED, out_path=str(dst), cache_key=key)
+
+        if self.use_cache:
+            hit = self._cached(key)
+            if hit is not None:
+                if not (dst.is_file() and dst.stat().st_size == hit["bytes"] and _sha256_file(dst) == hit["sha256"]):
+                    _materialize(self._entry(key)[0], dst)
+                res.status = STATUS_CACHED
+                res.attempt = int(hit.get("attempt", 0))
+                res.bytes = int(hit["bytes"])
+                res.sha256 = str(hit["sha256"])
+                res.elapsed_s = round(time.monotonic() - t0, 4)
+                return res
+
+        timeout = spec.timeout_s if spec.timeout_s is not None else self.timeout_s
+        work = self.cache_dir / "_work"
+        work.mkdir(parents=True, exist_ok=True)
+        produced = work / f"{key.split(':', 1)[-1]}.{os.getpid()}.{threading.get_ident()}{dst.suffix}"
+
+        timed_out = False
+        for attempt, cmd in enumerate((spec.cmd, *spec.fallback_cmds)):
+            timed_out = False
+            if produced.exists():
+                produced.unlink()  # restos de un intento previo
+            argv = [str(produced) if a == OUT_PLACEHOLDER else a for a in cmd]
+            try:
+                cp = subprocess.run(argv, capture_output=True, text=True, check=False, timeout=timeout)
+            except subprocess.TimeoutExpired:
+                timed_out = True
+                res.errors.append(f"attempt={attempt} timeout_s={timeout}")
+                continue
+            except OSError as e:
+                res.errors.append(f"attempt={attempt} exception: {e}")
+                continue
+            if cp.returncode != 0:
+                res.errors.append(f"attempt={attempt} rc={cp.returncode}: {(cp.stderr or cp.stdout or '').strip()[:800]}")
+                continue
+            if not produced.is_file() or produced.stat().st_size <= 0:
+                res.errors.append(f"attempt={attempt} produced empty output")
+                continue
+
+            info = {"bytes": produced.stat().st_size, "sha256": _sha256_file(produced), "attempt": attempt, "job_id": spec.job_id}
+            if self.use_cache:
+                _materialize(self._store(key, produced, info), dst)
+            else:
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(produced, dst)
+            res.status = STATUS_RENDERED
+            res.attempt = attempt
+            res.bytes = int(info["bytes"])
+            res.sha256 = str(info["sha256"])
+            break
+        else:
+            res.status = STATUS_TIMEOUT if timed_out else STATUS_FAILED
+
+        if produced.exists():
+            produced.unlink()
+        res.elapsed_s = round(time.monotonic() - t0, 4)
+        return res
+
+    def run(self, specs: Sequence[RenderSpec]) -> List[RenderResult]:
+        """Resultados en el orden de `specs`."""
+        if self.workers <= 1 or len(specs) <= 1:
+            return [self._run_one(s) for s in specs]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(specs))) as ex:
+            return list(ex.map(self._run_one, specs))
+
+
+def build_summary(results: Sequence[RenderResult], *, workers: int, elapsed_s: float) -> Dict[str, Any]:
+    counts: Dict[str, int] = {STATUS_RENDERED: 0, STATUS_CACHED: 0, STATUS_FAILED: 0, STATUS_TIMEOUT: 0}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    items = [asdict(r) for r in results]
+    return {
+        "marker": __MARKER__,
+        "ts": _utc_now_z(),
+        "workers": workers,
+        "elapsed_s": round(elapsed_s, 4),
+        "render_s_total": round(sum(r.elapsed_s for r in results), 4),
+        "counts": {"jobs": len(results), **{k.lower(): v for k, v in counts.items()}},
+        "items": items,
+        "summary_hash": _sha256_obj({"items": [(r.job_id, r.cache_key, r.sha256) for r in results]}),
+    }
+
+
+def render_batch(
+    specs: Sequence[RenderSpec],
+    *,
+    cache_dir: Optional[Path] = None,
+    workers: Optional[int] = None,
+    timeout_s: float = DEFAULT_TIMEOUT_S,
+    use_cache: bool = True,
+    manifest_path: Optional[Path] = None,
+) -> Tuple[List[RenderResult], Dict[str, Any]]:
+    farm = RenderFarm(cache_dir=cache_dir, workers=workers, timeout_s=timeout_s, use_cache=use_cache)
+    t0 = time.monotonic()
+    results = farm.run(specs)
+    summary = build_summary(results, workers=farm.workers, elapsed_s=time.monotonic() - t0)
+    if manifest_path is not None:
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = manifest_path.with_name(f"{manifest_path.name}.tmp")
+        tmp.write_text(json.dumps(summary, ensure_ascii=False, indent=2, sort_keys=True, default=str), encoding="utf-8")
+        os.replace(tmp, manifest_path)
+    return results, summary
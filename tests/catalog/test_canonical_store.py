@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from synapse.catalog.canonical_store import CanonicalCatalogStore, default_index_path, open_store
+
+
+def _write(path: Path, rows: list[str]) -> None:
+    path.write_text("product_id,title,price\n" + "".join(r + "\n" for r in rows), encoding="utf-8", newline="\n")
+
+
+def test_get_and_get_many(tmp_path: Path) -> None:
+    csv_path = tmp_path / "canonical_products.csv"
+    _write(csv_path, ["p1,Uno,10", "p2,Dos,20", "p1,Duplicado,99", "p3,Tres,30"])
+
+    st = CanonicalCatalogStore(csv_path)
+    assert st.rebuilt is True
+    assert default_index_path(csv_path).exists()
+    assert len(st) == 3
+
+    assert st.get("p1") == {"product_id": "p1", "title": "Uno", "price": "10"}  # primera aparicion gana
+    assert st.get("nope") is None
+    assert list(st.get_many(["p3", "nope", "p1", "p3"]).keys()) == ["p3", "p1"]
+
+
+def test_index_reused_and_invalidated_by_content(tmp_path: Path) -> None:
+    csv_path = tmp_path / "canonical.csv"
+    _write(csv_path, ["p1,Uno,10"])
+    CanonicalCatalogStore(csv_path).close()
+
+    # mismo contenido, mtime distinto -> no rebuild
+    os.utime(csv_path, ns=(1, 1))
+    st = CanonicalCatalogStore(csv_path)
+    assert st.rebuilt is False
+    st.close()
+
+    _write(csv_path, ["p1,Nuevo,11", "p2,Dos,20"])
+    st = open_store(csv_path)
+    assert st.get("p1")["title"] == "Nuevo"
+    assert "p2" in st
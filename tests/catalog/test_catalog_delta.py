@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from buyer.buyer_block import BuyerBlock
+from buyer.schemas import Decision, ProductSchema, ProductSource
+from synapse.catalog.delta import DeltaState, diff_fingerprints, row_fingerprint
+from synapse.discovery import ProductCandidate, ProductRanker
+
+
+def test_diff_fingerprints_classifies() -> None:
+    d = diff_fingerprints({"a": "1", "b": "2", "c": "3"}, {"a": "1", "b": "X", "d": "4"})
+    assert d.added == ["d"]
+    assert d.removed == ["c"]
+    assert d.changed == ["b"]
+    assert d.unchanged == ["a"]
+    assert d.to_process == ["b", "d"]
+
+
+def test_run_stage_only_recomputes_changed(tmp_path: Path) -> None:
+    calls: list[list[str]] = []
+
+    def compute(items: list[dict]) -> list[str]:
+        calls.append([i["id"] for i in items])
+        return [i["title"].upper() for i in items]
+
+    path = tmp_path / "delta.json"
+    st = DeltaState.load(path)
+    items = {"a": {"id": "a", "title": "uno"}, "b": {"id": "b", "title": "dos"}}
+    res, _ = st.run_stage("up", items, compute, fingerprint=row_fingerprint)
+    st.save()
+    assert res == {"a": "UNO", "b": "DOS"}
+
+    st2 = DeltaState.load(path)
+    items2 = {"a": {"id": "a", "title": "uno"}, "b": {"id": "b", "title": "tres"}, "c": {"id": "c", "title": "cuatro"}}
+    res2, delta = st2.run_stage("up", items2, compute, fingerprint=row_fingerprint)
+    assert calls[-1] == ["b", "c"]
+    assert res2 == {"a": "UNO", "b": "TRES", "c": "CUATRO"}
+    assert delta.summary()["unchanged"] == 1
+
+
+def test_ranker_with_delta_state_matches_full_rank() -> None:
+    cands = [
+        ProductCandidate(product_id="1", title="Pro", category="audio", price=599, cost=180, rating=4.7, reviews=150, match_score=0.8),
+        ProductCandidate(product_id="2", title="Mid", category="audio", price=450, cost=180, rating=4.2, reviews=80, match_score=0.6),
+    ]
+    ranker = ProductRanker()
+    st = DeltaState()
+    ranker.rank(cands, delta_state=st)
+    again = ranker.rank(cands, delta_state=st)
+    full = ranker.rank(cands)
+    assert [(p.product_id, p.total_score, p.rank) for p in again.ranked_products] == [
+        (p.product_id, p.total_score, p.rank) for p in full.ranked_products
+    ]
+
+
+def test_buyer_block_reuses_unchanged_decisions() -> None:
+    def product(pid: str, sale: float) -> ProductSchema:
+        return ProductSchema(
+            product_id=pid, external_id=pid, name=f"P {pid}", category="hogar",
+            cost_price=10.0, sale_price=sale, source=ProductSource.CSV,
+        )
+
+    bb = BuyerBlock()
+    st = DeltaState()
+    first = bb.evaluate_batch([product("a", 40.0), product("b", 40.0)], delta_state=st)
+    second = bb.evaluate_batch([product("a", 40.0), product("b", 11.0)], delta_state=st)
+
+    assert second[0].decision_id == first[0].decision_id  # arrastrada
+    assert second[1].decision_id != first[1].decision_id  # re-evaluada
+
+    bb.scoring_rules.min_margin = 0.9  # umbral nuevo: nada se arrastra
+    third = bb.evaluate_batch([product("a", 40.0), product("b", 11.0)], delta_state=st)
+    assert third[0].decision_id != second[0].decision_id
+    assert third[0].decision == Decision.REJECTED
+
+    dup = bb.evaluate_batch([product("a", 40.0), product("a", 11.0)], delta_state=st)
+    assert dup[0].decision_id == third[0].decision_id  # primera fila: cache
+    assert dup[1].decision_id != dup[0].decision_id and dup[1].product_id == "a"
+
+
+def test_build_canonical_v3_delta_state(tmp_path: Path) -> None:
+    dump = tmp_path / "dump.json"
+    shortlist = tmp_path / "shortlist.csv"
+    state = tmp_path / "delta.json"
+    items = [
+        {"product_id": "p1", "title": "Uno", "price": "10", "image_url": "https://cdn.example.com/1.jpg"},
+        {"product_id": "p2", "title": "Dos", "price": "20", "image_url": "https://via.placeholder.com/2"},
+    ]
+    dump.write_text(json.dumps({"items": items}), encoding="utf-8")
+    shortlist.write_text("product_id\np1\np2\n", encoding="utf-8")
+
+    def run() -> dict:
+        out = tmp_path / "canonical.csv"
+        r = subprocess.run(
+            [sys.executable, "scripts/build_canonical_from_dropi_v3.py", "--shortlist", str(shortlist),
+             "--dump", str(dump), "--out", str(out), "--delta-state", str(state)],
+            capture_output=True, text=True,
+        )
+        assert r.returncode == 0, r.stderr
+        return json.loads((tmp_path / "canonical.report.json").read_text(encoding="utf-8"))
+
+    rep1 = run()
+    assert rep1["delta"]["added"] == 2
+    assert rep1["placeholder_images"] == 1
+
+    items[0]["price"] = "12"
+    dump.write_text(json.dumps({"items": items}), encoding="utf-8")
+    rep2 = run()
+    assert rep2["delta"]["changed"] == 1
+    assert rep2["delta"]["unchanged"] == 1
+    assert rep2["counts"] == rep1["counts"]
+    assert "12" in (tmp_path / "canonical.csv").read_text(encoding="utf-8")
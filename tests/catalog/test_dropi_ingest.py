@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import csv
+import json
+from pathlib import Path
+
+from synapse.catalog.dropi_ingest import (
+    canonize_catalog,
+    canonize_row,
+    ingest_catalog,
+    pick_header_map,
+    plan_ingest,
+)
+
+
+def _write_catalog(path: Path, n: int = 40) -> None:
+    with path.open("w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["SKU", "Nombre", "Descripción", "Precio", "Imagen", "Etiquetas"])
+        for i in range(n):
+            sku = "" if i % 7 == 0 else f"SKU-{i}"
+            title = "" if i % 11 == 0 else f"Producto {i}"
+            # multilinea + comillas escapadas: los chunks no deben partir el registro
+            desc = f'Linea uno "{i}"\nLinea dos; con delimitador' if i % 3 == 0 else f"desc {i}"
+            img = "https://via.placeholder.com/1|https://cdn.example.com/a.jpg" if i % 5 == 0 else f"https://cdn.example.com/{i}.jpg"
+            w.writerow([sku, title, desc, f"${i},50", img, "hogar|cocina"])
+
+
+def _sequential(path: Path) -> list:
+    with path.open("r", encoding="utf-8", newline="") as f:
+        reader = csv.DictReader(f, delimiter=";")
+        hm = pick_header_map(reader.fieldnames or [])
+        return [canonize_row(r, hm, i, block_placeholders=True) for i, r in enumerate(reader, start=1)]
+
+
+def test_plan_splits_on_record_boundaries(tmp_path: Path) -> None:
+    cat = tmp_path / "catalog.csv"
+    _write_catalog(cat)
+
+    plan = plan_ingest(cat, chunk_bytes=64)
+    assert plan.delimiter == ";"
+    assert plan.header_map["product_id"] == "SKU"
+    assert len(plan.chunks) > 5
+    assert plan.chunks[-1][1] == cat.stat().st_size
+    for (_, end), (start, _) in zip(plan.chunks, plan.chunks[1:]):
+        assert end == start
+
+
+def test_chunked_matches_sequential_in_order(tmp_path: Path) -> None:
+    cat = tmp_path / "catalog.csv"
+    _write_catalog(cat)
+    expected = _sequential(cat)
+
+    _, inline = canonize_catalog(cat, chunk_bytes=64, workers=1)
+    _, pooled = canonize_catalog(cat, chunk_bytes=64, workers=2)
+
+    assert inline == expected
+    assert pooled == expected
+    assert expected[0].product_id.startswith("dropi-product-1")  # idx global, no local al chunk
+
+
+def test_ingest_writes_ndjson_and_respects_limit(tmp_path: Path) -> None:
+    cat = tmp_path / "catalog.csv"
+    out = tmp_path / "out" / "canonical.ndjson"
+    _write_catalog(cat)
+
+    st = ingest_catalog(cat, out, chunk_bytes=128, workers=1, limit=10)
+    lines = out.read_text(encoding="utf-8").splitlines()
+
+    assert st.rows == 10
+    assert len(lines) == 10
+    first = json.loads(lines[1])
+    assert first["product_id"] == "SKU-1"
+    assert first["price"] == 1.5
+    assert json.loads(lines[5])["image_url"] == "https://cdn.example.com/a.jpg"
+
+
+def test_stray_quotes_in_unquoted_fields_do_not_shift_chunks(tmp_path: Path) -> None:
+    cat = tmp_path / "catalog.csv"
+    lines = ["SKU;Nombre;Descripción;Precio"]
+    for i in range(30):
+        # pulgadas sin comillas (`TV 32" Smart`) junto a campos multilinea entrecomillados
+        title = f'TV {i}" Smart' if i % 2 == 0 else f"Producto {i}"
+        desc = f'"Linea uno\nLinea ""{i}""; dos"' if i % 3 == 0 else f'pantalla 4{i}"'
+        lines.append(f"SKU-{i};{title};{desc};{i}")
+    cat.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    expected = _sequential(cat)
+    assert len(expected) == 30
+
+    for chunk_bytes in (20, 40, 64, 100):
+        _, rows = canonize_catalog(cat, chunk_bytes=chunk_bytes, workers=1)
+        assert rows == expected, chunk_bytes
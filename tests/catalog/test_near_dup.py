@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+
+from synapse.catalog.near_dup import NearDupConfig, cluster_near_duplicates, image_basename_key
+from synapse.discovery import PipelineConfig, PipelineOrchestrator
+from synapse.infra.minhash import LSHIndex, MinHasher, char_shingles, jaccard, pick_bands
+
+
+def test_minhash_signature_is_deterministic_and_tracks_jaccard() -> None:
+    a = char_shingles("audifonos bluetooth inalambricos con cancelacion de ruido")
+    b = char_shingles("audifonos bluetooth inalambricos con cancelacion de ruido pro")
+    h1, h2 = MinHasher(128, seed=7), MinHasher(128, seed=7)
+    sa, sb = h1.signature(a), h2.signature(b)
+    assert sa == h2.signature(a)
+    est = sum(x == y for x, y in zip(sa, sb)) / 128.0
+    assert abs(est - jaccard(a, b)) < 0.15
+
+    bands, rows = pick_bands(128, 0.8)
+    assert bands * rows == 128
+    idx = LSHIndex(bands, rows)
+    idx.insert("a", sa)
+    assert idx.query(sb) == ["a"]
+
+
+def test_cluster_near_duplicates_groups_supplier_copies() -> None:
+    rows = [
+        {"product_id": "30", "title": "Audifonos Bluetooth TWS Pro 5.3", "description": "Cancelacion de ruido"},
+        {"product_id": "12", "title": "Lampara LED de escritorio", "description": "Luz calida"},
+        {"product_id": "17", "title": "Audífonos Bluetooth TWS Pro 5.3!", "description": "Cancelación de ruido"},
+        {"product_id": "44", "title": "Cargador inalambrico 15W", "description": ""},
+    ]
+    res = cluster_near_duplicates(rows, prefer=lambda r: r["product_id"] == "17")
+
+    assert res.cluster_ids == ["17", "12", "17", "44"]
+    assert res.clusters["17"] == [0, 2]
+    assert res.representatives["17"] == 2  # prefer elige, no el orden
+    assert [r["product_id"] for r in res.representative_items()] == ["12", "17", "44"]
+    assert res.summary()["duplicates_removed"] == 1
+
+
+def test_image_basename_key_is_optional() -> None:
+    rows = [
+        {"id": "1", "title": "Organizador de cocina", "image_url": "https://cdn.a.com/p/ab12cd34ef.jpg?w=400"},
+        {"id": "2", "title": "Rack multiuso acero", "image_url": "https://cdn.b.com/x/AB12CD34EF.png"},
+        {"id": "3", "title": "Taza termica", "image_url": "https://cdn.b.com/x/1.jpg"},
+        {"id": "4", "title": "Vaso termico", "image_url": "https://cdn.c.com/x/1.jpg"},
+    ]
+    assert image_basename_key(rows[2]["image_url"]) == ""
+    assert len(cluster_near_duplicates(rows).clusters) == 4
+    res = cluster_near_duplicates(rows, NearDupConfig(use_image_key=True))
+    assert res.cluster_ids == ["1", "1", "3", "4"]
+
+
+def test_pipeline_ranks_one_representative_per_cluster(tmp_path: Path) -> None:
+    catalog = tmp_path / "catalog.csv"
+    with open(catalog, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["id", "title", "category", "price", "cost", "rating", "reviews"])
+        w.writeheader()
+        w.writerow({"id": "1", "title": "Audifonos Bluetooth Pro Max", "category": "audio", "price": "599", "cost": "180", "rating": "4.7", "reviews": "150"})
+        w.writerow({"id": "2", "title": "Audifonos Bluetooth Pro Max.", "category": "audio", "price": "649", "cost": "180", "rating": "4.7", "reviews": "150"})
+        w.writerow({"id": "3", "title": "Bocina Speaker Portatil", "category": "audio", "price": "450", "cost": "135", "rating": "4.2", "reviews": "80"})
+
+    cfg = PipelineConfig(output_dir=str(tmp_path / "out"), generate_kits=False, save_results=False, min_score=0.0)
+    result = PipelineOrchestrator(cfg).run(niche_id="audio_personal", csv_path=str(catalog))
+
+    assert result.status == "completed"
+    ids = sorted(p.product_id for p in result.top_products)
+    assert ids == ["2", "3"]  # "2" gana por margen
+    assert result.dedup_summary["duplicates_removed"] == 1
+    by_id = {c.product_id: c for c in result.scan_result.candidates}
+    assert by_id["1"].cluster_id == by_id["2"].cluster_id == "1"
+    assert by_id["1"].cluster_size == 2
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from synapse.infra import file_fingerprint
+from synapse.infra.file_fingerprint import compute_file_fingerprints_from_steps
+
+
+@pytest.fixture()
+def hashed(monkeypatch) -> List[str]:
+    """Registra cada archivo que se lee para hashear; sin ventana racy."""
+    seen: List[str] = []
+    real = file_fingerprint._sha256_file
+
+    def spy(path: Path, **kw: Any) -> str:
+        seen.append(path.name)
+        return real(path, **kw)
+
+    monkeypatch.setattr(file_fingerprint, "_sha256_file", spy)
+    monkeypatch.setattr(file_fingerprint, "RACY_WINDOW_NS", 0)
+    return seen
+
+
+def _steps(*names: str) -> List[Dict[str, Any]]:
+    return [{"payload": {"source": f"<FILE:assets/{n}>"}} for n in names]
+
+
+def _write(root: Path, name: str, data: bytes) -> Path:
+    p = root / "assets" / name
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_bytes(data)
+    return p
+
+
+def test_second_run_is_served_from_cache(tmp_path: Path, hashed: List[str]) -> None:
+    for i in range(6):
+        _write(tmp_path, f"v{i}.mp4", os.urandom(4096))
+    steps = _steps(*(f"v{i}.mp4" for i in range(6)))
+
+    first = compute_file_fingerprints_from_steps(steps, cwd=tmp_path, workers=3)
+    assert sorted(hashed) == [f"v{i}.mp4" for i in range(6)]
+    assert first["cache"] == {"hits": 0, "misses": 6}
+
+    hashed.clear()
+    second = compute_file_fingerprints_from_steps(steps, cwd=tmp_path)
+    assert hashed == [] and second["cache"] == {"hits": 6, "misses": 0}
+    assert second["entries"] == first["entries"] and second["overall_sha256"] == first["overall_sha256"]
+
+    uncached = compute_file_fingerprints_from_steps(steps, cwd=tmp_path, use_cache=False)
+    assert uncached["overall_sha256"] == first["overall_sha256"] and uncached["cache"] is None
+
+
+def test_rewrite_with_restored_mtime_or_new_inode_invalidates(tmp_path: Path, hashed: List[str]) -> None:
+    a = _write(tmp_path, "a.mp4", b"A" * 100)
+    b = _write(tmp_path, "b.mp4", b"B" * 100)
+    steps = _steps("a.mp4", "b.mp4")
+    first = compute_file_fingerprints_from_steps(steps, cwd=tmp_path)
+    time.sleep(0.05)  # ctime del FS es de grano grueso
+
+    # mismo tamaño, mtime restaurado: solo ctime delata el cambio
+    st = a.stat()
+    a.write_bytes(b"Z" * 100)
+    os.utime(a, ns=(st.st_atime_ns, st.st_mtime_ns))
+    # mismo contenido y mtime, archivo nuevo (inode distinto)
+    st_b = b.stat()
+    tmp = b.with_suffix(".tmp")
+    tmp.write_bytes(b"B" * 100)
+    os.utime(tmp, ns=(st_b.st_atime_ns, st_b.st_mtime_ns))
+    os.replace(tmp, b)
+
+    hashed.clear()
+    second = compute_file_fingerprints_from_steps(steps, cwd=tmp_path)
+    assert sorted(hashed) == ["a.mp4", "b.mp4"] and second["cache"]["misses"] == 2
+    ka, kb = str(a.resolve()), str(b.resolve())
+    assert second["entries"][ka]["sha256"] != first["entries"][ka]["sha256"]
+    assert second["entries"][kb]["sha256"] == first["entries"][kb]["sha256"]
+
+
+def test_racy_hashes_are_not_cached_and_bad_cache_is_ignored(tmp_path: Path, hashed: List[str], monkeypatch) -> None:
+    _write(tmp_path, "fresh.mp4", b"x" * 10)
+    steps = _steps("fresh.mp4")
+    monkeypatch.setattr(file_fingerprint, "RACY_WINDOW_NS", 60 * 1_000_000_000)
+    compute_file_fingerprints_from_steps(steps, cwd=tmp_path)
+    compute_file_fingerprints_from_steps(steps, cwd=tmp_path)
+    assert hashed == ["fresh.mp4", "fresh.mp4"]  # recien escrito: se re-hashea
+
+    monkeypatch.setattr(file_fingerprint, "RACY_WINDOW_NS", 0)
+    cache_file = tmp_path / "data" / "cache" / "file_fingerprints.json"
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    cache_file.write_text("{not json", encoding="utf-8")
+    out = compute_file_fingerprints_from_steps(steps, cwd=tmp_path)
+    assert out["cache"] == {"hits": 0, "misses": 1}
+    assert json.loads(cache_file.read_text(encoding="utf-8"))["version"] == file_fingerprint.CACHE_VERSION
+
+    monkeypatch.setenv("SYNAPSE_FP_CACHE", "0")
+    hashed.clear()
+    assert compute_file_fingerprints_from_steps(steps, cwd=tmp_path)["cache"] is None
+    assert hashed == ["fresh.mp4"]
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import pytest
+
+from synapse.infra import http_pool
+from synapse.infra.http_pool import PoolConfig, install_pooled_transport
+from synapse.integrations.http_client import SimpleHttpClient
+
+
+class _Server:
+    """HTTP/1.1 keep-alive; `close_after` = responde y corta el socket sin avisar."""
+
+    def __init__(self) -> None:
+        self.ports: List[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.close_after = False
+        self.posts = 0
+        self.drop_posts = False
+        self.lock = threading.Lock()
+        srv = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with srv.lock:
+                    srv.posts += 1
+                    drop = srv.drop_posts
+                if drop:  # lo proceso pero corto sin responder
+                    self.close_connection = True
+                    return
+                self.send_response(201)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def do_GET(self) -> None:
+                with srv.lock:
+                    srv.ports.append(self.client_address[1])
+                    srv.in_flight += 1
+                    srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+                time.sleep(0.03 if self.path == "/slow" else 0)
+                with srv.lock:
+                    srv.in_flight -= 1
+                body = json.dumps({"path": self.path}).encode()
+                self.send_response(404 if self.path == "/missing" else 200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                if srv.close_after:
+                    self.close_connection = True
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture()
+def server(monkeypatch):
+    monkeypatch.setattr(http_pool, "_shared_pool", None)
+    monkeypatch.setattr(http_pool, "_installed_for", None)
+    srv = _Server()
+    yield srv
+    srv.close()
+    http_pool.shared_pool().close()
+    urllib.request.install_opener(None)
+
+
+def test_clients_reuse_one_connection_per_host(server: _Server) -> None:
+    client = SimpleHttpClient(dry_run=False, retry_max=0)
+    for i in range(5):
+        assert client.get(f"{server.url}/r{i}").json() == {"path": f"/r{i}"}
+
+    assert len(set(server.ports)) == 1  # un solo handshake
+    m = http_pool.pool_metrics()[server.url]
+    assert m["requests"] == 5 and m["opened"] == 1 and m["reused"] == 4 and m["idle"] == 1
+
+    # 4xx sigue saliendo como HttpResponseError (via HTTPError de urllib)
+    with pytest.raises(Exception) as ex:
+        client.get(f"{server.url}/missing")
+    assert getattr(ex.value, "status", None) == 404
+
+
+def test_reused_connection_accepts_urlopen_without_timeout(server: _Server) -> None:
+    pool = install_pooled_transport(PoolConfig(max_per_host=2, idle_timeout_s=30.0))
+    for path in ("/a", "/b"):
+        assert json.loads(urllib.request.urlopen(f"{server.url}{path}").read()) == {"path": path}
+    m = pool.metrics()[server.url]
+    assert m["opened"] == 1 and m["reused"] == 1
+
+
+def test_pool_size_bounds_concurrency_and_idle_expiry(server: _Server) -> None:
+    pool = install_pooled_transport(PoolConfig(max_per_host=2, idle_timeout_s=30.0))
+    threads = [threading.Thread(target=lambda: urllib.request.urlopen(f"{server.url}/slow", timeout=5).read()) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert server.max_in_flight <= 2
+    assert pool.metrics()[server.url]["opened"] <= 2
+
+    pool2 = install_pooled_transport(PoolConfig(max_per_host=2, idle_timeout_s=0.0))
+    assert pool2 is not pool
+    urllib.request.urlopen(f"{server.url}/a", timeout=5).read()
+    time.sleep(0.01)
+    urllib.request.urlopen(f"{server.url}/b", timeout=5).read()
+    m = pool2.metrics()[server.url]
+    assert m["opened"] == 2 and m["expired"] == 1
+
+
+def test_stale_keepalive_is_retried_on_fresh_connection(server: _Server) -> None:
+    pool = install_pooled_transport(PoolConfig(max_per_host=4, idle_timeout_s=30.0))
+    server.close_after = True
+    for _ in range(3):
+        assert json.loads(urllib.request.urlopen(f"{server.url}/x", timeout=5).read()) == {"path": "/x"}
+    m: Dict[str, int] = pool.metrics()[server.url]
+    assert m["requests"] == 3 and m["errors"] == 0
+    assert m["opened"] == 3 and m["stale_retries"] + m["dropped"] == 2
+
+
+def test_post_already_sent_is_not_replayed(server: _Server) -> None:
+    pool = install_pooled_transport(PoolConfig(max_per_host=4, idle_timeout_s=30.0))
+    url = f"{server.url}/act_1/ads"
+    assert urllib.request.urlopen(urllib.request.Request(url, data=b"a=1"), timeout=5).status == 201
+    server.drop_posts = True
+    with pytest.raises(urllib.error.URLError):
+        urllib.request.urlopen(urllib.request.Request(url, data=b"a=2"), timeout=5)
+    m = pool.metrics()[server.url]
+    assert server.posts == 2 and m["stale_retries"] == 0 and m["errors"] == 1
+
+
+def test_connect_timeout_surfaces_as_url_error(server: _Server, monkeypatch) -> None:
+    install_pooled_transport()
+
+    def timeout(self: Any) -> None:
+        raise TimeoutError("timed out")
+
+    monkeypatch.setattr(http_pool.http.client.HTTPConnection, "connect", timeout)
+    with pytest.raises(urllib.error.URLError) as ex:
+        urllib.request.urlopen(f"{server.url}/x", timeout=0.5)
+    assert isinstance(ex.value.reason, TimeoutError)
+    assert http_pool.pool_metrics()[server.url]["errors"] == 1
+
+
+def test_url_policy_still_applies_through_the_pool(server: _Server, monkeypatch) -> None:
+    monkeypatch.delenv("SYNAPSE_DRY_RUN", raising=False)
+    monkeypatch.delenv("SYNAPSE_LIVE_META", raising=False)
+    install_pooled_transport()
+    with pytest.raises(RuntimeError, match="NETWORK_BLOCKED_BY_FLAGS"):
+        urllib.request.urlopen("https://graph.facebook.com/v22.0/me", timeout=1)
+    assert "https://graph.facebook.com" not in http_pool.pool_metrics()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import json
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from synapse import ops_tick
+from synapse.infra.step_runner import (
+    MODE_SUBPROCESS,
+    STATUS_RAN,
+    STATUS_SKIPPED,
+    Stage,
+    StepRunner,
+    build_dependencies,
+)
+
+# modulo falso: copia src -> dst (append), imprime y deja traza de cada corrida
+_COPY = textwrap.dedent(
+    """
+    import sys, time
+    from pathlib import Path
+
+    def main(argv=None):
+        src, dst, tag = argv
+        time.sleep(0.05)
+        Path("calls.log").open("a").write(tag + "\\n")
+        data = Path(src).read_text() if Path(src).exists() else ""
+        Path(dst).write_text(data + tag + ";")
+        print("ran " + tag)
+        return 0
+
+    if __name__ == "__main__":
+        raise SystemExit(main(sys.argv[1:]))
+    """
+)
+
+
+@pytest.fixture()
+def work(tmp_path: Path, monkeypatch) -> Path:
+    (tmp_path / "fake_stage_mod.py").write_text(_COPY, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.txt").write_text("A", encoding="utf-8")
+    return tmp_path
+
+
+def _stage(name: str, src: str, dst: str) -> Stage:
+    return Stage(name=name, module="fake_stage_mod", args=(src, dst, name), inputs=(src,), outputs=(dst,))
+
+
+def _calls(root: Path) -> list[str]:
+    log = root / "calls.log"
+    return log.read_text().split() if log.exists() else []
+
+
+def _chain() -> list[Stage]:
+    return [_stage("b", "a.txt", "b.txt"), _stage("c", "a.txt", "c.txt"), _stage("d", "b.txt", "d.txt")]
+
+
+def test_hazard_dependencies() -> None:
+    deps = build_dependencies([
+        Stage("w1", "m", outputs=("x",)),
+        Stage("r1", "m", inputs=("x",)),
+        Stage("r2", "m", inputs=("y",)),
+        Stage("w2", "m", outputs=("y",), after=("r1", "disabled")),
+    ])
+    assert deps == {"w1": set(), "r1": {"w1"}, "r2": set(), "w2": {"r1", "r2"}}
+
+
+def test_inproc_runs_dag_then_skips_unchanged(work: Path) -> None:
+    runner = StepRunner(root=work, state_path=work / "state.json", workers=3)
+    first = runner.run(_chain())
+    assert [o.status for o in first] == [STATUS_RAN] * 3
+    assert [o.stdout_tail for o in first] == ["ran b", "ran c", "ran d"]
+    assert (work / "d.txt").read_text() == "Ab;d;"
+    assert sorted(_calls(work)) == ["b", "c", "d"]
+
+    second = runner.run(_chain())
+    assert [o.status for o in second] == [STATUS_SKIPPED] * 3
+    assert [o.cmd for o in second] == ["<SKIP> fake_stage_mod"] * 3
+    assert len(_calls(work)) == 3
+
+    # cambia la entrada de b: b y d (downstream por contenido) se rehacen, c no
+    (work / "a.txt").write_text("A2", encoding="utf-8")
+    third = runner.run([_chain()[0], _chain()[2]])
+    assert [o.status for o in third] == [STATUS_RAN, STATUS_RAN]
+    assert (work / "d.txt").read_text() == "A2b;d;"
+    # un output borrado fuerza re-run aunque los inputs no cambien
+    (work / "c.txt").unlink()
+    assert [o.status for o in runner.run(_chain())] == [STATUS_SKIPPED, STATUS_RAN, STATUS_SKIPPED]
+
+
+def test_failure_is_not_cached_and_subprocess_mode(work: Path) -> None:
+    bad = Stage(name="bad", module="fake_stage_mod", args=("only-one",), outputs=("z.txt",))
+    runner = StepRunner(root=work, state_path=work / "state.json", mode=MODE_SUBPROCESS)
+    out = runner.run([bad, _stage("b", "a.txt", "b.txt")])
+    assert out[0].returncode != 0 and "ValueError" in out[0].stderr_tail
+    assert out[1].returncode == 0 and out[1].cmd == "python -m fake_stage_mod a.txt b.txt b"
+    state = json.loads((work / "state.json").read_text())["stages"]
+    assert sorted(state) == ["b"]
+
+
+def test_ops_tick_maps_skips_and_keeps_order(work: Path, monkeypatch) -> None:
+    config = ops_tick._parse_tick_config(["--no-import", "--readonly"])
+    names = [getattr(p, "name", p.cmd) for p in ops_tick._plan_stages(config)]
+    assert names == ["ledger_validate", "<SKIP> synapse.runner", "post_learning", "creative_queue", "creative_briefs"]
+
+    def fake_run(self, stages):
+        from synapse.infra.step_runner import StageOutcome
+
+        return [
+            StageOutcome(s.name, f"<SKIP> {s.module}", 0, "inputs unchanged since last OK tick", "", STATUS_SKIPPED)
+            if s.name == "creative_queue" else StageOutcome(s.name, s.cmd, 0, "", "")
+            for s in stages
+        ]
+
+    monkeypatch.setattr(StepRunner, "run", fake_run)
+    steps = ops_tick._execute_steps(config)
+    assert [s.cmd for s in steps] == [
+        "python -m synapse.ledger_ndjson validate",
+        "<SKIP> synapse.runner",
+        "python -m synapse.post_learning",
+        "<SKIP> synapse.creative_queue",
+        "python -m synapse.creative_briefs",
+    ]
+    assert steps[3].stdout_tail == "inputs unchanged since last OK tick"
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+import pytest
+
+from synapse.infra.circuit_breaker import CircuitBreaker, CircuitOpenError
+from synapse.infra.retry_policy import RetryPolicy
+from synapse.integrations.async_http_client import AsyncHttpClient, fetch_all
+from synapse.integrations.http_client import HttpClientError, HttpRequest, HttpResponseError, HttpTimeoutError
+
+
+class _Server:
+    """HTTP/1.1 keep-alive; /slow tarda, /flaky/<n> da 500 n veces, /chunked responde chunked, POST /drop corta sin responder."""
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.hits: Dict[str, int] = {}
+        self.ports: List[int] = []
+        self.lock = threading.Lock()
+        srv = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def _reply(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self) -> None:
+                with srv.lock:
+                    srv.ports.append(self.client_address[1])
+                    n = srv.hits[self.path] = srv.hits.get(self.path, 0) + 1
+                    srv.in_flight += 1
+                    srv.max_in_flight = max(srv.max_in_flight, srv.in_flight)
+                try:
+                    if self.path.startswith("/slow"):
+                        time.sleep(0.05)
+                    if self.path == "/hang":
+                        time.sleep(0.5)
+                    if self.path.startswith("/flaky/") and n <= int(self.path.rsplit("/", 1)[1]):
+                        return self._reply(500, {"error": "boom"})
+                    if self.path == "/missing":
+                        return self._reply(404, {"error": "nope"})
+                    if self.path == "/chunked":
+                        self.send_response(200)
+                        self.send_header("Transfer-Encoding", "chunked")
+                        self.end_headers()
+                        for part in (b'{"a": ', b"1}"):
+                            self.wfile.write(b"%x\r\n%s\r\n" % (len(part), part))
+                        self.wfile.write(b"0\r\n\r\n")
+                        return
+                    self._reply(200, {"path": self.path})
+                finally:
+                    with srv.lock:
+                        srv.in_flight -= 1
+
+            def do_POST(self) -> None:
+                data = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                with srv.lock:
+                    srv.hits[self.path] = srv.hits.get(self.path, 0) + 1
+                if self.path == "/drop":
+                    self.close_connection = True  # recibido, pero se cae antes de responder
+                    return
+                self._reply(201, {"echo": json.loads(data)})
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture()
+def server():
+    srv = _Server()
+    yield srv
+    srv.close()
+
+
+def test_fan_out_is_bounded_per_host_and_reuses_connections(server: _Server) -> None:
+    async def main() -> List[Any]:
+        async with AsyncHttpClient(dry_run=False, retry_max=0, max_per_host=5) as client:
+            out = await client.request_all(HttpRequest("GET", f"{server.url}/slow/{i}") for i in range(40))
+            return [out, client.metrics()]
+
+    t0 = time.monotonic()
+    out, metrics = asyncio.run(main())
+    elapsed = time.monotonic() - t0
+
+    assert [r.json()["path"] for r in out] == [f"/slow/{i}" for i in range(40)]
+    assert 2 <= server.max_in_flight <= 5
+    assert elapsed < 40 * 0.05  # no serial
+    m = metrics[server.url]
+    assert m["requests"] == 40 and m["opened"] <= 5 and m["reused"] >= 35
+    assert len(set(server.ports)) <= 5
+
+
+def test_retry_4xx_chunked_and_post(server: _Server) -> None:
+    async def main() -> None:
+        async with AsyncHttpClient(dry_run=False, retry_max=2, backoff_s=0) as client:
+            assert (await client.get(f"{server.url}/flaky/2")).json() == {"path": "/flaky/2"}
+            assert server.hits["/flaky/2"] == 3
+
+            with pytest.raises(HttpClientError, match="request failed"):
+                await client.get(f"{server.url}/flaky/9")
+            assert server.hits["/flaky/9"] == 3
+
+            with pytest.raises(HttpResponseError) as ex:
+                await client.get(f"{server.url}/missing")
+            assert ex.value.status == 404 and server.hits["/missing"] == 1  # 4xx sin retry
+
+            assert (await client.get(f"{server.url}/chunked")).json() == {"a": 1}
+            r = await client.post_json(f"{server.url}/orders", {"id": 7})
+            assert r.status == 201 and r.json() == {"echo": {"id": 7}}
+
+            with pytest.raises(HttpTimeoutError):
+                await client.get(f"{server.url}/hang", timeout_s=0.1)
+
+    asyncio.run(main())
+
+
+def test_post_already_sent_on_reused_connection_is_not_replayed(server: _Server) -> None:
+    async def main() -> Dict[str, int]:
+        async with AsyncHttpClient(dry_run=False, retry_max=0, max_per_host=1) as client:
+            await client.get(f"{server.url}/warm")
+            with pytest.raises(HttpClientError, match="request failed"):
+                await client.post_json(f"{server.url}/drop", {"id": 1})
+            return client.metrics()[server.url]
+
+    m = asyncio.run(main())
+    assert server.hits["/drop"] == 1
+    assert m["reused"] == 1 and m["stale_retries"] == 0 and m["errors"] == 1
+
+
+def test_circuit_opens_after_exhausted_retries(server: _Server) -> None:
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=60)
+
+    async def main() -> None:
+        client = AsyncHttpClient(dry_run=False, retry_max=0, circuit=breaker)
+        for _ in range(2):
+            with pytest.raises(HttpClientError):
+                await client.get(f"{server.url}/flaky/99")
+        with pytest.raises(CircuitOpenError):
+            await client.get(f"{server.url}/ok")
+        await client.aclose()
+
+    asyncio.run(main())
+    assert "/ok" not in server.hits
+
+
+def test_dry_run_default_and_url_policy(monkeypatch) -> None:
+    out = fetch_all([HttpRequest("GET", "https://example.com/a")])
+    assert out[0].headers == {"x-dry-run": "1"} and out[0].json()["dry_run"] is True
+
+    monkeypatch.delenv("SYNAPSE_DRY_RUN", raising=False)
+    monkeypatch.delenv("SYNAPSE_LIVE_META", raising=False)
+    out = fetch_all([HttpRequest("GET", "https://graph.facebook.com/v22.0/me")], dry_run=False)
+    assert isinstance(out[0], RuntimeError) and "NETWORK_BLOCKED_BY_FLAGS" in str(out[0])
+
+
+def test_retry_policy_run_async_does_not_block_loop() -> None:
+    calls: List[int] = []
+
+    async def flaky() -> str:
+        calls.append(1)
+        if len(calls) < 3:
+            raise ValueError("transient")
+        return "ok"
+
+    async def main() -> List[str]:
+        policy = RetryPolicy(max_attempts=3, base_delay_s=0.05, max_delay_s=0.05)
+        ticks: List[str] = []
+
+        async def ticker() -> None:
+            for _ in range(3):
+                ticks.append("t")
+                await asyncio.sleep(0.01)
+
+        res, _ = await asyncio.gather(policy.run_async(flaky, retry_on=(ValueError,)), ticker())
+        return [res] + ticks
+
+    out = asyncio.run(main())
+    assert out[0] == "ok" and len(calls) == 3 and out.count("t") == 3
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import sys
+
+import pytest
+
+from synapse.marketing_os import wave_kit_runner, wave_runner
+
+
+@pytest.fixture(autouse=True)
+def _pin_wave_modules(monkeypatch: pytest.MonkeyPatch) -> None:
+    # los tests de higiene del CLI sacan estos modulos de sys.modules; los
+    # process pools picklean por nombre y necesitan el mismo objeto que importamos
+    for mod in (wave_kit_runner, wave_runner):
+        monkeypatch.setitem(sys.modules, mod.__name__, mod)
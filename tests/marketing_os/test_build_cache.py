@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from synapse.marketing_os.build_cache import BuildCache, write_zip_streamed
+from synapse.marketing_os.wave_kit_runner import run_batch
+
+ALL = [
+    "creatives.ndjson",
+    "quality.json",
+    "meta/meta_assets.json",
+    "shopify/shopify_products.csv",
+    "bundle.zip",
+    "manifest.json",
+]
+
+
+def _write_canonical(csv_path: Path, rows: list[tuple[str, str, str]]) -> None:
+    lines = ["product_id,title,description"] + [",".join(r) for r in rows]
+    csv_path.write_text("\n".join(lines) + "\n", encoding="utf-8", newline="\n")
+
+
+def _mtimes(root: Path) -> dict[str, int]:
+    return {rp: (root / rp).stat().st_mtime_ns for rp in ALL}
+
+
+def test_rerun_after_one_product_fix_touches_only_that_product(tmp_path: Path) -> None:
+    canonical = tmp_path / "canonical.csv"
+    out_root = tmp_path / "out"
+    _write_canonical(canonical, [("p1", "Lampara", "Desc 1"), ("p2", "Termo", "Desc 2")])
+
+    first = run_batch(product_ids=["p1", "p2"], dry_run=False, out_root=str(out_root), canonical_csv=str(canonical))
+    assert [sorted(r["rebuilt"]) for r in first["results"]] == [sorted(ALL)] * 2
+    before = {pid: _mtimes(out_root / pid) for pid in ("p1", "p2")}
+    manifest_p1 = (out_root / "p1" / "manifest.json").read_bytes()
+
+    # re-run sin cambios: nada se reescribe, mismo resumen
+    again = run_batch(product_ids=["p1", "p2"], dry_run=False, out_root=str(out_root), canonical_csv=str(canonical))
+    assert [r["rebuilt"] for r in again["results"]] == [[], []]
+    assert [r["quality_score"] for r in again["results"]] == [r["quality_score"] for r in first["results"]]
+    assert {pid: _mtimes(out_root / pid) for pid in ("p1", "p2")} == before
+
+    # solo cambia la descripcion de p2: creatives intactos, se rehace shopify + zip + manifest
+    _write_canonical(canonical, [("p1", "Lampara", "Desc 1"), ("p2", "Termo", "Desc 2 corregida")])
+    fixed = run_batch(product_ids=["p1", "p2"], dry_run=False, out_root=str(out_root), canonical_csv=str(canonical))
+    assert fixed["results"][0]["rebuilt"] == []
+    assert fixed["results"][1]["rebuilt"] == ["shopify/shopify_products.csv", "bundle.zip", "manifest.json"]
+    assert _mtimes(out_root / "p1") == before["p1"]
+    assert (out_root / "p1" / "manifest.json").read_bytes() == manifest_p1
+
+    m2 = json.loads((out_root / "p2" / "manifest.json").read_text(encoding="utf-8"))
+    assert m2["meta"]["creative_count"] == fixed["results"][1]["creative_count"] > 0
+
+
+def test_tampered_artifact_is_rebuilt(tmp_path: Path) -> None:
+    canonical = tmp_path / "canonical.csv"
+    out_root = tmp_path / "out"
+    _write_canonical(canonical, [("p1", "Lampara", "Desc 1")])
+    run_batch(product_ids=["p1"], dry_run=False, out_root=str(out_root), canonical_csv=str(canonical))
+
+    meta = out_root / "p1" / "meta" / "meta_assets.json"
+    original = meta.read_bytes()
+    meta.write_text("{}\n", encoding="utf-8")
+
+    res = run_batch(product_ids=["p1"], dry_run=False, out_root=str(out_root), canonical_csv=str(canonical))
+    assert res["results"][0]["rebuilt"] == ["meta/meta_assets.json"]
+    assert meta.read_bytes() == original
+
+
+def test_streamed_zip_is_deterministic(tmp_path: Path) -> None:
+    (tmp_path / "a.txt").write_text("hola\n", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.json").write_text("{}\n", encoding="utf-8")
+
+    z1, z2 = tmp_path / "one.zip", tmp_path / "two.zip"
+    write_zip_streamed(z1, base_dir=tmp_path, relpaths=["a.txt", "sub/b.json", "missing.txt"])
+    write_zip_streamed(z2, base_dir=tmp_path, relpaths=["a.txt", "sub/b.json", "missing.txt"])
+    assert z1.read_bytes() == z2.read_bytes()
+
+
+def test_cache_ignores_corrupt_sidecar(tmp_path: Path) -> None:
+    (tmp_path / "x.txt").write_text("x", encoding="utf-8")
+    (tmp_path / ".build_cache.json").write_text("{trunc", encoding="utf-8")
+    cache = BuildCache(tmp_path)
+    assert cache.ensure("x.txt", "fp1", lambda: None)
+    cache.save()
+    assert not BuildCache(tmp_path).ensure("x.txt", "fp1", lambda: None)
@@ -102,3 +102,51 @@ class TestQuickBlueprint:
     def test_quick_blueprint_tiktok(self):
         bp = quick_blueprint("123", "Test", ["Hook 1"], "tiktok", 25)
         assert bp.platform == Platform.TIKTOK
+
+
+class TestPortfolio:
+    def test_portfolio_matches_single_product_blueprints(self, generator, sample_kit):
+        products = [(f"P{i}", f"Producto {i}", sample_kit) for i in range(20)]
+        plan = generator.generate_portfolio(products, total_budget=2000.0)
+        assert plan.budget_per_product_usd == 100.0
+        assert len(plan.blueprints) == 20
+        for pid, name, kit in products:
+            single = generator.generate_all_platforms(pid, name, kit, 100.0)
+            for plat in ("meta", "tiktok"):
+                got = plan.blueprints[pid][plat].to_dict()
+                exp = single[plat].to_dict()
+                got.pop("created_at")
+                exp.pop("created_at")
+                assert got == exp
+
+    def test_portfolio_single_platform_gets_full_budget(self, generator, sample_kit):
+        plan = generator.generate_portfolio(
+            [{"product_id": "1", "name": "Uno", "kit": sample_kit}], platforms=["meta"]
+        )
+        assert list(plan.blueprints["1"]) == ["meta"]
+        assert plan.blueprints["1"]["meta"].total_budget_usd == 50.0
+        with pytest.raises(ValueError):
+            generator.generate_portfolio([("1", "Uno", sample_kit)], platforms=["snap"])
+
+    def test_zero_budget_falls_back_to_default_like_single_product(self, generator, sample_kit):
+        blueprints = generator.generate_all_platforms("1", "Uno", sample_kit, total_budget=0)
+        assert blueprints["meta"].total_budget_usd == 50.0
+        assert blueprints["tiktok"].total_budget_usd == 50.0
+        plan = generator.generate_portfolio([("1", "Uno", sample_kit)], total_budget=0)
+        assert plan.budget_per_product_usd == 100.0 and plan.total_budget_usd == 100.0
+
+    def test_portfolio_feeds_meta_publish_planner(self, generator, sample_kit):
+        from synapse.meta_publish_plan import build_plan
+
+        plan = generator.generate_portfolio([("1", "Uno", sample_kit), ("2", "Dos", sample_kit)], total_budget=100.0)
+        tasks = plan.to_publish_tasks(landing_urls={"1": "https://shop.example/uno"})
+        # 2 hooks + 1 primary text por producto
+        assert len(tasks["tasks"]) == 6
+        publish = build_plan(
+            tasks, graph_version="v22.0", ad_account_id="123", default_status="PAUSED",
+            objective="OUTCOME_SALES", billing_event="IMPRESSIONS",
+            optimization_goal="OFFSITE_CONVERSIONS", promoted_object="",
+        )
+        ops = [s["op"] for s in publish["steps"]]
+        assert ops.count("create_campaign") == 2
+        assert ops.count("create_ad") == 6
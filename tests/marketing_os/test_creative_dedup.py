@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from synapse.marketing_os.creative_dedup import dedup_creatives, normalize_text, token_set, jaccard
+import random
+
+from synapse.marketing_os.creative_dedup import dedup_creatives, dedup_creatives_lsh, normalize_text, token_set, jaccard
 
 
 def test_normalize_text_strips_accents_and_punct() -> None:
@@ -22,3 +24,22 @@ def test_dedup_creatives_drops_similar() -> None:
     r = dedup_creatives(creatives, threshold=0.75)
     assert len(r.kept) == 2
     assert r.dropped == 1
+
+
+def test_dedup_creatives_lsh_matches_exact() -> None:
+    rng = random.Random(3)
+    hooks = ["Producto X", "Upgrade inmediato", "Por fin", "Oferta real", "Sin drama"]
+    claims = ["mejor valor", "envio rapido", "calidad pro", "garantia 30 dias", "resultado visible", "uso diario"]
+    creatives = []
+    for i in range(600):
+        words = [rng.choice(hooks)] + rng.sample(claims, rng.randint(1, 4))
+        if i % 7 == 0:
+            words.append(f"lote {i}")
+        creatives.append({"primary_text": ": ".join(words) + "."})
+    creatives += [{"primary_text": ""}, {"primary_text": "!!!"}, {}]
+
+    for th in (0.5, 0.8, 0.85, 1.0):
+        exact = dedup_creatives(creatives, threshold=th)
+        fast = dedup_creatives_lsh(creatives, threshold=th)
+        assert fast.kept == exact.kept
+        assert fast.dropped == exact.dropped
@@ -0,0 +1,86 @@
+"""
+Tests para EvaluationCache (cache por evaluador del InterrogationEngine).
+"""
+
+from dataclasses import replace
+
+import pytest
+
+from synapse.marketing_os import interrogation_engine as ie
+from synapse.marketing_os.evaluation_cache import EvaluationCache, evaluator_fingerprint
+from synapse.marketing_os.interrogation_engine import InterrogationEngine
+from synapse.marketing_os.models import ProductContext
+
+
+@pytest.fixture
+def product():
+    return ProductContext(
+        product_id="34357",
+        name="Audifonos Bluetooth M10",
+        category="electronics/audio",
+        price=599.0,
+        cost=180.0,
+        description="Audifonos inalambricos " * 30,
+        unique_features=["20h bateria", "Bluetooth 5.0"],
+    )
+
+
+def _counting(engine, monkeypatch):
+    calls = {}
+    for ev in engine.evaluators:
+        orig = ev.evaluate
+
+        def wrapped(ctx, _orig=orig, _name=type(ev).__name__):
+            calls[_name] = calls.get(_name, 0) + 1
+            return _orig(ctx)
+
+        monkeypatch.setattr(ev, "evaluate", wrapped)
+    return calls
+
+
+def test_cached_interrogation_matches_uncached_and_persists(tmp_path, product, monkeypatch):
+    plain = InterrogationEngine().interrogate(product)
+
+    first = InterrogationEngine(cache=EvaluationCache(tmp_path / "cache"))
+    r1 = first.interrogate(product)
+    assert first.cache.stats()["misses"] == 5
+
+    second = InterrogationEngine(cache=EvaluationCache(tmp_path / "cache"))
+    calls = _counting(second, monkeypatch)
+    r2 = second.interrogate(product)
+
+    assert calls == {}
+    assert second.cache.stats()["hits"] == 5
+    for r in (r1, r2):
+        assert r.framework_scores == plain.framework_scores
+        assert r.verdict == plain.verdict
+        assert r.emotion_primary == plain.emotion_primary
+        assert r.risks == plain.risks
+        assert r.recommendations == plain.recommendations
+
+
+def test_context_change_misses_beyond_input_hash_truncation(tmp_path, product, monkeypatch):
+    engine = InterrogationEngine(cache=EvaluationCache(tmp_path))
+    engine.interrogate(product)
+
+    # input_hash() solo ve description[:200]; el cache ve el contexto completo
+    changed = replace(product, description=product.description + " cura el insomnio")
+    assert changed.input_hash() == product.input_hash()
+    calls = _counting(engine, monkeypatch)
+    result = engine.interrogate(changed)
+    assert sum(calls.values()) == 5
+    assert result.compliance_flags
+
+
+def test_evaluator_change_only_invalidates_that_evaluator(tmp_path, product, monkeypatch):
+    engine = InterrogationEngine(cache=EvaluationCache(tmp_path))
+    engine.interrogate(product)
+
+    monkeypatch.setattr(ie.ComplianceEvaluator, "VERSION", "2")
+    monkeypatch.setattr("synapse.marketing_os.evaluation_cache._FP_CACHE", {})
+    assert evaluator_fingerprint(ie.ComplianceEvaluator()) != evaluator_fingerprint(ie.JTBDEvaluator())
+
+    fresh = InterrogationEngine(cache=EvaluationCache(tmp_path))
+    calls = _counting(fresh, monkeypatch)
+    fresh.interrogate(product)
+    assert calls == {"ComplianceEvaluator": 1}
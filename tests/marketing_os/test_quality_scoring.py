@@ -19,3 +19,32 @@ def test_score_penalizes_ultra_short() -> None:
     creatives = [{"primary_text": "ok"} for _ in range(5)]
     q = score_creatives(creatives, title="Producto X")
     assert q.score < 60
+
+
+def test_bulk_matches_score_creatives_and_per_term_substring_checks() -> None:
+    import random
+
+    from synapse.marketing_os.quality_filter import COMPLIANCE_TERMS, FILLER_WORDS, GENERIC_PHRASES, SPAIN_SPANISH
+    from synapse.marketing_os.quality_scoring import score_creatives_bulk
+
+    rng = random.Random(5)
+    vocab = ["Producto X", "tratamiento", "cura", "100%", "vale", "mola", "el mejor", "premium", "realmente",
+             "20 horas", "$599", "{title}", "hoy", "envío gratis", "médico", "resultados", "único", "móvil", "."]
+    creatives = [{"primary_text": " ".join(rng.choice(vocab) for _ in range(rng.randint(0, 9)))} for _ in range(300)]
+    creatives.append(dict(creatives[0]))
+
+    bulk = score_creatives_bulk(creatives, title="Producto X")
+    assert bulk.quality == score_creatives(creatives, title="Producto X")
+
+    lists = {
+        "compliance_term": COMPLIANCE_TERMS,
+        "generic_phrase": GENERIC_PHRASES,
+        "spain_spanish": SPAIN_SPANISH,
+        "filler_word": FILLER_WORDS,
+    }
+    for rule, terms in lists.items():
+        expected = [sum(1 for t in terms if t.lower() in c["primary_text"].lower()) for c in creatives]
+        assert bulk.rule_vector(rule) == expected, rule
+    assert bulk.rule_vector("placeholder") == [int("{title}" in c["primary_text"]) for c in creatives]
+    assert bulk.flagged("duplicate")[-1] == len(creatives) - 1
+    assert bulk.rule_totals()["empty"] == sum(1 for c in creatives if not c["primary_text"])
@@ -0,0 +1,78 @@
+"""
+Tests para SimilarityIndex (historial completo de MetaFilter).
+"""
+
+import random
+
+from synapse.marketing_os.models import ContentType
+from synapse.marketing_os.quality_filter import MetaFilter
+from synapse.marketing_os.similarity_index import SimilarityIndex
+
+
+def _brute_force(history, words, threshold):
+    s = set(words)
+    for i, prev in enumerate(history):
+        inter = len(s & prev)
+        union = len(s | prev)
+        if prev and union and inter / union > threshold:
+            return i
+    return None
+
+
+def test_index_matches_brute_force_jaccard():
+    rng = random.Random(11)
+    vocab = [f"w{i}" for i in range(40)]
+    idx = SimilarityIndex(threshold=0.6)
+    history = []
+    for _ in range(400):
+        words = rng.sample(vocab, rng.randint(1, 12))
+        for th in (0.6, 0.8):
+            expected = _brute_force(history, words, th)
+            got = idx.find_similar(words, th)
+            assert (got is None) == (expected is None)
+        history.append(set(words))
+        idx.add(words)
+    # threshold por debajo del indice => scan lineal, mismo resultado
+    probe = rng.sample(vocab, 6)
+    assert (idx.find_similar(probe, 0.3) is None) == (_brute_force(history, probe, 0.3) is None)
+
+
+def test_index_persists_across_instances(tmp_path):
+    path = tmp_path / "similarity_index.jsonl"
+    idx = SimilarityIndex(path=path)
+    idx.add("los audífonos m10 tienen batería de 20 horas".split())
+    idx.add([])
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"tokens": ["trunc')  # crash a media escritura
+
+    reopened = SimilarityIndex(path=path)
+    assert len(reopened) == 1
+    assert reopened.find_similar("los audífonos m10 tienen batería de 20 horas ya".split()) == 0
+
+
+def test_meta_filter_checks_full_history():
+    f = MetaFilter()
+    target = "Los audífonos bluetooth M10 tienen excelente batería de 20 horas"
+    assert f.evaluate(target, ContentType.HOOK)[0]
+    for i in range(30):
+        f.similarity_index.add(f"relleno distinto numero {i} sin relacion".split())
+
+    passed, _, issues = f.evaluate(
+        "Los audífonos bluetooth M10 tienen excelente batería de veinte horas", ContentType.HOOK
+    )
+    assert not passed
+    assert "TOO_SIMILAR_TO_PREVIOUS" in issues
+
+
+def test_meta_filter_history_survives_runs_and_reset(tmp_path):
+    path = tmp_path / "idx.jsonl"
+    content = "Tus audífonos M10 con 20 horas de batería, pídelos hoy"
+    first = MetaFilter(similarity_index_path=path)
+    assert first.evaluate(content, ContentType.HOOK)[0]
+    first.reset()
+    assert len(first.similarity_index) == 1
+
+    second = MetaFilter(similarity_index_path=path)
+    passed, _, issues = second.evaluate(content, ContentType.HOOK)
+    assert not passed
+    assert issues == ["TOO_SIMILAR_TO_PREVIOUS"]
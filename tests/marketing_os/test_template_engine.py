@@ -0,0 +1,84 @@
+"""
+Tests para template_engine (templates compilados de CreativeFactory).
+"""
+
+from synapse.marketing_os import creative_factory as cf
+from synapse.marketing_os.models import ProductContext
+from synapse.marketing_os.template_engine import RenderContext, compile_template, render, render_bulk
+
+
+def _legacy_fill(template, ctx):
+    result = template
+    for key, value in ctx.items():
+        result = result.replace("{" + key + "}", str(value))
+    return result
+
+
+CTX = {
+    "product_name": "Audifonos M10",
+    "category": "audio",
+    "price": 599,
+    "high_price": 1078,
+    "enemy": "el cable enredado",
+    "benefit_1": "20h bateria",
+    "benefit_2": "Bluetooth 5.0",
+    "benefit_3": "envío rápido",
+    "main_feature": "20h bateria",
+    "unique_feature": "20h bateria",
+    "number": "24",
+    "urgency": "últimas unidades",
+    "cta": "👉 Compra ahora",
+    "hook": "Dile adiós al cable",
+}
+
+
+def test_compile_splits_literals_and_slots():
+    plan = compile_template("Calidad de ${high_price} a {missing} {price}")
+    assert plan.slots == ("high_price", "missing", "price")
+    assert plan is compile_template("Calidad de ${high_price} a {missing} {price}")
+    assert plan.render({"high_price": "1078", "price": "599"}) == "Calidad de $1078 a {missing} 599"
+
+
+def test_render_matches_legacy_fill_for_every_factory_template():
+    n = cf.precompile_templates()
+    assert n > 40
+    tables = [
+        *cf.HOOK_TEMPLATES.values(),
+        *[list(v.values()) for v in cf.SCRIPT_TEMPLATES.values()],
+        cf.PRIMARY_TEXT_TEMPLATES,
+        cf.HEADLINE_TEMPLATES,
+        cf.LANDING_SECTIONS,
+    ]
+    rc = RenderContext(CTX)
+    for table in tables:
+        for t in table:
+            assert render(t, CTX) == _legacy_fill(t, CTX)
+            assert rc.render(t) == _legacy_fill(t, CTX)
+
+
+def test_render_bulk_products_by_variants():
+    ctxs = [dict(CTX, product_name=f"P{i}") for i in range(3)]
+    out = render_bulk(cf.HEADLINE_TEMPLATES, ctxs, only=[[0], [1, 2], list(range(len(cf.HEADLINE_TEMPLATES)))])
+    assert out[0] == [_legacy_fill(cf.HEADLINE_TEMPLATES[0], ctxs[0])]
+    assert len(out[1]) == 2
+    assert out[2] == [_legacy_fill(t, ctxs[2]) for t in cf.HEADLINE_TEMPLATES]
+
+
+def test_derive_does_not_leak_into_parent():
+    base = RenderContext(CTX)
+    child = base.derive(hook="otro hook")
+    assert child.render("{hook}") == "otro hook"
+    assert base.render("{hook}") == "Dile adiós al cable"
+
+
+def test_generate_kits_bulk():
+    factory = cf.CreativeFactory()
+    items = [
+        (ProductContext(product_id=f"p{i}", name=f"Producto {i}", category="electronics/audio", price=500.0, cost=150.0), None)
+        for i in range(3)
+    ]
+    kits = factory.generate_kits(items, {"num_hooks": 3, "num_headlines": 3})
+    assert len(kits) == 3
+    for (product, _), kit in zip(items, kits):
+        assert kit["manifest"].product_id == product.product_id
+        assert all("{" not in h["content"] for h in kit["headlines"])
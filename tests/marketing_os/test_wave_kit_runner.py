@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 from pathlib import Path
 
-from synapse.marketing_os.wave_kit_runner import run
+from synapse.marketing_os.wave_kit_runner import run, run_batch
 
 
 def _write_canonical(csv_path: Path, product_id: str) -> None:
@@ -48,3 +48,38 @@ def test_wavekit_apply_writes_artifacts_bundle_quality_and_manifest(tmp_path: Pa
     assert 0 <= int(q["score"]) <= 100
     assert "metrics" in q
     assert "dedup_dropped" in q
+
+
+def test_wavekit_batch_writes_each_bundle_and_merged_summary(tmp_path: Path) -> None:
+    canonical = tmp_path / "canonical.csv"
+    canonical.write_text(
+        "product_id,title,description\n"
+        "p1,Producto Uno,Desc 1\n"
+        "p2,Producto Dos,Desc 2\n"
+        "p3,Producto Tres,Desc 3\n",
+        encoding="utf-8",
+        newline="\n",
+    )
+    out_root = tmp_path / "out"
+
+    summary = run_batch(
+        product_ids=["p1", "p2", "p3", "missing"],
+        dry_run=False,
+        out_root=str(out_root),
+        canonical_csv=str(canonical),
+        workers=2,
+    )
+
+    assert summary["ok"] == 4 and summary["errors"] == 0
+    assert summary["fallback_minimal"] == 1
+    assert [r["product_id"] for r in summary["results"]] == ["p1", "p2", "p3", "missing"]
+    for pid in ("p1", "p2", "p3", "missing"):
+        assert (out_root / pid / "bundle.zip").exists()
+        assert (out_root / pid / "manifest.json").exists()
+    on_disk = json.loads((out_root / "batch_summary.json").read_text(encoding="utf-8"))
+    assert on_disk["creative_count"] == summary["creative_count"] > 0
+
+    # mismo kit que el modo de un producto
+    single = tmp_path / "single"
+    assert run(product_id="p2", dry_run=False, out_root=str(single), canonical_csv=str(canonical)) == 0
+    assert (single / "p2" / "creatives.ndjson").read_bytes() == (out_root / "p2" / "creatives.ndjson").read_bytes()
@@ -4,7 +4,7 @@ import tempfile
 import json
 from pathlib import Path
 from synapse.marketing_os.models import ProductContext
-from synapse.marketing_os.wave_runner import WaveRunner, run_wave, WaveResult
+from synapse.marketing_os.wave_runner import WaveRunner, run_wave, WaveResult, summarize_batch
 
 
 @pytest.fixture
@@ -104,3 +104,12 @@ class TestBatchProcessing:
         results = runner.run_batch(products, force=True)
         assert len(results) == 3
         assert all(r.status == "SUCCESS" for r in results)
+    
+    def test_run_batch_process_pool_keeps_order_and_summarizes(self, runner):
+        products = [ProductContext(product_id=f"prod{i}", name=f"Product {i}", category="test", price=100*i, cost=30*i) for i in range(1, 5)]
+        results = runner.run_batch(products, force=True, workers=2)
+        assert [r.product_id for r in results] == ["prod1", "prod2", "prod3", "prod4"]
+        assert all(r.status == "SUCCESS" and Path(r.kit_path).exists() for r in results)
+        summary = summarize_batch(results)
+        assert summary["by_status"] == {"SUCCESS": 4}
+        assert summary["hooks_generated"] == sum(r.hooks_generated for r in results)
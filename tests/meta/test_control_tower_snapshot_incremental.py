@@ -0,0 +1,154 @@
+# tests/meta/test_control_tower_snapshot_incremental.py
+import json
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from synapse.meta import meta_control_tower_snapshot as ct
+from synapse.meta.meta_control_tower_snapshot import SnapshotCache, build_snapshot, git_info, ledger_section
+
+
+def _write_json(path: Path, obj: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(obj, indent=2), encoding="utf-8")
+
+
+def _seed(repo: Path) -> None:
+    run_dir = repo / "data" / "run"
+    _write_json(run_dir / "meta_publish_run.json", {"mode": "simulate", "counts": {"results": 13, "errors": 0}, "run_fingerprint_12": "a46df2b8960a"})
+    _write_json(run_dir / "meta_policy_check.json", {"status": "OK"})
+    _write_json(run_dir / "meta_publish_runs_index.json", {"count": 2, "runs": [{"ts": "t1", "mode": "simulate", "status": "OK"}]})
+    _write_json(run_dir / "meta_publish_runs" / "meta_publish_run_simulate_20261018_090000.json", {"ts": "a", "status": "FAIL"})
+    _write_json(run_dir / "meta_publish_runs" / "meta_publish_run_simulate_20261018_100000.json", {"ts": "b", "mode": "simulate", "status": "OK"})
+
+
+def _event(et: str, ts: str) -> str:
+    return json.dumps({"ts_utc": ts, "payload": {"event_type": et}}) + "\n"
+
+
+def test_unchanged_sources_are_served_from_cache(tmp_path: Path, monkeypatch) -> None:
+    _seed(tmp_path)
+    cache_path = tmp_path / "data" / "cache" / "ct.json"
+    reads: List[str] = []
+    real = ct._artifact_section
+    monkeypatch.setattr(ct, "_artifact_section", lambda p: reads.append(p.name) or real(p))
+
+    cache = SnapshotCache.load(cache_path)
+    first = build_snapshot(tmp_path, cache=cache)
+    assert sorted(first["freshness"]["rebuilt"]) == sorted([f"artifact:{a}" for a in ct.ARTIFACTS] + ["git", "git_dirty", "ledger", "runs_dir"])
+    assert first["kpis"]["rows"] == 13 and first["kpis"]["policy_status"] == "OK"
+    assert first["runs_dir"]["count"] == 2 and first["runs_dir"]["latest_status"] == "OK"
+    assert SnapshotCache.load(cache_path).sections == {}  # build_snapshot no persiste: lo hace el CLI
+    cache.save()
+
+    # otro proceso: mismo cache en disco -> nada se reconstruye
+    reads.clear()
+    second = build_snapshot(tmp_path, cache=SnapshotCache.load(cache_path))
+    assert second["freshness"]["rebuilt"] == [] and reads == []
+    assert second["freshness"]["content_fp12"] == first["freshness"]["content_fp12"]
+    assert second["kpis"] == first["kpis"] and second["raw"]["run"] == first["raw"]["run"]
+
+    _write_json(tmp_path / "data" / "run" / "meta_publish_run.json", {"mode": "live", "counts": {"results": 14, "errors": 1}})
+    _write_json(tmp_path / "data" / "run" / "meta_publish_runs" / "meta_publish_run_live_20261018_110000.json", {"ts": "c", "mode": "live", "status": "FAIL"})
+    third = build_snapshot(tmp_path, cache=cache)
+    assert third["freshness"]["rebuilt"] == ["artifact:run", "runs_dir"] and reads == ["meta_publish_run.json"]
+    assert (third["kpis"]["mode"], third["kpis"]["rows"], third["kpis"]["errors"]) == ("live", 14, 1)
+    assert (third["runs_dir"]["count"], third["runs_dir"]["latest_status"]) == (3, "FAIL")
+    assert third["freshness"]["content_fp12"] != first["freshness"]["content_fp12"]
+
+
+def test_ledger_is_read_from_the_last_offset(tmp_path: Path) -> None:
+    p = tmp_path / "events.ndjson"
+    p.write_text(_event("AD_RESULTS", "2026-10-01T00:00:00Z") * 3 + "{bad\n", encoding="utf-8")
+    first = ledger_section(p, None)
+    assert (first["events"], first["bad_lines"], first["by_type"]) == (3, 1, {"AD_RESULTS": 3})
+    assert first["offset"] == p.stat().st_size
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write(_event("PUBLISH", "2026-10-02T00:00:00Z"))
+        f.write(_event("PUBLISH", "2026-10-03T00:00:00Z")[:20])  # linea a medio escribir
+    second = ledger_section(p, first)
+    assert second["events"] == 4 and second["by_type"] == {"AD_RESULTS": 3, "PUBLISH": 1}
+    assert second["last_ts"] == "2026-10-02T00:00:00Z" and second["offset"] < p.stat().st_size
+    assert first["by_type"] == {"AD_RESULTS": 3}  # el estado anterior no se muta
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write(_event("PUBLISH", "2026-10-03T00:00:00Z")[20:])
+    third = ledger_section(p, second)
+    assert third["events"] == 5 and third["last_ts"] == "2026-10-03T00:00:00Z"
+
+    # reescrito (rotado / truncado): se re-escanea desde cero
+    tmp = tmp_path / "events.tmp"
+    tmp.write_text(_event("X", "2026-10-04T00:00:00Z"), encoding="utf-8")
+    os.replace(tmp, p)
+    assert ledger_section(p, third)["by_type"] == {"X": 1}
+
+    snap = build_snapshot(tmp_path)
+    assert snap["ledger"]["events"] == 0 and "guard" not in snap["ledger"]
+
+
+def test_git_head_is_read_from_refs_without_shell(tmp_path: Path) -> None:
+    repo = tmp_path / "repo"
+    git = repo / ".git"
+    (git / "refs" / "heads").mkdir(parents=True)
+    (git / "HEAD").write_text("ref: refs/heads/main\n", encoding="utf-8")
+    (git / "packed-refs").write_text("# pack-refs with: peeled\n" + "a" * 40 + " refs/heads/main\n^" + "c" * 40 + "\n", encoding="utf-8")
+    assert git_info(repo) == {"commit12": "a" * 12, "branch": "main", "dirty": None}
+
+    cache = SnapshotCache()
+    build_snapshot(repo, cache=cache)
+    assert build_snapshot(repo, cache=cache)["freshness"]["rebuilt"] == []
+    (git / "refs" / "heads" / "main").write_text("b" * 40 + "\n", encoding="utf-8")  # commit nuevo: ref suelta
+    snap = build_snapshot(repo, cache=cache)
+    assert snap["freshness"]["rebuilt"] == ["git", "git_dirty"] and snap["raw"]["__provenance"]["git"]["commit12"] == "b" * 12
+
+    (git / "HEAD").write_text("d" * 40 + "\n", encoding="utf-8")
+    assert git_info(repo)["branch"] == "HEAD" and git_info(repo / "sub" / "dir")["commit12"] == "d" * 12
+
+    # worktree: .git es un archivo que apunta al gitdir, refs en commondir
+    wt = tmp_path / "wt"
+    wt_git = git / "worktrees" / "wt"
+    wt_git.mkdir(parents=True)
+    wt.mkdir()
+    (wt / ".git").write_text(f"gitdir: {wt_git}\n", encoding="utf-8")
+    (wt_git / "commondir").write_text("../..\n", encoding="utf-8")
+    (wt_git / "HEAD").write_text("ref: refs/heads/main\n", encoding="utf-8")
+    info: Dict[str, Any] = git_info(wt)
+    assert (info["commit12"], info["branch"]) == ("b" * 12, "main")
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="git not installed")
+def test_git_dirty_is_refreshed_on_ttl_and_head_or_index_change(tmp_path: Path, monkeypatch) -> None:
+    def git(*args: str) -> None:
+        subprocess.run(["git", "-c", "user.email=t@t", "-c", "user.name=t", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    (tmp_path / "a.txt").write_text("uno\n", encoding="utf-8")
+    git("add", "a.txt")
+    git("commit", "-q", "-m", "init")
+    assert git_info(tmp_path)["dirty"] is False
+
+    calls: List[Path] = []
+    real = ct.git_dirty
+    monkeypatch.setattr(ct, "git_dirty", lambda repo: calls.append(repo) or real(repo))
+    now = [1000.0]
+    cache = SnapshotCache(clock=lambda: now[0])
+    assert build_snapshot(tmp_path, cache=cache, dirty_ttl_s=10)["raw"]["__provenance"]["git"]["dirty"] is False
+
+    # edicion sin stagear: dentro del TTL sale del cache, sin git status por build
+    (tmp_path / "a.txt").write_text("dos\n", encoding="utf-8")
+    snap = build_snapshot(tmp_path, cache=cache, dirty_ttl_s=10)
+    assert snap["freshness"]["rebuilt"] == [] and len(calls) == 1
+
+    now[0] += 10
+    snap = build_snapshot(tmp_path, cache=cache, dirty_ttl_s=10)
+    assert snap["freshness"]["rebuilt"] == ["git_dirty"] and snap["raw"]["__provenance"]["git"]["dirty"] is True
+    assert snap["raw"]["__provenance"]["git"]["commit12"] != "unknown"
+
+    git("commit", "-q", "-am", "dos")  # cambia HEAD/index: se recalcula sin esperar el TTL
+    snap = build_snapshot(tmp_path, cache=cache, dirty_ttl_s=10)
+    assert sorted(snap["freshness"]["rebuilt"]) == ["git", "git_dirty"] and snap["raw"]["__provenance"]["git"]["dirty"] is False
@@ -16,7 +16,9 @@ from synapse.infra.feature_flags import FeatureFlags
 from synapse.infra.idempotency_store import IdempotencyStore
 from synapse.infra.ledger_f1_core import Ledger
 from synapse.infra.retry_policy import RetryPolicy
+from synapse import meta_usage_scheduler
 from synapse.meta.safe_client import MetaSafeClient, MetaSafeClientConfig
+from synapse.meta_usage_scheduler import UsageScheduler
 
 
 def _make_client(
@@ -143,6 +145,23 @@ class TestAutopause:
         assert "meta.autopause.attempt" in event_types
         assert "meta.autopause.result" in event_types
 
+    def test_live_pause_uses_critical_lane(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        sched = UsageScheduler(max_wait_s=5.0)
+        sched.observe({"X-App-Usage": json.dumps({"call_count": 99})})  # NORMAL/BULK pausarian
+        monkeypatch.setattr(meta_usage_scheduler, "_shared", sched)
+        client = _make_client(tmp_path, live=True)
+
+        with patch("synapse.meta.safe_client.call_pause_campaign", return_value={"success": True}) as pause:
+            result = client.maybe_autopause(
+                spend_today_mxn=Decimal("90"),
+                cap_mxn=Decimal("100"),
+                campaign_id="camp-live",
+            )
+
+        assert result["ok"] is True and result["mode"] == "live"
+        pause.assert_called_once_with("camp-live")
+        assert sched.snapshot()["dispatched"] == 1 and sched.snapshot()["paused"] == 0
+
 
 # ------------------------------------------------------------------
 # 4) Error path: live mode + publisher raises => meta.error in ledger
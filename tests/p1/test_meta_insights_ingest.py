@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from synapse import meta_insights_ingest
+from synapse.integrations.http_client import SimpleHttpClient
+from synapse.learning.learning_loop import LearningLoop, LearningLoopConfig
+from synapse.meta_insights_ingest import GraphInsights, date_windows, ingest
+
+SINCE = date(2026, 10, 1)
+ADS = ("Hh1_Adolor_Fhands_V1", "Hh2_Adolor_Fhands_V1")
+PAGE = 3
+
+
+class _FakeInsights:
+    """
+    Graph fake con paginas enlatadas: una fila por ad por dia del time_range,
+    PAGE filas por pagina (cursor after = offset). POST insights crea un
+    report job que responde "Job Running" una vez antes de completar.
+    """
+
+    def __init__(self) -> None:
+        self.spend: Dict[str, str] = {}
+        self.fail_since = ""
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.gets: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def _send(self, code: int, body: Any) -> None:
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                u = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(u.query).items()}
+                with fake.lock:
+                    fake.gets.append(u.path)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                time.sleep(0.03)
+                parts = u.path.strip("/").split("/")[1:]
+                if parts == ["act_1", "insights"] and json.loads(q["time_range"])["since"] == fake.fail_since:
+                    code, body = 500, {"error": {"message": "tmp", "code": 2}}
+                elif parts == ["act_1", "insights"]:
+                    code, body = 200, fake.page(json.loads(q["time_range"]), q)
+                elif len(parts) == 1 and parts[0] in fake.jobs:
+                    job = fake.jobs[parts[0]]
+                    job["polls"] += 1
+                    done = job["polls"] > 1
+                    code, body = 200, {"async_status": "Job Completed" if done else "Job Running", "async_percent_completion": 100 if done else 40}
+                elif len(parts) == 2 and parts[0] in fake.jobs and parts[1] == "insights":
+                    code, body = 200, fake.page(fake.jobs[parts[0]]["range"], q)
+                else:
+                    code, body = 400, {"error": {"message": f"unknown path {u.path}", "code": 100}}
+                with fake.lock:
+                    fake.in_flight -= 1
+                self._send(code, body)
+
+            def do_POST(self) -> None:
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode()
+                q = {k: v[0] for k, v in parse_qs(raw).items()}
+                with fake.lock:
+                    rid = f"9{len(fake.jobs) + 1}"
+                    fake.jobs[rid] = {"range": json.loads(q["time_range"]), "polls": 0}
+                self._send(200, {"report_run_id": rid})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def rows(self, rng: Dict[str, str]) -> List[Dict[str, Any]]:
+        out = []
+        d, end = date.fromisoformat(rng["since"]), date.fromisoformat(rng["until"])
+        while d <= end:
+            for i, name in enumerate(ADS):
+                ad_id = f"AD{i + 1}"
+                out.append({
+                    "ad_id": ad_id,
+                    "ad_name": f"{name} | prospecting",
+                    "date_start": d.isoformat(),
+                    "date_stop": d.isoformat(),
+                    "spend": self.spend.get(f"{ad_id}|{d}", "10.50"),
+                    "impressions": "1000",
+                    "clicks": "40",
+                    "inline_link_clicks": "25",
+                    "actions": [{"action_type": "video_view", "value": "310"}, {"action_type": "omni_purchase", "value": "2"}],
+                    "purchase_roas": [{"action_type": "omni_purchase", "value": "2.4"}],
+                })
+            d += timedelta(days=1)
+        return out
+
+    def page(self, rng: Dict[str, str], q: Dict[str, str]) -> Dict[str, Any]:
+        rows = self.rows(rng)
+        start = int(q.get("after") or 0)
+        body: Dict[str, Any] = {"data": rows[start:start + PAGE], "paging": {"cursors": {"after": str(start + PAGE)}}}
+        if start + PAGE < len(rows):
+            body["paging"]["next"] = f"{self.base}/next"
+        return body
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def fake():
+    srv = _FakeInsights()
+    yield srv
+    srv.close()
+
+
+def _api(fake: _FakeInsights) -> GraphInsights:
+    return GraphInsights(SimpleHttpClient(dry_run=False, retry_max=0), access_token="SIMULATE", graph_base=fake.base, poll_interval_s=0.0)
+
+
+def _ledger(root: Path) -> List[Dict[str, Any]]:
+    p = root / "data" / "ledger" / "events.ndjson"
+    return [json.loads(line) for line in p.read_text(encoding="utf-8").splitlines()] if p.exists() else []
+
+
+def test_parallel_windows_paginate_and_dedupe(tmp_path: Path, fake: _FakeInsights) -> None:
+    until = SINCE + timedelta(days=9)
+    out = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=3, workers=4)
+
+    assert out["status"] == "OK" and [w["mode"] for w in out["windows"]] == ["sync"] * 4
+    assert [w["rows"] for w in out["windows"]] == [6, 6, 6, 2]
+    assert sum(w["pages"] for w in out["windows"]) == 2 + 2 + 2 + 1
+    assert fake.max_in_flight >= 2  # ventanas en paralelo
+    assert out["counts"] == {"rows": 20, "written": 20, "revisions": 0, "skipped_duplicates": 0, "skipped_invalid": 0}
+
+    events = _ledger(tmp_path)
+    assert [e["payload"]["date"] for e in events[:4]] == ["2026-10-01", "2026-10-01", "2026-10-02", "2026-10-02"]
+    p = events[0]["payload"]
+    assert events[0]["ts_utc"] == "2026-10-01T00:00:00Z"
+    assert p["event_type"] == "AD_RESULTS" and p["utm_content"] == "Hh1_Adolor_Fhands_V1" and p["creative_id"] == "AD1"
+    assert (p["spend"], p["clicks"], p["conversions"], p["roas"], p["hook_rate_3s"]) == (10.5, 25, 2, 2.4, 31.0)
+
+    again = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=3)
+    assert again["counts"]["written"] == 0 and again["counts"]["skipped_duplicates"] == 20
+
+    fake.spend["AD2|2026-10-04"] = "12.00"  # Meta re-estado un dia
+    third = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=3)
+    assert third["counts"]["written"] == 1 and third["counts"]["revisions"] == 1
+    last = _ledger(tmp_path)[-1]["payload"]
+    assert (last["ad_id"], last["date"], last["spend"], last["revision"]) == ("AD2", "2026-10-04", 12.0, 2)
+
+
+def test_marker_bump_does_not_restate_seen_rows(tmp_path: Path, fake: _FakeInsights, monkeypatch) -> None:
+    until = SINCE + timedelta(days=3)
+    first = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=4)
+    assert first["counts"]["written"] == 8
+
+    monkeypatch.setattr(meta_insights_ingest, "__MARKER__", "META_INSIGHTS_INGEST_TEST_BUMP")
+    again = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=4)
+    assert again["counts"]["revisions"] == 0 and again["counts"]["skipped_duplicates"] == 8
+    assert len(_ledger(tmp_path)) == 8
+
+
+def test_large_windows_use_async_report_jobs(tmp_path: Path, fake: _FakeInsights) -> None:
+    until = SINCE + timedelta(days=19)
+    out = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=10, async_min_days=10, dry_run=True)
+
+    assert out["status"] == "OK" and [w["mode"] for w in out["windows"]] == ["async", "async"]
+    assert out["counts"]["written"] == 40 and out["readonly"] is True
+    assert sorted(fake.jobs) == ["91", "92"] and all(j["polls"] == 2 for j in fake.jobs.values())
+    assert {"/v22.0/91/insights", "/v22.0/92/insights"} <= set(fake.gets)
+    assert _ledger(tmp_path) == [] and not (tmp_path / "data" / "run" / "meta_insights_state.json").exists()
+
+
+def test_failed_window_is_reported_and_cli_requires_live_or_loopback(tmp_path: Path, fake: _FakeInsights, monkeypatch) -> None:
+    api = _api(fake)
+    fake.fail_since = "2026-10-04"
+    out = ingest(tmp_path, api, account="act_1", since=SINCE, until=SINCE + timedelta(days=5), product_id="x", window_days=3)
+    assert out["status"] == "PARTIAL" and [e["since"] for e in out["errors"]] == ["2026-10-04"]
+    assert out["counts"]["written"] == 6
+
+    assert date_windows(SINCE, SINCE, 7) == [(SINCE, SINCE)]
+    monkeypatch.chdir(tmp_path)
+    assert meta_insights_ingest.main(["--account", "1", "--since", "2026-10-01", "--until", "2026-10-02"]) == 2
+    assert meta_insights_ingest.main(["--account", "1", "--since", "2026-10-01", "--until", "2026-10-02", "--graph-base", fake.base]) == 0
+    assert len(_ledger(tmp_path)) == 6 + 4
+
+
+def test_learning_loop_counts_only_the_latest_revision(tmp_path: Path, fake: _FakeInsights) -> None:
+    until = SINCE + timedelta(days=3)
+    ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=4)
+    # Meta re-estado dos veces el mismo ad-dia en pulls diarios sucesivos
+    for spend in ("12.00", "15.00"):
+        fake.spend["AD1|2026-10-02"] = spend
+        out = ingest(tmp_path, _api(fake), account="act_1", since=SINCE, until=until, product_id="34357", window_days=4)
+        assert out["counts"]["revisions"] == 1
+    events = _ledger(tmp_path)
+    assert len(events) == 8 + 2
+
+    cfg = LearningLoopConfig(min_records=1, min_spend_before_learn=1.0)
+    res = LearningLoop(tmp_path).run(ledger_obj=list(events), cfg=cfg, force=True)
+    assert res.status == "COMPLETED"
+    weights = json.loads(Path(res.weights_path).read_text(encoding="utf-8"))
+    assert weights["records_used"] == 8  # un registro por ad-dia
+    assert weights["total_spend"] == pytest.approx(7 * 10.5 + 15.0)
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+from urllib.parse import parse_qs
+
+import pytest
+
+from synapse import meta_publish_execute
+from synapse.infra.retry_policy import RetryPolicy
+from synapse.meta_publish_batch import BatchItem, is_retryable, parse_batch_response, run_batches
+from synapse.meta_publish_dag import dependency_levels, execute_dag
+from synapse.meta_publish_plan import build_plan
+from synapse.meta_usage_scheduler import account_from_url
+
+
+class _FakeGraph:
+    """
+    Graph API falso: id = "<edge>:<name>", registra orden y concurrencia.
+    POST / = batch endpoint; `flaky` = name -> veces que responde null/500 antes de OK.
+    """
+
+    def __init__(self, fail_names: tuple[str, ...] = (), flaky: Dict[str, int] | None = None) -> None:
+        self.fail_names = fail_names
+        self.flaky = dict(flaky or {})
+        self.log: List[Dict[str, Any]] = []
+        self.requests: List[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.headers.get("Content-Type", "").startswith("multipart/"):
+                    m = re.search(rb'name="name"\r\n\r\n([^\r]*)', raw)
+                    fields = {"name": m.group(1).decode() if m else ""}
+                else:
+                    fields = {k: v[0] for k, v in parse_qs(raw.decode()).items()}
+                with fake.lock:
+                    fake.requests.append(self.path)
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                time.sleep(0.05)
+                if self.path == "/" and "batch" in fields:
+                    items = json.loads(fields["batch"])
+                    code, body = 200, [fake.batch_item(it) for it in items]
+                else:
+                    code, body = fake.handle(self.path.rsplit("/", 1)[-1], fields)
+                with fake.lock:
+                    fake.in_flight -= 1
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, edge: str, fields: Dict[str, str]) -> tuple[int, Dict[str, Any]]:
+        name = fields.get("name", "")
+        if name in self.fail_names:
+            code, body = 400, {"error": {"message": "boom", "code": 100}}
+        else:
+            code, body = 200, {"id": f"{edge}:{name}"}
+        with self.lock:
+            self.log.append({"edge": edge, "fields": fields, "id": body.get("id")})
+        return code, body
+
+    def batch_item(self, item: Dict[str, Any]) -> Dict[str, Any] | None:
+        fields = {k: v[0] for k, v in parse_qs(item["body"]).items()}
+        name = fields.get("name", "")
+        with self.lock:
+            left = self.flaky.get(name, 0)
+            self.flaky[name] = left - 1
+        if left > 0:
+            return None if left % 2 else {"code": 500, "body": json.dumps({"error": {"message": "tmp", "is_transient": True}})}
+        code, body = self.handle(item["relative_url"].rsplit("/", 1)[-1], fields)
+        return {"code": code, "body": json.dumps(body)}
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _write_plan(root: Path, n_ads: int) -> Path:
+    tasks = []
+    for i in range(n_ads):
+        utm = f"U{i}"
+        (root / "assets").mkdir(exist_ok=True)
+        (root / "assets" / f"{utm}.mp4").write_bytes(b"video-" + utm.encode())
+        tasks.append({
+            "utm_content": utm,
+            "naming": {"campaign": "CAMP", "adset": f"{utm}_AS"},
+            "copy": {"primary_text": f"texto {i}"},
+            "assets": {"video_path": f"assets/{utm}.mp4"},
+        })
+    plan = build_plan({"tasks": tasks}, "v22.0", "123", "PAUSED", "OUTCOME_SALES", "IMPRESSIONS", "OFFSITE_CONVERSIONS", "")
+    path = root / "data" / "run" / "meta_publish_plan.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(plan), encoding="utf-8")
+    return path
+
+
+def _run(root: Path, plan: Path, base: str, *extra: str) -> Dict[str, Any]:
+    out = root / "run.json"
+    rc = meta_publish_execute.main([
+        "--plan", str(plan), "--mode", "simulate", "--graph-base", base,
+        "--out", str(out), "--out-dir", str(root / "runs"),
+        "--daily-budget", "500", "--targeting-json", '{"geo_locations": {"countries": ["CO"]}}',
+        "--promoted-object-json", '{"pixel_id": "<META_PIXEL_ID>"}',
+        "--page-id", "PAGE", "--ig-actor-id", "IG", "--pixel-id", "PX", *extra,
+    ])
+    run = json.loads(out.read_text(encoding="utf-8"))
+    run["rc"] = rc
+    return run
+
+
+@pytest.fixture()
+def graph():
+    servers: List[_FakeGraph] = []
+
+    def make(**kw: Any) -> _FakeGraph:
+        servers.append(_FakeGraph(**kw))
+        return servers[-1]
+
+    yield make
+    for s in servers:
+        s.close()
+
+
+def test_dag_publishes_20_ads_concurrently_with_resolved_ids(tmp_path: Path, graph) -> None:
+    fake = graph()
+    plan = _write_plan(tmp_path, 20)
+    run = _run(tmp_path, plan, fake.base, "--workers", "8")
+
+    assert run["rc"] == 0 and run["status"] == "OK"
+    assert run["counts"] == {"steps": 81, "results": 81, "errors": 0}
+    assert [r["i"] for r in run["results"]] == list(range(81))
+    assert 2 <= fake.max_in_flight <= 8
+
+    # cada request se despacho despues de sus deps, con sus ids ya resueltos
+    seen: List[str] = []
+    for req in fake.log:
+        f = req["fields"]
+        if req["edge"] == "adsets":
+            assert f["campaign_id"] == "campaigns:CAMP" and f["campaign_id"] in seen
+            assert json.loads(f["promoted_object"]) == {"pixel_id": "PX"}
+        if req["edge"] == "adcreatives":
+            vid = json.loads(f["object_story_spec"])["video_data"]["video_id"]
+            assert vid in seen and vid == "advideos:" + f["name"].replace("_CREATIVE", "")
+        if req["edge"] == "ads":
+            utm = f["name"].replace("_AD", "")
+            assert f["adset_id"] == f"adsets:{utm}_AS" and f["adset_id"] in seen
+            assert json.loads(f["creative"])["creative_id"] == f"adcreatives:{utm}_CREATIVE"
+        seen.append(req["id"])
+    assert run["id_map"]["meta:ad:U7"] == "ads:U7_AD"
+
+
+def test_fail_fast_stops_dispatch_and_continue_on_error_runs_the_rest(tmp_path: Path, graph) -> None:
+    plan = _write_plan(tmp_path, 6)
+
+    fake = graph(fail_names=("CAMP",))
+    run = _run(tmp_path, plan, fake.base, "--workers", "2")
+    assert run["rc"] == 2 and run["status"] == "FAIL"
+    assert run["errors"][0]["key"] == "meta:campaign:CAMP"
+    # nada que dependa de la campaña se despacho
+    assert not [r for r in fake.log if r["edge"] in ("adsets", "ads")]
+    assert run["counts"]["results"] < run["counts"]["steps"]
+
+    fake2 = graph(fail_names=("U2_AS",))
+    run2 = _run(tmp_path, plan, fake2.base, "--workers", "4", "--continue-on-error")
+    assert run2["counts"]["results"] == run2["counts"]["steps"]
+    failed = [r["key"] for r in run2["results"] if r["status"] == "FAIL"]
+    assert failed == ["meta:adset:U2", "meta:ad:U2"]
+    by_key = {r["key"]: r for r in run2["results"]}
+    assert "missing deps" in by_key["meta:ad:U2"]["error"]
+    assert by_key["meta:ad:U3"]["created_id"] == "ads:U3_AD"
+
+
+def test_scheduler_order_levels_and_cycles() -> None:
+    steps = [
+        {"key": "a", "payload": {}},
+        {"key": "b", "payload": {"x": "<ID:a>"}},
+        {"key": "c", "depends_on": ["a", "unknown"], "payload": {}},
+        {"key": "d", "payload": {"y": ["<ID:b>", "<ID:c>"]}},
+    ]
+    assert dependency_levels(steps) == {"a": 0, "b": 1, "c": 1, "d": 2}
+
+    done: List[str] = []
+    reports = execute_dag(steps, lambda s: done.append(s["key"]) or {"key": s["key"], "status": "OK"}, workers=3)
+    assert [r["key"] for r in reports] == ["a", "b", "c", "d"]
+    assert done[0] == "a" and done[-1] == "d"
+
+    with pytest.raises(ValueError, match="cycle"):
+        dependency_levels([{"key": "x", "depends_on": ["y"]}, {"key": "y", "payload": {"r": "<ID:x>"}}])
+
+
+def test_simulate_without_server_stays_offline(tmp_path: Path) -> None:
+    plan = _write_plan(tmp_path, 2)
+    out = tmp_path / "run.json"
+    rc = meta_publish_execute.main(["--plan", str(plan), "--mode", "simulate", "--out", str(out), "--out-dir", str(tmp_path / "runs")])
+    run = json.loads(out.read_text(encoding="utf-8"))
+    assert rc == 0 and all(r["simulated_id"].startswith("SIM") for r in run["results"])
+    with pytest.raises(ValueError, match="loopback"):
+        meta_publish_execute.main(["--plan", str(plan), "--mode", "simulate", "--graph-base", "https://graph.facebook.com"])
+
+
+def test_batch_mode_groups_levels_and_retries_items(tmp_path: Path, graph, monkeypatch) -> None:
+    monkeypatch.setattr("synapse.meta_publish_batch.DEFAULT_RETRY", RetryPolicy(max_attempts=3, base_delay_s=0.0, max_delay_s=0.0))
+    fake = graph(flaky={"U3_AS": 2, "U5_AD": 1})
+    plan = _write_plan(tmp_path, 20)
+    run = _run(tmp_path, plan, fake.base, "--batch-size", "50")
+
+    assert run["rc"] == 0 and run["counts"] == {"steps": 81, "results": 81, "errors": 0}
+    # nivel 0: 1 batch (campaña) + 20 uploads; nivel 1: 40 items -> 1 batch; nivel 2: 20 ads -> 1 batch
+    batch_calls = [p for p in fake.requests if p == "/"]
+    assert len(fake.requests) - len(batch_calls) == 20
+    assert len(batch_calls) == 3 + 2 + 1  # + dos rondas de retry en nivel 1 (500, null) y una en nivel 2
+    assert run["batch"] == {"size": 50, "items": 61, "http_calls": 6, "retried": 3, "uploads": 20}
+
+    by_key = {r["key"]: r for r in run["results"]}
+    assert by_key["meta:adset:U3"]["batch_retries"] == 2
+    assert by_key["meta:ad:U5"]["created_id"] == "ads:U5_AD"
+    assert run["id_map"]["meta:creative:U9"] == "adcreatives:U9_CREATIVE"
+
+
+def test_batch_mode_splits_batches_per_ad_account(tmp_path: Path, graph, monkeypatch) -> None:
+    fake = graph()
+    plan_path = _write_plan(tmp_path, 4)
+    plan = json.loads(plan_path.read_text(encoding="utf-8"))
+    for st in plan["steps"]:
+        if st["key"].endswith(("U1", "U3")):
+            st["endpoint"] = st["endpoint"].replace("act_123", "act_456")
+    plan_path.write_text(json.dumps(plan), encoding="utf-8")
+
+    sent: List[tuple] = []
+    real = meta_publish_execute._graph_batch
+
+    def spy(url: str, batch: List[Dict[str, Any]], access_token: str, account: str) -> Any:
+        sent.append((account, {account_from_url("/" + it["relative_url"]) for it in batch}))
+        return real(url, batch, access_token, account)
+
+    monkeypatch.setattr(meta_publish_execute, "_graph_batch", spy)
+    run = _run(tmp_path, plan_path, fake.base, "--batch-size", "50")
+
+    assert run["rc"] == 0 and run["counts"]["errors"] == 0
+    assert all(accounts == {account} for account, accounts in sent)
+    assert sorted(account for account, _ in sent) == ["act_123"] * 3 + ["act_456"] * 2
+    assert run["batch"]["http_calls"] == 5
+
+
+def test_batch_response_mapping_and_retry_rules() -> None:
+    items = [BatchItem(key=f"k{i}", relative_url="v22.0/act_1/ads", payload={"name": f"n{i}", "spec": {"a": 1}}) for i in range(3)]
+    assert items[0].to_request()["body"] == "name=n0&spec=%7B%22a%22%3A+1%7D"
+
+    parsed = parse_batch_response([{"code": 200, "body": '{"id": "1"}'}, {"code": 400, "body": '{"error": {"code": 100}}'}, None], 3)
+    assert parsed[0] == {"id": "1"} and parsed[2] is None
+    assert parsed[1] == {"error": {"code": 100}, "http_status": 400} and not is_retryable(parsed[1])
+    assert is_retryable({"error": {"code": 17}, "http_status": 400})
+    assert not is_retryable({"error": {"message": "internal"}, "http_status": 500})  # 5xx sin codigo: pudo crearse
+    assert is_retryable({"error": {"message": "tmp", "is_transient": True}, "http_status": 500})
+    whole = parse_batch_response({"error": "down", "http_status": None}, 2)
+    assert whole == [{"error": "down", "http_status": None, "outcome_unknown": True}] * 2 and not is_retryable(whole[0])
+    assert not is_retryable(parse_batch_response({"error": {"code": 2}, "http_status": 503}, 1)[0])
+    assert is_retryable(parse_batch_response({"error": {"code": 17}, "http_status": 400}, 1)[0])  # rechazado entero
+
+    calls: List[int] = []
+
+    def post(reqs: List[Dict[str, Any]]) -> Any:
+        calls.append(len(reqs))
+        return [None] * len(reqs)
+
+    out, stats = run_batches(items, post, batch_size=2, retry=RetryPolicy(2, 0.0, 0.0), sleep=lambda s: None)
+    assert calls == [2, 1, 2, 1]
+    assert out["k0"] == {"error": "batch item not processed", "http_status": None}
+    assert stats.http_calls == 4 and stats.retried == 3
+
+    # batch entero sin respuesta (timeout): no se re-postea ningun create
+    calls.clear()
+
+    def timeout(reqs: List[Dict[str, Any]]) -> Any:
+        calls.append(len(reqs))
+        return {"error": "timed out", "http_status": None}
+
+    out, stats = run_batches(items, timeout, batch_size=2, retry=RetryPolicy(3, 0.0, 0.0), sleep=lambda s: None)
+    assert calls == [2, 1] and stats.retried == 0
+    assert all(out[f"k{i}"]["outcome_unknown"] for i in range(3))
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import pytest
+
+from synapse import meta_publish_execute
+from synapse.meta_publish_diff import ACTION_CREATE, ACTION_SKIP, ACTION_UPDATE, PlanState, classify_step, field_digests
+from synapse.meta_publish_plan import build_plan
+
+EDGES = ("campaigns", "adsets", "advideos", "adcreatives", "ads")
+
+
+class _StatefulGraph:
+    """
+    Graph fake con objetos: POST /<act>/<edge> crea (id unico por llamada),
+    POST /<id> edita campos y responde {"success": true}.
+    """
+
+    def __init__(self, fail_names: tuple[str, ...] = ()) -> None:
+        self.fail_names = fail_names
+        self.objects: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.headers.get("Content-Type", "").startswith("multipart/"):
+                    fields = {"name": raw.split(b'name="name"\r\n\r\n', 1)[-1].split(b"\r\n", 1)[0].decode()}
+                else:
+                    fields = {k: v[0] for k, v in parse_qs(raw.decode()).items()}
+                fields.pop("access_token", None)
+                code, body = fake.handle(self.path.rsplit("/", 1)[-1], fields)
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, target: str, fields: Dict[str, str]) -> tuple[int, Dict[str, Any]]:
+        with self.lock:
+            if target in EDGES:
+                if fields.get("name") in self.fail_names:
+                    self.calls.append({"op": "fail", "target": target, "fields": fields})
+                    return 400, {"error": {"message": "boom", "code": 100}}
+                oid = f"{target[:3].upper()}{len(self.objects) + 1}"
+                self.objects[oid] = dict(fields)
+                self.calls.append({"op": "create", "target": target, "id": oid, "fields": fields})
+                return 200, {"id": oid}
+            if target in self.objects:
+                self.objects[target].update(fields)
+                self.calls.append({"op": "update", "target": target, "fields": fields})
+                return 200, {"success": True}
+            return 400, {"error": {"message": f"unknown object {target}", "code": 100}}
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def graph():
+    servers: List[_StatefulGraph] = []
+
+    def make(**kw: Any) -> _StatefulGraph:
+        servers.append(_StatefulGraph(**kw))
+        return servers[-1]
+
+    yield make
+    for s in servers:
+        s.close()
+
+
+def _write_plan(root: Path, copies: List[str]) -> Path:
+    tasks = []
+    for i, text in enumerate(copies):
+        utm = f"U{i}"
+        (root / "assets").mkdir(exist_ok=True)
+        video = root / "assets" / f"{utm}.mp4"
+        if not video.exists():
+            video.write_bytes(b"video-" + utm.encode())
+        tasks.append({
+            "utm_content": utm,
+            "naming": {"campaign": "CAMP", "adset": f"{utm}_AS"},
+            "copy": {"primary_text": text},
+            "assets": {"video_path": f"assets/{utm}.mp4"},
+        })
+    plan = build_plan({"tasks": tasks}, "v22.0", "123", "PAUSED", "OUTCOME_SALES", "IMPRESSIONS", "OFFSITE_CONVERSIONS", "")
+    path = root / "data" / "run" / "meta_publish_plan.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(plan), encoding="utf-8")
+    return path
+
+
+def _run(root: Path, plan: Path, base: str, *extra: str, budget: str = "500") -> Dict[str, Any]:
+    out = root / "run.json"
+    rc = meta_publish_execute.main([
+        "--plan", str(plan), "--mode", "simulate", "--graph-base", base,
+        "--out", str(out), "--out-dir", str(root / "runs"),
+        "--daily-budget", budget, "--targeting-json", '{"geo_locations": {"countries": ["CO"]}}',
+        "--promoted-object-json", '{"pixel_id": "<META_PIXEL_ID>"}',
+        "--page-id", "PAGE", "--ig-actor-id", "IG", "--pixel-id", "PX", *extra,
+    ])
+    run = json.loads(out.read_text(encoding="utf-8"))
+    run["rc"] = rc
+    return run
+
+
+def _statuses(run: Dict[str, Any]) -> Dict[str, str]:
+    return {r["key"]: r["status"] for r in run["results"]}
+
+
+def test_rerun_skips_unchanged_and_copy_edit_costs_two_calls(tmp_path: Path, graph) -> None:
+    fake = graph()
+    copies = [f"texto {i}" for i in range(4)]
+    plan = _write_plan(tmp_path, copies)
+
+    first = _run(tmp_path, plan, fake.base)
+    assert first["rc"] == 0 and first["diff"]["counts"] == {"create": 17, "update": 0, "skip": 0}
+    assert len(fake.calls) == 17
+
+    again = _run(tmp_path, plan, fake.base, "--batch-size", "50")
+    assert again["rc"] == 0 and again["diff"]["api_calls"] == 0 and len(fake.calls) == 17
+    assert set(_statuses(again).values()) == {"SKIPPED"} and again["id_map"] == first["id_map"]
+
+    copies[2] = "texto nuevo"
+    plan = _write_plan(tmp_path, copies)
+    edited = _run(tmp_path, plan, fake.base)
+    new_calls = fake.calls[17:]
+    assert edited["rc"] == 0 and edited["diff"]["counts"] == {"create": 1, "update": 1, "skip": 15}
+    assert [(c["op"], c["target"]) for c in new_calls] == [("create", "adcreatives"), ("update", first["id_map"]["meta:ad:U2"])]
+    assert json.loads(new_calls[1]["fields"]["creative"]) == {"creative_id": edited["id_map"]["meta:creative:U2"]}
+    assert set(new_calls[1]["fields"]) == {"creative"}  # solo el campo que cambio
+    assert _statuses(edited)["meta:ad:U2"] == "UPDATED" and edited["id_map"]["meta:ad:U2"] == first["id_map"]["meta:ad:U2"]
+    assert edited["id_map"]["meta:creative:U2"] != first["id_map"]["meta:creative:U2"]
+
+    budget = _run(tmp_path, plan, fake.base, budget="700")
+    assert budget["diff"]["counts"] == {"create": 0, "update": 4, "skip": 13}
+    assert {c["target"] for c in fake.calls[19:]} == {budget["id_map"][f"meta:adset:U{i}"] for i in range(4)}
+    assert all(set(c["fields"]) == {"daily_budget"} for c in fake.calls[19:])
+
+
+def test_partial_failure_resumes_only_what_is_missing(tmp_path: Path, graph) -> None:
+    plan = _write_plan(tmp_path, ["a", "b", "c"])
+    flaky = graph(fail_names=("U1_CREATIVE",))
+    first = _run(tmp_path, plan, flaky.base, "--continue-on-error")
+    assert first["rc"] == 2 and [e["key"] for e in first["errors"]] == ["meta:creative:U1", "meta:ad:U1"]
+
+    # mismo Graph (mismo scope), ya sin falla: solo el creative y el ad de U1
+    flaky.fail_names = ()
+    second = _run(tmp_path, plan, flaky.base)
+    assert second["rc"] == 0 and second["diff"]["counts"] == {"create": 2, "update": 0, "skip": 11}
+    assert [c["target"] for c in flaky.calls if c["op"] == "create"][-2:] == ["adcreatives", "ads"]
+
+    full = _run(tmp_path, plan, flaky.base, "--full")
+    assert full["diff"]["counts"]["create"] == 13 and full["diff"]["full"] is True
+
+    other = graph()  # otro graph base = otro scope: nada se reutiliza
+    assert _run(tmp_path, plan, other.base)["diff"]["counts"]["create"] == 13
+
+
+def test_classify_step_rules(tmp_path: Path) -> None:
+    fields = field_digests({"name": "A", "campaign_id": "1", "daily_budget": 500})
+    prev: Optional[Dict[str, Any]] = {"id": "X1", "op": "create_adset", "endpoint": "/act_1/adsets", "fields": fields}
+    assert classify_step("k", "create_adset", "/act_1/adsets", fields, None).action == ACTION_CREATE
+    assert classify_step("k", "create_adset", "/act_1/adsets", fields, prev).action == ACTION_SKIP
+
+    budget = field_digests({"name": "A", "campaign_id": "1", "daily_budget": 900})
+    d = classify_step("k", "create_adset", "/act_1/adsets", budget, prev)
+    assert (d.action, d.prev_id, d.changed) == (ACTION_UPDATE, "X1", ["daily_budget"])
+
+    moved = field_digests({"name": "A", "campaign_id": "2", "daily_budget": 500})
+    assert classify_step("k", "create_adset", "/act_1/adsets", moved, prev).reason == "immutable fields changed: ['campaign_id']"
+    assert classify_step("k", "create_adset", "/act_2/adsets", fields, prev).action == ACTION_CREATE
+    creative = dict(prev, op="create_creative")
+    assert classify_step("k", "create_creative", "/act_1/adsets", budget, creative).action == ACTION_CREATE
+
+    state_path = tmp_path / "state.json"
+    st = PlanState.load(state_path, "live|g")
+    st.record("k", created_id="X1", op="create_adset", endpoint="/act_1/adsets", fields=fields, run="r", ts="t")
+    st.save()
+    assert PlanState.load(state_path, "live|g").get("k")["id"] == "X1"
+    assert PlanState.load(state_path, "simulate|g").get("k") is None
+    state_path.write_text("{broken", encoding="utf-8")
+    assert PlanState.load(state_path, "live|g").steps == {}
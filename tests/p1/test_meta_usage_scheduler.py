@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from synapse import meta_publish_execute, meta_usage_scheduler
+from synapse.meta_publish_plan import build_plan
+from synapse.meta_usage_scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_CRITICAL,
+    PRIORITY_NORMAL,
+    ThrottledError,
+    UsageScheduler,
+    account_from_url,
+    classify_op,
+    parse_usage_headers,
+)
+
+
+def _headers(app: float = 0, acc: float = 0, buc: float = 0, regain_min: float = 0) -> Dict[str, str]:
+    return {
+        "X-App-Usage": json.dumps({"call_count": app, "total_time": app / 2, "total_cputime": 1}),
+        "x-ad-account-usage": json.dumps({"acc_id_util_pct": acc, "reset_time_duration": 0}),
+        "X-Business-Use-Case-Usage": json.dumps({"555": [{"type": "ads_management", "call_count": buc, "total_time": 3, "estimated_time_to_regain_access": regain_min}]}),
+    }
+
+
+def test_parse_headers_and_classification() -> None:
+    readings = parse_usage_headers(_headers(app=28, acc=9.5, buc=40, regain_min=2), "act_7")
+    assert [(r.scope, r.pct, r.regain_s) for r in readings] == [("app", 28.0, 0.0), ("act_7", 9.5, 0.0), ("act_7", 40.0, 120.0)]
+    assert parse_usage_headers({"Content-Type": "application/json"}) == []
+    assert parse_usage_headers({"X-App-Usage": "not json"}) == []
+
+    assert account_from_url("https://graph.example/v22.0/act_123/adsets") == "act_123"
+    assert account_from_url("http://127.0.0.1:1/") == ""
+    assert classify_op("pause_campaign") == classify_op("update_budget") == PRIORITY_CRITICAL
+    assert classify_op("upload_video") == PRIORITY_BULK and classify_op("create_ad") == PRIORITY_NORMAL
+
+
+def test_paces_before_the_limit_and_critical_skips_pacing() -> None:
+    sched = UsageScheduler(max_pace_s=0.2)
+    sched.observe(_headers(acc=85), "act_1")  # NORMAL: pacing a mitad de rango => 0.1s entre llamadas
+
+    assert sched.delay_for("act_1", PRIORITY_BULK)[1] == "paused"  # BULK ya pausa al 85%
+    t0 = time.monotonic()
+    for _ in range(3):
+        sched.acquire("act_1", PRIORITY_NORMAL)
+    assert time.monotonic() - t0 >= 0.18
+
+    t1 = time.monotonic()
+    for _ in range(3):
+        sched.acquire("act_1", PRIORITY_CRITICAL)
+    assert time.monotonic() - t1 < 0.05
+    assert sched.acquire("act_2", PRIORITY_NORMAL) == 0.0  # otra cuenta no se frena
+    snap = sched.snapshot()
+    assert snap["scopes"]["act_1"]["pct"] == 85.0 and snap["paced"] == 2 and snap["dispatched"] == 7
+
+
+def test_account_reset_time_only_blocks_at_full_utilisation() -> None:
+    low = {"x-ad-account-usage": json.dumps({"acc_id_util_pct": 1.6, "reset_time_duration": 180})}
+    full = {"x-ad-account-usage": json.dumps({"acc_id_util_pct": 100, "reset_time_duration": 180})}
+    assert [(r.pct, r.regain_s) for r in parse_usage_headers(low, "act_1")] == [(1.6, 0.0)]
+    assert [(r.pct, r.regain_s) for r in parse_usage_headers(full, "act_1")] == [(100.0, 180.0)]
+
+    now = [1000.0]
+    sched = UsageScheduler(clock=lambda: now[0])
+    sched.observe(low, "act_1")
+    for prio in (PRIORITY_CRITICAL, PRIORITY_NORMAL, PRIORITY_BULK):
+        assert sched.delay_for("act_1", prio)[0] == 0.0
+    sched.observe(full, "act_1")
+    assert sched.delay_for("act_1", PRIORITY_CRITICAL) == (180.0, "paused")
+
+
+def test_throttle_blocks_everyone_and_critical_goes_first() -> None:
+    sched = UsageScheduler(cool_down_s=0.2)
+    assert sched.observe_error({"error": {"code": 17, "message": "User request limit reached"}}, "act_1")
+    assert not sched.observe_error({"code": 100}, "act_1")
+
+    order: List[str] = []
+    lock = threading.Lock()
+
+    def run(name: str, prio: int) -> None:
+        sched.acquire("act_1", prio)
+        with lock:
+            order.append(name)
+
+    threads = [threading.Thread(target=run, args=("bulk", PRIORITY_BULK)), threading.Thread(target=run, args=("normal", PRIORITY_NORMAL))]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    crit = threading.Thread(target=run, args=("critical", PRIORITY_CRITICAL))
+    crit.start()
+    for t in threads + [crit]:
+        t.join(timeout=5)
+
+    assert order[0] == "critical" and sorted(order) == ["bulk", "critical", "normal"]
+    assert sched.snapshot()["throttle_errors"] == 1 and sched.snapshot()["paused"] == 3
+
+    # regain reportado por BUC mas largo que max_wait: falla sin despachar (ni esperar de gusto)
+    sched2 = UsageScheduler()
+    sched2.observe(_headers(buc=100, regain_min=30), "act_9")
+    t0 = time.monotonic()
+    with pytest.raises(ThrottledError, match="throttled on act_9 until") as ex:
+        sched2.acquire("act_9", PRIORITY_CRITICAL, max_wait_s=0.1)
+    assert time.monotonic() - t0 < 0.05 and ex.value.remaining_s > 1700
+    assert sched2.snapshot()["dispatched"] == 0 and sched2.snapshot()["throttled"] == 1
+
+    # la pausa preventiva (pause_at) si se corta en max_wait y despacha
+    sched3 = UsageScheduler(cool_down_s=60.0)
+    sched3.observe(_headers(acc=99), "act_3")
+    t1 = time.monotonic()
+    sched3.acquire("act_3", PRIORITY_NORMAL, max_wait_s=0.1)
+    assert 0.09 <= time.monotonic() - t1 < 1.0 and sched3.snapshot()["dispatched"] == 1
+
+
+class _UsageGraph:
+    """Graph fake que reporta uso alto de la cuenta en cada respuesta."""
+
+    def __init__(self, acc_pct: float) -> None:
+        self.times: List[float] = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fake.times.append(time.monotonic())
+                data = json.dumps({"id": f"ID{len(fake.times)}"}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in _headers(app=10, acc=acc_pct).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def usage_graph():
+    fake = _UsageGraph(acc_pct=90)
+    yield fake
+    fake.close()
+
+
+def test_executor_observes_usage_headers_and_paces(tmp_path: Path, usage_graph: _UsageGraph, monkeypatch) -> None:
+    monkeypatch.setattr(meta_usage_scheduler, "_shared", UsageScheduler(max_pace_s=0.08))
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "U0.mp4").write_bytes(b"video")
+    tasks = [{"utm_content": "U0", "naming": {"campaign": "CAMP", "adset": "U0_AS"}, "copy": {"primary_text": "t"}, "assets": {"video_path": "assets/U0.mp4"}}]
+    plan = build_plan({"tasks": tasks}, "v22.0", "123", "PAUSED", "OUTCOME_SALES", "IMPRESSIONS", "OFFSITE_CONVERSIONS", "")
+    plan_path = tmp_path / "data" / "run" / "meta_publish_plan.json"
+    plan_path.parent.mkdir(parents=True)
+    plan_path.write_text(json.dumps(plan), encoding="utf-8")
+
+    out = tmp_path / "run.json"
+    rc = meta_publish_execute.main([
+        "--plan", str(plan_path), "--mode", "simulate", "--graph-base", usage_graph.base,
+        "--out", str(out), "--out-dir", str(tmp_path / "runs"), "--workers", "1",
+        "--daily-budget", "500", "--targeting-json", '{"geo_locations": {"countries": ["CO"]}}',
+        "--promoted-object-json", '{"pixel_id": "<META_PIXEL_ID>"}',
+        "--page-id", "PAGE", "--ig-actor-id", "IG", "--pixel-id", "PX",
+    ])
+    run = json.loads(out.read_text(encoding="utf-8"))
+
+    assert rc == 0 and run["counts"]["errors"] == 0
+    usage = run["usage"]
+    assert usage["scopes"]["act_123"]["pct"] == 90.0 and usage["scopes"]["app"]["pct"] == 10.0
+    assert usage["dispatched"] == 5 and usage["paced"] >= 3  # create_* pacean; upload (BULK) pausa al 90%
+    gaps = [b - a for a, b in zip(usage_graph.times, usage_graph.times[1:])]
+    assert min(gaps) >= 0.05
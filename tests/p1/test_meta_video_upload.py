@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import parse_qs
+
+import pytest
+
+from synapse import meta_publish_execute
+from synapse.infra.file_fingerprint import compute_file_fingerprints_from_steps
+from synapse.infra.retry_policy import RetryPolicy
+from synapse.meta_publish_plan import build_plan
+from synapse.meta_video_upload import load_session, upload_resumable
+
+CHUNK = 1000
+
+
+def _parse_multipart(raw: bytes, ctype: str) -> Dict[str, bytes]:
+    boundary = ctype.split("boundary=", 1)[1].encode()
+    out: Dict[str, bytes] = {}
+    for part in raw.split(b"--" + boundary)[1:-1]:
+        head, _, content = part.strip(b"\r\n").partition(b"\r\n\r\n")
+        name = head.split(b'name="', 1)[1].split(b'"', 1)[0].decode()
+        out[name] = content
+    return out
+
+
+class _FakeResumableGraph:
+    """
+    advideos con upload_phase start/transfer/finish (chunks de CHUNK bytes);
+    el resto de edges responde id = "<edge>:<name>".
+    `fail_at` = offset -> veces que el transfer responde 500.
+    `fail_start` / `fail_finish` = veces que start / finish responden 500 despues
+    de procesar el request (el server lo recibio, la respuesta se pierde).
+    """
+
+    def __init__(self) -> None:
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.finished: Dict[str, bytes] = {}
+        self.calls: List[Tuple[str, Any]] = []
+        self.fail_at: Dict[int, int] = {}
+        self.fail_start = 0
+        self.fail_finish = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a: Any) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                ctype = self.headers.get("Content-Type", "")
+                if ctype.startswith("multipart/"):
+                    parts = _parse_multipart(raw, ctype)
+                    fields = {k: v.decode("utf-8", "replace") for k, v in parts.items() if k != "video_file_chunk"}
+                    fields["_chunk"] = parts.get("video_file_chunk", b"")
+                else:
+                    fields = {k: v[0] for k, v in parse_qs(raw.decode()).items()}
+                with fake.lock:
+                    code, body = fake.handle(self.path.rsplit("/", 1)[-1], fields)
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def handle(self, edge: str, f: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        phase = f.get("upload_phase")
+        if edge != "advideos" or not phase:
+            return 200, {"id": f"{edge}:{f.get('name', '')}"}
+        if phase == "start":
+            n = len(self.sessions) + 1
+            size = int(f["file_size"])
+            sid = f"S{n}"
+            self.sessions[sid] = {"size": size, "data": bytearray(), "video_id": f"VID{n}"}
+            self.calls.append(("start", size))
+            if self.fail_start > 0:
+                self.fail_start -= 1
+                return 500, {"error": {"message": "tmp"}}
+            return 200, {"upload_session_id": sid, "video_id": f"VID{n}", "start_offset": "0", "end_offset": str(min(CHUNK, size))}
+        sess = self.sessions.get(f.get("upload_session_id", ""))
+        if sess is None:
+            return 400, {"error": {"message": "invalid upload session", "code": 6001}}
+        if phase == "transfer":
+            start = int(f["start_offset"])
+            self.calls.append(("transfer", start))
+            if self.fail_at.get(start, 0) > 0:
+                self.fail_at[start] -= 1
+                return 500, {"error": {"message": "tmp", "is_transient": True}}
+            assert start == len(sess["data"])
+            sess["data"] += f["_chunk"]
+            nxt = len(sess["data"])
+            return 200, {"start_offset": str(nxt), "end_offset": str(min(nxt + CHUNK, sess["size"]))}
+        self.calls.append(("finish", f.get("title")))
+        if sess["video_id"] in self.finished:
+            return 400, {"error": {"message": "upload session already finished", "code": 6001}}
+        self.finished[sess["video_id"]] = bytes(sess["data"])
+        if self.fail_finish > 0:
+            self.fail_finish -= 1
+            return 500, {"error": {"message": "tmp"}}
+        return 200, {"success": True}
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture()
+def fake():
+    srv = _FakeResumableGraph()
+    yield srv
+    srv.close()
+
+
+def _video(path: Path, size: int) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(bytes(i % 251 for i in range(size)))
+    return path
+
+
+def _upload(fake: _FakeResumableGraph, video: Path, state_dir: Path, expected: Dict[str, Any] | None = None) -> Dict[str, Any]:
+    url = f"{fake.base}/v22.0/act_1/advideos"
+    return upload_resumable(
+        url,
+        video,
+        post_form=lambda data: meta_publish_execute._http_post(url, data, "SIMULATE"),
+        post_chunk=lambda fields, name, chunk: meta_publish_execute._http_post_file_bytes(url, fields, "video_file_chunk", name, chunk, "SIMULATE"),
+        state_dir=state_dir,
+        expected=expected,
+        title="U0",
+        retry=RetryPolicy(max_attempts=2, base_delay_s=0.0, max_delay_s=0.0),
+        sleep=lambda s: None,
+    )
+
+
+def test_executor_uploads_large_video_through_resumable_session(tmp_path: Path, fake: _FakeResumableGraph) -> None:
+    video = _video(tmp_path / "assets" / "U0.mp4", 5500)
+    tasks = [{
+        "utm_content": "U0",
+        "naming": {"campaign": "CAMP", "adset": "U0_AS"},
+        "copy": {"primary_text": "texto"},
+        "assets": {"video_path": "assets/U0.mp4"},
+    }]
+    plan = build_plan({"tasks": tasks}, "v22.0", "123", "PAUSED", "OUTCOME_SALES", "IMPRESSIONS", "OFFSITE_CONVERSIONS", "")
+    plan_path = tmp_path / "data" / "run" / "meta_publish_plan.json"
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    plan_path.write_text(json.dumps(plan), encoding="utf-8")
+
+    out = tmp_path / "run.json"
+    rc = meta_publish_execute.main([
+        "--plan", str(plan_path), "--mode", "simulate", "--graph-base", fake.base,
+        "--out", str(out), "--out-dir", str(tmp_path / "runs"), "--resumable-min-mb", "0",
+        "--daily-budget", "500", "--targeting-json", '{"geo_locations": {"countries": ["CO"]}}',
+        "--promoted-object-json", '{"pixel_id": "<META_PIXEL_ID>"}',
+        "--page-id", "PAGE", "--ig-actor-id", "IG", "--pixel-id", "PX",
+    ])
+    run = json.loads(out.read_text(encoding="utf-8"))
+
+    assert rc == 0 and run["status"] == "OK"
+    assert fake.finished == {"VID1": video.read_bytes()}
+    assert [c for c in fake.calls if c[0] != "transfer"] == [("start", 5500), ("finish", "U0")]
+    assert [c[1] for c in fake.calls if c[0] == "transfer"] == [0, 1000, 2000, 3000, 4000, 5000]
+    by_key = {r["key"]: r for r in run["results"]}
+    assert by_key["meta:video:U0"]["created_id"] == "VID1"
+    assert by_key["meta:video:U0"]["response"]["upload"]["chunks"] == 6
+    assert run["id_map"]["meta:creative:U0"] == "adcreatives:U0_CREATIVE"
+    assert not list((tmp_path / "data" / "run" / "meta_upload_sessions").glob("*.json"))
+
+
+def test_interrupted_upload_resumes_from_last_confirmed_offset(tmp_path: Path, fake: _FakeResumableGraph) -> None:
+    video = _video(tmp_path / "v.mp4", 4200)
+    state_dir = tmp_path / "state"
+    fake.fail_at = {3000: 2}  # agota los reintentos del chunk
+
+    first = _upload(fake, video, state_dir)
+    assert first["http_status"] == 500
+    [state] = list(state_dir.glob("*.json"))
+    sess = load_session(state)
+    assert sess is not None and sess.start_offset == 3000 and sess.chunks == 3
+
+    fake.calls.clear()
+    second = _upload(fake, video, state_dir)
+    assert second["id"] == "VID1"
+    assert second["upload"]["resumed_from"] == 3000 and second["upload"]["bytes_sent"] == 1200
+    assert fake.calls == [("transfer", 3000), ("transfer", 4000), ("finish", "U0")]  # sin start ni retransmitir
+    assert fake.finished["VID1"] == video.read_bytes()
+    assert not state.exists()
+
+
+def test_expired_session_restarts_and_changed_file_is_rejected(tmp_path: Path, fake: _FakeResumableGraph) -> None:
+    video = _video(tmp_path / "v.mp4", 2500)
+    state_dir = tmp_path / "state"
+    fake.fail_at = {1000: 2}
+    _upload(fake, video, state_dir)
+    fake.sessions.clear()  # Graph ya no reconoce la sesion guardada
+
+    res = _upload(fake, video, state_dir)
+    assert res["id"] == "VID1" and res["upload"]["resumed_from"] is None
+    assert [c for c in fake.calls if c[0] == "start"] == [("start", 2500), ("start", 2500)]
+    assert fake.finished["VID1"] == video.read_bytes()
+
+    fps = compute_file_fingerprints_from_steps([{"payload": {"source": f"<FILE:{video}>"}}], cwd=tmp_path)
+    expected = fps["entries"][str(video.resolve())]
+    video.write_bytes(b"otro contenido" * 10)
+    os.utime(video, ns=(expected["mtime_ns"] + 10**9, expected["mtime_ns"] + 10**9))
+    fake.calls.clear()
+
+    res = _upload(fake, video, state_dir, expected=expected)
+    assert "file changed since run fingerprint" in res["error"] and fake.calls == []
+
+
+def test_start_and_finish_are_not_replayed_on_network_or_5xx(tmp_path: Path, fake: _FakeResumableGraph) -> None:
+    video = _video(tmp_path / "v.mp4", 1500)
+    state_dir = tmp_path / "state"
+
+    fake.fail_start = 1  # Graph abrio la sesion pero la respuesta fue 500: no se abre otra
+    res = _upload(fake, video, state_dir)
+    assert res["http_status"] == 500 and fake.calls == [("start", 1500)] and len(fake.sessions) == 1
+
+    fake.calls.clear()
+    fake.sessions.clear()
+    fake.fail_finish = 1  # finish procesado, respuesta perdida
+    res = _upload(fake, video, state_dir)
+    assert res["http_status"] == 500 and [c for c in fake.calls if c[0] == "finish"] == [("finish", "U0")]
+    [state] = list(state_dir.glob("*.json"))
+    sess = load_session(state)
+    assert sess is not None and sess.finish_sent and sess.video_id == "VID1"
+
+    # el proximo run repite finish; Graph dice que ya cerro: se toma el video_id guardado
+    res = _upload(fake, video, state_dir)
+    assert res["id"] == "VID1" and res["upload"]["finish"] == "already_closed"
+    assert fake.finished["VID1"] == video.read_bytes() and not state.exists()
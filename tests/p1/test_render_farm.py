@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from synapse import creative_assets_build
+from synapse.render_farm import OUT_PLACEHOLDER, RenderSpec, render_batch
+
+# "renderer" falso: copia el input al output y deja traza de cada invocacion
+_RENDER = (
+    "import sys, pathlib; inp, out, log = sys.argv[1:4]; "
+    "pathlib.Path(log).open('a').write(inp + '\\n'); "
+    "pathlib.Path(out).write_bytes(b'MP4:' + pathlib.Path(inp).read_bytes())"
+)
+
+
+def _spec(tmp: Path, name: str, *, fallback: bool = False, cmd: tuple[str, ...] | None = None) -> RenderSpec:
+    inp = tmp / "in" / f"{name}.txt"
+    log = tmp / "calls.log"
+    good = (sys.executable, "-c", _RENDER, str(inp), OUT_PLACEHOLDER, str(log))
+    return RenderSpec(
+        job_id=name,
+        cmd=cmd or good,
+        fallback_cmds=(good,) if fallback else (),
+        out_path=str(tmp / "out" / f"{name}.mp4"),
+        inputs=(str(inp),),
+    )
+
+
+def _calls(tmp: Path) -> int:
+    log = tmp / "calls.log"
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def test_unchanged_specs_rerender_from_cache(tmp_path: Path) -> None:
+    (tmp_path / "in").mkdir()
+    for i in range(6):
+        (tmp_path / "in" / f"v{i}.txt").write_text(f"texto {i}", encoding="utf-8")
+    specs = [_spec(tmp_path, f"v{i}") for i in range(6)]
+    cache = tmp_path / "cache"
+
+    res1, summary1 = render_batch(specs, cache_dir=cache, workers=4, manifest_path=tmp_path / "farm.json")
+    assert [r.status for r in res1] == ["RENDERED"] * 6
+    assert _calls(tmp_path) == 6
+    assert (tmp_path / "out" / "v3.mp4").read_bytes() == b"MP4:texto 3"
+    assert json.loads((tmp_path / "farm.json").read_text())["counts"]["rendered"] == 6
+
+    # otro out dir, mismo spec: sin subprocess
+    (tmp_path / "out" / "v0.mp4").unlink()
+    (tmp_path / "in" / "v5.txt").write_text("texto 5 corregido", encoding="utf-8")
+    res2, summary2 = render_batch(specs, cache_dir=cache, workers=4)
+    assert [r.status for r in res2] == ["CACHED"] * 5 + ["RENDERED"]
+    assert _calls(tmp_path) == 7
+    assert (tmp_path / "out" / "v0.mp4").read_bytes() == b"MP4:texto 0"
+    assert summary2["counts"]["cached"] == 5
+
+
+def test_fallback_timeout_and_failure(tmp_path: Path) -> None:
+    (tmp_path / "in").mkdir()
+    for name in ("fb", "slow", "bad"):
+        (tmp_path / "in" / f"{name}.txt").write_text(name, encoding="utf-8")
+    failing = (sys.executable, "-c", "import sys; sys.exit(3)")
+    sleeping = (sys.executable, "-c", "import time; time.sleep(30)")
+    specs = [
+        _spec(tmp_path, "fb", cmd=failing, fallback=True),
+        RenderSpec(**{**_spec(tmp_path, "slow", cmd=sleeping).__dict__, "timeout_s": 0.5}),
+        _spec(tmp_path, "bad", cmd=failing),
+    ]
+    res, summary = render_batch(specs, cache_dir=tmp_path / "cache", workers=3)
+    assert [r.status for r in res] == ["RENDERED", "TIMEOUT", "FAILED"]
+    assert res[0].attempt == 1 and "rc=3" in res[0].errors[0]
+    assert not Path(res[1].out_path).exists()
+    assert summary["counts"] == {"jobs": 3, "rendered": 1, "cached": 0, "failed": 1, "timeout": 1}
+
+
+def test_creative_assets_build_uses_farm(tmp_path: Path, monkeypatch) -> None:
+    fake = tmp_path / "ffmpeg"
+    fake.write_text(
+        f"#!{sys.executable}\n"
+        "import sys, pathlib\n"
+        "pathlib.Path(sys.argv[-1]).write_bytes(b'fake-mp4:' + ' '.join(sys.argv[1:-1]).encode())\n",
+        encoding="utf-8",
+    )
+    fake.chmod(0o755)
+    monkeypatch.setattr(creative_assets_build, "_find_ffmpeg", lambda: str(fake))
+    monkeypatch.setattr(creative_assets_build, "_default_fontfile", lambda: None)
+    monkeypatch.chdir(tmp_path)
+
+    tasks = tmp_path / "tasks.json"
+    tasks.write_text(json.dumps({"tasks": [{"utm_content": f"U{i}", "copy": {"primary_text": f"p{i}"}} for i in range(3)]}))
+    argv = [
+        "--briefs", str(tmp_path / "none.json"), "--tasks", str(tasks),
+        "--assets-dir", str(tmp_path / "assets"), "--manifest", str(tmp_path / "m.json"),
+        "--cache-dir", str(tmp_path / "cache"), "--workers", "2",
+    ]
+    assert creative_assets_build.main(argv) == 0
+    m1 = json.loads((tmp_path / "m.json").read_text())
+    assert m1["counts"]["built"] == 3 and m1["render_farm"]["counts"]["rendered"] == 3
+
+    assert creative_assets_build.main([*argv, "--force"]) == 0
+    m2 = json.loads((tmp_path / "m.json").read_text())
+    assert m2["render_farm"]["counts"]["cached"] == 3
+    assert all(a["cached"] and a["mode"] == "drawtext" for a in m2["assets"])
+    assert [a["sha256"] for a in m2["assets"]] == [a["sha256"] for a in m1["assets"]]
+
+
+def test_creative_assets_build_reports_failed_and_timed_out_renders(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(creative_assets_build, "_default_fontfile", lambda: None)
+    monkeypatch.chdir(tmp_path)
+    tasks = tmp_path / "tasks.json"
+    tasks.write_text(json.dumps({"tasks": [{"utm_content": "U0", "copy": {"primary_text": "p0"}}]}))
+    argv = [
+        "--briefs", str(tmp_path / "none.json"), "--tasks", str(tasks),
+        "--assets-dir", str(tmp_path / "assets"), "--manifest", str(tmp_path / "m.json"),
+        "--cache-dir", str(tmp_path / "cache"), "--timeout", "0.5", "--force",
+    ]
+
+    for body, mode in (("sys.stderr.write('boom'); sys.exit(1)", "failed"), ("import time; time.sleep(30)", "timeout")):
+        fake = tmp_path / f"ffmpeg_{mode}"
+        fake.write_text(f"#!{sys.executable}\nimport sys\n{body}\n", encoding="utf-8")
+        fake.chmod(0o755)
+        monkeypatch.setattr(creative_assets_build, "_find_ffmpeg", lambda fake=fake: str(fake))
+
+        assert creative_assets_build.main(argv) == 2
+        m = json.loads((tmp_path / "m.json").read_text())
+        assert m["counts"] == {"items": 1, "built": 0, "skipped": 0, "failed": 1}
+        item = m["assets"][0]
+        assert (item["status"], item["mode"]) == ("FAIL", mode)
+        assert item["error"].count("attempt=") == 2  # drawtext + fallback en blanco
+        assert not (tmp_path / "assets" / "U0.mp4").exists()